@@ -0,0 +1,417 @@
+#!/usr/bin/env python
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark which measures how fast drivers turn provider responses into model
+objects (list_nodes, list_images, list_sizes, list_container_objects,
+list_records).
+
+Responses are replayed from the test fixtures using the MockHttp classes of
+the test suite so no network access is needed. Fixtures are scaled up
+synthetically by repeating the items in them.
+
+Usage:
+
+    python contrib/benchmark_drivers.py [--items 10000] [--filter ec2]
+                                        [--update-baselines] [--check]
+
+Results are compared with the baselines stored in
+contrib/benchmark_baselines.json (time and memory per 1000 items).
+"""
+
+from __future__ import with_statement
+
+import os
+import sys
+import gc
+import copy
+import time
+import math
+import argparse
+
+from xml.etree import ElementTree as ET
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+this_dir = os.path.abspath(os.path.split(__file__)[0])
+sys.path.insert(0, os.path.join(this_dir, '../'))
+
+from libcloud.utils.py3 import PY3
+from libcloud.storage.base import Container
+from libcloud.dns.base import Zone
+
+BASELINES_PATH = os.path.join(this_dir, 'benchmark_baselines.json')
+
+DEFAULT_ITEMS = 10000
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.5  # allowed slowdown compared to the baseline (50%)
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _repeat(items, size):
+    """
+    Return a list of ``size`` items created by cycling over ``items``.
+    """
+    if not items:
+        return items
+
+    return [copy.deepcopy(items[index % len(items)])
+            for index in range(size)]
+
+
+def scale_xml(parent, child=None):
+    """
+    Return a function which scales an XML document by repeating the children
+    (optionally only the ones with the ``child`` tag) of the first element
+    with the ``parent`` tag.
+    """
+    def scale(body, items):
+        root = ET.fromstring(body)
+        element = root
+
+        if parent is not None:
+            element = [e for e in root.iter() if
+                       _local_name(e.tag) == parent][0]
+
+        children = [e for e in list(element) if
+                    child is None or _local_name(e.tag) == child]
+
+        for item in children:
+            element.remove(item)
+
+        for item in _repeat(children, items):
+            element.append(item)
+
+        body = ET.tostring(root)
+        return body.decode('utf-8') if PY3 else body
+
+    return scale
+
+
+def scale_json(key, aggregated=False):
+    """
+    Return a function which scales a JSON document by repeating the items in
+    the ``items`` list (or in the ``key`` lists of an aggregated list
+    response).
+    """
+    def scale(body, items):
+        data = json.loads(body)
+
+        if not aggregated:
+            data[key] = _repeat(data[key], items)
+            return json.dumps(data)
+
+        scopes = [scope for scope in data['items'].values() if key in scope]
+        per_scope = int(math.ceil(float(items) / len(scopes)))
+
+        for scope in scopes:
+            scope[key] = _repeat(scope[key], per_scope)
+
+        return json.dumps(data)
+
+    return scale
+
+
+class ScaledFixtures(object):
+    """
+    Fixtures loader which scales some of the fixtures up.
+    """
+
+    def __init__(self, fixtures, scalers, items):
+        self.fixtures = fixtures
+        self.scalers = scalers
+        self.items = items
+        self._cache = {}
+
+    def load(self, file):
+        if file not in self.scalers:
+            return self.fixtures.load(file)
+
+        if file not in self._cache:
+            body = self.fixtures.load(file)
+            self._cache[file] = self.scalers[file](body, self.items)
+
+        return self._cache[file]
+
+
+class Benchmark(object):
+    def __init__(self, name, setup, run, scalers):
+        """
+        :param setup: Function which receives a mock HTTP class factory and
+                      returns a driver instance.
+
+        :param run: Function which receives the driver and returns the list
+                    of objects.
+
+        :param scalers: Mapping of fixture file name to scaling function.
+        """
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.scalers = scalers
+
+    def prepare(self, items):
+        def scaled(mock_cls):
+            fixtures = ScaledFixtures(mock_cls.fixtures, self.scalers, items)
+            return type('Scaled%s' % (mock_cls.__name__), (mock_cls,),
+                        {'fixtures': fixtures})
+
+        return self.setup(scaled)
+
+
+def setup_ec2(scaled):
+    from libcloud.compute.drivers.ec2 import EC2NodeDriver
+    from libcloud.test.compute.test_ec2 import EC2MockHttp
+    from libcloud.test.secrets import EC2_PARAMS
+
+    mock_cls = scaled(EC2MockHttp)
+    mock_cls.use_param = 'Action'
+    mock_cls.type = None
+    EC2NodeDriver.connectionCls.conn_classes = (None, mock_cls)
+    return EC2NodeDriver(*EC2_PARAMS, **{'region': 'us-east-1'})
+
+
+def setup_gce(scaled):
+    from libcloud.compute.drivers.gce import GCENodeDriver
+    from libcloud.common.google import GoogleBaseAuthConnection
+    from libcloud.test.common.test_google import GoogleAuthMockHttp
+    from libcloud.test.common.test_google import GoogleTestCase
+    from libcloud.test.compute.test_gce import GCEMockHttp
+    from libcloud.test.secrets import GCE_PARAMS, GCE_KEYWORD_PARAMS
+
+    # Start the patchers which make the authentication hermetic
+    if not getattr(GoogleTestCase, '_benchmark_patched', False):
+        GoogleTestCase.setUpClass()
+        GoogleTestCase._benchmark_patched = True
+
+    mock_cls = scaled(GCEMockHttp)
+    mock_cls.type = None
+    GCENodeDriver.connectionCls.conn_classes = (mock_cls, mock_cls)
+    GoogleBaseAuthConnection.conn_classes = (GoogleAuthMockHttp,
+                                             GoogleAuthMockHttp)
+
+    kwargs = GCE_KEYWORD_PARAMS.copy()
+    kwargs['auth_type'] = 'IA'
+    kwargs['datacenter'] = 'us-central1-a'
+    return GCENodeDriver(*GCE_PARAMS, **kwargs)
+
+
+def setup_s3(scaled):
+    from libcloud.storage.drivers.s3 import S3StorageDriver
+    from libcloud.test.storage.test_s3 import S3MockHttp, S3MockRawResponse
+    from libcloud.test.secrets import STORAGE_S3_PARAMS
+
+    mock_cls = scaled(S3MockHttp)
+    mock_cls.type = None
+    S3StorageDriver.connectionCls.conn_classes = (None, mock_cls)
+    S3StorageDriver.connectionCls.rawResponseCls = S3MockRawResponse
+    return S3StorageDriver(*STORAGE_S3_PARAMS)
+
+
+def setup_route53(scaled):
+    from libcloud.dns.drivers.route53 import Route53DNSDriver
+    from libcloud.test.dns.test_route53 import Route53MockHttp
+    from libcloud.test.secrets import DNS_PARAMS_ROUTE53
+
+    mock_cls = scaled(Route53MockHttp)
+    mock_cls.type = None
+    Route53DNSDriver.connectionCls.conn_classes = (mock_cls, mock_cls)
+    return Route53DNSDriver(*DNS_PARAMS_ROUTE53)
+
+
+def list_container_objects(driver):
+    container = Container(name='test_container', extra={}, driver=driver)
+    return driver.list_container_objects(container=container)
+
+
+def list_records(driver):
+    zone = Zone(id='47234', domain='t.com', type='master', ttl=None,
+                driver=driver)
+    return driver.list_records(zone=zone)
+
+
+BENCHMARKS = [
+    Benchmark('ec2.list_nodes', setup_ec2,
+              lambda driver: driver.list_nodes(),
+              {'describe_instances.xml': scale_xml('reservationSet')}),
+    Benchmark('ec2.list_images', setup_ec2,
+              lambda driver: driver.list_images(),
+              {'describe_images.xml': scale_xml('imagesSet')}),
+    Benchmark('ec2.list_volumes', setup_ec2,
+              lambda driver: driver.list_volumes(),
+              {'describe_volumes.xml': scale_xml('volumeSet')}),
+    Benchmark('ec2.list_sizes', setup_ec2,
+              lambda driver: driver.list_sizes(), {}),
+    Benchmark('gce.list_nodes', setup_gce,
+              lambda driver: driver.list_nodes(ex_zone='all'),
+              {'aggregated_instances.json': scale_json('instances',
+                                                       aggregated=True)}),
+    Benchmark('gce.list_images', setup_gce,
+              lambda driver: driver.list_images(ex_include_deprecated=True),
+              {'global_images.json': scale_json('items')}),
+    Benchmark('gce.list_sizes', setup_gce,
+              lambda driver: driver.list_sizes(location='all'),
+              {'aggregated_machineTypes.json': scale_json('machineTypes',
+                                                          aggregated=True)}),
+    Benchmark('s3.list_container_objects', setup_s3, list_container_objects,
+              {'list_container_objects.xml': scale_xml(None, 'Contents')}),
+    Benchmark('route53.list_records', setup_route53, list_records,
+              {'list_records.xml': scale_xml('ResourceRecordSets')}),
+]
+
+
+def run_benchmark(benchmark, items, repeat):
+    """
+    Run a benchmark and return a dictionary with the results.
+    """
+    driver = benchmark.prepare(items)
+
+    # Warm up (fixtures are scaled on the first call)
+    count = len(benchmark.run(driver))
+
+    timings = []
+
+    for _ in range(repeat):
+        gc.collect()
+        start = time.time()
+        benchmark.run(driver)
+        timings.append(time.time() - start)
+
+    result = {
+        'items': count,
+        'seconds': min(timings),
+        'seconds_per_1k': min(timings) / max(count, 1) * 1000
+    }
+
+    if tracemalloc is not None:
+        gc.collect()
+        tracemalloc.start()
+        benchmark.run(driver)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        result['peak_kb'] = peak / 1024.0
+        result['peak_kb_per_1k'] = peak / 1024.0 / max(count, 1) * 1000
+
+    return result
+
+
+def load_baselines(path=BASELINES_PATH):
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, 'r') as fp:
+        return json.load(fp)
+
+
+def save_baselines(results, path=BASELINES_PATH):
+    baselines = load_baselines(path)
+
+    for name, result in results.items():
+        baselines[name] = dict((key, round(value, 4)) for key, value in
+                               result.items() if key.endswith('_per_1k'))
+
+    with open(path, 'w') as fp:
+        json.dump(baselines, fp, indent=4, sort_keys=True)
+        fp.write('\n')
+
+
+def compare(name, result, baseline, tolerance):
+    """
+    Return a list of regressions compared to the baseline.
+    """
+    regressions = []
+
+    for key in ['seconds_per_1k', 'peak_kb_per_1k']:
+        if key not in result or key not in baseline:
+            continue
+
+        if result[key] > baseline[key] * (1 + tolerance):
+            regressions.append('%s: %s %.4f > baseline %.4f' %
+                               (name, key, result[key], baseline[key]))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--items', type=int, default=DEFAULT_ITEMS,
+                        help='Number of items in the scaled fixtures')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='Number of timed runs of each benchmark')
+    parser.add_argument('--filter', default=None,
+                        help='Only run benchmarks which contain this string')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown compared to the baselines')
+    parser.add_argument('--update-baselines', action='store_true',
+                        help='Store the results as the new baselines')
+    parser.add_argument('--check', action='store_true',
+                        help='Exit with non-zero status on regressions')
+    args = parser.parse_args()
+
+    baselines = load_baselines()
+    results = {}
+    regressions = []
+
+    print('%-28s %8s %10s %12s %12s' % ('benchmark', 'items', 'seconds',
+                                        's / 1k', 'KiB / 1k'))
+
+    for benchmark in BENCHMARKS:
+        if args.filter and args.filter not in benchmark.name:
+            continue
+
+        result = run_benchmark(benchmark, items=args.items,
+                               repeat=args.repeat)
+        results[benchmark.name] = result
+
+        print('%-28s %8d %10.3f %12.4f %12s' %
+              (benchmark.name, result['items'], result['seconds'],
+               result['seconds_per_1k'],
+               '%.1f' % result['peak_kb_per_1k'] if 'peak_kb_per_1k' in
+               result else '-'))
+
+        if benchmark.name in baselines:
+            regressions.extend(compare(benchmark.name, result,
+                                       baselines[benchmark.name],
+                                       args.tolerance))
+
+    if args.update_baselines:
+        save_baselines(results)
+        print('Baselines saved to %s' % (BASELINES_PATH))
+    elif regressions:
+        print('')
+        print('Regressions:')
+
+        for regression in regressions:
+            print('  %s' % (regression))
+
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
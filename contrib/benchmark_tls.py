@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark which measures the number of TLS handshakes per second
+LibcloudHTTPSConnection can do against a local TLS server:
+
+* new SSLContext for each connection (behaviour before contexts were cached)
+* cached SSLContext, full handshake
+* cached SSLContext and TLS session resumption (default)
+
+Usage:
+
+    python contrib/benchmark_tls.py [--connections 500]
+"""
+
+from __future__ import with_statement
+
+import os
+import sys
+import ssl
+import time
+import argparse
+
+this_dir = os.path.abspath(os.path.split(__file__)[0])
+sys.path.insert(0, os.path.join(this_dir, '../'))
+
+import libcloud.security
+import libcloud.httplib_ssl
+
+from libcloud.httplib_ssl import LibcloudHTTPSConnection
+from libcloud.test import LocalHTTPServer, TLS_CERT_PATH
+
+DEFAULT_CONNECTIONS = 500
+
+
+def new_context(ssl_version, verify=True, ca_cert=None, cert_file=None,
+                key_file=None, check_hostname=False):
+    context = ssl.SSLContext(ssl_version)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_REQUIRED
+    context.load_verify_locations(cafile=ca_cert)
+    return context
+
+
+def run(port, connections, get_ssl_context, resume_sessions):
+    libcloud.httplib_ssl._tls_sessions.clear()
+    original = (libcloud.httplib_ssl.get_ssl_context,
+                libcloud.httplib_ssl.HAS_TLS_SESSION)
+    libcloud.httplib_ssl.get_ssl_context = get_ssl_context
+    libcloud.httplib_ssl.HAS_TLS_SESSION = resume_sessions and \
+        original[1]
+
+    try:
+        reused = 0
+        start = time.time()
+
+        for _ in range(connections):
+            connection = LibcloudHTTPSConnection('localhost', port)
+            connection.connect()
+            reused += int(connection.tls_session_reused)
+
+            # Read the TLS 1.3 session ticket so the session can be resumed
+            connection.request('HEAD', '/')
+            connection.getresponse().read()
+            connection.close()
+
+        elapsed = time.time() - start
+    finally:
+        (libcloud.httplib_ssl.get_ssl_context,
+         libcloud.httplib_ssl.HAS_TLS_SESSION) = original
+
+    return connections / elapsed, reused
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--connections', type=int,
+                        default=DEFAULT_CONNECTIONS,
+                        help='Number of connections in each run')
+    args = parser.parse_args()
+
+    os.environ.pop('http_proxy', None)
+    libcloud.security.VERIFY_SSL_CERT = True
+    libcloud.security.CA_CERTS_PATH = [TLS_CERT_PATH]
+    libcloud.security.SSL_VERSION = getattr(ssl, 'PROTOCOL_TLS_CLIENT',
+                                            ssl.PROTOCOL_SSLv23)
+
+    server = LocalHTTPServer(lambda request: (200, '', {}),
+                             certfile=TLS_CERT_PATH).start()
+
+    runs = [
+        ('new context per connection', new_context, False),
+        ('cached context', libcloud.httplib_ssl.get_ssl_context, False),
+        ('cached context + resumption', libcloud.httplib_ssl.get_ssl_context,
+         True)
+    ]
+
+    print('%-30s %16s %10s' % ('mode', 'handshakes / s', 'resumed'))
+
+    try:
+        for name, get_ssl_context, resume_sessions in runs:
+            rate, reused = run(port=server.port,
+                               connections=args.connections,
+                               get_ssl_context=get_ssl_context,
+                               resume_sessions=resume_sessions)
+            print('%-30s %16.1f %10d' % (name, rate, reused))
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
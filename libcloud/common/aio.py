@@ -0,0 +1,642 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+asyncio based transport and awaitable driver API.
+
+Note: This module requires Python 3.5 or higher.
+
+:class:`AsyncConnection` wraps an existing :class:`libcloud.common.base.
+Connection` instance and sends its requests over non-blocking asyncio
+streams. All the connection hooks (``morph_action_hook``,
+``add_default_params``, ``add_default_headers``, ``pre_connect_hook``, ...),
+the ``responseCls`` parsing, the ``retry_policy``, the ``rate_limiter``, the
+``response_cache`` and the request observers are re-used which means it works
+with every driver without modifications and a single event loop can drive
+thousands of concurrent requests.
+
+:class:`ThreadPoolAsyncDriver` wraps a driver instance and exposes awaitable
+counterparts of the most common base class methods. The driver methods do
+blocking I/O so they are run in a thread pool, API calls made with its
+``connection`` (an :class:`AsyncConnection`) don't use any threads.
+"""
+
+import time
+import asyncio
+import functools
+
+import libcloud.security
+
+from libcloud.utils.py3 import b
+from libcloud.utils.py3 import httplib
+from libcloud.common.types import LibcloudError
+from libcloud.common.instrumentation import RequestEvent
+from libcloud.httplib_ssl import find_ca_cert, get_ssl_context
+
+__all__ = [
+    'AsyncHTTPResponse',
+    'AsyncConnection',
+    'AsyncStreamIterator',
+    'ThreadPoolAsyncDriver'
+]
+
+DEFAULT_MAX_CONNECTIONS = 100  # maximum number of concurrent requests
+DEFAULT_MAX_IDLE_CONNECTIONS = 10  # kept-alive connections per endpoint
+
+
+class AsyncHTTPResponse(object):
+    """
+    Fully read HTTP response which implements the subset of the
+    ``httplib.HTTPResponse`` interface used by the Response classes.
+    """
+
+    def __init__(self, status, reason, headers, body, version=11,
+                 will_close=False):
+        self.status = status
+        self.reason = reason
+        self.version = version
+        self.will_close = will_close
+        self._headers = headers
+        self._body = body
+        self._read = False
+
+    def read(self, amt=None):
+        if self._read:
+            return b('')
+
+        self._read = True
+        return self._body
+
+    def isclosed(self):
+        return self._read
+
+    def getheader(self, name, default=None):
+        name = name.lower()
+
+        for key, value in self._headers:
+            if key.lower() == name:
+                return value
+
+        return default
+
+    def getheaders(self):
+        return list(self._headers)
+
+
+class AsyncConnection(object):
+    """
+    Send requests of a :class:`libcloud.common.base.Connection` instance
+    using asyncio.
+
+    The request state of a connection (``action``, ``context``, ...) is only
+    set while the request is prepared and while its response is parsed. No
+    other coroutine can run in the mean time, so many requests can be in
+    flight over the same connection instance.
+
+    Note: Requests are prepared using the connection's hooks, but the
+    ``request`` method itself is not called which means that logic in the
+    ``request`` method overrides of a connection subclass is not applied.
+    Raw and streamed requests and HTTP proxies are not supported.
+    """
+
+    def __init__(self, connection, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 max_idle_connections=DEFAULT_MAX_IDLE_CONNECTIONS):
+        """
+        :param connection: Connection instance whose hooks and response class
+                           are used.
+        :type connection: :class:`libcloud.common.base.Connection`
+
+        :param max_connections: Maximum number of concurrent requests.
+        :type max_connections: ``int``
+
+        :param max_idle_connections: Maximum number of kept-alive idle
+                                     connections per endpoint.
+        :type max_idle_connections: ``int``
+        """
+        self.connection = connection
+        self.max_connections = max_connections
+        self.max_idle_connections = max_idle_connections
+
+        self._semaphore = None
+        self._idle = {}  # (host, port, secure) -> [(reader, writer)]
+
+    async def request(self, action, params=None, data=None, headers=None,
+                      method='GET'):
+        """
+        Awaitable counterpart of
+        :meth:`libcloud.common.base.Connection.request`.
+
+        :return: An instance of the connection's ``responseCls``.
+        :rtype: :class:`libcloud.common.base.Response`
+        """
+        con = self.connection
+
+        if con.proxy_url:
+            raise LibcloudError('HTTP proxies are not supported with '
+                                'AsyncConnection', driver=con.driver)
+
+        # Context set by the caller is only valid until the first await
+        context = con.context
+        con.reset_context()
+
+        cache_key = None
+        cached_response = None
+
+        if con.response_cache is not None and method == 'GET':
+            cache_key = con.get_cache_key(action=action, params=params,
+                                          headers=headers)
+            cached = con.response_cache.get(
+                cache_key, ttl=con.response_cache.get_ttl(con))
+
+            if cached is not None:
+                cached_response, fresh = cached
+
+                if fresh:
+                    return cached_response
+
+                headers = con._add_conditional_headers(headers,
+                                                       cached_response)
+
+        kwargs = {'action': action, 'params': params, 'data': data,
+                  'headers': headers, 'method': method, 'context': context,
+                  'cached_response': cached_response}
+        policy = con.retry_policy
+
+        if policy is None:
+            response = await self._request_attempt(**kwargs)
+        else:
+            response = await self._request_with_retries(policy, **kwargs)
+
+        if cache_key is not None and con._is_cacheable(response):
+            revalidated = cached_response is not None and \
+                response.object is cached_response.object
+            con.response_cache.put(cache_key, response,
+                                   revalidated=revalidated)
+
+        return response
+
+    async def async_request(self, action, params=None, data=None,
+                            headers=None, method='GET', context=None):
+        """
+        Awaitable counterpart of
+        :meth:`libcloud.common.base.PollingConnection.async_request`.
+
+        Job status is polled using ``asyncio.sleep`` which means the event
+        loop is not blocked while waiting for the job to complete.
+        """
+        con = self.connection
+        kwargs = con.get_request_kwargs(action=action, params=params,
+                                        data=data, headers=headers,
+                                        method=method, context=context)
+        response = await self.request(**kwargs)
+        kwargs = con.get_poll_request_kwargs(response=response,
+                                             context=context,
+                                             request_kwargs=kwargs)
+
+        end = time.time() + con.timeout
+
+        while time.time() < end:
+            response = await self.request(**kwargs)
+
+            if con.has_completed(response=response):
+                return response
+
+            await asyncio.sleep(con.poll_interval)
+
+        raise LibcloudError('Job did not complete in %s seconds' %
+                            (con.timeout))
+
+    def close(self):
+        """
+        Close all the idle kept-alive connections.
+        """
+        idle, self._idle = self._idle, {}
+
+        for connections in idle.values():
+            for _, writer in connections:
+                writer.close()
+
+    async def _request_with_retries(self, policy, **kwargs):
+        """
+        Perform a request using the ``retry_policy`` of the connection.
+        Same as :meth:`libcloud.common.retry.RetryPolicy.call`, but the delay
+        between the attempts doesn't block the event loop.
+        """
+        policy.record_request()
+
+        start = time.time()
+        delay = policy.base_delay
+        retries = 0
+
+        while True:
+            try:
+                return await self._request_attempt(retries=retries, **kwargs)
+            except Exception as e:
+                delay = policy.get_retry_delay(exception=e,
+                                               previous_delay=delay,
+                                               retries=retries,
+                                               elapsed=time.time() - start)
+
+                if delay is None:
+                    raise
+
+            retries += 1
+            await asyncio.sleep(delay)
+
+    async def _request_attempt(self, action, params, data, headers, method,
+                               context, cached_response, retries=0):
+        """
+        Perform a single attempt of a request and notify the observers of
+        the connection.
+        """
+        con = self.connection
+        event = None
+
+        if con.observers:
+            event = RequestEvent(driver=getattr(con.driver, 'name', None) or
+                                 con.__class__.__name__,
+                                 host=con.host, action=action, method=method,
+                                 params=params, retries=retries)
+            start = time.time()
+
+        try:
+            if con.rate_limiter is not None:
+                key = con.get_rate_limit_key(action=action, params=params,
+                                             method=method)
+                delay = con.rate_limiter.reserve(key)
+
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                if event is not None:
+                    event.timings['wait'] = delay
+
+            response = await self._perform_request(
+                action=action, params=params, data=data, headers=headers,
+                method=method, context=context,
+                cached_response=cached_response, event=event)
+        except Exception as e:
+            if event is not None:
+                event.error = e
+                event.status = getattr(e, 'code', None)
+            raise
+        else:
+            if event is not None:
+                event.status = response.status
+        finally:
+            if event is not None:
+                event.timings['total'] = time.time() - start
+                con._notify_observers(event)
+
+        return response
+
+    async def _perform_request(self, action, params, data, headers, method,
+                               context, cached_response, event):
+        """
+        Prepare a request using the connection hooks, send it and build the
+        response object.
+        """
+        con = self.connection
+
+        # Hooks are called synchronously so other tasks can't change the
+        # state of the connection while the request is being prepared
+        url, data, headers = con._prepare_request(action=action,
+                                                  params=params, data=data,
+                                                  headers=headers,
+                                                  method=method)
+        state = (con.action, con.method, con.data)
+        con.reset_context()
+
+        host, port, secure = self._get_endpoint()
+
+        if event is not None and data is not None:
+            event.bytes_sent = len(data)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+
+        async with self._semaphore:
+            start = time.time()
+            http_response = await self._send(host=host, port=port,
+                                             secure=secure, method=method,
+                                             url=url, body=data,
+                                             headers=headers)
+
+        if event is not None:
+            event.timings['ttfb'] = time.time() - start
+
+        # Restore request state for the response class which might use it
+        con.action, con.method, con.data = state
+        con.context = context
+        con.stream = False
+        con.cached_response = cached_response
+        con.request_event = event
+
+        try:
+            return con.responseCls(connection=con, response=http_response)
+        finally:
+            con.reset_context()
+            con.cached_response = None
+            con.request_event = None
+
+    def _get_endpoint(self):
+        con = self.connection
+        base_url = getattr(con, 'base_url', None)
+
+        if base_url:
+            host, port, secure, _ = con._tuple_from_url(base_url)
+        else:
+            host, port, secure = con.host, con.port, con.secure
+
+        return host, int(port), bool(secure)
+
+    def _get_ssl_context(self):
+        con = self.connection
+        verify = libcloud.security.VERIFY_SSL_CERT
+
+        return get_ssl_context(ssl_version=libcloud.security.SSL_VERSION,
+                               verify=verify,
+                               ca_cert=find_ca_cert() if verify else None,
+                               cert_file=getattr(con, 'cert_file', None),
+                               key_file=getattr(con, 'key_file', None),
+                               check_hostname=verify)
+
+    async def _open(self, host, port, secure):
+        key = (host, port, secure)
+        idle = self._idle.get(key, [])
+
+        while idle:
+            reader, writer = idle.pop()
+
+            if not reader.at_eof():
+                return reader, writer, True
+
+            writer.close()
+
+        ssl_context = self._get_ssl_context() if secure else None
+        open_connection = asyncio.open_connection(host=host, port=port,
+                                                  ssl=ssl_context)
+        reader, writer = await asyncio.wait_for(open_connection,
+                                                self.connection.timeout)
+        return reader, writer, False
+
+    def _release(self, host, port, secure, reader, writer, response):
+        idle = self._idle.setdefault((host, port, secure), [])
+
+        if response.will_close or len(idle) >= self.max_idle_connections:
+            writer.close()
+            return
+
+        idle.append((reader, writer))
+
+    async def _send(self, host, port, secure, method, url, body, headers):
+        reader, writer, reused = await self._open(host=host, port=port,
+                                                  secure=secure)
+
+        try:
+            response = await self._send_over(reader=reader, writer=writer,
+                                             method=method, url=url,
+                                             body=body, headers=headers)
+        except (httplib.BadStatusLine, ConnectionError):
+            writer.close()
+
+            if not reused:
+                raise
+
+            # Kept-alive connection has been closed by the server, re-send
+            # the request over a new connection
+            reader, writer, _ = await self._open(host=host, port=port,
+                                                 secure=secure)
+
+            try:
+                response = await self._send_over(reader=reader,
+                                                 writer=writer,
+                                                 method=method, url=url,
+                                                 body=body, headers=headers)
+            except Exception:
+                writer.close()
+                raise
+        except Exception:
+            writer.close()
+            raise
+
+        self._release(host=host, port=port, secure=secure, reader=reader,
+                      writer=writer, response=response)
+        return response
+
+    async def _send_over(self, reader, writer, method, url, body, headers):
+        body = b(body) if body else b('')
+        headers = dict(headers)
+
+        if body or 'Content-Length' in headers:
+            headers['Content-Length'] = str(len(body))
+
+        lines = ['%s %s HTTP/1.1' % (method, url)]
+        lines.extend(['%s: %s' % (key, value)
+                      for key, value in headers.items()])
+        head = '\r\n'.join(lines) + '\r\n\r\n'
+
+        writer.write(head.encode('iso-8859-1') + body)
+        await writer.drain()
+
+        read = self._read_response(reader=reader, method=method)
+        return await asyncio.wait_for(read, self.connection.timeout)
+
+    async def _read_response(self, reader, method):
+        status_line = await reader.readline()
+
+        if not status_line:
+            raise httplib.BadStatusLine('Server closed the connection')
+
+        try:
+            version, status, reason = \
+                status_line.decode('iso-8859-1').strip().split(' ', 2)
+        except ValueError:
+            version, status = \
+                status_line.decode('iso-8859-1').strip().split(' ', 1)
+            reason = ''
+
+        status = int(status)
+        headers = []
+
+        while True:
+            line = await reader.readline()
+
+            if line in (b'\r\n', b'\n', b''):
+                break
+
+            name, value = line.decode('iso-8859-1').split(':', 1)
+            headers.append((name.strip(), value.strip()))
+
+        lower_headers = dict([(key.lower(), value)
+                              for key, value in headers])
+        transfer_encoding = lower_headers.get('transfer-encoding', '')
+        will_close = (version == 'HTTP/1.0' or
+                      lower_headers.get('connection', '').lower() == 'close')
+
+        if method == 'HEAD' or status in (httplib.NO_CONTENT,
+                                          httplib.NOT_MODIFIED) or \
+           status < 200:
+            body = b('')
+        elif 'chunked' in transfer_encoding.lower():
+            body = await self._read_chunked(reader=reader)
+        elif 'content-length' in lower_headers:
+            body = await reader.readexactly(
+                int(lower_headers['content-length']))
+        else:
+            body = await reader.read()
+            will_close = True
+
+        return AsyncHTTPResponse(status=status, reason=reason,
+                                 headers=headers, body=body,
+                                 version=11 if version == 'HTTP/1.1' else 10,
+                                 will_close=will_close)
+
+    async def _read_chunked(self, reader):
+        chunks = []
+
+        while True:
+            line = await reader.readline()
+            size = int(line.split(b';', 1)[0].strip(), 16)
+
+            if size == 0:
+                # Skip trailers
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                break
+
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+        return b('').join(chunks)
+
+
+class AsyncStreamIterator(object):
+    """
+    Asynchronous iterator over a blocking iterator. Each item is retrieved
+    using the provided executor so the event loop is not blocked.
+    """
+
+    def __init__(self, iterator, run):
+        self._iterator = iterator
+        self._run = run
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        sentinel = object()
+        item = await self._run(next, self._iterator, sentinel)
+
+        if item is sentinel:
+            raise StopAsyncIteration
+
+        return item
+
+
+class ThreadPoolAsyncDriver(object):
+    """
+    Awaitable counterparts of the common base driver methods.
+
+    Driver methods are executed in an executor (thread pool by default) using
+    the regular blocking connection. This is safe because the request state
+    of the connection is thread local which means a single driver instance
+    (and its authentication token and kept-alive connections) is shared
+    between all the calls. The number of concurrent driver method calls is
+    bound by the size of the thread pool.
+
+    API calls which are made directly with :attr:`connection` (an
+    :class:`AsyncConnection` wrapping the driver connection) are sent over
+    non-blocking asyncio streams and don't use the thread pool.
+    """
+
+    def __init__(self, driver, executor=None, max_concurrency=None,
+                 loop=None, max_connections=DEFAULT_MAX_CONNECTIONS):
+        """
+        :param driver: Driver instance to wrap.
+        :type driver: :class:`libcloud.common.base.BaseDriver`
+
+        :param executor: Optional executor used to run the driver methods.
+                         Defaults to the loop's default executor.
+        :type executor: :class:`concurrent.futures.Executor`
+
+        :param max_concurrency: Optional maximum number of driver methods
+                                which are executed at the same time.
+        :type max_concurrency: ``int``
+
+        :param max_connections: Maximum number of concurrent requests sent
+                                with :attr:`connection`.
+        :type max_connections: ``int``
+        """
+        self.driver = driver
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.loop = loop
+        self.connection = AsyncConnection(driver.connection,
+                                          max_connections=max_connections)
+
+        self._semaphore = None
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a blocking driver method without blocking the event loop.
+        """
+        loop = self.loop or asyncio.get_event_loop()
+        call = functools.partial(func, *args, **kwargs)
+
+        if not self.max_concurrency:
+            return await loop.run_in_executor(self.executor, call)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            return await loop.run_in_executor(self.executor, call)
+
+    def close(self):
+        """
+        Close the idle kept-alive connections of :attr:`connection`.
+        """
+        self.connection.close()
+
+    async def list_nodes(self, *args, **kwargs):
+        return await self.run(self.driver.list_nodes, *args, **kwargs)
+
+    async def list_container_objects(self, container, *args, **kwargs):
+        return await self.run(self.driver.list_container_objects, container,
+                              *args, **kwargs)
+
+    async def list_records(self, zone, *args, **kwargs):
+        return await self.run(self.driver.list_records, zone, *args,
+                              **kwargs)
+
+    async def download_object_as_stream(self, obj, chunk_size=None):
+        """
+        :return: Asynchronous iterator which yields object data chunks.
+        :rtype: :class:`AsyncStreamIterator`
+        """
+        stream = await self.run(self.driver.download_object_as_stream, obj,
+                                chunk_size=chunk_size)
+        return AsyncStreamIterator(iterator=iter(stream), run=self.run)
+
+    async def wait_until_running(self, nodes, *args, **kwargs):
+        """
+        Awaitable counterpart of
+        :meth:`libcloud.compute.base.NodeDriver.wait_until_running`.
+        """
+        return await self.run(self.driver.wait_until_running, nodes, *args,
+                              **kwargs)
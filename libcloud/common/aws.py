@@ -33,7 +33,7 @@ except ImportError:
 from libcloud.common.base import ConnectionUserAndKey, XmlResponse, BaseDriver
 from libcloud.common.base import JsonResponse
 from libcloud.common.types import InvalidCredsError, MalformedResponseError
-from libcloud.utils.py3 import b, httplib, urlquote
+from libcloud.utils.py3 import b, basestring, httplib, urlquote
 from libcloud.utils.xml import findtext, findall
 
 __all__ = [
@@ -50,12 +50,61 @@ __all__ = [
 ]
 
 DEFAULT_SIGNATURE_VERSION = '2'
+
+# Error codes AWS services use to signal that a request has been throttled
+THROTTLING_ERROR_CODES = [
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'RequestLimitExceeded',
+    'TooManyRequestsException',
+    'ProvisionedThroughputExceededException',
+    'BandwidthLimitExceeded',
+    'SlowDown',
+    'PriorRequestNotComplete'
+]
+
+# Prefixes of the AWS query API actions which don't modify any resources
+READ_ONLY_ACTION_PREFIXES = ('Describe', 'List', 'Get')
+
 UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
 
 
 class AWSBaseResponse(XmlResponse):
     namespace = None
 
+    def is_throttled(self):
+        """
+        AWS signals throttling using an error code in the body (e.g.
+        ``RequestLimitExceeded`` in EC2 or ``SlowDown`` in S3) which is
+        returned with status code 400 or 503.
+        """
+        if super(AWSBaseResponse, self).is_throttled():
+            return True
+
+        if int(self.status) not in [httplib.BAD_REQUEST,
+                                    httplib.SERVICE_UNAVAILABLE] or \
+           not self.body:
+            return False
+
+        try:
+            try:
+                body = ET.XML(self.body)
+            except ValueError:
+                # lxml wants a bytes and raises ValueError on str input.
+                body = ET.XML(self.body.encode('utf-8'))
+        except Exception:
+            return False
+
+        for element in body.iter():
+            if isinstance(element.tag, basestring) and \
+               element.tag.rsplit('}', 1)[-1] == 'Code':
+                return element.text in THROTTLING_ERROR_CODES
+
+        return False
+
     def _parse_error_details(self, element):
         """
         Parse code and message from the provided error element.
@@ -389,12 +438,46 @@ class SignedAWSConnection(AWSTokenConnection):
                                                           data=self.data)
         return params, headers
 
+    def get_rate_limit_action_class(self, action, params, method):
+        """
+        AWS query APIs (e.g. EC2) throttle read-only ``Describe*`` calls
+        separately from the calls which modify resources.
+        """
+        api_action = params.get('Action', None)
+
+        if not api_action:
+            parent = super(SignedAWSConnection, self)
+            return parent.get_rate_limit_action_class(action=action,
+                                                      params=params,
+                                                      method=method)
+
+        if api_action.startswith(READ_ONLY_ACTION_PREFIXES):
+            return 'describe'
+
+        return 'mutate'
+
 
 class AWSJsonResponse(JsonResponse):
     """
     Amazon ECS response class.
     ECS API uses JSON unlike the s3, elb drivers
     """
+    def is_throttled(self):
+        if super(AWSJsonResponse, self).is_throttled():
+            return True
+
+        if int(self.status) not in [httplib.BAD_REQUEST,
+                                    httplib.SERVICE_UNAVAILABLE]:
+            return False
+
+        try:
+            code = json.loads(self.body).get('__type', '')
+        except Exception:
+            return False
+
+        # Type can be prefixed with a namespace (e.g. "com.amazon...#Code")
+        return code.rsplit('#', 1)[-1] in THROTTLING_ERROR_CODES
+
     def parse_error(self):
         response = json.loads(self.body)
         code = response['__type']
@@ -18,8 +18,14 @@ import sys
 import ssl
 import socket
 import copy
+import hashlib
 import binascii
 import time
+import zlib
+import codecs
+import email.utils
+import functools
+import threading
 
 import xml.dom.minidom
 
@@ -44,12 +50,17 @@ from libcloud.utils.py3 import urlencode
 from libcloud.utils.py3 import StringIO
 from libcloud.utils.py3 import u
 from libcloud.utils.py3 import b
+from libcloud.utils.py3 import basestring
 
 from libcloud.utils.misc import lowercase_keys, retry
 from libcloud.utils.compression import decompress_data
 
 from libcloud.common.exceptions import exception_from_message
+from libcloud.common.exceptions import RateLimitReachedError
 from libcloud.common.types import LibcloudError, MalformedResponseError
+from libcloud.common.pool import DEFAULT_CONNECTION_POOL
+from libcloud.common.pool import RECONNECT_EXCEPTIONS
+from libcloud.common.instrumentation import RequestEvent
 from libcloud.httplib_ssl import LibcloudHTTPConnection
 from libcloud.httplib_ssl import LibcloudHTTPSConnection
 
@@ -76,6 +87,9 @@ __all__ = [
 # Module level variable indicates if the failed HTTP requests should be retried
 RETRY_FAILED_HTTP_REQUESTS = False
 
+# Size of the chunks in which the body of a streaming response is read
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 class LazyObject(object):
     """An object that doesn't get initialized until accessed."""
@@ -112,6 +126,58 @@ class LazyObject(object):
         return cls._proxy(*lazy_init_args, **lazy_init_kwargs)
 
 
+class RequestLocal(object):
+    """
+    Descriptor for the Connection attributes which hold the state of the
+    request in progress (action, method, data, context and the underlying
+    HTTP connection).
+
+    Values are stored per thread so a single Connection (and driver) instance
+    can be used by multiple threads at the same time.
+    """
+
+    def __init__(self, name, default=None):
+        """
+        :param name: Attribute name.
+        :type name: ``str``
+
+        :param default: Default value or a callable which returns one.
+        """
+        self.name = name
+        self.default = default
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+
+        local = self._get_local(obj)
+
+        try:
+            return getattr(local, self.name)
+        except AttributeError:
+            value = self.default() if callable(self.default) else self.default
+            setattr(local, self.name, value)
+            return value
+
+    def __set__(self, obj, value):
+        setattr(self._get_local(obj), self.name, value)
+
+    def __delete__(self, obj):
+        local = self._get_local(obj)
+
+        if hasattr(local, self.name):
+            delattr(local, self.name)
+
+    def _get_local(self, obj):
+        local = obj.__dict__.get('_request_local', None)
+
+        if local is None:
+            local = obj.__dict__.setdefault('_request_local',
+                                            threading.local())
+
+        return local
+
+
 class HTTPResponse(httplib.HTTPResponse):
     # On python 2.6 some calls can hang because HEAD isn't quite properly
     # supported.
@@ -153,12 +219,41 @@ class Response(object):
         """
         self.connection = connection
 
+        event = getattr(connection, 'request_event', None)
+
+        if not isinstance(event, RequestEvent):
+            event = None
+
         # http.client In Python 3 doesn't automatically lowercase the header
         # names
         self.headers = lowercase_keys(dict(response.getheaders()))
         self.error = response.reason
         self.status = response.status
 
+        if getattr(connection, 'stream', False) is True and \
+           200 <= int(self.status) < 300 and self.success():
+            # Body is parsed incrementally using iterparse() / iter_items()
+            self._response = response
+            return
+
+        cached = getattr(connection, 'cached_response', None)
+
+        if int(self.status) == httplib.NOT_MODIFIED and \
+           isinstance(cached, Response):
+            # Cached response is still valid, reuse the already parsed body
+            response.read()
+            headers = dict(cached.headers)
+            headers.update(self.headers)
+            self.headers = headers
+            self.status = cached.status
+            self.error = cached.error
+            self.body = cached.body
+            self.object = cached.object
+            return
+
+        if event is not None:
+            start = time.time()
+
         # This attribute is set when using LoggingConnection.
         original_data = getattr(response, '_original_data', None)
 
@@ -166,19 +261,40 @@ class Response(object):
             # LoggingConnection already decompresses data so it can log it
             # which means we don't need to decompress it here.
             self.body = response._original_data
+            body_size = len(self.body)
         else:
-            self.body = self._decompress_response(body=response.read(),
+            body = response.read()
+            body_size = len(body or '')
+            self.body = self._decompress_response(body=body,
                                                   headers=self.headers)
 
+        if event is not None:
+            event.timings['read'] = time.time() - start
+            event.bytes_received = body_size
+
         if PY3:
             self.body = b(self.body).decode('utf-8')
 
+        # Throttled requests are only raised as such when they are retried,
+        # otherwise the error is handled like any other one by parse_error()
+        if getattr(connection, 'retry_policy', None) is not None and \
+           self.is_throttled():
+            raise RateLimitReachedError(code=self.status, message=self.body,
+                                        headers=self.headers,
+                                        retry_after=self.get_retry_after())
+
         if not self.success():
             raise exception_from_message(code=self.status,
                                          message=self.parse_error(),
                                          headers=self.headers)
 
+        if event is None:
+            self.object = self.parse_body()
+            return
+
+        start = time.time()
         self.object = self.parse_body()
+        event.timings['parse'] = time.time() - start
 
     def parse_body(self):
         """
@@ -202,6 +318,46 @@ class Response(object):
         """
         return self.body
 
+    def is_throttled(self):
+        """
+        Determine if the request has been throttled by the provider.
+
+        When the connection has a ``retry_policy``, throttled requests raise
+        :class:`RateLimitReachedError` which is retried by the policy.
+        Otherwise the error is handled by :meth:`parse_error` like any other
+        error response. Override in a provider's subclass if the provider
+        signals throttling with a different status code or with an error code
+        in the body.
+
+        :rtype: ``bool``
+        """
+        return int(self.status) == RateLimitReachedError.code
+
+    def get_retry_after(self):
+        """
+        Return the number of seconds the provider asked us to wait before
+        retrying the request (``Retry-After`` header) or None.
+
+        :rtype: ``int``
+        """
+        value = self.headers.get('retry-after',
+                                 self.headers.get('retry_after', None))
+
+        if not value:
+            return None
+
+        value = str(value).strip()
+
+        if value.isdigit():
+            return int(value)
+
+        parsed = email.utils.parsedate_tz(value)
+
+        if parsed is None:
+            return None
+
+        return max(0, int(email.utils.mktime_tz(parsed) - time.time()))
+
     def success(self):
         """
         Determine if our request was successful.
@@ -238,6 +394,214 @@ class Response(object):
 
         return body
 
+    def _iter_body_chunks(self, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Read the body of a streaming response in chunks and decompress them
+        on the fly.
+
+        :rtype: ``generator`` of ``bytes``
+        """
+        response = self._response
+        original_data = getattr(response, '_original_data', None)
+
+        if original_data:
+            # LoggingConnection has already read and decompressed the body
+            yield b(original_data)
+            return
+
+        encoding = self.headers.get('content-encoding', None)
+
+        if encoding in ['zlib', 'deflate']:
+            decompressor = zlib.decompressobj()
+        elif encoding in ['gzip', 'x-gzip']:
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        else:
+            decompressor = None
+
+        while True:
+            data = response.read(chunk_size)
+
+            if not data:
+                break
+
+            data = b(data)
+
+            if decompressor:
+                data = decompressor.decompress(data)
+
+            if data:
+                yield data
+
+        if decompressor:
+            data = decompressor.flush()
+
+            if data:
+                yield data
+
+    def _drain(self):
+        """
+        Read and discard the rest of the body of a streaming response so the
+        underlying connection can be reused.
+        """
+        while self._response.read(STREAM_CHUNK_SIZE):
+            pass
+
+
+class StreamReader(object):
+    """
+    File-like wrapper around a generator of byte chunks.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = b('')
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+
+        if size < 0:
+            size = len(self._buffer)
+
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class JsonStreamParser(object):
+    """
+    Incremental JSON parser which decodes array items one by one from a
+    generator of byte chunks, without holding the whole document in memory.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def iter_items(self, key=None):
+        """
+        Yield items of the top-level array (if key is None) or of the array
+        stored under ``key`` attribute of the top-level object.
+
+        Once all the items have been yielded, :attr:`object` contains all the
+        other attributes of the top-level object.
+        """
+        self.object = {}
+
+        if not self._skip_whitespace():
+            # Empty body
+            return
+
+        if key is None:
+            self._expect('[')
+            for item in self._iter_array():
+                yield item
+            return
+
+        self._expect('{')
+
+        while self._skip_whitespace():
+            char = self._buffer[self._pos]
+
+            if char == '}':
+                self._pos += 1
+                return
+            elif char == ',':
+                self._pos += 1
+                continue
+
+            name = self._decode_value()
+            self._skip_whitespace()
+            self._expect(':')
+            self._skip_whitespace()
+
+            if name == key and self._buffer[self._pos] == '[':
+                self._pos += 1
+                for item in self._iter_array():
+                    yield item
+            else:
+                self.object[name] = self._decode_value()
+
+        raise ValueError('Unexpected end of JSON document')
+
+    def _iter_array(self):
+        while self._skip_whitespace():
+            char = self._buffer[self._pos]
+
+            if char == ']':
+                self._pos += 1
+                return
+            elif char == ',':
+                self._pos += 1
+                continue
+
+            yield self._decode_value()
+
+        raise ValueError('Unexpected end of JSON document')
+
+    def _fill(self):
+        if self._eof:
+            return False
+
+        # Drop already parsed data
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+
+        try:
+            data = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            self._buffer += self._text_decoder.decode(b(''), final=True)
+            return False
+
+        self._buffer += self._text_decoder.decode(data)
+        return True
+
+    def _skip_whitespace(self):
+        """
+        Skip whitespace and return False on the end of the document.
+        """
+        while True:
+            while self._pos < len(self._buffer) and \
+                    self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+
+            if self._pos < len(self._buffer):
+                return True
+
+            if not self._fill():
+                return False
+
+    def _expect(self, char):
+        if self._buffer[self._pos] != char:
+            raise ValueError('Expected "%s" at position %s' %
+                             (char, self._pos))
+        self._pos += 1
+
+    def _decode_value(self):
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if not self._fill():
+                    raise
+                continue
+
+            # Numbers and literals at the end of the buffer might be truncated
+            if end == len(self._buffer) and not self._eof and \
+               self._buffer[self._pos] not in '{["':
+                if self._fill():
+                    continue
+
+            self._pos = end
+            return value
+
 
 class JsonResponse(Response):
     """
@@ -259,6 +623,43 @@ class JsonResponse(Response):
 
     parse_error = parse_body
 
+    def iter_items(self, key=None):
+        """
+        Yield items of the top-level JSON array (if ``key`` is None) or of the
+        array stored under ``key`` attribute of the top-level JSON object.
+
+        For streaming responses (``stream=True`` request argument) the body is
+        decoded incrementally which means only a single item is held in memory
+        at once. Once all the items have been yielded, :attr:`object` contains
+        all the other attributes of the top-level object.
+
+        :param key: Name of the attribute which holds the array.
+        :type key: ``str``
+
+        :rtype: ``generator``
+        """
+        if getattr(self, '_response', None) is None:
+            items = self.object if key is None else self.object.get(key, [])
+
+            for item in items or []:
+                yield item
+            return
+
+        parser = JsonStreamParser(chunks=self._iter_body_chunks())
+
+        try:
+            for item in parser.iter_items(key=key):
+                yield item
+        except ValueError:
+            raise MalformedResponseError('Failed to parse JSON',
+                                         body=None,
+                                         driver=self.connection.driver)
+        finally:
+            self._drain()
+            self._response = None
+
+        self.object = parser.object
+
 
 class XmlResponse(Response):
     """
@@ -283,6 +684,94 @@ class XmlResponse(Response):
 
     parse_error = parse_body
 
+    def iterparse(self, tag, parent=None):
+        """
+        Yield elements with the provided tag name. Namespaces are ignored when
+        matching the tag names.
+
+        For streaming responses (``stream=True`` request argument) the body is
+        parsed incrementally and each element is cleared and removed from the
+        tree once the caller has processed it, so memory usage doesn't depend
+        on the number of elements. Once all the elements have been yielded,
+        :attr:`object` contains the root element without them.
+
+        :param tag: Tag name of the elements to yield (e.g. ``item``).
+        :type tag: ``str``
+
+        :param parent: Optional tag name of the parent element (e.g.
+                       ``instancesSet``). Useful when the same tag is used on
+                       multiple levels of the document.
+        :type parent: ``str``
+
+        :rtype: ``generator`` of ``Element``
+        """
+        def matches(element, parent_element):
+            if _local_name(element.tag) != tag:
+                return False
+
+            return parent is None or (
+                parent_element is not None and
+                _local_name(parent_element.tag) == parent)
+
+        if getattr(self, '_response', None) is None:
+            if self.object is None or not len(self.object):
+                return
+
+            for parent_element in self.object.iter():
+                for element in list(parent_element):
+                    if matches(element, parent_element):
+                        yield element
+            return
+
+        source = StreamReader(chunks=self._iter_body_chunks())
+        stack = []
+        root = None
+
+        try:
+            for event, element in ET.iterparse(source,
+                                               events=('start', 'end')):
+                if event == 'start':
+                    if root is None:
+                        root = element
+                    stack.append(element)
+                    continue
+
+                stack.pop()
+                parent_element = stack[-1] if stack else None
+
+                if not matches(element, parent_element):
+                    continue
+
+                yield element
+
+                element.clear()
+
+                if parent_element is not None:
+                    parent_element.remove(element)
+        except Exception:
+            if root is None and not stack:
+                # Empty body
+                return
+            raise MalformedResponseError('Failed to parse XML',
+                                         body=None,
+                                         driver=self.connection.driver)
+        finally:
+            self._drain()
+            self._response = None
+
+        self.object = root
+
+
+def _local_name(tag):
+    """
+    Return tag name without the namespace.
+    """
+    if not isinstance(tag, basestring):
+        # lxml comments and processing instructions
+        return None
+
+    return tag.rsplit('}', 1)[-1]
+
 
 class RawResponse(Response):
 
@@ -298,11 +787,23 @@ class RawResponse(Response):
         self._reason = None
         self.connection = connection
 
+        # Underlying HTTP connection which is held until the response body
+        # has been consumed
+        self._http_connection = connection.connection
+
     @property
     def response(self):
         if not self._response:
-            response = self.connection.connection.getresponse()
+            http_connection = self._http_connection
+            response = http_connection.getresponse()
             self._response, self.body = response, response
+
+            pool = getattr(self.connection, 'connection_pool', None)
+
+            if pool is not None:
+                # Connection is put back in the pool once the body is read
+                pool.release(http_connection, response)
+
             if not self.success():
                 self.parse_error()
         return self._response
@@ -520,17 +1021,48 @@ class Connection(object):
 
     responseCls = Response
     rawResponseCls = RawResponse
-    connection = None
     host = '127.0.0.1'
     port = 443
     timeout = None
     secure = 1
     driver = None
-    action = None
     cache_busting = False
     backoff = None
     retry_delay = None
 
+    # :class:`libcloud.common.retry.RetryPolicy` used to retry throttled
+    # requests. None means throttled requests are not retried.
+    retry_policy = None
+
+    # :class:`libcloud.common.ratelimit.RateLimiter` which admits requests
+    # before they are sent. None means requests are not rate limited.
+    rate_limiter = None
+
+    # :class:`libcloud.common.cache.ResponseCache` used to cache and
+    # revalidate GET responses. None means responses are not cached.
+    response_cache = None
+
+    # Number of seconds a cached response is used without revalidation
+    response_cache_ttl = None
+
+    # Callables which receive a :class:`RequestEvent` after each request
+    # attempt (see add_observer)
+    observers = ()
+
+    # Pool of keep-alive connections which are reused between requests to the
+    # same endpoint. Set to None to open a new connection for each request.
+    connection_pool = DEFAULT_CONNECTION_POOL
+
+    # State of the request in progress is local to the thread which issued it
+    connection = RequestLocal('connection')
+    action = RequestLocal('action')
+    method = RequestLocal('method')
+    data = RequestLocal('data')
+    stream = RequestLocal('stream', default=False)
+    cached_response = RequestLocal('cached_response')
+    request_event = RequestLocal('request_event')
+    context = RequestLocal('context', default=dict)
+
     allow_insecure = True
 
     def __init__(self, secure=True, host=None, port=None, url=None,
@@ -579,6 +1111,24 @@ class Connection(object):
         """
         self.proxy_url = proxy_url
 
+    def add_observer(self, observer):
+        """
+        Register a callable which receives a
+        :class:`libcloud.common.instrumentation.RequestEvent` with timings
+        and other details after each request attempt.
+
+        :param observer: Callable which accepts a single argument.
+        :type observer: ``callable``
+        """
+        self.observers = list(self.observers) + [observer]
+
+    def remove_observer(self, observer):
+        """
+        Unregister an observer registered with :meth:`add_observer`.
+        """
+        self.observers = [item for item in self.observers
+                          if item != observer]
+
     def set_context(self, context):
         if not isinstance(context, dict):
             raise TypeError('context needs to be a dictionary')
@@ -668,7 +1218,15 @@ class Connection(object):
         if self.proxy_url:
             kwargs.update({'proxy_url': self.proxy_url})
 
-        connection = self.conn_classes[secure](**kwargs)
+        conn_cls = self.conn_classes[secure]
+
+        if self.connection_pool is not None:
+            key = (conn_cls, secure, tuple(sorted(kwargs.items())))
+            factory = functools.partial(conn_cls, **kwargs)
+            connection = self.connection_pool.acquire(key=key,
+                                                      factory=factory)
+        else:
+            connection = conn_cls(**kwargs)
         # You can uncoment this line, if you setup a reverse proxy server
         # which proxies to your endpoint, and lets you easily capture
         # connections in cleartext when you setup the proxy to do SSL
@@ -703,7 +1261,7 @@ class Connection(object):
         self.ua.append(token)
 
     def request(self, action, params=None, data=None, headers=None,
-                method='GET', raw=False):
+                method='GET', raw=False, stream=False):
         """
         Request a given `action`.
 
@@ -733,76 +1291,164 @@ class Connection(object):
                      and use the rawResponseCls class. This is used with
                      storage API when uploading a file.
 
+        :type stream: ``bool``
+        :param stream: True to not read the body of a successful response
+                       upfront. The body can then be parsed incrementally
+                       using :meth:`XmlResponse.iterparse` or
+                       :meth:`JsonResponse.iter_items`. The underlying
+                       connection is held until the body has been consumed.
+
         :return: An :class:`Response` instance.
         :rtype: :class:`Response` instance
 
         """
-        if params is None:
-            params = {}
-        else:
-            params = copy.copy(params)
+        self.stream = stream
 
-        if headers is None:
-            headers = {}
-        else:
-            headers = copy.copy(headers)
+        cache_key = None
+        cached_response = None
 
-        retry_enabled = os.environ.get('LIBCLOUD_RETRY_FAILED_HTTP_REQUESTS',
-                                       False) or RETRY_FAILED_HTTP_REQUESTS
+        if self.response_cache is not None and method == 'GET' and \
+           not raw and not stream:
+            cache_key = self.get_cache_key(action=action, params=params,
+                                           headers=headers)
+            cached = self.response_cache.get(
+                cache_key, ttl=self.response_cache.get_ttl(self))
 
-        action = self.morph_action_hook(action)
-        self.action = action
-        self.method = method
-        self.data = data
+            if cached is not None:
+                cached_response, fresh = cached
 
-        # Extend default parameters
-        params = self.add_default_params(params)
+                if fresh:
+                    self.reset_context()
+                    return cached_response
 
-        # Add cache busting parameters (if enabled)
-        if self.cache_busting and method == 'GET':
-            params = self._add_cache_busting_to_params(params=params)
+                headers = self._add_conditional_headers(headers,
+                                                        cached_response)
+                self.cached_response = cached_response
 
-        # Extend default headers
-        headers = self.add_default_headers(headers)
+        try:
+            response = self._request_with_retries(action=action,
+                                                  params=params, data=data,
+                                                  headers=headers,
+                                                  method=method, raw=raw)
+        finally:
+            self.cached_response = None
 
-        # We always send a user-agent header
-        headers.update({'User-Agent': self._user_agent()})
+        if cache_key is not None and self._is_cacheable(response):
+            revalidated = cached_response is not None and \
+                response.object is cached_response.object
+            self.response_cache.put(cache_key, response,
+                                    revalidated=revalidated)
 
-        # Indicate that we support gzip and deflate compression
-        headers.update({'Accept-Encoding': 'gzip,deflate'})
+        return response
 
-        port = int(self.port)
+    def _request_with_retries(self, action, params=None, data=None,
+                              headers=None, method='GET', raw=False):
+        """
+        Perform a request using the ``retry_policy`` (if any).
 
-        if port not in (80, 443):
-            headers.update({'Host': "%s:%d" % (self.host, port)})
-        else:
-            headers.update({'Host': self.host})
+        @inherits: :class:`Connection.request`
+        """
+        # Raw requests are not retried because the caller sends the body
+        if self.retry_policy is None or raw:
+            return self._request_attempt(action=action, params=params,
+                                         data=data, headers=headers,
+                                         method=method, raw=raw)
 
-        if data:
-            data = self.encode_data(data)
-            headers['Content-Length'] = str(len(data))
-        elif method.upper() in ['POST', 'PUT'] and not raw:
-            # Only send Content-Length 0 with POST and PUT request.
-            #
-            # Note: Content-Length is not added when using "raw" mode means
-            # means that headers are upfront and the body is sent at some point
-            # later on. With raw mode user can specify Content-Length with
-            # "data" not being set.
-            headers['Content-Length'] = '0'
+        context = self.context
+        attempts = [0]
 
-        params, headers = self.pre_connect_hook(params, headers)
+        def send_request():
+            # Context is reset after each attempt, but it's needed by the
+            # response class of the next one
+            self.context = context
+            attempts[0] += 1
+            return self._request_attempt(action=action, params=params,
+                                         data=data, headers=headers,
+                                         method=method, raw=raw,
+                                         retries=attempts[0] - 1)
 
-        if params:
-            if '?' in action:
-                url = '&'.join((action, urlencode(params, doseq=True)))
-            else:
-                url = '?'.join((action, urlencode(params, doseq=True)))
-        else:
-            url = action
+        return self.retry_policy.call(send_request)
+
+    def _request_attempt(self, action, params=None, data=None, headers=None,
+                         method='GET', raw=False, retries=0):
+        """
+        Perform a single attempt of a request.
+
+        All the request hooks are run again for each attempt so signatures
+        and timestamps are up to date when a request is retried.
+
+        :param retries: Number of previous attempts of this request.
+        :type retries: ``int``
+
+        @inherits: :class:`Connection.request`
+        """
+        if not self.observers:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(self.get_rate_limit_key(
+                    action=action, params=params, method=method))
+
+            return self._perform_request(action=action, params=params,
+                                         data=data, headers=headers,
+                                         method=method, raw=raw)
+
+        driver = self.driver
+        event = RequestEvent(driver=getattr(driver, 'name', None) or
+                             self.__class__.__name__,
+                             host=self.host, action=action, method=method,
+                             params=params, retries=retries)
+        start = time.time()
+
+        try:
+            if self.rate_limiter is not None:
+                event.timings['wait'] = self.rate_limiter.acquire(
+                    self.get_rate_limit_key(action=action, params=params,
+                                            method=method))
+
+            self.request_event = event
+            response = self._perform_request(action=action, params=params,
+                                             data=data, headers=headers,
+                                             method=method, raw=raw)
+            event.status = response.status
+            return response
+        except Exception:
+            event.error = sys.exc_info()[1]
+            event.status = getattr(event.error, 'code', None)
+            raise
+        finally:
+            self.request_event = None
+            event.timings['total'] = time.time() - start
+            self._notify_observers(event)
+
+    def _notify_observers(self, event):
+        """
+        Pass a request event to all the registered observers. Errors raised
+        by an observer don't affect the request.
+        """
+        for observer in self.observers:
+            try:
+                observer(event)
+            except Exception:
+                pass
+
+    def _perform_request(self, action, params=None, data=None, headers=None,
+                         method='GET', raw=False):
+        """
+        Send a request and build the response object.
+
+        @inherits: :class:`Connection.request`
+        """
+        retry_enabled = os.environ.get('LIBCLOUD_RETRY_FAILED_HTTP_REQUESTS',
+                                       False) or RETRY_FAILED_HTTP_REQUESTS
+
+        url, data, headers = self._prepare_request(action=action,
+                                                   params=params, data=data,
+                                                   headers=headers,
+                                                   method=method, raw=raw)
 
         # Removed terrible hack...this a less-bad hack that doesn't execute a
         # request twice, but it's still a hack.
         self.connect()
+        http_response = None
         try:
             # @TODO: Should we just pass File object as body to request method
             # instead of dealing with splitting and sending the file ourselves?
@@ -820,13 +1466,12 @@ class Connection(object):
                     retry_request = retry(timeout=self.timeout,
                                           retry_delay=self.retry_delay,
                                           backoff=self.backoff)
-                    retry_request(self.connection.request)(method=method,
-                                                           url=url,
-                                                           body=data,
-                                                           headers=headers)
+                    send_request = retry_request(self._send_request)
                 else:
-                    self.connection.request(method=method, url=url, body=data,
-                                            headers=headers)
+                    send_request = self._send_request
+
+                http_response = send_request(method=method, url=url,
+                                             body=data, headers=headers)
         except socket.gaierror:
             e = sys.exc_info()[1]
             message = str(e)
@@ -844,19 +1489,24 @@ class Connection(object):
                        (message, class_name, self.host))
                 raise socket.gaierror(msg)
             self.reset_context()
+            self._discard_connection()
             raise e
         except ssl.SSLError:
             e = sys.exc_info()[1]
             self.reset_context()
+            self._discard_connection()
             raise ssl.SSLError(str(e))
+        except Exception:
+            self.reset_context()
+            self._discard_connection()
+            raise
 
         if raw:
             responseCls = self.rawResponseCls
             kwargs = {'connection': self}
         else:
             responseCls = self.responseCls
-            kwargs = {'connection': self,
-                      'response': self.connection.getresponse()}
+            kwargs = {'connection': self, 'response': http_response}
 
         try:
             response = responseCls(**kwargs)
@@ -864,8 +1514,241 @@ class Connection(object):
             # Always reset the context after the request has completed
             self.reset_context()
 
+            # Body of a non-raw response has been fully read at this point so
+            # the connection can be reused by another request. Raw responses
+            # hold the connection until the body has been consumed.
+            if not raw and self.connection_pool is not None:
+                self.connection_pool.release(self.connection, http_response)
+
+        return response
+
+    def _send_request(self, method, url, body, headers):
+        """
+        Send a request over the current connection and return the HTTP
+        response.
+
+        If a kept-alive connection from the pool has been closed by the server
+        in the mean time, it's transparently replaced with a new connection
+        and the request is sent again.
+        """
+        event = self.request_event
+
+        if event is not None:
+            # Only set when a new connection is established
+            self.connection.connect_timings = None
+
+            if body is not None and hasattr(body, '__len__'):
+                event.bytes_sent = len(body)
+
+            start = time.time()
+
+        try:
+            self.connection.request(method=method, url=url, body=body,
+                                    headers=headers)
+            response = self.connection.getresponse()
+        except RECONNECT_EXCEPTIONS:
+            e = sys.exc_info()[1]
+            pool = self.connection_pool
+
+            # Timeout means the server might have received the request so it's
+            # not safe to send it again
+            if pool is None or not pool.is_reused(self.connection) or \
+               isinstance(e, socket.timeout):
+                raise
+
+            self.connection = pool.reconnect(self.connection)
+            self.connection.request(method=method, url=url, body=body,
+                                    headers=headers)
+            response = self.connection.getresponse()
+
+        if event is not None:
+            event.timings['ttfb'] = time.time() - start
+            connect_timings = getattr(self.connection, 'connect_timings',
+                                      None)
+
+            if connect_timings:
+                event.timings.update(connect_timings)
+
         return response
 
+    def _discard_connection(self):
+        """
+        Make sure a connection which is in an unknown state after a failed
+        request is not put back in the pool.
+        """
+        if self.connection_pool is not None and self.connection is not None:
+            self.connection_pool.discard(self.connection)
+
+    def _prepare_request(self, action, params=None, data=None, headers=None,
+                         method='GET', raw=False):
+        """
+        Run all the request hooks (morph_action_hook, add_default_params,
+        add_default_headers, pre_connect_hook, ...) and return the final url,
+        encoded body and headers of the request.
+
+        :rtype: ``tuple`` (``url``, ``data``, ``headers``)
+        """
+        if params is None:
+            params = {}
+        else:
+            params = copy.copy(params)
+
+        if headers is None:
+            headers = {}
+        else:
+            headers = copy.copy(headers)
+
+        action = self.morph_action_hook(action)
+        self.action = action
+        self.method = method
+        self.data = data
+
+        # Extend default parameters
+        params = self.add_default_params(params)
+
+        # Add cache busting parameters (if enabled)
+        if self.cache_busting and method == 'GET':
+            params = self._add_cache_busting_to_params(params=params)
+
+        # Extend default headers
+        headers = self.add_default_headers(headers)
+
+        # We always send a user-agent header
+        headers.update({'User-Agent': self._user_agent()})
+
+        # Indicate that we support gzip and deflate compression
+        headers.update({'Accept-Encoding': 'gzip,deflate'})
+
+        port = int(self.port)
+
+        if port not in (80, 443):
+            headers.update({'Host': "%s:%d" % (self.host, port)})
+        else:
+            headers.update({'Host': self.host})
+
+        if data:
+            data = self.encode_data(data)
+            headers['Content-Length'] = str(len(data))
+        elif method.upper() in ['POST', 'PUT'] and not raw:
+            # Only send Content-Length 0 with POST and PUT request.
+            #
+            # Note: Content-Length is not added when using "raw" mode means
+            # means that headers are upfront and the body is sent at some point
+            # later on. With raw mode user can specify Content-Length with
+            # "data" not being set.
+            headers['Content-Length'] = '0'
+
+        params, headers = self.pre_connect_hook(params, headers)
+
+        if params:
+            if '?' in action:
+                url = '&'.join((action, urlencode(params, doseq=True)))
+            else:
+                url = '?'.join((action, urlencode(params, doseq=True)))
+        else:
+            url = action
+
+        return url, data, headers
+
+    def get_cache_key(self, action, params=None, headers=None):
+        """
+        Return the ``response_cache`` key of a GET request.
+
+        The key includes the identity of the account so responses are never
+        shared between connections which use different credentials.
+
+        :rtype: ``tuple``
+        """
+        params = params or {}
+        headers = headers or {}
+
+        if isinstance(params, dict):
+            params = list(params.items())
+
+        return (self.__class__.__name__, self._get_account_hash(), self.host,
+                self.port, self.request_path, action,
+                tuple(sorted((str(key), str(value))
+                             for key, value in params)),
+                tuple(sorted((str(key).lower(), str(value))
+                             for key, value in headers.items())))
+
+    def _is_cacheable(self, response):
+        """
+        Return True if the response can be stored in the ``response_cache``.
+        Only successful responses which can be revalidated (or which are
+        cached for a fixed time) are stored.
+        """
+        if int(response.status) != httplib.OK or response.body is None:
+            return False
+
+        if self.response_cache.get_ttl(self) > 0:
+            return True
+
+        return 'etag' in response.headers or \
+            'last-modified' in response.headers
+
+    def _add_conditional_headers(self, headers, cached_response):
+        """
+        Return a copy of request headers with the validators of a cached
+        response (``If-None-Match`` / ``If-Modified-Since``).
+        """
+        headers = copy.copy(headers) if headers else {}
+        etag = cached_response.headers.get('etag', None)
+        last_modified = cached_response.headers.get('last-modified', None)
+
+        if etag:
+            headers['If-None-Match'] = etag
+
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        return headers
+
+    def _get_account_hash(self):
+        """
+        Return a hash which identifies the account credentials used by this
+        connection without revealing them.
+
+        :rtype: ``str``
+        """
+        account = '%s:%s' % (getattr(self, 'user_id', None),
+                             getattr(self, 'key', None))
+        return hashlib.sha1(b(account)).hexdigest()[:16]
+
+    def get_rate_limit_key(self, action, params=None, method='GET'):
+        """
+        Return the key of the ``rate_limiter`` token bucket a request
+        acquires a token from.
+
+        Requests made by different drivers with the same provider, account
+        and endpoint share a bucket. Account credentials are hashed so they
+        are never stored by a rate limiter backend.
+
+        :rtype: ``tuple``
+        """
+        driver_type = getattr(self.driver, 'type', None) or \
+            self.__class__.__name__
+        return (driver_type, self._get_account_hash(), self.host,
+                self.get_rate_limit_action_class(action=action,
+                                                 params=params or {},
+                                                 method=method))
+
+    def get_rate_limit_action_class(self, action, params, method):
+        """
+        Return the action class of a request (last item of the rate limit
+        key) which can have its own rate in the ``rate_limiter``.
+
+        By default requests which don't modify any resources are ``read``
+        and the rest are ``write`` requests. Override in a provider's
+        subclass if the provider limits API calls differently.
+
+        :rtype: ``str``
+        """
+        if method.upper() in ['GET', 'HEAD', 'OPTIONS']:
+            return 'read'
+
+        return 'write'
+
     def morph_action_hook(self, action):
         return self.request_path + action
 
@@ -1138,6 +2021,18 @@ class BaseDriver(object):
                        support multiple regions.
         :type region: ``str``
 
+        :param retry_policy: Optional policy used to retry throttled
+                             requests (keyword argument).
+        :type retry_policy: :class:`libcloud.common.retry.RetryPolicy`
+
+        :param rate_limiter: Optional rate limiter which admits requests
+                             (keyword argument).
+        :type rate_limiter: :class:`libcloud.common.ratelimit.RateLimiter`
+
+        :param response_cache: Optional cache of GET responses (keyword
+                               argument).
+        :type response_cache: :class:`libcloud.common.cache.ResponseCache`
+
         :rtype: ``None``
         """
 
@@ -1174,8 +2069,21 @@ class BaseDriver(object):
             if value is not None or kwarg_name not in conn_kwargs:
                 conn_kwargs[kwarg_name] = value
 
+        retry_policy = kwargs.pop('retry_policy', None)
+        rate_limiter = kwargs.pop('rate_limiter', None)
+        response_cache = kwargs.pop('response_cache', None)
+
         self.connection = self.connectionCls(*args, **conn_kwargs)
 
+        if retry_policy is not None:
+            self.connection.retry_policy = retry_policy
+
+        if rate_limiter is not None:
+            self.connection.rate_limiter = rate_limiter
+
+        if response_cache is not None:
+            self.connection.response_cache = response_cache
+
         self.connection.driver = self
         self.connection.connect()
 
@@ -0,0 +1,196 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Cache of parsed GET responses which are revalidated using conditional
+requests (``If-None-Match`` / ``If-Modified-Since``).
+"""
+
+import time
+import threading
+
+from collections import OrderedDict
+
+__all__ = [
+    'ResponseCache'
+]
+
+DEFAULT_MAX_SIZE = 10 * 1024 * 1024  # maximum size of cached bodies in bytes
+
+
+class ResponseCache(object):
+    """
+    Byte-bounded LRU cache of responses which is attached to a
+    :class:`libcloud.common.base.Connection` (``response_cache`` attribute).
+
+    A cached response is returned without making a request while it's fresh
+    (younger than the TTL). After that, the request is sent with the
+    ``If-None-Match`` / ``If-Modified-Since`` headers and if the server
+    returns ``304 Not Modified``, the cached response body and parsed object
+    are reused without parsing the body again.
+
+    Parsed objects are shared between all the responses returned from the
+    cache so they must not be modified by the caller.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl=0, ttls=None):
+        """
+        :param max_size: Maximum total size of the cached response bodies (in
+                         bytes). Least recently used responses are evicted
+                         once the size is exceeded.
+        :type max_size: ``int``
+
+        :param ttl: Default number of seconds a cached response is returned
+                    without revalidation. 0 means responses are always
+                    revalidated.
+        :type ttl: ``float``
+
+        :param ttls: Optional mapping of driver type (e.g. ``gce``) to TTL.
+                     Takes precedence over the ``response_cache_ttl``
+                     attribute of the connection class.
+        :type ttls: ``dict``
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.ttls = ttls or {}
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (response, size, stored_at)
+        self._size = 0
+
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'revalidated': 0,
+            'evictions': 0
+        }
+
+    @property
+    def size(self):
+        """
+        Total size of the cached response bodies (in bytes).
+
+        :rtype: ``int``
+        """
+        return self._size
+
+    @property
+    def stats(self):
+        """
+        Cache metrics.
+
+        * ``hits`` - responses returned without making a request
+        * ``misses`` - requests for responses which were not cached
+        * ``revalidated`` - cached responses confirmed with a 304 response
+        * ``evictions`` - responses evicted to keep the cache under
+          ``max_size``
+
+        :rtype: ``dict``
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def get_ttl(self, connection):
+        """
+        Return the TTL for responses of the provided connection.
+
+        :rtype: ``float``
+        """
+        driver_type = getattr(connection.driver, 'type', None)
+
+        if driver_type in self.ttls:
+            return self.ttls[driver_type]
+
+        ttl = getattr(connection, 'response_cache_ttl', None)
+        return self.ttl if ttl is None else ttl
+
+    def get(self, key, ttl=0):
+        """
+        Return a (``response``, ``fresh``) tuple for the provided key or
+        None if the response is not cached.
+
+        :param key: Cache key.
+        :type key: ``tuple``
+
+        :param ttl: Number of seconds the cached response is fresh.
+        :type ttl: ``float``
+
+        :rtype: ``tuple``
+        """
+        with self._lock:
+            entry = self._entries.get(key, None)
+
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+
+            # Move to the end (most recently used)
+            del self._entries[key]
+            self._entries[key] = entry
+
+            response, _, stored_at = entry
+            fresh = ttl > 0 and (time.time() - stored_at) < ttl
+
+            if fresh:
+                self._stats['hits'] += 1
+
+        return response, fresh
+
+    def put(self, key, response, revalidated=False):
+        """
+        Store a response in the cache.
+
+        :param key: Cache key.
+        :type key: ``tuple``
+
+        :param response: Successful response with a parsed body.
+        :type response: :class:`libcloud.common.base.Response`
+
+        :param revalidated: True if the response is a cached response which
+                            has been confirmed by the server.
+        :type revalidated: ``bool``
+        """
+        size = len(response.body or '')
+
+        with self._lock:
+            if revalidated:
+                self._stats['revalidated'] += 1
+
+            self._remove(key)
+
+            if size > self.max_size:
+                return
+
+            self._entries[key] = (response, size, time.time())
+            self._size += size
+
+            while self._size > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        """
+        Remove all the cached responses.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self._size -= entry[1]
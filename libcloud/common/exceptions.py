@@ -46,8 +46,12 @@ class RateLimitReachedError(BaseHTTPError):
     code = 429
     message = '%s Rate limit exceeded' % (code)
 
-    def __init__(self, *args, **kwargs):
-        self.retry_after = int(kwargs.pop('retry_after', 0))
+    def __init__(self, code=code, message=message, headers=None,
+                 retry_after=0):
+        self.retry_after = int(retry_after or 0)
+        super(RateLimitReachedError, self).__init__(code=code,
+                                                    message=message,
+                                                    headers=headers)
 
 
 _error_classes = [RateLimitReachedError]
@@ -68,8 +72,12 @@ def exception_from_message(code, message, headers=None):
         'headers': headers
     }
 
-    if headers and 'retry_after' in headers:
-        kwargs['retry_after'] = headers['retry_after']
-
     cls = _code_map.get(code, BaseHTTPError)
+
+    if cls is RateLimitReachedError and headers:
+        if 'retry_after' in headers:
+            kwargs['retry_after'] = headers['retry_after']
+        elif str(headers.get('retry-after', '')).isdigit():
+            kwargs['retry_after'] = headers['retry-after']
+
     return cls(**kwargs)
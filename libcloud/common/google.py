@@ -73,11 +73,9 @@ except ImportError:
     import json
 
 import base64
-import errno
 import time
 import datetime
 import os
-import socket
 import sys
 
 from libcloud.utils.connection import get_response_object
@@ -101,6 +99,9 @@ except ImportError:
 
 UTC_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
 
+# Error reasons Google APIs use to signal that a request has been throttled
+THROTTLING_REASONS = ['rateLimitExceeded', 'userRateLimitExceeded']
+
 
 def _utcnow():
     """
@@ -179,6 +180,25 @@ class GoogleResponse(JsonResponse):
     """
     Google Base Response class.
     """
+    def is_throttled(self):
+        """
+        Google APIs signal throttling using status code 429 or 403 with
+        ``rateLimitExceeded`` / ``userRateLimitExceeded`` error reason.
+        """
+        if super(GoogleResponse, self).is_throttled():
+            return True
+
+        if int(self.status) != httplib.FORBIDDEN:
+            return False
+
+        try:
+            errors = json.loads(self.body)['error'].get('errors', [])
+        except Exception:
+            return False
+
+        return any(error.get('reason') in THROTTLING_REASONS
+                   for error in errors)
+
     def success(self):
         """
         Determine if the request was successful.
@@ -226,6 +246,12 @@ class GoogleResponse(JsonResponse):
         if len(self.body) == 0 and not self.parse_zero_length_body:
             return self.body
 
+        if self.status == httplib.OK and \
+           self.headers.get('content-type', '').startswith('multipart/'):
+            # Response of a batch request, the parts are parsed by the
+            # connection
+            return self.body
+
         json_error = False
         try:
             body = json.loads(self.body)
@@ -745,7 +771,7 @@ class GoogleBaseConnection(ConnectionUserAndKey, PollingConnection):
         """
         @inherits: :class:`Connection.add_default_headers`
         """
-        headers['Content-Type'] = 'application/json'
+        headers.setdefault('Content-Type', 'application/json')
         headers['Host'] = self.host
         return headers
 
@@ -764,27 +790,6 @@ class GoogleBaseConnection(ConnectionUserAndKey, PollingConnection):
         """Encode data to JSON"""
         return json.dumps(data)
 
-    def request(self, *args, **kwargs):
-        """
-        @inherits: :class:`Connection.request`
-        """
-        # Adds some retry logic for the occasional
-        # "Connection Reset by peer" error.
-        retries = 4
-        tries = 0
-        while tries < (retries - 1):
-            try:
-                return super(GoogleBaseConnection, self).request(
-                    *args, **kwargs)
-            except socket.error:
-                e = sys.exc_info()[1]
-                if e.errno == errno.ECONNRESET:
-                    tries = tries + 1
-                else:
-                    raise e
-        # One more time, then give up.
-        return super(GoogleBaseConnection, self).request(*args, **kwargs)
-
     def has_completed(self, response):
         """
         Determine if operation has completed based on response.
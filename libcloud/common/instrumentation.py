@@ -0,0 +1,122 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Instrumentation of the requests made by
+:class:`libcloud.common.base.Connection`.
+
+An observer is a callable which is registered using
+``Connection.add_observer`` and receives a :class:`RequestEvent` after each
+request attempt. Nothing is measured if no observer is registered.
+"""
+
+import threading
+
+__all__ = [
+    'RequestEvent',
+    'RequestStatsObserver'
+]
+
+
+class RequestEvent(object):
+    """
+    Structured information about a single request attempt.
+
+    ``timings`` is a dictionary with the following keys (in seconds). Keys
+    are only present if the corresponding phase took place (e.g. ``dns``,
+    ``connect`` and ``tls`` are missing if a kept-alive connection has been
+    reused):
+
+    * ``dns`` - name resolution
+    * ``connect`` - TCP connect
+    * ``tls`` - TLS handshake
+    * ``ttfb`` - time from sending the request until the response headers
+      have been received (includes ``dns``, ``connect`` and ``tls``)
+    * ``read`` - reading of the response body
+    * ``parse`` - parsing of the response body (``parse_body``)
+    * ``total`` - whole request attempt
+    """
+
+    def __init__(self, driver, host, action, method, params=None,
+                 retries=0):
+        self.driver = driver
+        self.host = host
+        self.action = action
+        self.method = method
+        self.params = params
+        self.retries = retries
+
+        self.status = None
+        self.error = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.timings = {}
+
+    def __repr__(self):
+        return ('<RequestEvent: driver=%s, method=%s, action=%s, status=%s, '
+                'retries=%s, total=%s>' %
+                (self.driver, self.method, self.action, self.status,
+                 self.retries, self.timings.get('total', None)))
+
+
+class RequestStatsObserver(object):
+    """
+    Observer which aggregates request count, errors and total time per
+    (driver, method, action).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def __call__(self, event):
+        key = (event.driver, event.method, event.action)
+
+        with self._lock:
+            stats = self._stats.setdefault(key, {'count': 0, 'errors': 0,
+                                                 'retries': 0,
+                                                 'bytes_received': 0,
+                                                 'time': 0.0})
+            stats['count'] += 1
+            stats['bytes_received'] += event.bytes_received
+            stats['time'] += event.timings.get('total', 0)
+
+            if event.retries:
+                stats['retries'] += 1
+
+            if event.error is not None:
+                stats['errors'] += 1
+
+    @property
+    def stats(self):
+        """
+        Aggregated metrics keyed by (driver, method, action).
+
+        :rtype: ``dict``
+        """
+        with self._lock:
+            return dict((key, dict(value))
+                        for key, value in self._stats.items())
+
+    def get_slowest(self, limit=10):
+        """
+        Return (key, stats) tuples of the calls which took the most time in
+        total.
+
+        :rtype: ``list``
+        """
+        stats = self.stats
+        return sorted(stats.items(), key=lambda item: item[1]['time'],
+                      reverse=True)[:limit]
@@ -17,6 +17,8 @@
 Common utilities for OpenStack
 """
 
+import threading
+
 try:
     from lxml import etree as ET
 except ImportError:
@@ -171,6 +173,9 @@ class OpenStackBaseConnection(ConnectionUserAndKey):
         self._ex_force_service_region = ex_force_service_region
         self._osa = None
 
+        # Makes sure only one thread re-authenticates when the token expires
+        self._auth_lock = threading.Lock()
+
         if ex_force_auth_token and not ex_force_base_url:
             raise LibcloudError(
                 'Must also provide ex_force_base_url when specifying '
@@ -294,6 +299,29 @@ class OpenStackBaseConnection(ConnectionUserAndKey):
         self._populate_hosts_and_request_paths()
         return super(OpenStackBaseConnection, self).morph_action_hook(action)
 
+    def _authenticate(self, osa):
+        """
+        Token is not available or it has expired. Retrieve a new one and
+        update the service catalog.
+        """
+        if self._auth_version == '2.0_apikey':
+            kwargs = {'auth_type': 'api_key'}
+        elif self._auth_version == '2.0_password':
+            kwargs = {'auth_type': 'password'}
+        else:
+            kwargs = {}
+
+        osa = osa.authenticate(**kwargs)  # may throw InvalidCreds
+
+        self.auth_token = osa.auth_token
+        self.auth_token_expires = osa.auth_token_expires
+        self.auth_user_info = osa.auth_user_info
+
+        # Pull out and parse the service catalog
+        osc = OpenStackServiceCatalog(service_catalog=osa.urls,
+                                      auth_version=self._auth_version)
+        self.service_catalog = osc
+
     def _set_up_connection_info(self, url):
         result = self._tuple_from_url(url)
         (self.host, self.port, self.secure, self.request_path) = result
@@ -315,25 +343,11 @@ class OpenStackBaseConnection(ConnectionUserAndKey):
             return
 
         if not osa.is_token_valid():
-            # Token is not available or it has expired. Need to retrieve a
-            # new one.
-            if self._auth_version == '2.0_apikey':
-                kwargs = {'auth_type': 'api_key'}
-            elif self._auth_version == '2.0_password':
-                kwargs = {'auth_type': 'password'}
-            else:
-                kwargs = {}
-
-            osa = osa.authenticate(**kwargs)  # may throw InvalidCreds
-
-            self.auth_token = osa.auth_token
-            self.auth_token_expires = osa.auth_token_expires
-            self.auth_user_info = osa.auth_user_info
-
-            # Pull out and parse the service catalog
-            osc = OpenStackServiceCatalog(service_catalog=osa.urls,
-                                          auth_version=self._auth_version)
-            self.service_catalog = osc
+            with self._auth_lock:
+                # Another thread might have already retrieved a new token
+                # while we were waiting for the lock
+                if not osa.is_token_valid():
+                    self._authenticate(osa=osa)
 
         url = self._ex_force_base_url or self.get_endpoint()
         self._set_up_connection_info(url=url)
@@ -0,0 +1,352 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Keep-alive pool for the HTTP(s) connection objects used by
+:class:`libcloud.common.base.Connection`.
+"""
+
+import select
+import socket
+import threading
+import time
+import weakref
+
+from libcloud.utils.py3 import httplib
+
+__all__ = [
+    'RECONNECT_EXCEPTIONS',
+
+    'ConnectionPool',
+    'DEFAULT_CONNECTION_POOL'
+]
+
+DEFAULT_MAX_SIZE = 10  # maximum number of idle connections per key
+DEFAULT_IDLE_TIMEOUT = 60  # seconds after which an idle connection is dropped
+DEFAULT_MAX_PENDING = 100  # maximum number of unconsumed raw responses
+# seconds after which the connection of an unconsumed raw response is closed
+DEFAULT_PENDING_TIMEOUT = 10 * 60
+
+# Exceptions which indicate that the server has closed a kept-alive socket
+# before (or while) we were sending a request over it
+RECONNECT_EXCEPTIONS = (httplib.BadStatusLine, httplib.CannotSendRequest,
+                        httplib.ResponseNotReady, socket.error)
+
+
+class ConnectionPool(object):
+    """
+    Thread-safe pool of idle keep-alive connections.
+
+    Connections are grouped by a key (connection class, host, port, secure
+    and proxy url) so a connection is only ever handed out to a request
+    which targets the same endpoint.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                 max_pending=DEFAULT_MAX_PENDING,
+                 pending_timeout=DEFAULT_PENDING_TIMEOUT):
+        """
+        :param max_size: Maximum number of idle connections which are kept
+                         per key. Connections released over this limit are
+                         closed.
+        :type max_size: ``int``
+
+        :param idle_timeout: Number of seconds after which an idle connection
+                             is evicted from the pool.
+        :type idle_timeout: ``int``
+
+        :param max_pending: Maximum number of connections which wait for the
+                            body of a raw response to be read. The connection
+                            of the oldest response is closed over this limit.
+        :type max_pending: ``int``
+
+        :param pending_timeout: Number of seconds after which the connection
+                                of a raw response whose body hasn't been read
+                                is closed.
+        :type pending_timeout: ``int``
+        """
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_pending = max_pending
+        self.pending_timeout = pending_timeout
+
+        self._lock = threading.Lock()
+        self._idle = {}  # key -> list of (connection, released_at)
+        # connection -> (key, reused, factory)
+        self._borrowed = weakref.WeakKeyDictionary()
+        # (key, connection, weak reference to the response, released_at) of
+        # raw requests
+        self._pending = []
+
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+        self.evictions = 0
+
+    def acquire(self, key, factory):
+        """
+        Return a connection for the provided key. An idle connection is
+        reused if one is available, otherwise a new one is created by calling
+        ``factory``.
+
+        :param key: Pool key.
+        :type key: ``tuple``
+
+        :param factory: Callable which returns a new connection object.
+        :type factory: ``callable``
+        """
+        now = time.time()
+        connection = None
+
+        with self._lock:
+            self._collect_pending()
+            idle = self._idle.get(key, [])
+
+            while idle:
+                candidate, released_at = idle.pop()
+
+                if (now - released_at) > self.idle_timeout or \
+                   self._is_dropped(candidate):
+                    self.evictions += 1
+                    self._close(candidate)
+                    continue
+
+                connection = candidate
+                break
+
+            if connection is not None:
+                self.hits += 1
+                self._borrowed[connection] = (key, True, factory)
+                return connection
+
+            self.misses += 1
+
+        connection = factory()
+
+        with self._lock:
+            self._borrowed[connection] = (key, False, factory)
+
+        return connection
+
+    def release(self, connection, response=None):
+        """
+        Return a connection to the pool.
+
+        If a response object is provided and its body hasn't been fully
+        consumed yet (e.g. raw streaming requests), the connection is only put
+        back once the body has been read.
+
+        :param connection: Connection returned by :meth:`acquire`.
+
+        :param response: Optional HTTP response object which was received
+                         over this connection.
+        """
+        with self._lock:
+            item = self._borrowed.pop(connection, None)
+
+            if not item:
+                # Connection was not handed out by this pool
+                return
+
+            key = item[0]
+
+            if response is not None and \
+               getattr(response, 'will_close', False):
+                self._close(connection)
+                return
+
+            if response is not None and not self._is_consumed(response):
+                self._add_pending(key, connection, response)
+                return
+
+            self._put(key, connection)
+
+    def discard(self, connection):
+        """
+        Close a connection which was handed out by the pool and forget about
+        it.
+        """
+        with self._lock:
+            self._borrowed.pop(connection, None)
+
+        self._close(connection)
+
+    def is_reused(self, connection):
+        """
+        Return True if the provided borrowed connection has previously been
+        used for another request.
+
+        :rtype: ``bool``
+        """
+        with self._lock:
+            item = self._borrowed.get(connection, None)
+
+        return bool(item and item[1])
+
+    def reconnect(self, connection):
+        """
+        Replace a borrowed connection whose socket was closed by the server
+        with a new one.
+
+        :return: New connection.
+        """
+        with self._lock:
+            key, _, factory = self._borrowed.pop(connection)
+            self.reconnects += 1
+
+        self._close(connection)
+        new_connection = factory()
+
+        with self._lock:
+            self._borrowed[new_connection] = (key, False, factory)
+
+        return new_connection
+
+    def clear(self):
+        """
+        Close all the idle connections in the pool.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, {}
+            pending, self._pending = self._pending, []
+
+        for connections in idle.values():
+            for connection, _ in connections:
+                self._close(connection)
+
+        for _, connection, _, _ in pending:
+            self._close(connection)
+
+    @property
+    def stats(self):
+        """
+        Pool statistics.
+
+        :rtype: ``dict``
+        """
+        with self._lock:
+            self._collect_pending()
+            idle = sum([len(value) for value in self._idle.values()])
+            return {'hits': self.hits, 'misses': self.misses,
+                    'reconnects': self.reconnects,
+                    'evictions': self.evictions, 'idle': idle,
+                    'in_use': len(self._borrowed),
+                    'pending': len(self._pending)}
+
+    def _put(self, key, connection):
+        idle = self._idle.setdefault(key, [])
+
+        if len(idle) >= self.max_size:
+            self._close(connection)
+            return
+
+        idle.append((connection, time.time()))
+
+    def _add_pending(self, key, connection, response):
+        """
+        Hold a connection until the body of its raw response has been read.
+
+        Only a weak reference to the response is kept. If the response is
+        garbage collected while it's still pending (e.g. a stream which has
+        been abandoned), the connection is closed.
+        """
+        close = self._close
+
+        def on_collected(ref):
+            close(connection)
+
+        def strong_ref():
+            return response
+
+        try:
+            response_ref = weakref.ref(response, on_collected)
+        except TypeError:
+            # Response which doesn't support weak references
+            response_ref = strong_ref
+
+        # httplib connection references its last response until it is
+        # closed, the reference would keep an abandoned response alive
+        if getattr(connection, '_HTTPConnection__response', None) is \
+           response:
+            connection._HTTPConnection__response = None
+
+        self._pending.append((key, connection, response_ref, time.time()))
+
+        while len(self._pending) > self.max_pending:
+            _, oldest, _, _ = self._pending.pop(0)
+            self.evictions += 1
+            self._close(oldest)
+
+    def _collect_pending(self):
+        """
+        Move connections of fully consumed raw responses back to the pool and
+        drop the ones of collected or too old responses.
+        """
+        now = time.time()
+        pending = []
+
+        for key, connection, response_ref, released_at in self._pending:
+            response = response_ref()
+
+            if response is None:
+                # Connection has been closed when the response was collected
+                continue
+
+            if self._is_consumed(response):
+                self._put(key, connection)
+            elif (now - released_at) > self.pending_timeout:
+                self.evictions += 1
+                self._close(connection)
+            else:
+                pending.append((key, connection, response_ref, released_at))
+
+        self._pending = pending
+
+    def _is_consumed(self, response):
+        isclosed = getattr(response, 'isclosed', None)
+
+        if isclosed is None:
+            return True
+
+        return isclosed()
+
+    def _is_dropped(self, connection):
+        """
+        Return True if the server has closed an idle connection. Idle socket
+        which is readable means either EOF or unsolicited data and in both
+        cases it can't be reused.
+        """
+        sock = getattr(connection, 'sock', None)
+
+        if sock is None:
+            # Not connected yet or a mock connection
+            return False
+
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (ValueError, TypeError, select.error, socket.error):
+            return True
+
+        return bool(readable)
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+DEFAULT_CONNECTION_POOL = ConnectionPool()
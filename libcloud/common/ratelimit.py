@@ -0,0 +1,279 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Client-side rate limiting (admission control) for the requests made by
+:class:`libcloud.common.base.Connection`.
+
+Requests are admitted using token buckets. Each bucket is identified by a key
+(provider, account, region / endpoint and action class) so all the drivers
+which talk to the same API as the same account share the request budget.
+"""
+
+import os
+import time
+import threading
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+__all__ = [
+    'MemoryBackend',
+    'FileBackend',
+    'RateLimiter'
+]
+
+DEFAULT_RATE = 10  # tokens added to a bucket per second
+DEFAULT_BURST = 20  # maximum number of tokens in a bucket
+
+
+class MemoryBackend(object):
+    """
+    Token bucket storage which is shared by all the threads of a process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}  # key -> (tokens, updated_at)
+
+    def reserve(self, key, rate, burst, tokens=1):
+        """
+        Take ``tokens`` from the bucket identified by ``key`` and return the
+        number of seconds the caller needs to wait before the tokens become
+        available.
+
+        Bucket balance can become negative. This way concurrent callers are
+        admitted in the order in which they have called this method.
+
+        :param key: Bucket key.
+        :type key: ``str``
+
+        :param rate: Number of tokens added to the bucket per second.
+        :type rate: ``float``
+
+        :param burst: Bucket capacity.
+        :type burst: ``float``
+
+        :param tokens: Number of tokens to take.
+        :type tokens: ``float``
+
+        :rtype: ``float``
+        """
+        with self._lock:
+            bucket = self._buckets.get(key, None)
+            balance, delay = _take(bucket=bucket, rate=rate, burst=burst,
+                                   tokens=tokens, now=time.time())
+            self._buckets[key] = balance
+
+        return delay
+
+
+class FileBackend(object):
+    """
+    Token bucket storage in a local file which is shared by all the processes
+    on a host. Access to the file is serialized using an advisory lock
+    (``fcntl.flock``) so this backend is only available on POSIX systems.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Path to the state file. The file is created if it
+                     doesn't exist yet.
+        :type path: ``str``
+        """
+        if fcntl is None:
+            raise ValueError('FileBackend is not supported on this platform')
+
+        self.path = path
+        self._lock = threading.Lock()
+
+    def reserve(self, key, rate, burst, tokens=1):
+        """
+        @inherits: :class:`MemoryBackend.reserve`
+        """
+        # flock() doesn't serialize threads which share a file descriptor
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                buckets = self._read(fd)
+                balance, delay = _take(bucket=buckets.get(key, None),
+                                       rate=rate, burst=burst, tokens=tokens,
+                                       now=time.time())
+                buckets[key] = balance
+                self._write(fd, buckets)
+            finally:
+                os.close(fd)
+
+        return delay
+
+    def _read(self, fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        chunks = []
+
+        while True:
+            chunk = os.read(fd, 8192)
+
+            if not chunk:
+                break
+
+            chunks.append(chunk)
+
+        try:
+            return dict((key, tuple(value)) for key, value in
+                        json.loads(b''.join(chunks).decode('utf-8')).items())
+        except ValueError:
+            # Empty or corrupted state file, start from scratch
+            return {}
+
+    def _write(self, fd, buckets):
+        data = json.dumps(buckets).encode('utf-8')
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, data)
+
+
+class RateLimiter(object):
+    """
+    Token bucket rate limiter which is attached to a
+    :class:`libcloud.common.base.Connection` (``rate_limiter`` attribute).
+
+    Every request acquires a token from the bucket returned by the
+    connection's ``get_rate_limit_key`` method before it's sent. Rates can be
+    configured per action class (e.g. ``describe`` vs ``mutate`` calls in the
+    AWS drivers, ``read`` vs ``write`` calls in the other drivers).
+
+    A single limiter can (and should) be shared by all the drivers which use
+    the same account. Use :class:`FileBackend` to share the budget between
+    processes on the same host.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, rates=None,
+                 backend=None):
+        """
+        :param rate: Default number of requests per second.
+        :type rate: ``float``
+
+        :param burst: Default number of requests which can be made at once
+                      after a period of inactivity.
+        :type burst: ``float``
+
+        :param rates: Optional mapping of action class to a
+                      (``rate``, ``burst``) tuple. A ``None`` value means
+                      requests of that class are not limited.
+        :type rates: ``dict``
+
+        :param backend: Bucket storage. Defaults to :class:`MemoryBackend`.
+        :type backend: :class:`MemoryBackend` or :class:`FileBackend`
+        """
+        self.rate = rate
+        self.burst = burst
+        self.rates = rates or {}
+        self.backend = backend or MemoryBackend()
+
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'delayed': 0,
+            'delay': 0.0
+        }
+
+    @property
+    def stats(self):
+        """
+        Rate limiter metrics.
+
+        * ``requests`` - number of admitted requests
+        * ``delayed`` - number of requests which had to wait for a token
+        * ``delay`` - total time requests spent waiting for a token
+
+        :rtype: ``dict``
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def reserve(self, key, tokens=1):
+        """
+        Take a token for a request and return the number of seconds to wait
+        before the request can be sent. Use this method instead of
+        :meth:`acquire` when the caller can't block (e.g. in a coroutine).
+
+        :param key: Bucket key as returned by
+                    ``Connection.get_rate_limit_key``. The last item of the
+                    key is the action class.
+        :type key: ``tuple``
+
+        :rtype: ``float``
+        """
+        limit = self.rates.get(key[-1], (self.rate, self.burst))
+
+        if limit is None:
+            delay = 0
+        else:
+            rate, burst = limit
+            delay = self.backend.reserve(key='|'.join(str(item) for item in
+                                                      key),
+                                         rate=rate, burst=burst,
+                                         tokens=tokens)
+
+        with self._lock:
+            self._stats['requests'] += 1
+
+            if delay > 0:
+                self._stats['delayed'] += 1
+                self._stats['delay'] += delay
+
+        return delay
+
+    def acquire(self, key, tokens=1):
+        """
+        Block until a token for a request is available.
+
+        @inherits: :class:`RateLimiter.reserve`
+        """
+        delay = self.reserve(key=key, tokens=tokens)
+
+        if delay > 0:
+            time.sleep(delay)
+
+        return delay
+
+
+def _take(bucket, rate, burst, tokens, now):
+    """
+    Refill the bucket and take tokens from it.
+
+    :return: (``tokens``, ``updated_at``) state of the bucket and the number
+             of seconds to wait.
+    :rtype: ``tuple``
+    """
+    if bucket is None:
+        balance = float(burst)
+    else:
+        balance, updated_at = bucket
+        balance = min(float(burst), balance + (now - updated_at) * rate)
+
+    balance -= tokens
+    delay = 0 if balance >= 0 else -balance / float(rate)
+
+    return (balance, now), delay
@@ -0,0 +1,232 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Retry policy for requests which have been throttled by the provider or which
+failed because of a transient network error.
+"""
+
+import sys
+import time
+import errno
+import random
+import socket
+import threading
+
+from libcloud.common.exceptions import RateLimitReachedError
+
+__all__ = [
+    'RetryPolicy'
+]
+
+# Socket errors which are safe to retry
+RETRY_ERRNOS = (errno.ECONNRESET,)
+
+
+class RetryPolicy(object):
+    """
+    Retry policy which is attached to a :class:`libcloud.common.base.
+    Connection` (``retry_policy`` attribute).
+
+    Throttled requests (a response class raises
+    :class:`RateLimitReachedError`, see ``Response.is_throttled``) and
+    requests which failed with one of the ``retry_errnos`` socket errors are
+    retried using exponential backoff with "decorrelated jitter". If the
+    provider returns a ``Retry-After`` header, the policy waits at least that
+    long.
+
+    A single policy can be shared by multiple connections and threads. In
+    that case :attr:`stats` contains aggregated metrics for all of them.
+    """
+
+    def __init__(self, max_retries=5, base_delay=0.5, max_delay=20,
+                 timeout=None, retry_errnos=RETRY_ERRNOS,
+                 retry_exceptions=None):
+        """
+        :param max_retries: Maximum number of retries per request.
+        :type max_retries: ``int``
+
+        :param base_delay: Minimum delay between attempts (in seconds).
+        :type base_delay: ``float``
+
+        :param max_delay: Maximum delay between attempts (in seconds). Delay
+                          requested by the provider using ``Retry-After``
+                          header can be longer.
+        :type max_delay: ``float``
+
+        :param timeout: Optional maximum time spent on a single request
+                        including all the retries (in seconds).
+        :type timeout: ``float``
+
+        :param retry_errnos: Socket error numbers to retry on.
+        :type retry_errnos: ``tuple`` of ``int``
+
+        :param retry_exceptions: Additional exception classes to retry on.
+        :type retry_exceptions: ``tuple``
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.retry_errnos = retry_errnos or ()
+        self.retry_exceptions = retry_exceptions or ()
+
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'retries': 0,
+            'throttled': 0,
+            'errors': 0,
+            'exhausted': 0,
+            'delay': 0.0
+        }
+
+    @property
+    def stats(self):
+        """
+        Retry metrics.
+
+        * ``requests`` - number of requests made using this policy
+        * ``retries`` - total number of retries
+        * ``throttled`` - number of throttled responses
+        * ``errors`` - number of retryable network errors
+        * ``exhausted`` - number of requests which failed after retrying
+        * ``delay`` - total time spent waiting between attempts
+
+        :rtype: ``dict``
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call the provided function and retry it according to this policy.
+        """
+        self.record_request()
+
+        start = time.time()
+        delay = self.base_delay
+        retries = 0
+
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                e = sys.exc_info()[1]
+                delay = self.get_retry_delay(exception=e,
+                                             previous_delay=delay,
+                                             retries=retries,
+                                             elapsed=time.time() - start)
+
+                if delay is None:
+                    raise
+
+            retries += 1
+            time.sleep(delay)
+
+    def get_retry_delay(self, exception, previous_delay, retries, elapsed):
+        """
+        Decide if a failed attempt should be retried and update the metrics
+        accordingly.
+
+        This is the decision part of :meth:`call` which can be used by
+        callers that can't block while waiting (e.g. coroutines).
+
+        :param exception: Exception the attempt failed with.
+        :type exception: ``Exception``
+
+        :param previous_delay: Delay before the previous attempt.
+        :type previous_delay: ``float``
+
+        :param retries: Number of retries made so far.
+        :type retries: ``int``
+
+        :param elapsed: Time spent on the request so far (in seconds).
+        :type elapsed: ``float``
+
+        :return: Number of seconds to wait before the next attempt or None if
+                 the request should not be retried.
+        :rtype: ``float``
+        """
+        if not self.should_retry(exception):
+            return None
+
+        if isinstance(exception, RateLimitReachedError):
+            self._increment('throttled')
+        else:
+            self._increment('errors')
+
+        delay = self.get_delay(previous_delay=previous_delay,
+                               exception=exception)
+
+        if retries >= self.max_retries or \
+           (self.timeout is not None and elapsed + delay > self.timeout):
+            self._increment('exhausted')
+            return None
+
+        self._increment('retries')
+        self._increment('delay', delay)
+        return delay
+
+    def record_request(self):
+        """
+        Count a request made using this policy. Called by :meth:`call`.
+        """
+        self._increment('requests')
+
+    def should_retry(self, exception):
+        """
+        Return True if the request which failed with the provided exception
+        should be retried.
+
+        :rtype: ``bool``
+        """
+        if isinstance(exception, RateLimitReachedError):
+            return True
+
+        if isinstance(exception, socket.error) and \
+           getattr(exception, 'errno', None) in self.retry_errnos:
+            return True
+
+        return bool(self.retry_exceptions) and \
+            isinstance(exception, self.retry_exceptions)
+
+    def get_delay(self, previous_delay, exception=None):
+        """
+        Return the number of seconds to wait before the next attempt.
+
+        :param previous_delay: Delay before the previous attempt.
+        :type previous_delay: ``float``
+
+        :param exception: Exception the previous attempt failed with.
+        :type exception: ``Exception``
+
+        :rtype: ``float``
+        """
+        # Decorrelated jitter - delay grows exponentially on average, but
+        # concurrent clients don't retry in lock step
+        upper = max(self.base_delay, previous_delay * 3)
+        delay = min(self.max_delay, random.uniform(self.base_delay, upper))
+
+        retry_after = getattr(exception, 'retry_after', None)
+
+        if retry_after:
+            delay = max(delay, retry_after)
+
+        return delay
+
+    def _increment(self, name, value=1):
+        with self._lock:
+            self._stats[name] += value
@@ -32,7 +32,7 @@ from libcloud.utils.py3 import b
 import libcloud.compute.ssh
 from libcloud.pricing import get_size_price
 from libcloud.compute.types import NodeState, StorageVolumeState,\
-    DeploymentError
+    DeploymentError, WaitUntilRunningTimeoutError
 from libcloud.compute.ssh import SSHClient
 from libcloud.common.base import ConnectionKey
 from libcloud.common.base import BaseDriver
@@ -41,6 +41,7 @@ from libcloud.compute.ssh import have_paramiko
 
 from libcloud.utils.networking import is_private_subnet
 from libcloud.utils.networking import is_valid_ip_address
+from libcloud.utils.concurrency import run_in_parallel
 
 if have_paramiko:
     from paramiko.ssh_exception import SSHException
@@ -58,6 +59,11 @@ NODE_ONLINE_WAIT_TIMEOUT = 10 * 60
 # script.
 SSH_CONNECT_TIMEOUT = 5 * 60
 
+# deploy_node arguments which are not passed to create_node by deploy_nodes
+DEPLOY_KWARGS = ['deploy', 'ssh_username', 'ssh_alternate_usernames',
+                 'ssh_port', 'ssh_timeout', 'ssh_key', 'timeout', 'max_tries',
+                 'ssh_interface']
+
 
 __all__ = [
     'Node',
@@ -874,6 +880,150 @@ class NodeDriver(BaseDriver):
                                    'public_ips', other option is 'private_ips'.
         :type ssh_interface: ``str``
         """
+        self._check_deploy_supported(kwargs)
+
+        node = self.create_node(**kwargs)
+        password = self._get_deploy_password(node, kwargs)
+        ssh_interface = kwargs.get('ssh_interface', 'public_ips')
+
+        # Wait until node is up and running and has IP assigned
+        try:
+            node, ip_addresses = self.wait_until_running(
+                nodes=[node],
+                wait_period=3,
+                timeout=kwargs.get('timeout', NODE_ONLINE_WAIT_TIMEOUT),
+                ssh_interface=ssh_interface)[0]
+        except Exception:
+            e = sys.exc_info()[1]
+            raise DeploymentError(node=node, original_exception=e, driver=self)
+
+        return self._deploy_running_node(node=node, ip_addresses=ip_addresses,
+                                         ssh_password=password, **kwargs)
+
+    def deploy_nodes(self, count, max_concurrency=10, **kwargs):
+        """
+        Create multiple nodes and run the deployment on all of them.
+
+        The nodes are created with :meth:`_create_nodes` (which uses the
+        provider bulk API when the driver has one), waited for with a single
+        :meth:`wait_until_running` call and then deployed to using a pool of
+        at most ``max_concurrency`` threads.
+
+        When a ``name`` is provided, the nodes are named with the name and a
+        number, for example ``web-000``, ``web-001`` (unless the provider
+        bulk API doesn't support different names).
+
+        Other arguments are the same as for :meth:`deploy_node`.
+
+        :param count: Number of nodes to create.
+        :type count: ``int``
+
+        :param max_concurrency: Maximum number of nodes which are connected
+                                to and deployed at the same time.
+                                (default is 10)
+        :type max_concurrency: ``int``
+
+        :return: ``(nodes, errors)`` tuple with the list of deployed nodes and
+                 the list of exceptions for the nodes which failed. Nodes
+                 which were created but failed later are available as
+                 :class:`DeploymentError` ``node`` attribute, you might want
+                 to destroy them.
+        :rtype: ``tuple``
+        """
+        self._check_deploy_supported(kwargs)
+
+        create_kwargs = dict([(key, value) for key, value in kwargs.items()
+                              if key not in DEPLOY_KWARGS])
+        nodes, errors = self._create_nodes(count=count,
+                                           max_concurrency=max_concurrency,
+                                           **create_kwargs)
+
+        if not nodes:
+            return [], errors
+
+        # Generated passwords are only returned by create_node
+        passwords = dict([(node.uuid, self._get_deploy_password(node, kwargs))
+                          for node in nodes])
+        ssh_interface = kwargs.get('ssh_interface', 'public_ips')
+
+        try:
+            running = self.wait_until_running(
+                nodes=nodes,
+                wait_period=3,
+                timeout=kwargs.get('timeout', NODE_ONLINE_WAIT_TIMEOUT),
+                ssh_interface=ssh_interface)
+        except WaitUntilRunningTimeoutError:
+            e = sys.exc_info()[1]
+            running = e.running
+            errors.extend([DeploymentError(node=node, original_exception=e,
+                                           driver=self)
+                           for node in e.pending])
+        except Exception:
+            e = sys.exc_info()[1]
+            errors.extend([DeploymentError(node=node, original_exception=e,
+                                           driver=self)
+                           for node in nodes])
+            return [], errors
+
+        def deploy(item):
+            node, ip_addresses = item
+            return self._deploy_running_node(
+                node=node, ip_addresses=ip_addresses,
+                ssh_password=passwords.get(node.uuid), **kwargs)
+
+        deployed = []
+        results = run_in_parallel(deploy, running,
+                                  max_workers=max_concurrency)
+
+        for (node, _), (result, error) in zip(running, results):
+            if error is None:
+                deployed.append(result)
+            elif isinstance(error, DeploymentError):
+                errors.append(error)
+            else:
+                errors.append(DeploymentError(node=node,
+                                              original_exception=error,
+                                              driver=self))
+
+        return deployed, errors
+
+    def _create_nodes(self, count, max_concurrency=10, **kwargs):
+        """
+        Create ``count`` nodes with the provided :meth:`create_node`
+        arguments.
+
+        This implementation calls :meth:`create_node` from a pool of at most
+        ``max_concurrency`` threads. Drivers whose API can create multiple
+        nodes with a single request override it.
+
+        :return: ``(nodes, errors)`` tuple with the list of the created nodes
+                 and the list of exceptions for the nodes which couldn't be
+                 created.
+        :rtype: ``tuple``
+        """
+        def create(index):
+            node_kwargs = dict(kwargs)
+            if 'name' in kwargs and count > 1:
+                node_kwargs['name'] = '%s-%03d' % (kwargs['name'], index)
+            return self.create_node(**node_kwargs)
+
+        nodes = []
+        errors = []
+
+        for node, error in run_in_parallel(create, range(count),
+                                           max_workers=max_concurrency):
+            if error is None:
+                nodes.append(node)
+            else:
+                errors.append(error)
+
+        return nodes, errors
+
+    def _check_deploy_supported(self, kwargs):
+        """
+        Raise an exception if the nodes can't be deployed to with the
+        provided :meth:`deploy_node` arguments.
+        """
         if not libcloud.compute.ssh.have_paramiko:
             raise RuntimeError('paramiko is not installed. You can install ' +
                                'it using pip: pip install paramiko')
@@ -896,29 +1046,35 @@ class NodeDriver(BaseDriver):
             raise NotImplementedError(
                 'deploy_node not implemented for this driver')
 
-        node = self.create_node(**kwargs)
-        max_tries = kwargs.get('max_tries', 3)
-
-        password = None
+    def _get_deploy_password(self, node, kwargs):
+        """
+        Return the SSH password for a node created by :meth:`deploy_node`.
+        """
         if 'auth' in kwargs:
             if isinstance(kwargs['auth'], NodeAuthPassword):
-                password = kwargs['auth'].password
+                return kwargs['auth'].password
         elif 'password' in node.extra:
-            password = node.extra['password']
+            return node.extra['password']
 
-        ssh_interface = kwargs.get('ssh_interface', 'public_ips')
+        return None
 
-        # Wait until node is up and running and has IP assigned
-        try:
-            node, ip_addresses = self.wait_until_running(
-                nodes=[node],
-                wait_period=3,
-                timeout=kwargs.get('timeout', NODE_ONLINE_WAIT_TIMEOUT),
-                ssh_interface=ssh_interface)[0]
-        except Exception:
-            e = sys.exc_info()[1]
-            raise DeploymentError(node=node, original_exception=e, driver=self)
+    def _deploy_running_node(self, node, ip_addresses, ssh_password=None,
+                             **kwargs):
+        """
+        Connect to a running node and run the deployment on it.
+
+        :param node: Running node.
+        :type node: :class:`.Node`
 
+        :param ip_addresses: IP addresses of the node to connect to.
+        :type ip_addresses: ``list`` of ``str``
+
+        :param ssh_password: Optional SSH password.
+        :type ssh_password: ``str``
+
+        :rtype: :class:`.Node`
+        """
+        max_tries = kwargs.get('max_tries', 3)
         ssh_username = kwargs.get('ssh_username', 'root')
         ssh_alternate_usernames = kwargs.get('ssh_alternate_usernames', [])
         ssh_port = kwargs.get('ssh_port', 22)
@@ -933,7 +1089,7 @@ class NodeDriver(BaseDriver):
                 self._connect_and_run_deployment_script(
                     task=kwargs['deploy'], node=node,
                     ssh_hostname=ip_addresses[0], ssh_port=ssh_port,
-                    ssh_username=username, ssh_password=password,
+                    ssh_username=username, ssh_password=ssh_password,
                     ssh_key_file=ssh_key_file, ssh_timeout=ssh_timeout,
                     timeout=timeout, max_tries=max_tries)
             except Exception:
@@ -1266,18 +1422,25 @@ class NodeDriver(BaseDriver):
 
     def wait_until_running(self, nodes, wait_period=3,
                            timeout=600, ssh_interface='public_ips',
-                           force_ipv4=True, ex_list_nodes_kwargs=None):
+                           force_ipv4=True, ex_list_nodes_kwargs=None,
+                           max_wait_period=30):
         """
         Block until the provided nodes are considered running.
 
         Node is considered running when it's state is "running" and when it has
         at least one IP address assigned.
 
+        Drivers which support a targeted lookup (see
+        :meth:`_get_nodes_by_id`) only request the nodes which are still
+        pending on each iteration, other drivers fall back to ``list_nodes``.
+
         :param nodes: List of nodes to wait for.
         :type nodes: ``list`` of :class:`.Node`
 
-        :param wait_period: How many seconds to wait between each loop
-                            iteration. (default is 3)
+        :param wait_period: How many seconds to wait between the first loop
+                            iterations. The period grows by 50% after each
+                            iteration in which no node became running and is
+                            reset when some did. (default is 3)
         :type wait_period: ``int``
 
         :param timeout: How many seconds to wait before giving up.
@@ -1294,15 +1457,113 @@ class NodeDriver(BaseDriver):
 
         :param ex_list_nodes_kwargs: Optional driver-specific keyword arguments
                                      which are passed to the ``list_nodes``
-                                     method.
+                                     method. When provided, ``list_nodes`` is
+                                     always used.
         :type ex_list_nodes_kwargs: ``dict``
 
+        :param max_wait_period: Maximum number of seconds to wait between loop
+                                iterations. (default is 30)
+        :type max_wait_period: ``int``
+
         :return: ``[(Node, ip_addresses)]`` list of tuple of Node instance and
                  list of ip_address on success.
         :rtype: ``list`` of ``tuple``
+
+        :raises: :class:`.WaitUntilRunningTimeoutError` with the nodes which
+                 are already running and the ones which are still pending.
         """
         ex_list_nodes_kwargs = ex_list_nodes_kwargs or {}
 
+        if ssh_interface not in ['public_ips', 'private_ips']:
+            raise ValueError('ssh_interface argument must either be' +
+                             'public_ips or private_ips')
+
+        start = time.time()
+        end = start + timeout
+        max_wait_period = max(wait_period, max_wait_period)
+
+        delay = wait_period
+        running = {}
+        pending = list(nodes)
+
+        while time.time() < end:
+            result = self._poll_running_nodes(
+                nodes=pending, ssh_interface=ssh_interface,
+                force_ipv4=force_ipv4,
+                ex_list_nodes_kwargs=ex_list_nodes_kwargs)
+
+            for node, addresses in result:
+                running[node.uuid] = (node, addresses)
+
+            pending = [node for node in pending if node.uuid not in running]
+
+            if not pending:
+                return [running[node.uuid] for node in nodes]
+
+            if result:
+                delay = wait_period
+
+            time.sleep(max(min(delay, end - time.time()), 0))
+            delay = min(delay * 1.5, max_wait_period)
+
+        raise WaitUntilRunningTimeoutError(
+            value='Timed out after %s seconds' % (timeout),
+            running=[running[node.uuid] for node in nodes
+                     if node.uuid in running],
+            pending=pending, driver=self)
+
+    def _get_nodes_by_id(self, nodes):
+        """
+        Return the current version of the provided nodes using a lookup which
+        only requests those nodes.
+
+        Drivers whose API supports such a lookup override this method and
+        :meth:`wait_until_running` uses it instead of ``list_nodes``. Nodes
+        which can't be found (yet) are left out of the result.
+
+        :param nodes: Nodes to look up.
+        :type nodes: ``list`` of :class:`.Node`
+
+        :return: List of nodes or ``None`` if the driver doesn't support a
+                 targeted lookup.
+        :rtype: ``list`` of :class:`.Node` or ``None``
+        """
+        return None
+
+    def _poll_running_nodes(self, nodes, ssh_interface='public_ips',
+                            force_ipv4=True, ex_list_nodes_kwargs=None):
+        """
+        Look up the provided nodes once and return ``[(Node, ip_addresses)]``
+        list for the ones which are running.
+
+        :rtype: ``list`` of ``tuple``
+        """
+        all_nodes = None
+
+        if not ex_list_nodes_kwargs:
+            all_nodes = self._get_nodes_by_id(nodes)
+
+        if all_nodes is None:
+            all_nodes = self.list_nodes(**(ex_list_nodes_kwargs or {}))
+
+        return self._filter_running_nodes(
+            uuids=set([node.uuid for node in nodes]), all_nodes=all_nodes,
+            ssh_interface=ssh_interface, force_ipv4=force_ipv4)
+
+    def _filter_running_nodes(self, uuids, all_nodes,
+                              ssh_interface='public_ips', force_ipv4=True):
+        """
+        Return ``[(Node, ip_addresses)]`` list for the running nodes with the
+        provided uuids.
+
+        :param uuids: UUIDs of the nodes to wait for.
+        :type uuids: ``set`` of ``str``
+
+        :param all_nodes: Current list of nodes.
+        :type all_nodes: ``list`` of :class:`.Node`
+
+        :rtype: ``list`` of ``tuple``
+        """
         def is_supported(address):
             """
             Return True for supported address.
@@ -1318,40 +1579,22 @@ class NodeDriver(BaseDriver):
             """
             return [address for address in addresses if is_supported(address)]
 
-        if ssh_interface not in ['public_ips', 'private_ips']:
-            raise ValueError('ssh_interface argument must either be' +
-                             'public_ips or private_ips')
+        matching_nodes = list([node for node in all_nodes
+                               if node.uuid in uuids])
 
-        start = time.time()
-        end = start + timeout
-
-        uuids = set([node.uuid for node in nodes])
+        if len(matching_nodes) > len(uuids):
+            found_uuids = [node.uuid for node in matching_nodes]
+            msg = ('Unable to match specified uuids ' +
+                   '(%s) with existing nodes. Found ' % (uuids) +
+                   'multiple nodes with same uuid: (%s)' % (found_uuids))
+            raise LibcloudError(value=msg, driver=self)
 
-        while time.time() < end:
-            all_nodes = self.list_nodes(**ex_list_nodes_kwargs)
-            matching_nodes = list([node for node in all_nodes
-                                   if node.uuid in uuids])
-
-            if len(matching_nodes) > len(uuids):
-                found_uuids = [node.uuid for node in matching_nodes]
-                msg = ('Unable to match specified uuids ' +
-                       '(%s) with existing nodes. Found ' % (uuids) +
-                       'multiple nodes with same uuid: (%s)' % (found_uuids))
-                raise LibcloudError(value=msg, driver=self)
-
-            running_nodes = [node for node in matching_nodes
-                             if node.state == NodeState.RUNNING]
-            addresses = [filter_addresses(getattr(node, ssh_interface))
-                         for node in running_nodes]
-
-            if len(running_nodes) == len(uuids) == len(addresses):
-                return list(zip(running_nodes, addresses))
-            else:
-                time.sleep(wait_period)
-                continue
+        running_nodes = [node for node in matching_nodes
+                         if node.state == NodeState.RUNNING]
+        addresses = [filter_addresses(getattr(node, ssh_interface))
+                     for node in running_nodes]
 
-        raise LibcloudError(value='Timed out after %s seconds' % (timeout),
-                            driver=self)
+        return list(zip(running_nodes, addresses))
 
     def _get_and_check_auth(self, auth):
         """
@@ -1411,47 +1654,13 @@ class NodeDriver(BaseDriver):
 
     def _ssh_client_connect(self, ssh_client, wait_period=1.5, timeout=300):
         """
-        Try to connect to the remote SSH server. If a connection times out or
-        is refused it is retried up to timeout number of seconds.
-
-        :param ssh_client: A configured SSHClient instance
-        :type ssh_client: ``SSHClient``
-
-        :param wait_period: How many seconds to wait between each loop
-                            iteration. (default is 1.5)
-        :type wait_period: ``int``
-
-        :param timeout: How many seconds to wait before giving up.
-                        (default is 300)
-        :type timeout: ``int``
+        Try to connect to the remote SSH server. See
+        :func:`ssh_client_connect`.
 
         :return: ``SSHClient`` on success
         """
-        start = time.time()
-        end = start + timeout
-
-        while time.time() < end:
-            try:
-                ssh_client.connect()
-            except SSH_TIMEOUT_EXCEPTION_CLASSES:
-                e = sys.exc_info()[1]
-                message = str(e).lower()
-                expected_msg = 'no such file or directory'
-
-                if isinstance(e, IOError) and expected_msg in message:
-                    # Propagate (key) file doesn't exist errors
-                    raise e
-
-                # Retry if a connection is refused, timeout occurred,
-                # or the connection fails due to failed authentication.
-                ssh_client.close()
-                time.sleep(wait_period)
-                continue
-            else:
-                return ssh_client
-
-        raise LibcloudError(value='Could not connect to the remote SSH ' +
-                            'server. Giving up.', driver=self)
+        return ssh_client_connect(ssh_client, wait_period=wait_period,
+                                  timeout=timeout, driver=self)
 
     def _connect_and_run_deployment_script(self, task, node, ssh_hostname,
                                            ssh_port, ssh_username,
@@ -1526,6 +1735,60 @@ class NodeDriver(BaseDriver):
                               size_id=size_id)
 
 
+def ssh_client_connect(ssh_client, wait_period=1.5, timeout=300, driver=None):
+    """
+    Try to connect to the remote SSH server. If a connection times out or
+    is refused it is retried up to timeout number of seconds.
+
+    :param ssh_client: A configured SSHClient instance
+    :type ssh_client: ``SSHClient``
+
+    :param wait_period: How many seconds to wait between each loop
+                        iteration. (default is 1.5)
+    :type wait_period: ``int``
+
+    :param timeout: How many seconds to wait before giving up.
+                    (default is 300)
+    :type timeout: ``int``
+
+    :param driver: Driver which is passed to the raised exception.
+    :type driver: :class:`NodeDriver`
+
+    :return: ``SSHClient`` on success
+    """
+    start = time.time()
+    end = start + timeout
+    error = None
+
+    while time.time() < end:
+        try:
+            ssh_client.connect()
+        except SSH_TIMEOUT_EXCEPTION_CLASSES:
+            e = sys.exc_info()[1]
+            message = str(e).lower()
+            expected_msg = 'no such file or directory'
+
+            if isinstance(e, IOError) and expected_msg in message:
+                # Propagate (key) file doesn't exist errors
+                raise e
+
+            # Retry if a connection is refused, timeout occurred,
+            # or the connection fails due to failed authentication.
+            error = e
+            ssh_client.close()
+            time.sleep(wait_period)
+            continue
+        else:
+            return ssh_client
+
+    message = 'Could not connect to the remote SSH server. Giving up.'
+
+    if error is not None:
+        message += ' Last error: %s' % (error)
+
+    raise LibcloudError(value=message, driver=driver)
+
+
 if __name__ == '__main__':
     import doctest
     doctest.testmod()
@@ -20,10 +20,21 @@ Provides generic deployment steps for machines post boot.
 from __future__ import with_statement
 
 import os
+import tarfile
+import tempfile
 import binascii
 
+from libcloud.common.types import LibcloudError
 from libcloud.utils.py3 import basestring, PY3
 
+# Shells which read the script from stdin with "-s", other interpreters
+# (python, perl, ruby, ...) use "-"
+SHELL_INTERPRETERS = ['sh', 'bash', 'dash', 'ksh', 'zsh', 'ash']
+
+# Batch uploads are kept in memory up to this size (in bytes) and spooled to
+# a temporary file above it
+ARCHIVE_MEMORY_SIZE = 10 * 1024 * 1024
+
 
 class Deployment(object):
     """
@@ -190,6 +201,32 @@ class ScriptDeployment(Deployment):
 
         return node
 
+    def _run_over_stdin(self, node, client):
+        """
+        Run the script by piping it to the interpreter stdin instead of
+        uploading it first. The client needs to support ``stdin``.
+
+        The interpreter is taken from the script shebang (``/bin/sh`` if
+        there is none).
+        """
+        if self.script.startswith('#!'):
+            interpreter = self.script[2:].split('\n', 1)[0].strip()
+        else:
+            interpreter = '/bin/sh'
+
+        parts = interpreter.split()
+        name = os.path.basename(parts[0])
+
+        if name == 'env' and len(parts) > 1:
+            name = os.path.basename(parts[1])
+
+        flag = '-s' if name in SHELL_INTERPRETERS else '-'
+        cmd = ' '.join([interpreter, flag] + self.args)
+
+        self.stdout, self.stderr, self.exit_status = \
+            client.run(cmd, stdin=self.script)
+        return node
+
 
 class ScriptFileDeployment(ScriptDeployment):
     """
@@ -230,13 +267,23 @@ class ScriptFileDeployment(ScriptDeployment):
 class MultiStepDeployment(Deployment):
     """
     Runs a chain of Deployment steps.
+
+    In batch mode (when the SSH client supports it) consecutive
+    :class:`FileDeployment` steps are uploaded as a single tar archive which
+    is extracted by one remote ``tar`` command and scripts are piped to the
+    interpreter instead of being uploaded and executed. This saves many round
+    trips when a lot of files are installed.
     """
-    def __init__(self, add=None):
+    def __init__(self, add=None, batch=False):
         """
         :type add: ``list``
         :keyword add: Deployment steps to add.
+
+        :type batch: ``bool``
+        :keyword batch: Upload files and run scripts in batch mode.
         """
         self.steps = []
+        self.batch = batch
         self.add(add)
 
     def add(self, add):
@@ -258,6 +305,57 @@ class MultiStepDeployment(Deployment):
 
         See also :class:`Deployment.run`
         """
+        if not self.batch or not getattr(client, 'supports_stdin', False):
+            for s in self.steps:
+                node = s.run(node, client)
+            return node
+
+        files = []
+
         for s in self.steps:
-            node = s.run(node, client)
+            if isinstance(s, FileDeployment):
+                files.append(s)
+                continue
+
+            self._put_files(files, client)
+            files = []
+
+            if isinstance(s, ScriptDeployment):
+                node = s._run_over_stdin(node, client)
+            else:
+                node = s.run(node, client)
+
+        self._put_files(files, client)
         return node
+
+    def _put_files(self, files, client):
+        """
+        Upload the files of the provided file deployments with a single tar
+        archive.
+        """
+        if not files:
+            return
+
+        with tempfile.SpooledTemporaryFile(max_size=ARCHIVE_MEMORY_SIZE) \
+                as archive:
+            tar = tarfile.open(fileobj=archive, mode='w')
+
+            for step in files:
+                info = tar.gettarinfo(step.source)
+                # Keep absolute paths, relative paths are extracted in the
+                # home directory like with put()
+                info.name = step.target
+                info.uid = info.gid = 0
+                info.uname = info.gname = 'root'
+
+                with open(step.source, 'rb') as fp:
+                    tar.addfile(info, fp)
+
+            tar.close()
+            archive.seek(0)
+
+            stdout, stderr, status = client.run('tar -xpPf -', stdin=archive)
+
+        if status != 0:
+            raise LibcloudError('Failed to extract the uploaded files: %s' %
+                                (stderr))
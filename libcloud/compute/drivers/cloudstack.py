@@ -1372,7 +1372,50 @@ class CloudStackNodeDriver(CloudStackDriverMixIn, NodeDriver):
             args['zoneid'] = location.id
 
         vms = self._sync_request('listVirtualMachines', params=args)
-        addrs = self._sync_request('listPublicIpAddresses', params=args)
+        return self._to_listed_nodes(vms=vms.get('virtualmachine', []),
+                                     params=args)
+
+    def _get_nodes_by_id(self, nodes):
+        """
+        Look the provided nodes up with a single ``listVirtualMachines``
+        request filtered on their ids instead of listing all the virtual
+        machines.
+
+        :rtype: ``list`` of :class:`CloudStackNode`
+        """
+        ids = [str(node.id) for node in nodes]
+
+        if len(ids) == 1:
+            params = {'id': ids[0]}
+        else:
+            params = {'ids': ','.join(ids)}
+
+        result = self._sync_request('listVirtualMachines', params=params)
+
+        # Results are filtered here too in case "ids" is not supported by
+        # the API version
+        vms = [vm for vm in result.get('virtualmachine', [])
+               if str(vm['id']) in ids]
+
+        if not vms:
+            return []
+
+        return self._to_listed_nodes(vms=vms, params={})
+
+    def _to_listed_nodes(self, vms, params):
+        """
+        Return the nodes for the provided virtual machines, including their
+        public IP addresses and forwarding rules.
+
+        :param vms: Virtual machine objects returned by listVirtualMachines.
+        :type vms: ``list`` of ``dict``
+
+        :param params: Parameters for the listPublicIpAddresses request.
+        :type params: ``dict``
+
+        :rtype: ``list`` of :class:`CloudStackNode`
+        """
+        addrs = self._sync_request('listPublicIpAddresses', params=params)
         port_forwarding_rules = self._sync_request('listPortForwardingRules')
         ip_forwarding_rules = self._sync_request('listIpForwardingRules')
 
@@ -1387,7 +1430,7 @@ class CloudStackNodeDriver(CloudStackDriverMixIn, NodeDriver):
 
         nodes = []
 
-        for vm in vms.get('virtualmachine', []):
+        for vm in vms:
             public_ips = public_ips_map.get(str(vm['id']), {}).keys()
             public_ips = list(public_ips)
             node = self._to_node(data=vm, public_ips=public_ips)
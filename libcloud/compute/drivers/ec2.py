@@ -18,9 +18,14 @@ Amazon EC2, Eucalyptus, Nimbus and Outscale drivers.
 """
 
 import re
+import os
 import sys
+import json
+import time
 import base64
+import bisect
 import copy
+import datetime
 import warnings
 
 try:
@@ -31,6 +36,7 @@ except ImportError:
 from libcloud.utils.py3 import b, basestring, ensure_string
 
 from libcloud.utils.xml import fixxpath, findtext, findattr, findall
+from libcloud.utils.xml import compile_extractor
 from libcloud.utils.publickey import get_pubkey_ssh2_fingerprint
 from libcloud.utils.publickey import get_pubkey_comment
 from libcloud.utils.iso8601 import parse_date
@@ -38,6 +44,7 @@ from libcloud.common.aws import AWSBaseResponse, SignedAWSConnection
 from libcloud.common.aws import DEFAULT_SIGNATURE_VERSION
 from libcloud.common.types import (InvalidCredsError, MalformedResponseError,
                                    LibcloudError)
+from libcloud.common.exceptions import BaseHTTPError
 from libcloud.compute.providers import Provider
 from libcloud.compute.base import Node, NodeDriver, NodeLocation, NodeSize
 from libcloud.compute.base import NodeImage, StorageVolume, VolumeSnapshot
@@ -74,6 +81,7 @@ __all__ = [
     'EC2RouteTable',
     'EC2Route',
     'EC2SubnetAssociation',
+    'EC2ImageCatalog',
     'ExEC2AvailabilityZone',
 
     'IdempotentParamError'
@@ -1832,6 +1840,10 @@ OUTSCALE_INC_REGION_DETAILS = {
 """
 Define the extra dictionary for specific resources
 """
+# Functions compiled from the mappings by BaseEC2NodeDriver._get_extra_dict,
+# keyed by id(mapping)
+_EXTRA_DICT_EXTRACTORS = {}
+
 RESOURCE_EXTRA_ATTRIBUTES_MAP = {
     'ebs_volume': {
         'snapshot_id': {
@@ -1886,6 +1898,10 @@ RESOURCE_EXTRA_ATTRIBUTES_MAP = {
             'xpath': 'imageState',
             'transform_func': str
         },
+        'creation_date': {
+            'xpath': 'creationDate',
+            'transform_func': str
+        },
         'owner_id': {
             'xpath': 'imageOwnerId',
             'transform_func': str
@@ -2325,7 +2341,7 @@ class EC2Response(AWSBaseResponse):
                                          body=self.body, driver=EC2NodeDriver)
 
         for err in body.findall('Errors/Error'):
-            code, message = err.getchildren()
+            code, message = list(err)
             err_list.append('%s: %s' % (code.text, message.text))
             if code.text == 'InvalidClientTokenId':
                 raise InvalidCredsError(err_list[-1])
@@ -2660,6 +2676,299 @@ class EC2SubnetAssociation(object):
         return (('<EC2SubnetAssociation: id=%s>') % (self.id))
 
 
+class EC2ImageCatalog(object):
+    """
+    Local catalog of EC2 images indexed by ID, name, owner and tag.
+
+    Images are requested with :meth:`refresh` and can then be looked up
+    without sending any requests. If a path is provided, the catalog is
+    stored in that file (a JSON document with an entry per region) and
+    loaded from it when the catalog is created.
+    """
+
+    # Maximum number of days covered by the creation-date filter of an
+    # incremental refresh. Older "since" dates refresh all the images.
+    MAX_INCREMENTAL_DAYS = 200
+
+    def __init__(self, driver, path=None):
+        """
+        :param      driver: EC2 driver used to request the images.
+        :type       driver: :class:`BaseEC2NodeDriver`
+
+        :param      path: Optional path of the file the catalog is stored in.
+        :type       path: ``str``
+        """
+        self.driver = driver
+        self.path = path
+        self.region = getattr(driver, 'region_name', None) or \
+            driver.connection.host
+
+        # Time of the last refresh, keyed by owner ('*' for all the owners)
+        self.refreshed = {}
+
+        # IDs of the images returned by the last refresh of each owner
+        self._sources = {}
+
+        self._images = {}
+        self._by_name = {}
+        self._by_owner = {}
+        self._by_tag = {}
+
+        # Sorted (name, id) tuples used for the name prefix searches. Built
+        # on demand after the catalog has changed.
+        self._names = None
+
+        if self.path:
+            self.load()
+
+    def __len__(self):
+        return len(self._images)
+
+    def __contains__(self, image_id):
+        return image_id in self._images
+
+    def refresh(self, owner=None, filters=None, since=None):
+        """
+        Request the images and add them to the catalog.
+
+        A refresh of all the images of an owner (no filters and no since
+        date) also removes the images of the previous refresh of this owner
+        which are not available anymore.
+
+        :param      owner: Only request the images of this owner
+                           (amazon|aws-marketplace|self|all|aws id).
+        :type       owner: ``str``
+
+        :param      filters: Filters of the DescribeImages request.
+        :type       filters: ``dict``
+
+        :param      since: Only request the images created since this date.
+        :type       since: :class:`datetime.datetime` or
+                           :class:`datetime.date`
+
+        :return:    Number of images returned by the request.
+        :rtype:     ``int``
+        """
+        filters = dict(filters or {})
+        complete = not filters
+
+        if since is not None:
+            dates = self._get_creation_date_filter(since)
+            if dates is not None:
+                filters['creation-date'] = dates
+                complete = False
+
+        key = owner or '*'
+        seen = set()
+
+        for image in self.driver.iterate_images(ex_owner=owner,
+                                                ex_filters=filters or None):
+            self._add(image)
+            seen.add(image.id)
+
+        if complete:
+            for image_id in set(self._sources.get(key, [])) - seen:
+                if not any(image_id in ids for other, ids in
+                           self._sources.items() if other != key):
+                    self._remove(image_id)
+            self._sources[key] = seen
+        else:
+            self._sources.setdefault(key, set()).update(seen)
+
+        self.refreshed[key] = time.time()
+
+        if self.path:
+            self.save()
+
+        return len(seen)
+
+    def get(self, image_id):
+        """
+        Return the image with the provided ID or None if it's not in the
+        catalog.
+
+        :rtype: :class:`NodeImage`
+        """
+        return self._images.get(image_id)
+
+    def find(self, name=None, name_prefix=None, owner=None, tags=None):
+        """
+        Return the images of the catalog which match all the provided
+        criteria, sorted by name.
+
+        :param      name: Name of the images.
+        :type       name: ``str``
+
+        :param      name_prefix: Prefix of the name of the images.
+        :type       name_prefix: ``str``
+
+        :param      owner: Owner ID or alias (e.g. amazon) of the images.
+        :type       owner: ``str``
+
+        :param      tags: Tags (key/value pairs) of the images.
+        :type       tags: ``dict``
+
+        :rtype:     ``list`` of :class:`NodeImage`
+        """
+        candidates = None
+
+        def intersect(ids):
+            if candidates is None:
+                return set(ids)
+            return candidates & ids
+
+        if owner is not None:
+            candidates = intersect(self._by_owner.get(owner, set()))
+
+        for tag in (tags or {}).items():
+            candidates = intersect(self._by_tag.get(tag, set()))
+
+        if name is not None:
+            candidates = intersect(self._by_name.get(name, set()))
+
+        if name_prefix is not None:
+            names = self._get_sorted_names()
+            index = bisect.bisect_left(names, (name_prefix, ''))
+            ids = set()
+            while index < len(names) and \
+                    names[index][0].startswith(name_prefix):
+                ids.add(names[index][1])
+                index += 1
+            candidates = intersect(ids)
+
+        if candidates is None:
+            candidates = self._images.keys()
+
+        images = [self._images[image_id] for image_id in candidates]
+        return sorted(images, key=lambda image: (image.name or '', image.id))
+
+    def load(self):
+        """
+        Load the catalog of the region from the file.
+        """
+        filename = os.path.realpath(os.path.expanduser(self.path))
+
+        try:
+            with open(filename, 'r') as f:
+                catalog = json.load(f)[self.region]
+            images = catalog['images']
+        except (IOError, ValueError, KeyError, TypeError):
+            return
+
+        self.refreshed = catalog.get('refreshed', {})
+        self._sources = dict((key, set(ids)) for key, ids in
+                             catalog.get('sources', {}).items())
+
+        for image_id, (name, extra) in images.items():
+            self._add(NodeImage(id=image_id, name=name, driver=self.driver,
+                                extra=extra))
+
+    def save(self):
+        """
+        Store the catalog of the region in the file. Catalogs of other
+        regions in the file are kept.
+        """
+        filename = os.path.realpath(os.path.expanduser(self.path))
+
+        try:
+            with open(filename, 'r') as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            data = {}
+
+        if not isinstance(data, dict):
+            data = {}
+
+        data[self.region] = {
+            'refreshed': self.refreshed,
+            'sources': dict((key, sorted(ids)) for key, ids in
+                            self._sources.items()),
+            'images': dict((image.id, [image.name, image.extra]) for image in
+                           self._images.values())
+        }
+
+        # Write to a temporary file first so concurrent readers never see a
+        # partially written file
+        tmp_filename = '%s.%s.tmp' % (filename, os.getpid())
+        try:
+            with os.fdopen(os.open(tmp_filename,
+                                   os.O_CREAT | os.O_WRONLY | os.O_TRUNC,
+                                   int('600', 8)), 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.rename(tmp_filename, filename)
+        except (IOError, OSError, TypeError, ValueError):
+            # The catalog file is only an optimization. TypeError and
+            # ValueError are raised for extra values which can't be
+            # serialized.
+            try:
+                os.remove(tmp_filename)
+            except OSError:
+                pass
+
+    def _add(self, image):
+        if image.id in self._images:
+            self._remove(image.id)
+
+        self._images[image.id] = image
+        self._by_name.setdefault(image.name, set()).add(image.id)
+
+        for owner in [image.extra.get('owner_id'),
+                      image.extra.get('owner_alias')]:
+            if owner:
+                self._by_owner.setdefault(owner, set()).add(image.id)
+
+        for tag in (image.extra.get('tags') or {}).items():
+            self._by_tag.setdefault(tag, set()).add(image.id)
+
+        self._names = None
+
+    def _remove(self, image_id):
+        image = self._images.pop(image_id)
+
+        indexes = [(self._by_name, [image.name])]
+        indexes.append((self._by_owner, [image.extra.get('owner_id'),
+                                         image.extra.get('owner_alias')]))
+        indexes.append((self._by_tag,
+                        list((image.extra.get('tags') or {}).items())))
+
+        for index, keys in indexes:
+            for key in keys:
+                ids = index.get(key)
+                if ids is None:
+                    continue
+                ids.discard(image_id)
+                if not ids:
+                    del index[key]
+
+        self._names = None
+
+    def _get_sorted_names(self):
+        if self._names is None:
+            self._names = sorted((image.name or '', image.id) for image in
+                                 self._images.values())
+        return self._names
+
+    def _get_creation_date_filter(self, since):
+        """
+        Return the values of a creation-date filter which matches the images
+        created since the provided date (one wildcard per day) or None if
+        the date is too old.
+        """
+        if isinstance(since, datetime.datetime):
+            since = since.date()
+
+        today = datetime.datetime.utcnow().date()
+        days = (today - since).days
+
+        if days < 0:
+            days = 0
+        if days >= self.MAX_INCREMENTAL_DAYS:
+            return None
+
+        return ['%s*' % (since + datetime.timedelta(days=day)).isoformat()
+                for day in range(days + 1)]
+
+
 class BaseEC2NodeDriver(NodeDriver):
     """
     Base Amazon EC2 node driver.
@@ -2696,7 +3005,25 @@ class BaseEC2NodeDriver(NodeDriver):
         'error': VolumeSnapshotState.ERROR,
     }
 
-    def list_nodes(self, ex_node_ids=None, ex_filters=None):
+    # Number of seconds the Elastic IP addresses returned by
+    # ex_describe_addresses() are reused by list_nodes() before they are
+    # requested again. 0 means the addresses are requested on every call.
+    addresses_cache_ttl = 0
+
+    # Number of items requested in each page of results (MaxResults) by the
+    # iterate_* methods. None means MaxResults is not sent, but NextToken is
+    # still followed if the response contains one.
+    page_size = None
+
+    # Describe* actions which accept MaxResults at the used API version.
+    # MaxResults isn't sent with the other actions.
+    max_results_actions = ['DescribeInstances']
+
+    # :class:`EC2ImageCatalog` used by get_image(), see ex_get_image_catalog
+    image_catalog = None
+
+    def list_nodes(self, ex_node_ids=None, ex_filters=None,
+                   ex_describe_addresses=True):
         """
         List all nodes
 
@@ -2704,6 +3031,11 @@ class BaseEC2NodeDriver(NodeDriver):
         nodes that should be returned. Only the nodes
         with the corresponding node ids will be returned.
 
+        The public IPs of the nodes are taken from the DescribeInstances
+        response. Unless ex_describe_addresses is False, the Elastic IP
+        addresses of the nodes are also requested with DescribeAddresses
+        (see ``addresses_cache_ttl``) and added to ``node.public_ips``.
+
         :param      ex_node_ids: List of ``node.id``
         :type       ex_node_ids: ``list`` of ``str``
 
@@ -2711,25 +3043,69 @@ class BaseEC2NodeDriver(NodeDriver):
                              information for only certain nodes.
         :type       ex_filters: ``dict``
 
+        :param      ex_describe_addresses: If False, do not request the
+                                           Elastic IP addresses of the nodes.
+        :type       ex_describe_addresses: ``bool``
+
         :rtype: ``list`` of :class:`Node`
         """
+        return list(self.iterate_nodes(
+            ex_node_ids=ex_node_ids, ex_filters=ex_filters,
+            ex_describe_addresses=ex_describe_addresses))
+
+    def iterate_nodes(self, ex_node_ids=None, ex_filters=None,
+                      ex_describe_addresses=True, ex_page_size=None):
+        """
+        Return a generator of nodes, see :meth:`list_nodes`.
+
+        The nodes are requested page by page and each page is parsed
+        incrementally, so memory usage doesn't depend on the number of nodes.
+        When ex_describe_addresses is True, the Elastic IP addresses are
+        requested once for each page of nodes.
 
+        :param      ex_page_size: Number of nodes in each page of results.
+                                  Defaults to ``page_size``. Ignored when
+                                  ex_node_ids is provided.
+        :type       ex_page_size: ``int``
+
+        :rtype: ``generator`` of :class:`Node`
+        """
         params = {'Action': 'DescribeInstances'}
 
         if ex_node_ids:
             params.update(self._pathlist('InstanceId', ex_node_ids))
+            ex_page_size = None
+        else:
+            ex_page_size = ex_page_size or self.page_size
 
         if ex_filters:
             params.update(self._build_filters(ex_filters))
 
-        elem = self.connection.request(self.path, params=params).object
+        for page in self._iterate_pages(params, parent='reservationSet',
+                                        page_size=ex_page_size):
+            if not ex_describe_addresses:
+                for rs in page:
+                    for node in self._to_nodes(rs, 'instancesSet/item'):
+                        yield node
+                continue
 
-        nodes = []
-        for rs in findall(element=elem, xpath='reservationSet/item',
-                          namespace=NAMESPACE):
-            nodes += self._to_nodes(rs, 'instancesSet/item')
+            nodes = []
+            for rs in page:
+                nodes += self._to_nodes(rs, 'instancesSet/item')
 
-        nodes_elastic_ips_mappings = self.ex_describe_addresses(nodes)
+            for node in self._merge_elastic_ips(nodes):
+                yield node
+
+    def _merge_elastic_ips(self, nodes):
+        """
+        Add the Elastic IP addresses of the nodes to ``node.public_ips``.
+
+        :rtype: ``list`` of :class:`Node`
+        """
+        if not nodes:
+            return nodes
+
+        nodes_elastic_ips_mappings = self._get_nodes_elastic_ips(nodes)
 
         for node in nodes:
             ips = nodes_elastic_ips_mappings[node.id]
@@ -2737,6 +3113,24 @@ class BaseEC2NodeDriver(NodeDriver):
 
         return nodes
 
+    def _get_nodes_by_id(self, nodes):
+        """
+        Look the provided nodes up with a single DescribeInstances request
+        filtered on their ids.
+
+        Instances which were just created might not be known to the API
+        yet, in which case none of the nodes are returned.
+
+        :rtype: ``list`` of :class:`Node`
+        """
+        try:
+            return self.list_nodes(ex_node_ids=[node.id for node in nodes])
+        except BaseHTTPError:
+            e = sys.exc_info()[1]
+            if 'InvalidInstanceID.NotFound' in str(e):
+                return []
+            raise
+
     def list_sizes(self, location=None):
         available_types = REGION_DETAILS[self.region_name]['instance_types']
         sizes = []
@@ -2790,6 +3184,29 @@ class BaseEC2NodeDriver(NodeDriver):
 
         :rtype: ``list`` of :class:`NodeImage`
         """
+        return list(self.iterate_images(
+            location=location, ex_image_ids=ex_image_ids, ex_owner=ex_owner,
+            ex_executableby=ex_executableby, ex_filters=ex_filters))
+
+    def iterate_images(self, location=None, ex_image_ids=None, ex_owner=None,
+                       ex_executableby=None, ex_filters=None,
+                       ex_page_size=None):
+        """
+        Return a generator of images, see :meth:`list_images`.
+
+        The images are requested page by page and each page is parsed
+        incrementally, so memory usage doesn't depend on the number of
+        images.
+
+        :param      ex_page_size: Number of images in each page of results.
+                                  Defaults to ``page_size``. Ignored when
+                                  ex_image_ids is provided or when
+                                  DescribeImages isn't in
+                                  ``max_results_actions``.
+        :type       ex_page_size: ``int``
+
+        :rtype: ``generator`` of :class:`NodeImage`
+        """
         params = {'Action': 'DescribeImages'}
 
         if ex_owner:
@@ -2802,14 +3219,17 @@ class BaseEC2NodeDriver(NodeDriver):
             for index, image_id in enumerate(ex_image_ids):
                 index += 1
                 params.update({'ImageId.%s' % (index): image_id})
+            ex_page_size = None
+        else:
+            ex_page_size = ex_page_size or self.page_size
 
         if ex_filters:
             params.update(self._build_filters(ex_filters))
 
-        images = self._to_images(
-            self.connection.request(self.path, params=params).object
-        )
-        return images
+        for page in self._iterate_pages(params, parent='imagesSet',
+                                        page_size=ex_page_size):
+            for element in page:
+                yield self._to_image(element)
 
     def get_image(self, image_id):
         """
@@ -2822,11 +3242,35 @@ class BaseEC2NodeDriver(NodeDriver):
         :rtype: :class:`NodeImage`
 
         """
+        if self.image_catalog is not None:
+            image = self.image_catalog.get(image_id)
+            if image is not None:
+                return image
+
         images = self.list_images(ex_image_ids=[image_id])
         image = images[0]
 
         return image
 
+    def ex_get_image_catalog(self, path=None):
+        """
+        Return the local image catalog of the driver, creating it (and
+        loading it from path, if provided) on the first call.
+
+        Once created, get_image() returns the images of the catalog without
+        sending a request. Call :meth:`EC2ImageCatalog.refresh` to add
+        images to the catalog.
+
+        :param      path: Optional path of the file the catalog is stored in.
+        :type       path: ``str``
+
+        :rtype: :class:`EC2ImageCatalog`
+        """
+        if self.image_catalog is None:
+            self.image_catalog = EC2ImageCatalog(self, path=path)
+
+        return self.image_catalog
+
     def list_locations(self):
         locations = []
         for index, availability_zone in \
@@ -2838,6 +3282,28 @@ class BaseEC2NodeDriver(NodeDriver):
         return locations
 
     def list_volumes(self, node=None):
+        return list(self.iterate_volumes(node=node))
+
+    def iterate_volumes(self, node=None, ex_page_size=None):
+        """
+        Return a generator of volumes, optionally only the ones attached to
+        the provided node.
+
+        The volumes are requested page by page and each page is parsed
+        incrementally, so memory usage doesn't depend on the number of
+        volumes.
+
+        :param      node: Only return the volumes attached to this node.
+        :type       node: :class:`Node`
+
+        :param      ex_page_size: Number of volumes in each page of results
+                                  (at most 500). Defaults to ``page_size``.
+                                  Ignored when DescribeVolumes isn't in
+                                  ``max_results_actions``.
+        :type       ex_page_size: ``int``
+
+        :rtype: ``generator`` of :class:`StorageVolume`
+        """
         params = {
             'Action': 'DescribeVolumes',
         }
@@ -2845,11 +3311,14 @@ class BaseEC2NodeDriver(NodeDriver):
             filters = {'attachment.instance-id': node.id}
             params.update(self._build_filters(filters))
 
-        response = self.connection.request(self.path, params=params).object
-        volumes = [self._to_volume(el) for el in response.findall(
-            fixxpath(xpath='volumeSet/item', namespace=NAMESPACE))
-        ]
-        return volumes
+        ex_page_size = ex_page_size or self.page_size
+        if ex_page_size:
+            ex_page_size = min(ex_page_size, 500)
+
+        for page in self._iterate_pages(params, parent='volumeSet',
+                                        page_size=ex_page_size):
+            for element in page:
+                yield self._to_volume(element)
 
     def create_node(self, **kwargs):
         """
@@ -3061,6 +3530,26 @@ class BaseEC2NodeDriver(NodeDriver):
         else:
             return nodes
 
+    def _create_nodes(self, count, max_concurrency=10, **kwargs):
+        """
+        Create the nodes for :meth:`deploy_nodes` with a single RunInstances
+        request. All the nodes are tagged with the same name.
+        """
+        kwargs = dict(kwargs)
+        kwargs.setdefault('ex_mincount', count)
+        kwargs.setdefault('ex_maxcount', count)
+
+        try:
+            nodes = self.create_node(**kwargs)
+        except Exception:
+            # None of the nodes is created if the request fails
+            return [], [sys.exc_info()[1]]
+
+        if not isinstance(nodes, list):
+            nodes = [nodes]
+
+        return nodes, []
+
     def reboot_node(self, node):
         params = {'Action': 'RebootInstances'}
         params.update(self._pathlist('InstanceId', [node.id]))
@@ -3227,6 +3716,24 @@ class BaseEC2NodeDriver(NodeDriver):
 
         :rtype: ``list`` of :class:`VolumeSnapshot`
         """
+        return list(self.iterate_snapshots(snapshot=snapshot, owner=owner))
+
+    def iterate_snapshots(self, snapshot=None, owner=None, ex_page_size=None):
+        """
+        Return a generator of snapshots, see :meth:`list_snapshots`.
+
+        The snapshots are requested page by page and each page is parsed
+        incrementally, so memory usage doesn't depend on the number of
+        snapshots.
+
+        :param ex_page_size: Number of snapshots in each page of results.
+                             Defaults to ``page_size``. Ignored when
+                             snapshot is provided or when DescribeSnapshots
+                             isn't in ``max_results_actions``.
+        :type ex_page_size: ``int``
+
+        :rtype: ``generator`` of :class:`VolumeSnapshot`
+        """
         params = {
             'Action': 'DescribeSnapshots',
         }
@@ -3234,13 +3741,18 @@ class BaseEC2NodeDriver(NodeDriver):
             params.update({
                 'SnapshotId.1': snapshot.id,
             })
+            ex_page_size = None
+        else:
+            ex_page_size = ex_page_size or self.page_size
         if owner:
             params.update({
                 'Owner.1': owner,
             })
-        response = self.connection.request(self.path, params=params).object
-        snapshots = self._to_snapshots(response)
-        return snapshots
+
+        for page in self._iterate_pages(params, parent='snapshotSet',
+                                        page_size=ex_page_size):
+            for element in page:
+                yield self._to_snapshot(element)
 
     def destroy_volume_snapshot(self, snapshot):
         params = {
@@ -4320,6 +4832,7 @@ class BaseEC2NodeDriver(NodeDriver):
             params['AllocationId'] = elastic_ip.extra['allocation_id']
 
         response = self.connection.request(self.path, params=params).object
+        self._addresses_cache = {}
         return self._get_boolean(response)
 
     def ex_describe_all_addresses(self, only_associated=False):
@@ -4371,6 +4884,7 @@ class BaseEC2NodeDriver(NodeDriver):
             params.update({'AllocationId': elastic_ip.extra['allocation_id']})
 
         response = self.connection.request(self.path, params=params).object
+        self._addresses_cache = {}
         association_id = findtext(element=response,
                                   xpath='associationId',
                                   namespace=NAMESPACE)
@@ -4412,6 +4926,7 @@ class BaseEC2NodeDriver(NodeDriver):
             params['AssociationId'] = elastic_ip.extra['association_id']
 
         res = self.connection.request(self.path, params=params).object
+        self._addresses_cache = {}
         return self._get_boolean(res)
 
     def ex_describe_addresses(self, nodes):
@@ -4436,23 +4951,17 @@ class BaseEC2NodeDriver(NodeDriver):
 
         result = self.connection.request(self.path, params=params).object
 
-        node_instance_ids = [node.id for node in nodes]
-        nodes_elastic_ip_mappings = {}
+        nodes_elastic_ip_mappings = dict((node.id, []) for node in nodes)
 
         # We will set only_associated to True so that we only get back
         # IPs which are associated with instances
         only_associated = True
 
-        for node_id in node_instance_ids:
-            nodes_elastic_ip_mappings.setdefault(node_id, [])
-            for addr in self._to_addresses(result,
-                                           only_associated):
+        for addr in self._to_addresses(result, only_associated):
+            instance_id = addr.instance_id
 
-                instance_id = addr.instance_id
-
-                if node_id == instance_id:
-                    nodes_elastic_ip_mappings[instance_id].append(
-                        addr.ip)
+            if instance_id in nodes_elastic_ip_mappings:
+                nodes_elastic_ip_mappings[instance_id].append(addr.ip)
 
         return nodes_elastic_ip_mappings
 
@@ -4469,6 +4978,31 @@ class BaseEC2NodeDriver(NodeDriver):
         node_elastic_ips = self.ex_describe_addresses([node])
         return node_elastic_ips[node.id]
 
+    def _get_nodes_elastic_ips(self, nodes):
+        """
+        Return the Elastic IP addresses of the provided nodes like
+        ex_describe_addresses(), reusing the addresses requested less than
+        ``addresses_cache_ttl`` seconds ago.
+
+        :rtype:     ``dict``
+        """
+        if not self.addresses_cache_ttl:
+            return self.ex_describe_addresses(nodes)
+
+        cache = getattr(self, '_addresses_cache', None)
+        if cache is None:
+            cache = self._addresses_cache = {}
+
+        now = time.time()
+        missing = [node for node in nodes
+                   if cache.get(node.id, (0, None))[0] <= now]
+        if missing:
+            expires = now + self.addresses_cache_ttl
+            for node_id, ips in self.ex_describe_addresses(missing).items():
+                cache[node_id] = (expires, ips)
+
+        return dict((node.id, list(cache[node.id][1])) for node in nodes)
+
     # Network interface management methods
 
     def ex_list_network_interfaces(self):
@@ -4478,11 +5012,31 @@ class BaseEC2NodeDriver(NodeDriver):
         :return:    List of EC2NetworkInterface instances
         :rtype:     ``list`` of :class `EC2NetworkInterface`
         """
+        return list(self.ex_iterate_network_interfaces())
+
+    def ex_iterate_network_interfaces(self, ex_page_size=None):
+        """
+        Return a generator of all the network interfaces.
+
+        The network interfaces are requested page by page and each page is
+        parsed incrementally, so memory usage doesn't depend on the number
+        of network interfaces.
+
+        :param      ex_page_size: Number of network interfaces in each page
+                                  of results. Defaults to ``page_size``.
+                                  Ignored when DescribeNetworkInterfaces
+                                  isn't in ``max_results_actions``.
+        :type       ex_page_size: ``int``
+
+        :rtype:     ``generator`` of :class `EC2NetworkInterface`
+        """
         params = {'Action': 'DescribeNetworkInterfaces'}
 
-        return self._to_interfaces(
-            self.connection.request(self.path, params=params).object
-        )
+        for page in self._iterate_pages(
+                params, parent='networkInterfaceSet',
+                page_size=ex_page_size or self.page_size):
+            for element in page:
+                yield self._to_interface(element)
 
     def ex_create_network_interface(self, subnet, name=None,
                                     description=None,
@@ -5383,6 +5937,55 @@ class BaseEC2NodeDriver(NodeDriver):
         kwargs['signature_version'] = self.signature_version
         return kwargs
 
+    def _iterate_pages(self, params, parent, page_size=None):
+        """
+        Send a Describe* request and yield the ``item`` elements of the
+        ``parent`` set of each page of results, following NextToken.
+
+        A generator of elements is yielded for each page. The responses are
+        parsed incrementally and each element is cleared once the caller has
+        processed it.
+
+        :param      params: Parameters of the request.
+        :type       params: ``dict``
+
+        :param      parent: Tag name of the set with the items (e.g.
+                            ``volumeSet``).
+        :type       parent: ``str``
+
+        :param      page_size: Number of items in each page (MaxResults).
+                               Ignored if the action isn't in
+                               ``max_results_actions``.
+        :type       page_size: ``int``
+
+        :rtype: ``generator`` of ``generator`` of ``Element``
+        """
+        params = params.copy()
+
+        if page_size and params['Action'] in self.max_results_actions:
+            params['MaxResults'] = page_size
+
+        while True:
+            response = self.connection.request(self.path, params=params,
+                                               stream=True)
+
+            elements = response.iterparse('item', parent=parent)
+            yield elements
+
+            # NextToken is only available once the whole page was parsed
+            for _ in elements:
+                pass
+
+            next_token = None
+            if response.object is not None:
+                next_token = findtext(element=response.object,
+                                      xpath='nextToken',
+                                      namespace=NAMESPACE)
+            if not next_token:
+                break
+
+            params['NextToken'] = next_token
+
     def _to_nodes(self, object, xpath):
         return [self._to_node(el)
                 for el in object.findall(fixxpath(xpath=xpath,
@@ -5404,6 +6007,17 @@ class BaseEC2NodeDriver(NodeDriver):
         public_ip = findtext(element=element, xpath='ipAddress',
                              namespace=NAMESPACE)
         public_ips = [public_ip] if public_ip else []
+
+        # The public IPs associated with the network interfaces of a VPC
+        # node (including the Elastic IPs) are in the response as well
+        for xpath in ['networkInterfaceSet/item/association/publicIp',
+                      'networkInterfaceSet/item/privateIpAddressesSet/item/'
+                      'association/publicIp']:
+            for item in findall(element=element, xpath=xpath,
+                                namespace=NAMESPACE):
+                if item.text and item.text not in public_ips:
+                    public_ips.append(item.text)
+
         private_ip = findtext(element=element, xpath='privateIpAddress',
                               namespace=NAMESPACE)
         private_ips = [private_ip] if private_ip else []
@@ -6124,18 +6738,15 @@ class BaseEC2NodeDriver(NodeDriver):
 
         :rtype: ``dict``
         """
-        extra = {}
-        for attribute, values in mapping.items():
-            transform_func = values['transform_func']
-            value = findattr(element=element,
-                             xpath=values['xpath'],
-                             namespace=NAMESPACE)
-            if value is not None:
-                extra[attribute] = transform_func(value)
-            else:
-                extra[attribute] = None
+        # The mappings are compiled once into functions which extract all
+        # the attributes in a single pass over the element
+        extractor = _EXTRA_DICT_EXTRACTORS.get(id(mapping))
+        if extractor is None or extractor[0] is not mapping:
+            extractor = (mapping,
+                         compile_extractor(mapping, namespace=NAMESPACE))
+            _EXTRA_DICT_EXTRACTORS[id(mapping)] = extractor
 
-        return extra
+        return extractor[1](element)
 
     def _get_resource_tags(self, element):
         """
@@ -6307,6 +6918,7 @@ class EC2NodeDriver(BaseEC2NodeDriver):
     name = 'Amazon EC2'
     website = 'http://aws.amazon.com/ec2/'
     path = '/'
+    page_size = 1000
 
     NODE_STATE_MAP = {
         'pending': NodeState.PENDING,
@@ -18,17 +18,26 @@ Module for Google Compute Engine Driver.
 from __future__ import with_statement
 
 import datetime
+import email
+import json
+import os
 import time
 import sys
+import threading
+import uuid
 
+from io import BytesIO
+
+from libcloud.utils.py3 import b, basestring, httplib, urlencode
 from libcloud.common.base import LazyObject
+from libcloud.common.exceptions import RateLimitReachedError
 from libcloud.common.google import GoogleOAuth2Credential
 from libcloud.common.google import GoogleResponse
 from libcloud.common.google import GoogleBaseConnection
 from libcloud.common.google import GoogleBaseError
 from libcloud.common.google import ResourceNotFoundError
 from libcloud.common.google import ResourceExistsError
-from libcloud.common.types import ProviderError
+from libcloud.common.types import LibcloudError, ProviderError
 
 from libcloud.compute.base import Node, NodeDriver, NodeImage, NodeLocation
 from libcloud.compute.base import NodeSize, StorageVolume, VolumeSnapshot
@@ -40,6 +49,22 @@ from libcloud.utils.iso8601 import parse_date
 API_VERSION = 'v1'
 DEFAULT_TASK_COMPLETION_TIMEOUT = 180
 
+# Maximum number of requests which can be sent in a single batch request
+MAX_BATCH_SIZE = 1000
+
+# Number of seconds zones and regions stored in a catalog file are used for
+DEFAULT_CATALOG_TTL = 24 * 60 * 60
+
+# create_node arguments which ex_create_multiple_nodes accepts under the same
+# name
+MULTIPLE_NODES_KWARGS = ['location', 'ex_network', 'ex_tags', 'ex_metadata',
+                         'use_existing_disk', 'external_ip', 'ex_disk_type',
+                         'ex_disk_auto_delete', 'ex_service_accounts',
+                         'description', 'ex_can_ip_forward',
+                         'ex_disks_gce_struct', 'ex_nic_gce_struct',
+                         'ex_on_host_maintenance', 'ex_automatic_restart',
+                         'ex_image_family']
+
 
 def timestamp_to_datetime(timestamp):
     """
@@ -90,6 +115,10 @@ class GCEConnection(GoogleBaseConnection):
     """
     host = 'www.googleapis.com'
     responseCls = GCEResponse
+    # Batch requests don't go to the project request_path, the full URL
+    # makes morph_action_hook use the path as is
+    batch_path = 'https://www.googleapis.com/batch/compute/%s' % (API_VERSION)
+    batch_size = MAX_BATCH_SIZE
 
     def __init__(self, user_id, key, secure, auth_type=None,
                  credential_file=None, project=None, **kwargs):
@@ -112,6 +141,16 @@ class GCEConnection(GoogleBaseConnection):
             params.update(self.gce_params)
         return params, headers
 
+    def encode_data(self, data):
+        """
+        Encode data to JSON. The body of a batch request is already encoded.
+
+        @inherits: :class:`GoogleBaseConnection.encode_data`
+        """
+        if isinstance(data, basestring):
+            return data
+        return super(GCEConnection, self).encode_data(data)
+
     def request(self, *args, **kwargs):
         """
         Perform request then do GCE-specific processing of URL params.
@@ -131,6 +170,421 @@ class GCEConnection(GoogleBaseConnection):
 
         return response
 
+    def request_batch(self, requests):
+        """
+        Perform many requests using as few HTTP round-trips as possible.
+
+        The requests are sent in batch requests (multipart/mixed) of up to
+        batch_size requests each. Requests which are throttled are sent again
+        in another batch request according to retry_policy.
+
+        :param  requests: The requests to perform. Each request is a
+                          dictionary with the 'action' and optionally the
+                          'method', 'data' and 'params' keyword arguments of
+                          request().
+        :type   requests: ``list`` of ``dict``
+
+        :return:  A GCEResponse object, or the exception raised while
+                  handling the response, for each request (in the same order
+                  as requests).
+        :rtype:   ``list`` of :class:`GCEResponse` or ``Exception``
+        """
+        results = [None] * len(requests)
+        pending = list(range(len(requests)))
+        delay = None
+        retries = 0
+
+        while pending:
+            for start in range(0, len(pending), self.batch_size):
+                indexes = pending[start:start + self.batch_size]
+                responses = self._request_batch([requests[i] for i in indexes])
+                for index, response in zip(indexes, responses):
+                    results[index] = response
+
+            throttled = [i for i in pending
+                         if isinstance(results[i], RateLimitReachedError)]
+            policy = self.retry_policy
+
+            if not throttled or policy is None or \
+               retries >= policy.max_retries:
+                break
+
+            delay = policy.get_delay(previous_delay=delay or
+                                     policy.base_delay,
+                                     exception=results[throttled[0]])
+            time.sleep(delay)
+            retries += 1
+            pending = throttled
+
+        return results
+
+    def _request_batch(self, requests):
+        """
+        Send a single batch request and return the response (or exception)
+        of each request.
+        """
+        boundary = 'batch_%s' % (uuid.uuid4().hex)
+        parts = []
+
+        for index, request in enumerate(requests):
+            action = self.morph_action_hook(request['action'])
+            method = request.get('method', 'GET')
+            if request.get('params'):
+                action = '%s?%s' % (action, urlencode(request['params'],
+                                                      doseq=True))
+            part = ['--%s' % (boundary),
+                    'Content-Type: application/http',
+                    'Content-ID: <item-%d>' % (index),
+                    '',
+                    '%s %s HTTP/1.1' % (method, action)]
+            if request.get('data') is not None:
+                data = super(GCEConnection, self).encode_data(request['data'])
+                part.extend(['Content-Type: application/json',
+                             'Content-Length: %d' % (len(data)),
+                             '',
+                             data])
+            else:
+                part.append('')
+            parts.append('\r\n'.join(part))
+
+        body = '\r\n'.join(parts + ['--%s--' % (boundary), ''])
+        headers = {'Content-Type': 'multipart/mixed; boundary=%s' % (boundary)}
+        response = self.request(self.batch_path, method='POST', data=body,
+                                headers=headers)
+
+        results = [GoogleBaseError('No response for request in batch',
+                                   None, None) for _ in requests]
+        content_type = response.headers.get('content-type', '')
+        message = email.message_from_string(
+            'Content-Type: %s\r\n\r\n%s' % (content_type, response.body))
+
+        for part in message.get_payload() or []:
+            # Content-ID of a response is "<response-" + Content-ID of the
+            # request + ">"
+            content_id = part.get('Content-ID', '').strip('<>')
+            try:
+                index = int(content_id.rsplit('-', 1)[-1])
+            except ValueError:
+                continue
+            if not 0 <= index < len(requests):
+                continue
+
+            http_response = httplib.HTTPResponse(
+                _BatchResponseSocket(part.get_payload()))
+            http_response.begin()
+            try:
+                results[index] = self.responseCls(http_response, self)
+            except Exception:
+                results[index] = sys.exc_info()[1]
+
+        return results
+
+
+class _BatchResponseSocket(object):
+    """
+    Socket-like object which lets httplib.HTTPResponse parse a HTTP response
+    contained in a part of a batch response.
+    """
+
+    def __init__(self, data):
+        self._file = BytesIO(b(data))
+
+    def makefile(self, *args, **kwargs):
+        return self._file
+
+
+class _PrefetchThread(threading.Thread):
+    """
+    Thread which calls a function (e.g. to request the next page of results)
+    in the background.
+    """
+
+    def __init__(self, function, *args):
+        super(_PrefetchThread, self).__init__()
+        self.daemon = True
+        self.function = function
+        self.args = args
+        self._result = None
+        self._error = None
+
+    def run(self):
+        try:
+            self._result = self.function(*self.args)
+        except Exception:
+            self._error = sys.exc_info()[1]
+
+    def result(self):
+        """
+        Wait for the function to return and return its result (or raise its
+        exception).
+        """
+        self.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class GCEOperation(object):
+    """
+    A GCE operation tracked by :class:`GCEOperationWaiter`.
+
+    Works like a future: result() waits for the operation to finish and
+    returns its result (or raises the error the operation failed with).
+    """
+
+    def __init__(self, waiter, operation, result_fn=None):
+        """
+        :param  waiter: The waiter which tracks the operation.
+        :type   waiter: :class:`GCEOperationWaiter`
+
+        :param  operation: The operation returned by the API.
+        :type   operation: ``dict``
+
+        :keyword  result_fn: Function which is called with the finished
+                             operation to get the result of result().
+                             Defaults to returning the operation.
+        :type     result_fn: ``callable``
+        """
+        self.waiter = waiter
+        self.operation = operation
+        self.result_fn = result_fn
+        self.done = operation.get('status') == 'DONE'
+        self.error = None
+        self._callbacks = []
+        self._result = None
+        self._has_result = False
+
+    def add_done_callback(self, callback):
+        """
+        Register a function which is called with this operation once it has
+        finished. If it has already finished, the function is called right
+        away.
+
+        :param  callback: Function taking a :class:`GCEOperation`.
+        :type   callback: ``callable``
+        """
+        if self.done:
+            callback(self)
+        else:
+            self._callbacks.append(callback)
+
+    def result(self, timeout=None):
+        """
+        Wait for the operation to finish and return its result.
+
+        :keyword  timeout: Number of seconds to wait. Defaults to the timeout
+                           of the waiter.
+        :type     timeout: ``int``
+        """
+        if not self.done:
+            self.waiter.wait([self], timeout=timeout)
+
+        if self.error is not None:
+            raise self.error
+
+        if not self._has_result:
+            if self.result_fn:
+                self._result = self.result_fn(self.operation)
+            else:
+                self._result = self.operation
+            self._has_result = True
+
+        return self._result
+
+    def _finish(self, operation=None, error=None):
+        if operation is not None:
+            self.operation = operation
+        self.done = True
+        self.error = error
+
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                # Errors in callbacks must not affect the other operations
+                pass
+
+    def __repr__(self):
+        return '<GCEOperation name="%s" status="%s">' % (
+            self.operation.get('name'), self.operation.get('status'))
+
+
+class GCEOperationWaiter(object):
+    """
+    Wait for many GCE (zone, region or global) operations together.
+
+    The operations a wait() call waits for are polled with a single batch
+    request per poll. The time between polls starts at poll_interval and
+    grows up to max_poll_interval while none of the operations finishes.
+
+    Instances can be shared between threads, each wait() call only polls
+    the operations it waits for.
+    """
+
+    def __init__(self, connection, poll_interval=None, max_poll_interval=30,
+                 backoff=1.5, timeout=None):
+        """
+        :param  connection: The connection used to poll the operations.
+        :type   connection: :class:`GCEConnection`
+
+        :keyword  poll_interval: Initial number of seconds between polls.
+                                 Defaults to connection.poll_interval.
+        :type     poll_interval: ``float``
+
+        :keyword  max_poll_interval: Maximum number of seconds between polls.
+        :type     max_poll_interval: ``float``
+
+        :keyword  backoff: Factor the time between polls is multiplied with
+                           if no operation finished.
+        :type     backoff: ``float``
+
+        :keyword  timeout: Default number of seconds wait() waits. Defaults
+                           to connection.timeout.
+        :type     timeout: ``int``
+        """
+        self.connection = connection
+        if poll_interval is None:
+            poll_interval = connection.poll_interval
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(max_poll_interval, self.poll_interval)
+        self.backoff = backoff
+        self.timeout = timeout or connection.timeout
+        self.pending = []
+        self._lock = threading.RLock()
+
+    def submit(self, action, method='POST', data=None, params=None,
+               result_fn=None):
+        """
+        Perform a request which starts an operation and track the operation.
+
+        :param  action: The request path.
+        :type   action: ``str``
+
+        :keyword  result_fn: See :class:`GCEOperation`.
+        :type     result_fn: ``callable``
+
+        :rtype:   :class:`GCEOperation`
+        """
+        response = self.connection.request(action, method=method, data=data,
+                                           params=params)
+        return self.add(response.object, result_fn=result_fn)
+
+    def add(self, operation, result_fn=None):
+        """
+        Track an operation returned by the API.
+
+        :param  operation: The operation.
+        :type   operation: ``dict``
+
+        :keyword  result_fn: See :class:`GCEOperation`.
+        :type     result_fn: ``callable``
+
+        :rtype:   :class:`GCEOperation`
+        """
+        operation = GCEOperation(self, operation, result_fn=result_fn)
+        if not operation.done:
+            with self._lock:
+                self.pending.append(operation)
+        return operation
+
+    def poll(self, operations=None):
+        """
+        Update the status of the operations (by default all the pending
+        operations).
+
+        :keyword  operations: The operations to poll.
+        :type     operations: ``list`` of :class:`GCEOperation`
+
+        :return:  The operations which finished.
+        :rtype:   ``list`` of :class:`GCEOperation`
+        """
+        with self._lock:
+            if operations is None:
+                operations = self.pending
+            pending = [operation for operation in operations
+                       if not operation.done]
+
+        if not pending:
+            return []
+
+        if len(pending) == 1:
+            try:
+                responses = [self.connection.request(
+                    pending[0].operation['selfLink'])]
+            except GoogleBaseError:
+                responses = [sys.exc_info()[1]]
+        else:
+            responses = self.connection.request_batch(
+                [{'action': operation.operation['selfLink']}
+                 for operation in pending])
+
+        finished = []
+        error = None
+
+        with self._lock:
+            for operation, response in zip(pending, responses):
+                if operation.done:
+                    # Finished by a poll in another thread
+                    continue
+                if isinstance(response, GoogleBaseError):
+                    # Includes operations which are done but failed
+                    operation._finish(error=response)
+                    finished.append(operation)
+                elif isinstance(response, Exception):
+                    error = error or response
+                elif response.object.get('status') == 'DONE':
+                    operation._finish(operation=response.object)
+                    finished.append(operation)
+                else:
+                    operation.operation = response.object
+
+            self.pending = [operation for operation in self.pending
+                            if not operation.done]
+
+        if error is not None:
+            raise error
+
+        return finished
+
+    def wait(self, operations=None, timeout=None):
+        """
+        Wait until the operations (by default all the pending operations)
+        have finished. Only these operations are polled.
+
+        :keyword  operations: The operations to wait for.
+        :type     operations: ``list`` of :class:`GCEOperation`
+
+        :keyword  timeout: Number of seconds to wait.
+        :type     timeout: ``int``
+
+        :return:  The operations
+        :rtype:   ``list`` of :class:`GCEOperation`
+        """
+        if operations is None:
+            with self._lock:
+                operations = list(self.pending)
+
+        timeout = timeout or self.timeout
+        end = time.time() + timeout
+        delay = None
+
+        while not all(operation.done for operation in operations):
+            # The first poll happens right away
+            if delay is not None:
+                remaining = end - time.time()
+                if remaining <= 0:
+                    raise LibcloudError('Job did not complete in %s seconds' %
+                                        (timeout))
+                time.sleep(min(delay, remaining))
+
+            if self.poll(operations) or delay is None:
+                delay = self.poll_interval
+            else:
+                delay = min(delay * self.backoff, self.max_poll_interval)
+
+        return operations
+
 
 class GCEList(object):
     """
@@ -1027,7 +1481,9 @@ class GCENodeDriver(NodeDriver):
     }
 
     def __init__(self, user_id, key=None, datacenter=None, project=None,
-                 auth_type=None, scopes=None, credential_file=None, **kwargs):
+                 auth_type=None, scopes=None, credential_file=None,
+                 catalog_file=None, catalog_ttl=DEFAULT_CATALOG_TTL,
+                 **kwargs):
         """
         :param  user_id: The email address (for service accounts) or Client ID
                          (for installed apps) to be used for authentication.
@@ -1061,6 +1517,15 @@ class GCENodeDriver(NodeDriver):
         :keyword  credential_file: Path to file for caching authentication
                                    information used by GCEConnection.
         :type     credential_file: ``str``
+
+        :keyword  catalog_file: Path to file for caching the zones and regions
+                                of the project, so other processes don't need
+                                to request them again. Disabled by default.
+        :type     catalog_file: ``str``
+
+        :keyword  catalog_ttl: Number of seconds the zones and regions in
+                               catalog_file are used for.
+        :type     catalog_ttl: ``int``
         """
         if not project:
             raise ValueError('Project name must be specified using '
@@ -1072,30 +1537,96 @@ class GCENodeDriver(NodeDriver):
         self.credential_file = credential_file or \
             GoogleOAuth2Credential.default_credential_file + '.' + self.project
 
+        self.catalog_file = catalog_file
+        self.catalog_ttl = catalog_ttl
+
+        # Zone and Region information is cached to reduce API calls and
+        # increase speed. It's only loaded when it's first needed, see
+        # _load_catalog().
+        self._zone_list = None
+        self._zone_dict = None
+        self._region_list = None
+        self._region_dict = None
+        self._datacenter = datacenter
+        self._zone = None
+        self._region = None
+
         super(GCENodeDriver, self).__init__(user_id, key, **kwargs)
 
-        # Cache Zone and Region information to reduce API calls and
-        # increase speed
         self.base_path = '/compute/%s/projects/%s' % (API_VERSION,
                                                       self.project)
-        self.zone_list = self.ex_list_zones()
-        self.zone_dict = {}
-        for zone in self.zone_list:
-            self.zone_dict[zone.name] = zone
-        if datacenter:
-            self.zone = self.ex_get_zone(datacenter)
-        else:
-            self.zone = None
 
-        self.region_list = self.ex_list_regions()
-        self.region_dict = {}
-        for region in self.region_list:
-            self.region_dict[region.name] = region
+        # Tracks the operations started by create_node, create_volume and
+        # destroy_node
+        self.operation_waiter = GCEOperationWaiter(self.connection)
 
-        if self.zone:
-            self.region = self._get_region_from_zone(self.zone)
-        else:
-            self.region = None
+    @property
+    def zone_list(self):
+        if self._zone_list is None:
+            self._load_catalog()
+        return self._zone_list
+
+    @zone_list.setter
+    def zone_list(self, value):
+        self._zone_list = value
+
+    @property
+    def zone_dict(self):
+        if self._zone_dict is None:
+            self._load_catalog()
+        return self._zone_dict
+
+    @zone_dict.setter
+    def zone_dict(self, value):
+        self._zone_dict = value
+
+    @property
+    def region_list(self):
+        if self._region_list is None:
+            self._load_catalog()
+        return self._region_list
+
+    @region_list.setter
+    def region_list(self, value):
+        self._region_list = value
+
+    @property
+    def region_dict(self):
+        if self._region_dict is None:
+            self._load_catalog()
+        return self._region_dict
+
+    @region_dict.setter
+    def region_dict(self, value):
+        self._region_dict = value
+
+    @property
+    def zone(self):
+        """
+        Default zone (the datacenter the driver has been created with).
+        """
+        if self._datacenter:
+            self._zone = self.ex_get_zone(self._datacenter)
+            self._datacenter = None
+        return self._zone
+
+    @zone.setter
+    def zone(self, zone):
+        self._datacenter = None
+        self._zone = zone
+
+    @property
+    def region(self):
+        """
+        Default region (the region of the default zone).
+        """
+        if self._region is None and self.zone:
+            self._region = self._get_region_from_zone(self.zone)
+        return self._region
+
+    @region.setter
+    def region(self, region):
+        self._region = region
 
     def ex_add_access_config(self, node, name, nic, nat_ip=None,
                              config_type=None):
@@ -1488,21 +2019,47 @@ class GCENodeDriver(NodeDriver):
         :return:  List of GCENodeImage objects
         :rtype:   ``list`` of :class:`GCENodeImage`
         """
+        return list(self.iterate_images(
+            ex_project=ex_project,
+            ex_include_deprecated=ex_include_deprecated))
+
+    def iterate_images(self, ex_project=None, ex_include_deprecated=False,
+                       ex_prefetch=False):
+        """
+        Return a generator of image objects, see :meth:`list_images`. All
+        the pages of results are requested.
+
+        :keyword  ex_project: Optional alternate project name.
+        :type     ex_project: ``str``, ``list`` of ``str``, or ``None``
+
+        :keyword  ex_include_deprecated: If True, even DEPRECATED images will
+                                         be returned.
+        :type     ex_include_deprecated: ``bool``
+
+        :keyword  ex_prefetch: If True, request the next page of results while
+                               the current page is being processed.
+        :type     ex_prefetch: ``bool``
+
+        :return:  A generator of GCENodeImage objects
+        :rtype:   ``generator`` of :class:`GCENodeImage`
+        """
         dep = ex_include_deprecated
         if ex_project is not None:
-            return self.ex_list_project_images(ex_project=ex_project,
-                                               ex_include_deprecated=dep)
-        image_list = self.ex_list_project_images(ex_project=None,
-                                                 ex_include_deprecated=dep)
+            for image in self._iterate_project_images(ex_project, dep,
+                                                      ex_prefetch):
+                yield image
+            return
+
+        for image in self._iterate_project_images(None, dep, ex_prefetch):
+            yield image
         for img_proj in list(self.IMAGE_PROJECTS.keys()):
             try:
-                image_list.extend(
-                    self.ex_list_project_images(ex_project=img_proj,
-                                                ex_include_deprecated=dep))
+                for image in self._iterate_project_images(img_proj, dep,
+                                                          ex_prefetch):
+                    yield image
             except:
                 # do not break if an OS type is invalid
                 pass
-        return image_list
 
     def ex_list_project_images(self, ex_project=None,
                                ex_include_deprecated=False):
@@ -1520,42 +2077,8 @@ class GCENodeDriver(NodeDriver):
         :return:  List of GCENodeImage objects
         :rtype:   ``list`` of :class:`GCENodeImage`
         """
-        list_images = []
-        request = '/global/images'
-        if ex_project is None:
-            response = self.connection.request(request, method='GET').object
-            for img in response.get('items', []):
-                if 'deprecated' not in img:
-                    list_images.append(self._to_node_image(img))
-                else:
-                    if ex_include_deprecated:
-                        list_images.append(self._to_node_image(img))
-        else:
-            list_images = []
-            # Save the connection request_path
-            save_request_path = self.connection.request_path
-            if isinstance(ex_project, str):
-                ex_project = [ex_project]
-            for proj in ex_project:
-                # Override the connection request path
-                new_request_path = save_request_path.replace(self.project,
-                                                             proj)
-                self.connection.request_path = new_request_path
-                try:
-                    response = self.connection.request(request,
-                                                       method='GET').object
-                except:
-                    raise
-                finally:
-                    # Restore the connection request_path
-                    self.connection.request_path = save_request_path
-                for img in response.get('items', []):
-                    if 'deprecated' not in img:
-                        list_images.append(self._to_node_image(img))
-                    else:
-                        if ex_include_deprecated:
-                            list_images.append(self._to_node_image(img))
-        return list_images
+        return list(self._iterate_project_images(ex_project,
+                                                 ex_include_deprecated))
 
     def list_locations(self):
         """
@@ -1612,45 +2135,51 @@ class GCENodeDriver(NodeDriver):
         :return:  List of Node objects
         :rtype:   ``list`` of :class:`Node`
         """
-        list_nodes = []
+        return list(self.iterate_nodes(ex_zone=ex_zone))
+
+    def iterate_nodes(self, ex_zone=None, ex_prefetch=False):
+        """
+        Return a generator of nodes in the current zone or all zones. All the
+        pages of results are requested.
+
+        :keyword  ex_zone:  Optional zone name or 'all'
+        :type     ex_zone:  ``str`` or :class:`GCEZone` or
+                            :class:`NodeLocation` or ``None``
+
+        :keyword  ex_prefetch: If True, request the next page of results while
+                               the current page is being processed.
+        :type     ex_prefetch: ``bool``
+
+        :return:  A generator of Node objects
+        :rtype:   ``generator`` of :class:`Node`
+        """
         zone = self._set_zone(ex_zone)
         if zone is None:
             request = '/aggregated/instances'
         else:
             request = '/zones/%s/instances' % (zone.name)
 
-        response = self.connection.request(request, method='GET').object
+        boot_disks = None
+        for instances in self._iterate_pages(request, 'instances',
+                                             prefetch=ex_prefetch):
+            # Resolve the boot disks of all the nodes with a single request
+            # instead of one ex_get_volume() request per node
+            if boot_disks is None and \
+               any(self._get_boot_disk_source(i) for i in instances):
+                boot_disks = self._list_boot_disks(zone)
 
-        if 'items' in response:
-            # The aggregated response returns a dict for each zone
-            if zone is None:
-                for v in response['items'].values():
-                    for i in v.get('instances', []):
-                        try:
-                            list_nodes.append(self._to_node(i))
-                        # If a GCE node has been deleted between
-                        #   - is was listed by `request('.../instances', 'GET')
-                        #   - it is converted by `self._to_node(i)`
-                        # `_to_node()` will raise a ResourceNotFoundError.
-                        #
-                        # Just ignore that node and return the list of the
-                        # other nodes.
-                        except ResourceNotFoundError:
-                            pass
-            else:
-                for i in response['items']:
-                    try:
-                        list_nodes.append(self._to_node(i))
-                    # If a GCE node has been deleted between
-                    #   - is was listed by `request('.../instances', 'GET')
-                    #   - it is converted by `self._to_node(i)`
-                    # `_to_node()` will raise a ResourceNotFoundError.
-                    #
-                    # Just ignore that node and return the list of the
-                    # other nodes.
-                    except ResourceNotFoundError:
-                        pass
-        return list_nodes
+            for i in instances:
+                try:
+                    yield self._to_node(i, boot_disks=boot_disks)
+                # If a GCE node has been deleted between
+                #   - is was listed by `request('.../instances', 'GET')
+                #   - it is converted by `self._to_node(i)`
+                # `_to_node()` will raise a ResourceNotFoundError.
+                #
+                # Just ignore that node and return the list of the
+                # other nodes.
+                except ResourceNotFoundError:
+                    pass
 
     def ex_list_regions(self):
         """
@@ -1703,12 +2232,24 @@ class GCENodeDriver(NodeDriver):
         :return:  A list of snapshot objects
         :rtype:   ``list`` of :class:`GCESnapshot`
         """
-        list_snapshots = []
-        request = '/global/snapshots'
-        response = self.connection.request(request, method='GET').object
-        list_snapshots = [self._to_snapshot(s) for s in
-                          response.get('items', [])]
-        return list_snapshots
+        return list(self.ex_iterate_snapshots())
+
+    def ex_iterate_snapshots(self, ex_prefetch=False):
+        """
+        Return a generator of the disk snapshots in the project. All the
+        pages of results are requested.
+
+        :keyword  ex_prefetch: If True, request the next page of results while
+                               the current page is being processed.
+        :type     ex_prefetch: ``bool``
+
+        :return:  A generator of snapshot objects
+        :rtype:   ``generator`` of :class:`GCESnapshot`
+        """
+        for snapshots in self._iterate_pages('/global/snapshots',
+                                             prefetch=ex_prefetch):
+            for snapshot in snapshots:
+                yield self._to_snapshot(snapshot)
 
     def ex_list_targethttpproxies(self):
         """
@@ -1801,25 +2342,34 @@ class GCENodeDriver(NodeDriver):
         :return: A list of volume objects.
         :rtype: ``list`` of :class:`StorageVolume`
         """
-        list_volumes = []
+        return list(self.iterate_volumes(ex_zone=ex_zone))
+
+    def iterate_volumes(self, ex_zone=None, ex_prefetch=False):
+        """
+        Return a generator of volumes for a zone or all. All the pages of
+        results are requested.
+
+        :keyword  ex_zone: The zone to return volumes from.
+        :type     ex_zone: ``str`` or :class:`GCEZone` or
+                            :class:`NodeLocation` or ``None``
+
+        :keyword  ex_prefetch: If True, request the next page of results while
+                               the current page is being processed.
+        :type     ex_prefetch: ``bool``
+
+        :return: A generator of volume objects.
+        :rtype: ``generator`` of :class:`StorageVolume`
+        """
         zone = self._set_zone(ex_zone)
         if zone is None:
             request = '/aggregated/disks'
         else:
             request = '/zones/%s/disks' % (zone.name)
 
-        response = self.connection.request(request, method='GET').object
-        if 'items' in response:
-            # The aggregated response returns a dict for each zone
-            if zone is None:
-                for v in response['items'].values():
-                    zone_volumes = [self._to_storage_volume(d) for d in
-                                    v.get('disks', [])]
-                    list_volumes.extend(zone_volumes)
-            else:
-                list_volumes = [self._to_storage_volume(d) for d in
-                                response['items']]
-        return list_volumes
+        for disks in self._iterate_pages(request, 'disks',
+                                         prefetch=ex_prefetch):
+            for disk in disks:
+                yield self._to_storage_volume(disk)
 
     def ex_list_zones(self):
         """
@@ -2288,7 +2838,8 @@ class GCENodeDriver(NodeDriver):
                     description=None, ex_can_ip_forward=None,
                     ex_disks_gce_struct=None, ex_nic_gce_struct=None,
                     ex_on_host_maintenance=None, ex_automatic_restart=None,
-                    ex_preemptible=None, ex_image_family=None):
+                    ex_preemptible=None, ex_image_family=None,
+                    ex_wait_for_completion=True):
         """
         Create a new node and return a node object for the node.
 
@@ -2406,8 +2957,16 @@ class GCENodeDriver(NodeDriver):
                                    to use this keyword.
         :type     ex_image_family: ``str`` or ``None``
 
+        :keyword  ex_wait_for_completion: If False, return a GCEOperation
+                                          right away instead of waiting
+                                          for the node to be created. Its
+                                          result() is the Node object. Use
+                                          ex_wait_for_operations() to wait
+                                          for many operations together.
+        :type     ex_wait_for_completion: ``bool``
+
         :return:  A Node object for the new node.
-        :rtype:   :class:`Node`
+        :rtype:   :class:`Node` or :class:`GCEOperation`
         """
         if ex_boot_disk and ex_disks_gce_struct:
             raise ValueError("Cannot specify both 'ex_boot_disk' and "
@@ -2469,8 +3028,12 @@ class GCENodeDriver(NodeDriver):
                                                    ex_on_host_maintenance,
                                                    ex_automatic_restart,
                                                    ex_preemptible)
-        self.connection.async_request(request, method='POST', data=node_data)
-        return self.ex_get_node(name, location.name)
+        operation = self.operation_waiter.submit(
+            request, method='POST', data=node_data,
+            result_fn=lambda op: self.ex_get_node(name, location.name))
+        if not ex_wait_for_completion:
+            return operation
+        return operation.result()
 
     def ex_create_multiple_nodes(self, base_name, size, image, number,
                                  location=None, ex_network='default',
@@ -2671,25 +3234,19 @@ class GCENodeDriver(NodeDriver):
                       'node': None}
             status_list.append(status)
 
-        start_time = time.time()
-        complete = False
-        while not complete:
-            if (time.time() - start_time >= timeout):
-                raise Exception("Timeout (%s sec) while waiting for multiple "
-                                "instances")
-            complete = True
-            time.sleep(poll_interval)
-            for status in status_list:
-                # Create the node or check status if already in progress.
-                if not status['node']:
-                    if not status['node_response']:
-                        self._multi_create_node(status, node_attrs)
-                    else:
-                        self._multi_check_node(status, node_attrs)
-                # If any of the nodes have not been created (or failed) we are
-                # not done yet.
-                if not status['node']:
-                    complete = False
+        # Create all the nodes using batch requests and wait for all the
+        # operations together
+        self._multi_create_node(status_list, node_attrs)
+
+        waiter = GCEOperationWaiter(self.connection,
+                                    poll_interval=poll_interval,
+                                    timeout=timeout)
+        for status in status_list:
+            if status['node_response']:
+                status['node_response'] = waiter.add(status['node_response'])
+        waiter.wait()
+
+        self._multi_check_node(status_list, node_attrs)
 
         # Return list of nodes
         node_list = []
@@ -2697,6 +3254,39 @@ class GCENodeDriver(NodeDriver):
             node_list.append(status['node'])
         return node_list
 
+    def _create_nodes(self, count, max_concurrency=10, **kwargs):
+        """
+        Create the nodes for :meth:`deploy_nodes` with
+        :meth:`ex_create_multiple_nodes`, which sends the requests in batch
+        requests.
+
+        If a :meth:`create_node` argument isn't supported by
+        :meth:`ex_create_multiple_nodes`, the nodes are created one by one.
+        """
+        unsupported = set(kwargs) - set(['name', 'size', 'image'] +
+                                        MULTIPLE_NODES_KWARGS)
+
+        if unsupported:
+            return super(GCENodeDriver, self)._create_nodes(
+                count, max_concurrency=max_concurrency, **kwargs)
+
+        multiple_kwargs = dict([(key, kwargs[key]) for key in
+                                MULTIPLE_NODES_KWARGS if key in kwargs])
+        node_list = self.ex_create_multiple_nodes(
+            kwargs['name'], kwargs['size'], kwargs['image'], count,
+            ignore_errors=True, **multiple_kwargs)
+
+        nodes = []
+        errors = []
+        for node in node_list:
+            if isinstance(node, GCEFailedNode):
+                errors.append(LibcloudError(
+                    'Failed to create node %s: %s' % (node.name, node.error),
+                    driver=self))
+            else:
+                nodes.append(node)
+        return nodes, errors
+
     def ex_create_targethttpproxy(self, name, urlmap):
         """
         Create a target HTTP proxy.
@@ -2867,7 +3457,8 @@ class GCENodeDriver(NodeDriver):
 
     def create_volume(self, size, name, location=None, snapshot=None,
                       image=None, use_existing=True,
-                      ex_disk_type='pd-standard', ex_image_family=None):
+                      ex_disk_type='pd-standard', ex_image_family=None,
+                      ex_wait_for_completion=True):
         """
         Create a volume (disk).
 
@@ -2902,8 +3493,15 @@ class GCENodeDriver(NodeDriver):
                                    to use this keyword.
         :type     ex_image_family: ``str`` or ``None``
 
+        :keyword  ex_wait_for_completion: If False, return a GCEOperation
+                                          right away instead of waiting
+                                          for the volume to be created. Its
+                                          result() is the StorageVolume
+                                          object.
+        :type     ex_wait_for_completion: ``bool``
+
         :return:  Storage Volume object
-        :rtype:   :class:`StorageVolume`
+        :rtype:   :class:`StorageVolume` or :class:`GCEOperation`
         """
         if image and ex_image_family:
             raise ValueError("Cannot specify both 'image' and "
@@ -2914,15 +3512,31 @@ class GCENodeDriver(NodeDriver):
 
         request, volume_data, params = self._create_vol_req(
             size, name, location, snapshot, image, ex_disk_type)
+
+        def get_volume(operation):
+            return self.ex_get_volume(name, location)
+
+        def ignore_existing(operation):
+            if isinstance(operation.error, ResourceExistsError):
+                operation.error = None
+
         try:
-            self.connection.async_request(request, method='POST',
-                                          data=volume_data, params=params)
+            operation = self.operation_waiter.submit(
+                request, method='POST', data=volume_data, params=params,
+                result_fn=get_volume)
         except ResourceExistsError:
             e = sys.exc_info()[1]
             if not use_existing:
                 raise e
+            operation = self.operation_waiter.add({'status': 'DONE'},
+                                                  result_fn=get_volume)
+
+        if use_existing:
+            operation.add_done_callback(ignore_existing)
 
-        return self.ex_get_volume(name, location)
+        if not ex_wait_for_completion:
+            return operation
+        return operation.result()
 
     def create_volume_snapshot(self, volume, name):
         """
@@ -3107,38 +3721,36 @@ class GCENodeDriver(NodeDriver):
 
     def ex_targetpool_add_node(self, targetpool, node):
         """
-        Add a node to a target pool.
+        Add a node, or a list of nodes, to a target pool.
+
+        A list of nodes is added using a single request.
 
         :param  targetpool: The targetpool to add node to
         :type   targetpool: ``str`` or :class:`GCETargetPool`
 
-        :param  node: The node to add
-        :type   node: ``str`` or :class:`Node`
+        :param  node: The node(s) to add
+        :type   node: ``str`` or :class:`Node` or ``list``
 
         :returns: True if successful
         :rtype:   ``bool``
         """
         if not hasattr(targetpool, 'name'):
             targetpool = self.ex_get_targetpool(targetpool)
-        if hasattr(node, 'name'):
-            node_uri = node.extra['selfLink']
-        else:
-            if node.startswith('https://'):
-                node_uri = node
-            else:
-                node = self.ex_get_node(node, 'all')
-                node_uri = node.extra['selfLink']
+        nodes = self._get_targetpool_nodes(node)
 
-        targetpool_data = {'instances': [{'instance': node_uri}]}
+        targetpool_data = {'instances': [{'instance': node_uri}
+                                         for node, node_uri in nodes]}
 
         request = '/regions/%s/targetPools/%s/addInstance' % (
             targetpool.region.name, targetpool.name)
         self.connection.async_request(request, method='POST',
                                       data=targetpool_data)
-        if all((node_uri != n) and
-               (not hasattr(n, 'extra') or n.extra['selfLink'] != node_uri)
-               for n in targetpool.nodes):
-            targetpool.nodes.append(node)
+        for node, node_uri in nodes:
+            if all((node_uri != n) and
+                   (not hasattr(n, 'extra') or
+                    n.extra['selfLink'] != node_uri)
+                   for n in targetpool.nodes):
+                targetpool.nodes.append(node)
         return True
 
     def ex_targetpool_add_healthcheck(self, targetpool, healthcheck):
@@ -3172,44 +3784,36 @@ class GCENodeDriver(NodeDriver):
 
     def ex_targetpool_remove_node(self, targetpool, node):
         """
-        Remove a node from a target pool.
+        Remove a node, or a list of nodes, from a target pool.
+
+        A list of nodes is removed using a single request.
 
         :param  targetpool: The targetpool to remove node from
         :type   targetpool: ``str`` or :class:`GCETargetPool`
 
-        :param  node: The node to remove
-        :type   node: ``str`` or :class:`Node`
+        :param  node: The node(s) to remove
+        :type   node: ``str`` or :class:`Node` or ``list``
 
         :returns: True if successful
         :rtype:   ``bool``
         """
         if not hasattr(targetpool, 'name'):
             targetpool = self.ex_get_targetpool(targetpool)
+        nodes = self._get_targetpool_nodes(node)
 
-        if hasattr(node, 'name'):
-            node_uri = node.extra['selfLink']
-        else:
-            if node.startswith('https://'):
-                node_uri = node
-            else:
-                node = self.ex_get_node(node, 'all')
-                node_uri = node.extra['selfLink']
-
-        targetpool_data = {'instances': [{'instance': node_uri}]}
+        targetpool_data = {'instances': [{'instance': node_uri}
+                                         for node, node_uri in nodes]}
 
         request = '/regions/%s/targetPools/%s/removeInstance' % (
             targetpool.region.name, targetpool.name)
         self.connection.async_request(request, method='POST',
                                       data=targetpool_data)
-        # Remove node object from node list
-        index = None
-        for i, nd in enumerate(targetpool.nodes):
-            if nd == node_uri or (hasattr(nd, 'extra') and
-                                  nd.extra['selfLink'] == node_uri):
-                index = i
-                break
-        if index is not None:
-            targetpool.nodes.pop(index)
+        # Remove node objects from node list
+        node_uris = set(node_uri for node, node_uri in nodes)
+        targetpool.nodes = [
+            nd for nd in targetpool.nodes
+            if nd not in node_uris and not (hasattr(nd, 'extra') and
+                                            nd.extra['selfLink'] in node_uris)]
         return True
 
     def ex_targetpool_remove_healthcheck(self, targetpool, healthcheck):
@@ -3796,7 +4400,8 @@ class GCENodeDriver(NodeDriver):
         self.connection.async_request(request, method='POST')
         return True
 
-    def destroy_node(self, node, destroy_boot_disk=False):
+    def destroy_node(self, node, destroy_boot_disk=False,
+                     ex_wait_for_completion=True):
         """
         Destroy a node.
 
@@ -3809,15 +4414,47 @@ class GCENodeDriver(NodeDriver):
                                      method.)
         :type     destroy_boot_disk: ``bool``
 
+        :keyword  ex_wait_for_completion: If False, return a GCEOperation
+                                          right away instead of waiting
+                                          for the node to be destroyed. The
+                                          boot disk is destroyed when its
+                                          result() is called.
+        :type     ex_wait_for_completion: ``bool``
+
         :return:  True if successful
-        :rtype:   ``bool``
+        :rtype:   ``bool`` or :class:`GCEOperation`
         """
+        def destroy_disk(operation):
+            if destroy_boot_disk and node.extra['boot_disk']:
+                node.extra['boot_disk'].destroy()
+            return True
+
         request = '/zones/%s/instances/%s' % (node.extra['zone'].name,
                                               node.name)
-        self.connection.async_request(request, method='DELETE')
-        if destroy_boot_disk and node.extra['boot_disk']:
-            node.extra['boot_disk'].destroy()
-        return True
+        operation = self.operation_waiter.submit(request, method='DELETE',
+                                                 result_fn=destroy_disk)
+        if not ex_wait_for_completion:
+            return operation
+        return operation.result()
+
+    def ex_wait_for_operations(self, operations=None, timeout=None):
+        """
+        Wait for operations returned by create_node, create_volume and
+        destroy_node (with ex_wait_for_completion=False) to finish. The
+        operations are polled together.
+
+        :keyword  operations: The operations to wait for. Defaults to all the
+                              pending operations.
+        :type     operations: ``list`` of :class:`GCEOperation`
+
+        :keyword  timeout: Number of seconds to wait.
+        :type     timeout: ``int``
+
+        :return:  The results of the operations (e.g. Node objects).
+        :rtype:   ``list``
+        """
+        operations = self.operation_waiter.wait(operations, timeout=timeout)
+        return [operation.result() for operation in operations]
 
     def ex_destroy_multiple_nodes(self, node_list, ignore_errors=True,
                                   destroy_boot_disk=False, poll_interval=2,
@@ -3847,17 +4484,16 @@ class GCENodeDriver(NodeDriver):
                   that the node was successfully destroyed.
         :rtype:   ``list`` of ``bool``
         """
+        requests = [{'action': '/zones/%s/instances/%s' % (
+            node.extra['zone'].name, node.name), 'method': 'DELETE'}
+            for node in node_list]
+        responses = self.connection.request_batch(requests)
+
         status_list = []
-        complete = False
-        start_time = time.time()
-        for node in node_list:
-            request = '/zones/%s/instances/%s' % (node.extra['zone'].name,
-                                                  node.name)
-            try:
-                response = self.connection.request(request,
-                                                   method='DELETE').object
-            except GoogleBaseError:
-                self._catch_error(ignore_errors=ignore_errors)
+        for node, response in zip(node_list, responses):
+            response = self._get_batch_object(response,
+                                              ignore_errors=ignore_errors)
+            if isinstance(response, GoogleBaseError):
                 response = None
 
             status = {'node': node,
@@ -3868,55 +4504,67 @@ class GCENodeDriver(NodeDriver):
 
             status_list.append(status)
 
-        while not complete:
+        start_time = time.time()
+        while True:
+            pending = [status for status in status_list
+                       if status['node_response'] or status['disk_response']]
+            if not pending:
+                break
             if (time.time() - start_time >= timeout):
                 raise Exception("Timeout (%s sec) while waiting to delete "
                                 "multiple instances")
-            complete = True
-            for status in status_list:
-                # If one of the operations is running, check the status
-                operation = status['node_response'] or status['disk_response']
-                delete_disk = False
-                if operation:
-                    no_errors = True
-                    try:
-                        response = self.connection.request(
-                            operation['selfLink']).object
-                    except GoogleBaseError:
-                        self._catch_error(ignore_errors=ignore_errors)
-                        no_errors = False
-                        response = {'status': 'DONE'}
-                    if response['status'] == 'DONE':
-                        # If a node was deleted, update status and indicate
-                        # that the disk is ready to be deleted.
-                        if status['node_response']:
-                            status['node_response'] = None
-                            status['node_success'] = no_errors
-                            delete_disk = True
-                        else:
-                            status['disk_response'] = None
-                            status['disk_success'] = no_errors
-                # If we are destroying disks, and the node has been deleted,
-                # destroy the disk.
-                if delete_disk and destroy_boot_disk:
-                    boot_disk = status['node'].extra['boot_disk']
-                    if boot_disk:
-                        request = '/zones/%s/disks/%s' % (
-                            boot_disk.extra['zone'].name, boot_disk.name)
-                        try:
-                            response = self.connection.request(
-                                request, method='DELETE').object
-                        except GoogleBaseError:
-                            self._catch_error(ignore_errors=ignore_errors)
-                            no_errors = False
-                            response = None
-                        status['disk_response'] = response
-                    else:  # If there is no boot disk, ignore
-                        status['disk_success'] = True
-                operation = status['node_response'] or status['disk_response']
-                if operation:
-                    time.sleep(poll_interval)
-                    complete = False
+
+            # Check the status of all the running operations
+            responses = self.connection.request_batch(
+                [{'action': (status['node_response'] or
+                             status['disk_response'])['selfLink']}
+                 for status in pending])
+
+            deleted = []
+            for status, response in zip(pending, responses):
+                response = self._get_batch_object(response,
+                                                  ignore_errors=ignore_errors)
+                no_errors = not isinstance(response, GoogleBaseError)
+                if no_errors and response['status'] != 'DONE':
+                    continue
+                # If a node was deleted, update status and indicate that the
+                # disk is ready to be deleted.
+                if status['node_response']:
+                    status['node_response'] = None
+                    status['node_success'] = no_errors
+                    deleted.append(status)
+                else:
+                    status['disk_response'] = None
+                    status['disk_success'] = no_errors
+
+            # If we are destroying disks, destroy the boot disks of the nodes
+            # which have been deleted.
+            disk_status_list = []
+            for status in deleted:
+                if not destroy_boot_disk:
+                    continue
+                if status['node'].extra['boot_disk']:
+                    disk_status_list.append(status)
+                else:  # If there is no boot disk, ignore
+                    status['disk_success'] = True
+
+            responses = self.connection.request_batch(
+                [{'action': '/zones/%s/disks/%s' % (
+                    status['node'].extra['boot_disk'].extra['zone'].name,
+                    status['node'].extra['boot_disk'].name),
+                  'method': 'DELETE'}
+                 for status in disk_status_list])
+
+            for status, response in zip(disk_status_list, responses):
+                response = self._get_batch_object(response,
+                                                  ignore_errors=ignore_errors)
+                if isinstance(response, GoogleBaseError):
+                    response = None
+                status['disk_response'] = response
+
+            if any(status['node_response'] or status['disk_response']
+                   for status in status_list):
+                time.sleep(poll_interval)
 
         success = []
         for status in status_list:
@@ -4465,12 +5113,15 @@ class GCENodeDriver(NodeDriver):
         # Check zone cache first
         if short_name in self.zone_dict:
             return self.zone_dict[short_name]
-        # Otherwise, look up zone information
+        # Otherwise, look up zone information and cache it, so that e.g.
+        # _to_node() doesn't look up the same zone for every node
         try:
             response = self.connection.request(request, method='GET').object
         except ResourceNotFoundError:
             return None
-        return self._to_zone(response)
+        zone = self._to_zone(response)
+        self.zone_dict[short_name] = zone
+        return zone
 
     def ex_copy_image(self, name, url, description=None, family=None):
         """
@@ -4535,6 +5186,209 @@ class GCENodeDriver(NodeDriver):
         else:
             raise e
 
+    def _get_batch_object(self, response, ignore_errors=False):
+        """
+        Return the parsed body of a response returned by
+        :meth:`GCEConnection.request_batch`.
+
+        :param  response: The response or the exception raised for a request
+        :type   response: :class:`GCEResponse` or ``Exception``
+
+        :keyword  ignore_errors: If true, return a GoogleBaseError instead of
+                                 raising it.
+        :type     ignore_errors: ``bool``
+
+        :return:  The parsed body of the response or the error
+        :rtype:   ``dict`` or :class:`GoogleBaseError`
+        """
+        if isinstance(response, GoogleBaseError) and ignore_errors:
+            return response
+        elif isinstance(response, Exception):
+            raise response
+        return response.object
+
+    def _get_nodes_by_id(self, nodes):
+        """
+        Look the provided nodes up with ``instances.get`` requests which are
+        sent in a single batch request.
+
+        :param  nodes: The nodes to look up
+        :type   nodes: ``list`` of :class:`Node`
+
+        :return:  A list of Node objects, or None if the zone of a node isn't
+                  known.
+        :rtype:   ``list`` of :class:`Node` or ``None``
+        """
+        if not all(node.extra.get('zone') for node in nodes):
+            return None
+
+        responses = self.connection.request_batch(
+            [{'action': '/zones/%s/instances/%s' % (
+                node.extra['zone'].name, node.name)} for node in nodes])
+
+        result = []
+        for response in responses:
+            response = self._get_batch_object(response, ignore_errors=True)
+            if isinstance(response, ResourceNotFoundError):
+                continue
+            elif isinstance(response, GoogleBaseError):
+                raise response
+            try:
+                result.append(self._to_node(response))
+            except ResourceNotFoundError:
+                pass
+        return result
+
+    def _get_targetpool_nodes(self, node):
+        """
+        Return (node, URL) tuples for the node(s) passed to
+        ex_targetpool_add_node and ex_targetpool_remove_node.
+
+        :param  node: Node, URL or name of a node or a list of them
+        :type   node: ``str`` or :class:`Node` or ``list``
+
+        :rtype:   ``list`` of ``tuple``
+        """
+        if not isinstance(node, (list, tuple)):
+            node = [node]
+
+        nodes = []
+        for nd in node:
+            if hasattr(nd, 'name'):
+                node_uri = nd.extra['selfLink']
+            elif nd.startswith('https://'):
+                node_uri = nd
+            else:
+                nd = self.ex_get_node(nd, 'all')
+                node_uri = nd.extra['selfLink']
+            nodes.append((nd, node_uri))
+        return nodes
+
+    def _iterate_project_images(self, ex_project, include_deprecated,
+                                prefetch=False):
+        """
+        Return a generator of the images of the given project(s), or of the
+        'global' images if ex_project is None.
+        """
+        if ex_project is None:
+            requests = ['/global/images']
+        else:
+            if isinstance(ex_project, str):
+                ex_project = [ex_project]
+            # Images of other projects are requested using their full URL
+            requests = ['https://%s%s/global/images' % (
+                self.connection.host,
+                self.connection.request_path.replace(self.project, proj))
+                for proj in ex_project]
+
+        for request in requests:
+            for images in self._iterate_pages(request, prefetch=prefetch):
+                for img in images:
+                    if 'deprecated' not in img or include_deprecated:
+                        yield self._to_node_image(img)
+
+    def _iterate_pages(self, request, aggregated_key=None, params=None,
+                       prefetch=False):
+        """
+        Return a generator of the items of each page of results of a list
+        request, following nextPageToken.
+
+        If connection.gce_params is set (see :class:`GCEList`), only a single
+        page is requested so that the caller can page through the results.
+
+        :param  request: The list request path.
+        :type   request: ``str``
+
+        :keyword  aggregated_key: Key of the items in each scope of an
+                                  aggregated list response (e.g. 'instances').
+        :type     aggregated_key: ``str``
+
+        :keyword  params: Additional URL parameters (e.g. 'filter').
+        :type     params: ``dict``
+
+        :keyword  prefetch: If True, request the next page in a background
+                            thread while the caller processes the current
+                            page.
+        :type     prefetch: ``bool``
+
+        :return:  A generator of lists of items
+        :rtype:   ``generator`` of ``list`` of ``dict``
+        """
+        def get_items(response):
+            items = response.get('items', [])
+            if isinstance(items, dict):
+                # The aggregated response returns a dict for each zone
+                return [item for scope in items.values()
+                        for item in scope.get(aggregated_key, [])]
+            return items
+
+        if self.connection.gce_params:
+            response = self.connection.request(request, method='GET',
+                                               params=params).object
+            yield get_items(response)
+            return
+
+        def get_page(page_token):
+            page_params = dict(params or {})
+            if page_token:
+                page_params['pageToken'] = page_token
+            return self.connection.request(request, method='GET',
+                                           params=page_params).object
+
+        response = get_page(None)
+        while True:
+            page_token = response.get('nextPageToken')
+            next_page = None
+            if page_token and prefetch:
+                next_page = _PrefetchThread(get_page, page_token)
+                next_page.start()
+
+            yield get_items(response)
+
+            if not page_token:
+                break
+            if next_page:
+                response = next_page.result()
+            else:
+                response = get_page(page_token)
+
+    def _get_boot_disk_source(self, node):
+        """
+        Return the URL of the persistent boot disk of a node.
+
+        :param  node: The dictionary describing the node.
+        :type   node: ``dict``
+
+        :return:  URL of the boot disk or None if the node has no persistent
+                  boot disk
+        :rtype:   ``str`` or ``None``
+        """
+        for disk in node.get('disks', []):
+            if disk.get('boot') and disk.get('type') == 'PERSISTENT':
+                return disk.get('source')
+        return None
+
+    def _list_boot_disks(self, zone=None):
+        """
+        Return the volumes in a zone (or in all zones) keyed by
+        (zone name, volume name) for use by :meth:`_to_node`.
+
+        :keyword  zone: The zone to list the volumes from or ``None`` for all
+                        zones
+        :type     zone: :class:`GCEZone` or ``None``
+
+        :return:  Dictionary of StorageVolume objects
+        :rtype:   ``dict``
+        """
+        boot_disks = {}
+        for volume in self.list_volumes(ex_zone=zone or 'all'):
+            if not volume.extra.get('selfLink'):
+                continue
+            components = self._get_components_from_path(
+                volume.extra['selfLink'])
+            boot_disks[(components['zone'], components['name'])] = volume
+        return boot_disks
+
     def _get_components_from_path(self, path):
         """
         Return a dictionary containing name & zone/region from a request path.
@@ -4580,6 +5434,96 @@ class GCENodeDriver(NodeDriver):
         response = self.connection.request(url, method='GET').object
         return GCENodeDriver.KIND_METHOD_MAP[response['kind']](self, response)
 
+    def _load_catalog(self):
+        """
+        Load the zones and regions of the project, either from catalog_file
+        (if it has been stored less than catalog_ttl seconds ago) or using the
+        API.
+        """
+        catalog = self._read_catalog_file()
+        if catalog is None:
+            catalog = {}
+            for name in ['zones', 'regions']:
+                response = self.connection.request('/%s' % (name),
+                                                   method='GET').object
+                catalog[name] = response.get('items', [])
+            self._write_catalog_file(catalog)
+
+        # Values which have been assigned by the user are kept. Zones have to
+        # be available before regions are converted.
+        zone_list = [self._to_zone(z) for z in catalog['zones']]
+        if self._zone_list is None:
+            self._zone_list = zone_list
+        if self._zone_dict is None:
+            self._zone_dict = dict((zone.name, zone) for zone in zone_list)
+
+        region_list = [self._to_region(r) for r in catalog['regions']]
+        if self._region_list is None:
+            self._region_list = region_list
+        if self._region_dict is None:
+            self._region_dict = dict((region.name, region) for region in
+                                     region_list)
+
+    def _read_catalog_file(self):
+        """
+        Return the zones and regions of the project stored in catalog_file or
+        None if there's no such file or the entry has expired.
+
+        :rtype: ``dict`` or ``None``
+        """
+        if not self.catalog_file:
+            return None
+
+        filename = os.path.realpath(os.path.expanduser(self.catalog_file))
+
+        try:
+            with open(filename, 'r') as f:
+                catalog = json.load(f)[self.project]
+        except (IOError, ValueError, KeyError, TypeError):
+            return None
+
+        if time.time() - catalog.get('timestamp', 0) > self.catalog_ttl:
+            return None
+
+        return catalog
+
+    def _write_catalog_file(self, catalog):
+        """
+        Store the zones and regions of the project in catalog_file. Entries
+        of other projects in the file are kept.
+
+        :param  catalog: Dictionary with the 'zones' and 'regions' API items
+        :type   catalog: ``dict``
+        """
+        if not self.catalog_file:
+            return
+
+        filename = os.path.realpath(os.path.expanduser(self.catalog_file))
+
+        try:
+            with open(filename, 'r') as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            data = {}
+
+        if not isinstance(data, dict):
+            data = {}
+
+        data[self.project] = dict(catalog, timestamp=time.time())
+
+        # Write to a temporary file first so concurrent readers never see a
+        # partially written file
+        tmp_filename = '%s.%s.tmp' % (filename, os.getpid())
+        try:
+            with os.fdopen(os.open(tmp_filename,
+                                   os.O_CREAT | os.O_WRONLY | os.O_TRUNC,
+                                   int('600', 8)), 'w') as f:
+                json.dump(data, f)
+            os.rename(tmp_filename, filename)
+        except (IOError, OSError):
+            # The catalog file is only an optimization
+            pass
+
     def _get_region_from_zone(self, zone):
         """
         Return the Region object that contains the given Zone object.
@@ -5039,73 +5983,102 @@ class GCENodeDriver(NodeDriver):
                 status['disk'] = self.ex_get_volume(status['name'],
                                                     node_attrs['location'])
 
-    def _multi_create_node(self, status, node_attrs):
-        """Create node for ex_create_multiple_nodes.
+    def _multi_create_node(self, status_list, node_attrs):
+        """Create nodes for ex_create_multiple_nodes.
 
-        :param  status: Dictionary for holding node creation status.
-                        (This dictionary is modified by this method)
-        :type   status: ``dict``
+        All the nodes are created using batch requests.
+
+        :param  status_list: Dictionaries for holding node creation status.
+                             (These dictionaries are modified by this method)
+        :type   status_list: ``list`` of ``dict``
 
         :param  node_attrs: Dictionary for holding node attribute information.
                             (size, image, location, etc.)
         :type   node_attrs: ``dict``
         """
+        requests = []
+        for status in status_list:
+            request, node_data = self._create_node_req(
+                status['name'], node_attrs['size'], node_attrs['image'],
+                node_attrs['location'], node_attrs['network'],
+                node_attrs['tags'], node_attrs['metadata'],
+                external_ip=node_attrs['external_ip'],
+                ex_service_accounts=node_attrs['ex_service_accounts'],
+                description=node_attrs['description'],
+                ex_can_ip_forward=node_attrs['ex_can_ip_forward'],
+                ex_disks_gce_struct=node_attrs['ex_disks_gce_struct'],
+                ex_nic_gce_struct=node_attrs['ex_nic_gce_struct'],
+                ex_on_host_maintenance=node_attrs['ex_on_host_maintenance'],
+                ex_automatic_restart=node_attrs['ex_automatic_restart'])
+            requests.append({'action': request, 'method': 'POST',
+                             'data': node_data})
+
+        responses = self.connection.request_batch(requests)
+
+        # Store the operation in the status dictionary. Or, if there is an
+        # error, mark as failed.
+        for status, response in zip(status_list, responses):
+            response = self._get_batch_object(
+                response, ignore_errors=node_attrs['ignore_errors'])
+            if isinstance(response, GoogleBaseError):
+                status['node'] = GCEFailedNode(status['name'], response.value,
+                                               response.code)
+            else:
+                status['node_response'] = response
 
-        # Create node and return response object in status dictionary.
-        # Or, if there is an error, mark as failed.
-        request, node_data = self._create_node_req(
-            status['name'], node_attrs['size'], node_attrs['image'],
-            node_attrs['location'], node_attrs['network'], node_attrs['tags'],
-            node_attrs['metadata'],
-            external_ip=node_attrs['external_ip'],
-            ex_service_accounts=node_attrs['ex_service_accounts'],
-            description=node_attrs['description'],
-            ex_can_ip_forward=node_attrs['ex_can_ip_forward'],
-            ex_disks_gce_struct=node_attrs['ex_disks_gce_struct'],
-            ex_nic_gce_struct=node_attrs['ex_nic_gce_struct'],
-            ex_on_host_maintenance=node_attrs['ex_on_host_maintenance'],
-            ex_automatic_restart=node_attrs['ex_automatic_restart'])
-
-        try:
-            node_res = self.connection.request(
-                request, method='POST', data=node_data).object
-        except GoogleBaseError:
-            e = self._catch_error(ignore_errors=node_attrs['ignore_errors'])
-            error = e.value
-            code = e.code
-            node_res = None
-            status['node'] = GCEFailedNode(status['name'], error, code)
-        status['node_response'] = node_res
-
-    def _multi_check_node(self, status, node_attrs):
+    def _multi_check_node(self, status_list, node_attrs):
         """Check node status for ex_create_multiple_nodes.
 
-        :param  status: Dictionary for holding node/disk creation status.
-                        (This dictionary is modified by this method)
-        :type   status: ``dict``
+        The nodes which have been created are retrieved using batch
+        requests.
+
+        :param  status_list: Dictionaries for holding node creation status.
+                             (These dictionaries are modified by this method)
+        :type   status_list: ``list`` of ``dict``
 
         :param  node_attrs: Dictionary for holding node attribute information.
                             (size, image, location, etc.)
         :type   node_attrs: ``dict``
         """
-        error = None
-        try:
-            response = self.connection.request(
-                status['node_response']['selfLink']).object
-        except GoogleBaseError:
-            e = self._catch_error(ignore_errors=node_attrs['ignore_errors'])
-            error = e.value
-            code = e.code
-            response = {'status': 'DONE'}
-        except ResourceNotFoundError:
-            return
-        if response['status'] == 'DONE':
+        ignore_errors = node_attrs['ignore_errors']
+
+        created = []
+        for status in status_list:
+            operation = status['node_response']
+            if not operation:
+                continue
             status['node_response'] = None
-            if error:
-                status['node'] = GCEFailedNode(status['name'], error, code)
+            if operation.error is not None:
+                if not ignore_errors:
+                    raise operation.error
+                status['node'] = GCEFailedNode(status['name'],
+                                               operation.error.value,
+                                               operation.error.code)
+            else:
+                created.append(status)
+
+        if not created:
+            return
+
+        location = node_attrs['location']
+        responses = self.connection.request_batch(
+            [{'action': '/zones/%s/instances/%s' % (location.name,
+                                                    status['name'])}
+             for status in created])
+        nodes = [self._get_batch_object(response, ignore_errors=ignore_errors)
+                 for response in responses]
+
+        boot_disks = None
+        if any(not isinstance(node, GoogleBaseError) and
+               self._get_boot_disk_source(node) for node in nodes):
+            boot_disks = self._list_boot_disks(location)
+
+        for status, node in zip(created, nodes):
+            if isinstance(node, GoogleBaseError):
+                status['node'] = GCEFailedNode(status['name'], node.value,
+                                               node.code)
             else:
-                status['node'] = self.ex_get_node(status['name'],
-                                                  node_attrs['location'])
+                status['node'] = self._to_node(node, boot_disks=boot_disks)
 
     def _create_vol_req(self, size, name, location=None, snapshot=None,
                         image=None, ex_disk_type='pd-standard'):
@@ -5440,13 +6413,19 @@ class GCENodeDriver(NodeDriver):
                             country=location['name'].split('-')[0],
                             driver=self)
 
-    def _to_node(self, node):
+    def _to_node(self, node, boot_disks=None):
         """
         Return a Node object from the JSON-response dictionary.
 
         :param  node: The dictionary describing the node.
         :type   node: ``dict``
 
+        :keyword  boot_disks: Already retrieved boot disks keyed by
+                              (zone name, disk name), see
+                              :meth:`_list_boot_disks`. Disks which are not
+                              in the dictionary are retrieved one by one.
+        :type     boot_disks: ``dict`` or ``None``
+
         :return: Node object
         :rtype: :class:`Node`
         """
@@ -5476,9 +6455,13 @@ class GCENodeDriver(NodeDriver):
         extra['scheduling'] = node.get('scheduling', {})
         extra['boot_disk'] = None
 
-        for disk in extra['disks']:
-            if disk.get('boot') and disk.get('type') == 'PERSISTENT':
-                bd = self._get_components_from_path(disk['source'])
+        source = self._get_boot_disk_source(node)
+        if source:
+            bd = self._get_components_from_path(source)
+            key = (bd['zone'], bd['name'])
+            if boot_disks and key in boot_disks:
+                extra['boot_disk'] = boot_disks[key]
+            else:
                 extra['boot_disk'] = self.ex_get_volume(bd['name'], bd['zone'])
 
         if 'items' in node['tags']:
@@ -27,6 +27,7 @@ try:
 except ImportError:
     from xml.etree import ElementTree as ET
 
+import sys
 import warnings
 import base64
 
@@ -36,6 +37,7 @@ from libcloud.utils.py3 import next
 from libcloud.utils.py3 import urlparse
 
 
+from libcloud.common.exceptions import BaseHTTPError
 from libcloud.common.openstack import OpenStackBaseConnection
 from libcloud.common.openstack import OpenStackDriverMixin
 from libcloud.common.openstack import OpenStackException
@@ -1293,6 +1295,29 @@ class OpenStack_1_1_NodeDriver(OpenStackNodeDriver):
             )
         )
 
+    def _get_nodes_by_id(self, nodes):
+        """
+        Look the provided nodes up with a ``GET /servers/{id}`` request per
+        node.
+
+        :rtype: ``list`` of :class:`Node`
+        """
+        result = []
+
+        for node in nodes:
+            try:
+                node = self.ex_get_node_details(node.id)
+            except BaseHTTPError:
+                e = sys.exc_info()[1]
+                if e.code != httplib.NOT_FOUND:
+                    raise
+                node = None
+
+            if node is not None:
+                result.append(node)
+
+        return result
+
     def _to_nodes(self, obj):
         servers = obj['servers']
         return [self._to_node(server) for server in servers]
@@ -0,0 +1,395 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Run commands and deployments on many nodes at once over SSH.
+"""
+
+from __future__ import with_statement
+
+import sys
+import copy
+import time
+import socket
+import threading
+
+from libcloud.common.types import LibcloudError
+from libcloud.compute.base import SSH_CONNECT_TIMEOUT
+from libcloud.compute.base import ssh_client_connect
+from libcloud.compute.deployment import Deployment
+from libcloud.compute.ssh import SSHClient, ParamikoSSHClient
+from libcloud.utils.concurrency import run_in_parallel
+from libcloud.utils.networking import is_valid_ip_address
+
+__all__ = [
+    'ParallelSSHExecutor',
+    'SSHExecutionResult',
+    'SSHExecutionResults'
+]
+
+
+class SSHExecutionResult(object):
+    """
+    Result of running a command or a deployment on a single node.
+    """
+
+    def __init__(self, node, hostname=None, stdout=None, stderr=None,
+                 exit_status=None, error=None, duration=None,
+                 deployment=None):
+        """
+        :param node: Node the command was run on.
+        :type node: :class:`.Node`
+
+        :param hostname: Address which was used to connect to the node.
+        :type hostname: ``str``
+
+        :param stdout: Standard output of the command.
+        :type stdout: ``str``
+
+        :param stderr: Standard error of the command.
+        :type stderr: ``str``
+
+        :param exit_status: Exit status of the command.
+        :type exit_status: ``int``
+
+        :param error: Exception raised while connecting or running the
+                      command, ``None`` on success.
+        :type error: ``Exception``
+
+        :param duration: How long it took to connect and run the command
+                         (in seconds).
+        :type duration: ``float``
+
+        :param deployment: Copy of the deployment which was run on the node.
+        :type deployment: :class:`Deployment`
+        """
+        self.node = node
+        self.hostname = hostname
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_status = exit_status
+        self.error = error
+        self.duration = duration
+        self.deployment = deployment
+
+    @property
+    def success(self):
+        """
+        True if the command ran and didn't return a non-zero exit status.
+        """
+        return self.error is None and not self.exit_status
+
+    def __repr__(self):
+        return (('<SSHExecutionResult: node=%s, hostname=%s, exit_status=%s, '
+                 'error=%r, duration=%s>')
+                % (self.node.id, self.hostname, self.exit_status, self.error,
+                   self.duration))
+
+
+class SSHExecutionResults(object):
+    """
+    Results of a :meth:`ParallelSSHExecutor.run` call, one per node, in the
+    same order as the executor nodes.
+    """
+
+    def __init__(self, results, duration):
+        """
+        :param results: Per node results.
+        :type results: ``list`` of :class:`SSHExecutionResult`
+
+        :param duration: Wall clock time of the whole run (in seconds).
+        :type duration: ``float``
+        """
+        self.results = results
+        self.duration = duration
+
+    @property
+    def succeeded(self):
+        """
+        Results of the nodes the command succeeded on.
+
+        :rtype: ``list`` of :class:`SSHExecutionResult`
+        """
+        return [result for result in self.results if result.success]
+
+    @property
+    def failed(self):
+        """
+        Results of the nodes the command failed on.
+
+        :rtype: ``list`` of :class:`SSHExecutionResult`
+        """
+        return [result for result in self.results if not result.success]
+
+    @property
+    def total_duration(self):
+        """
+        Sum of the per node durations (in seconds).
+
+        :rtype: ``float``
+        """
+        return sum([result.duration or 0 for result in self.results])
+
+    @property
+    def max_duration(self):
+        """
+        Duration of the slowest node (in seconds).
+
+        :rtype: ``float``
+        """
+        return max([result.duration or 0 for result in self.results] or [0])
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    def __getitem__(self, index):
+        return self.results[index]
+
+    def __repr__(self):
+        return ('<SSHExecutionResults: nodes=%s, failed=%s, duration=%s>'
+                % (len(self.results), len(self.failed), self.duration))
+
+
+class _TimeoutSSHClient(object):
+    """
+    SSH client wrapper which applies a timeout to all the commands run with
+    it, including the ones run by deployments.
+    """
+
+    def __init__(self, client, timeout):
+        self._client = client
+        self._timeout = timeout
+
+    def run(self, cmd, **kwargs):
+        kwargs.setdefault('timeout', self._timeout)
+        return self._client.run(cmd, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class ParallelSSHExecutor(object):
+    """
+    Run a command or a :class:`Deployment` on many nodes concurrently.
+
+    SSH connections are kept open between the :meth:`run` calls so the
+    successive commands don't have to connect again. Use :meth:`close` (or
+    the executor as a context manager) to close them.
+
+    >>> from libcloud.compute.drivers.dummy import DummyNodeDriver
+    >>> driver = DummyNodeDriver(0)
+    >>> executor = ParallelSSHExecutor(driver.list_nodes(),
+    ...                                key_files='/root/.ssh/id_rsa')
+    >>> results = executor.run('uptime') # doctest: +SKIP
+    >>> executor.close()
+    """
+
+    def __init__(self, nodes, ssh_interface='public_ips', username='root',
+                 password=None, key_files=None, port=22, max_concurrency=10,
+                 timeout=None, connect_timeout=SSH_CONNECT_TIMEOUT,
+                 ssh_timeout=10, force_ipv4=True, ssh_client_cls=None):
+        """
+        :param nodes: Nodes to run the commands on.
+        :type nodes: ``list`` of :class:`.Node`
+
+        :param ssh_interface: The interface to connect to the nodes with
+                              (public_ips or private_ips).
+        :type ssh_interface: ``str``
+
+        :param username: SSH username.
+        :type username: ``str``
+
+        :param password: Optional SSH password.
+        :type password: ``str``
+
+        :param key_files: Path(s) to the SSH private key(s).
+        :type key_files: ``str`` or ``list``
+
+        :param port: SSH port.
+        :type port: ``int``
+
+        :param max_concurrency: Maximum number of nodes to run the command on
+                                at the same time.
+        :type max_concurrency: ``int``
+
+        :param timeout: Optional timeout (in seconds) for each command which
+                        is run on a node, including the commands run by
+                        deployments. Only commands run with
+                        :class:`ParamikoSSHClient` can be interrupted.
+        :type timeout: ``float``
+
+        :param connect_timeout: How long to retry connecting to a node before
+                                giving up (in seconds).
+        :type connect_timeout: ``int``
+
+        :param ssh_timeout: Socket timeout of the SSH connections.
+        :type ssh_timeout: ``float``
+
+        :param force_ipv4: Only connect to the IPv4 addresses of the nodes.
+        :type force_ipv4: ``bool``
+
+        :param ssh_client_cls: SSH client class (defaults to
+                               :class:`SSHClient`).
+        :type ssh_client_cls: ``type``
+        """
+        self.nodes = list(nodes)
+        self.ssh_interface = ssh_interface
+        self.username = username
+        self.password = password
+        self.key_files = key_files
+        self.port = port
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.ssh_timeout = ssh_timeout
+        self.force_ipv4 = force_ipv4
+        self.ssh_client_cls = ssh_client_cls or SSHClient
+
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def run(self, task):
+        """
+        Run a command or a deployment on all the nodes.
+
+        Failures don't stop the other nodes, they are reported in the
+        results.
+
+        :param task: Shell command or deployment to run. A copy of the
+                     deployment is run on each node so its output attributes
+                     are available in the results.
+        :type task: ``str`` or :class:`Deployment`
+
+        :rtype: :class:`SSHExecutionResults`
+        """
+        start = time.time()
+        results = run_in_parallel(lambda node: self._run_on_node(node, task),
+                                  self.nodes,
+                                  max_workers=self.max_concurrency)
+        duration = time.time() - start
+
+        return SSHExecutionResults(results=[result for result, _ in results],
+                                   duration=duration)
+
+    def close(self):
+        """
+        Close all the open SSH connections.
+        """
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients = {}
+
+        for _, client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _run_on_node(self, node, task):
+        """
+        Run the task on a single node and return the result. Never raises.
+
+        :rtype: :class:`SSHExecutionResult`
+        """
+        result = SSHExecutionResult(node=node)
+        start = time.time()
+
+        try:
+            result.hostname, client = self._get_client(node)
+
+            try:
+                self._run_task(client, node, task, result)
+            except Exception:
+                # The connection might be broken, connect again next time
+                self._drop_client(node)
+                raise
+        except Exception:
+            result.error = sys.exc_info()[1]
+
+        result.duration = time.time() - start
+        return result
+
+    def _run_task(self, client, node, task, result):
+        if self.timeout is not None and isinstance(client, ParamikoSSHClient):
+            client = _TimeoutSSHClient(client=client, timeout=self.timeout)
+
+        if isinstance(task, Deployment):
+            deployment = copy.deepcopy(task)
+            result.deployment = deployment
+            deployment.run(node, client)
+
+            result.stdout = getattr(deployment, 'stdout', None)
+            result.stderr = getattr(deployment, 'stderr', None)
+            result.exit_status = getattr(deployment, 'exit_status', None)
+        else:
+            result.stdout, result.stderr, result.exit_status = \
+                client.run(task)
+
+    def _get_client(self, node):
+        """
+        Return ``(hostname, client)`` tuple with an open connection to the
+        node, reusing the existing one.
+        """
+        with self._lock:
+            cached = self._clients.get(node.uuid)
+
+        if cached:
+            return cached
+
+        hostname = self._get_hostname(node)
+        client = self.ssh_client_cls(hostname=hostname, port=self.port,
+                                     username=self.username,
+                                     password=self.password,
+                                     key_files=self.key_files,
+                                     timeout=self.ssh_timeout)
+        ssh_client_connect(client, timeout=self.connect_timeout)
+
+        with self._lock:
+            self._clients[node.uuid] = (hostname, client)
+
+        return hostname, client
+
+    def _drop_client(self, node):
+        with self._lock:
+            cached = self._clients.pop(node.uuid, None)
+
+        if cached:
+            try:
+                cached[1].close()
+            except Exception:
+                pass
+
+    def _get_hostname(self, node):
+        addresses = getattr(node, self.ssh_interface) or []
+
+        if self.force_ipv4:
+            addresses = [address for address in addresses
+                         if is_valid_ip_address(address=address,
+                                                family=socket.AF_INET)]
+
+        if not addresses:
+            raise LibcloudError(value='Node %s has no %s addresses to connect '
+                                'to' % (node.id, self.ssh_interface))
+
+        return addresses[0]
@@ -30,17 +30,28 @@ except ImportError:
 # Ref: https://bugs.launchpad.net/paramiko/+bug/392973
 
 import os
+import sys
 import time
+import errno
+import codecs
+import select
+import socket
+import shutil
+import tempfile
 import subprocess
 import logging
 import warnings
 
+from io import BytesIO
+from collections import deque
+
 from os.path import split as psplit
 from os.path import join as pjoin
 
 from libcloud.utils.logging import ExtraLogFormatter
 from libcloud.utils.py3 import StringIO
 from libcloud.utils.py3 import b
+from libcloud.utils.py3 import u
 
 __all__ = [
     'BaseSSHClient',
@@ -69,11 +80,61 @@ class SSHCommandTimeoutError(Exception):
         return self.message
 
 
+class _OutputBuffer(object):
+    """
+    Output of a command which is decoded incrementally (a chunk can end in
+    the middle of a multi byte UTF-8 character), passed to an optional
+    handler and kept in memory, up to max_size characters.
+    """
+
+    def __init__(self, handler=None, max_size=None):
+        self.handler = handler
+        self.max_size = max_size
+        self.size = 0
+        self.chunks = deque()
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def write(self, data, final=False):
+        text = self.decoder.decode(data, final)
+
+        if not text:
+            return
+
+        if self.handler is not None:
+            self.handler(text)
+
+        self.chunks.append(text)
+        self.size += len(text)
+
+        if self.max_size is None:
+            return
+
+        # Only keep the end of the output
+        while self.size > self.max_size:
+            excess = self.size - self.max_size
+            first = self.chunks[0]
+
+            if len(first) <= excess:
+                self.chunks.popleft()
+                self.size -= len(first)
+            else:
+                self.chunks[0] = first[excess:]
+                self.size -= excess
+
+    def getvalue(self):
+        self.write(b(''), final=True)
+        return u('').join(self.chunks)
+
+
 class BaseSSHClient(object):
     """
     Base class representing a connection over SSH/SCP to a remote node.
     """
 
+    # True if run() accepts a "stdin" argument with the data to pass to
+    # the command
+    supports_stdin = False
+
     def __init__(self, hostname, port=22, username='root', password=None,
                  key=None, key_files=None, timeout=None):
         """
@@ -202,9 +263,14 @@ class ParamikoSSHClient(BaseSSHClient):
     # Maximum number of bytes to read at once from a socket
     CHUNK_SIZE = 4096
 
+    # Maximum number of bytes to send at once to the stdin of a command
+    SEND_CHUNK_SIZE = 32768
+
     # How long to sleep while waiting for command to finish
     SLEEP_DELAY = 1.5
 
+    supports_stdin = True
+
     def __init__(self, hostname, port=22, username='root', password=None,
                  key=None, key_files=None, key_material=None, timeout=None):
         """
@@ -314,14 +380,36 @@ class ParamikoSSHClient(BaseSSHClient):
         sftp.close()
         return True
 
-    def run(self, cmd, timeout=None):
+    def run(self, cmd, timeout=None, stdout_handler=None,
+            stderr_handler=None, max_output_size=None, stdin=None):
         """
         Note: This function is based on paramiko's exec_command()
         method.
 
+        The output is read as soon as it's available (the channel is
+        watched with ``select``) and decoded incrementally.
+
         :param timeout: How long to wait (in seconds) for the command to
                         finish (optional).
         :type timeout: ``float``
+
+        :param stdout_handler: Optional function which is called with each
+                               decoded chunk of stdout as it's received.
+        :type stdout_handler: ``callable``
+
+        :param stderr_handler: Optional function which is called with each
+                               decoded chunk of stderr as it's received.
+        :type stderr_handler: ``callable``
+
+        :param max_output_size: Optional maximum number of characters of
+                                stdout and stderr which are kept and
+                                returned. Only the end of a longer output is
+                                returned. Use 0 when the output is only
+                                consumed by the handlers.
+        :type max_output_size: ``int``
+
+        :param stdin: Optional data which is sent to the command stdin.
+        :type stdin: ``str``, ``bytes`` or a file-like object
         """
         extra = {'_cmd': cmd}
         self.logger.debug('Executing command', extra=extra)
@@ -335,13 +423,19 @@ class ParamikoSSHClient(BaseSSHClient):
         start_time = time.time()
         chan.exec_command(cmd)
 
-        stdout = StringIO()
-        stderr = StringIO()
+        stdout = _OutputBuffer(handler=stdout_handler,
+                               max_size=max_output_size)
+        stderr = _OutputBuffer(handler=stderr_handler,
+                               max_size=max_output_size)
 
-        # Create a stdin file and immediately close it to prevent any
-        # interactive script from hanging the process.
-        stdin = chan.makefile('wb', bufsize)
-        stdin.close()
+        if stdin is not None:
+            self._send_stdin(chan, stdin, stdout=stdout, stderr=stderr,
+                             cmd=cmd, timeout=timeout, start_time=start_time)
+        else:
+            # Create a stdin file and immediately close it to prevent any
+            # interactive script from hanging the process.
+            stdin = chan.makefile('wb', bufsize)
+            stdin.close()
 
         # Receive all the output
         # Note #1: This is used instead of chan.makefile approach to prevent
@@ -353,34 +447,30 @@ class ParamikoSSHClient(BaseSSHClient):
         # which is not ready will block for indefinitely.
         exit_status_ready = chan.exit_status_ready()
 
-        if exit_status_ready:
-            # It's possible that some data is already available when exit
+        while True:
+            # It's possible that some data is still available when exit
             # status is ready
-            stdout.write(self._consume_stdout(chan).getvalue())
-            stderr.write(self._consume_stderr(chan).getvalue())
+            self._consume_stdout(chan, output=stdout)
+            self._consume_stderr(chan, output=stderr)
 
-        while not exit_status_ready:
-            current_time = time.time()
-            elapsed_time = (current_time - start_time)
+            if exit_status_ready:
+                break
 
-            if timeout and (elapsed_time > timeout):
-                # TODO: Is this the right way to clean up?
-                chan.close()
+            wait_time = self.SLEEP_DELAY
 
-                raise SSHCommandTimeoutError(cmd=cmd, timeout=timeout)
+            if timeout:
+                remaining_time = timeout - (time.time() - start_time)
 
-            stdout.write(self._consume_stdout(chan).getvalue())
-            stderr.write(self._consume_stderr(chan).getvalue())
+                if remaining_time <= 0:
+                    # TODO: Is this the right way to clean up?
+                    chan.close()
 
-            # We need to check the exist status here, because the command could
-            # print some output and exit during this sleep below.
-            exit_status_ready = chan.exit_status_ready()
+                    raise SSHCommandTimeoutError(cmd=cmd, timeout=timeout)
 
-            if exit_status_ready:
-                break
+                wait_time = min(wait_time, remaining_time)
 
-            # Short sleep to prevent busy waiting
-            time.sleep(self.SLEEP_DELAY)
+            self._wait_for_channel(chan, timeout=wait_time)
+            exit_status_ready = chan.exit_status_ready()
 
         # Receive the exit status code of the command we ran.
         status = chan.recv_exit_status()
@@ -399,39 +489,107 @@ class ParamikoSSHClient(BaseSSHClient):
         self.client.close()
         return True
 
-    def _consume_stdout(self, chan):
+    def _send_stdin(self, chan, data, stdout, stderr, cmd=None,
+                    timeout=None, start_time=None):
+        """
+        Send data to the stdin of the command running on chan and close it.
+
+        The output which is available is consumed between the chunks so the
+        command can't block on a full output window. If a timeout is given,
+        :class:`SSHCommandTimeoutError` is raised when the command doesn't
+        read all the data before the deadline.
+        """
+        if not hasattr(data, 'read'):
+            data = BytesIO(b(data))
+
+        if start_time is None:
+            start_time = time.time()
+
+        end_time = start_time + (timeout or 0)
+
+        while True:
+            chunk = data.read(self.SEND_CHUNK_SIZE)
+
+            if not chunk:
+                break
+
+            if timeout:
+                remaining_time = end_time - time.time()
+
+                if remaining_time <= 0:
+                    chan.close()
+                    raise SSHCommandTimeoutError(cmd=cmd, timeout=timeout)
+
+                # Don't block on a full input window past the deadline
+                chan.settimeout(remaining_time)
+
+            try:
+                chan.sendall(b(chunk))
+            except socket.timeout:
+                chan.close()
+                raise SSHCommandTimeoutError(cmd=cmd, timeout=timeout)
+
+            self._consume_stdout(chan, output=stdout)
+            self._consume_stderr(chan, output=stderr)
+
+        if timeout:
+            chan.settimeout(None)
+
+        chan.shutdown_write()
+
+    def _wait_for_channel(self, chan, timeout):
+        """
+        Block until output or the exit status of the command is available on
+        chan, or until timeout seconds have passed.
+        """
+        if chan.recv_ready() or chan.recv_stderr_ready():
+            return
+
+        if chan.eof_received:
+            # Channel file descriptor stays readable after EOF, the exit
+            # status is all that is left to wait for
+            chan.status_event.wait(timeout)
+        else:
+            select.select([chan], [], [], timeout)
+
+    def _consume_stdout(self, chan, output=None):
         """
         Try to consume stdout data from chan if it's receive ready.
         """
         stdout = self._consume_data_from_channel(
             chan=chan,
             recv_method=chan.recv,
-            recv_ready_method=chan.recv_ready)
+            recv_ready_method=chan.recv_ready,
+            output=output)
         return stdout
 
-    def _consume_stderr(self, chan):
+    def _consume_stderr(self, chan, output=None):
         """
         Try to consume stderr data from chan if it's receive ready.
         """
         stderr = self._consume_data_from_channel(
             chan=chan,
             recv_method=chan.recv_stderr,
-            recv_ready_method=chan.recv_stderr_ready)
+            recv_ready_method=chan.recv_stderr_ready,
+            output=output)
         return stderr
 
-    def _consume_data_from_channel(self, chan, recv_method, recv_ready_method):
+    def _consume_data_from_channel(self, chan, recv_method, recv_ready_method,
+                                   output=None):
         """
         Try to consume data from the provided channel.
 
         Keep in mind that data is only consumed if the channel is receive
         ready.
+
+        The data is written to output (an :class:`_OutputBuffer`) when it's
+        provided, otherwise it's returned as a ``StringIO`` object.
         """
-        result = StringIO()
-        result_bytes = bytearray()
+        result = output if output is not None else _OutputBuffer()
 
         if recv_ready_method():
             data = recv_method(self.CHUNK_SIZE)
-            result_bytes += b(data)
+            result.write(b(data))
 
             while data:
                 ready = recv_ready_method()
@@ -440,13 +598,12 @@ class ParamikoSSHClient(BaseSSHClient):
                     break
 
                 data = recv_method(self.CHUNK_SIZE)
-                result_bytes += b(data)
+                result.write(b(data))
 
-        # We only decode data at the end because a single chunk could contain
-        # a part of multi byte UTF-8 character (whole multi bytes character
-        # could be split over two chunks)
-        result.write(result_bytes.decode('utf-8'))
-        return result
+        if output is not None:
+            return output
+
+        return StringIO(result.getvalue())
 
     def _get_pkey_object(self, key):
         """
@@ -472,11 +629,26 @@ class ShellOutSSHClient(BaseSSHClient):
     This client shells out to "ssh" binary to run commands on the remote
     server.
 
+    In the multiplex mode a master connection is started in :meth:`connect`
+    (OpenSSH "ControlMaster") and all the later commands are sent over it,
+    so they don't need to do a new SSH handshake and key exchange.
+
     Note: This client should not be used in production.
     """
 
+    # How many bytes of a file-like stdin object are written at once
+    SEND_CHUNK_SIZE = 32768
+
+    supports_stdin = True
+
     def __init__(self, hostname, port=22, username='root', password=None,
-                 key=None, key_files=None, timeout=None):
+                 key=None, key_files=None, timeout=None, multiplex=False):
+        """
+        :type multiplex: ``bool``
+        :keyword multiplex: Send all the commands over a single master
+                            connection which is started in :meth:`connect`
+                            and stopped in :meth:`close`.
+        """
         super(ShellOutSSHClient, self).__init__(hostname=hostname,
                                                 port=port, username=username,
                                                 password=password,
@@ -493,17 +665,55 @@ class ShellOutSSHClient(BaseSSHClient):
         if child.returncode == 127:
             raise ValueError('ssh client is not available')
 
+        self.multiplex = multiplex
+        self.control_path = None
         self.logger = self._get_and_setup_logger()
 
     def connect(self):
         """
-        This client doesn't support persistent connections establish a new
-        connection every time "run" method is called.
+        Start the master connection in the multiplex mode.
+
+        Otherwise this client doesn't support persistent connections and
+        establishes a new connection every time "run" method is called.
         """
+        if not self.multiplex or self.control_path:
+            return True
+
+        control_dir = tempfile.mkdtemp(prefix='libcloud-ssh-')
+        control_path = pjoin(control_dir, 'master')
+
+        # -f makes ssh go to background once the connection is established
+        # and ControlPersist keeps the master running until "-O exit"
+        cmd = self._get_base_ssh_command()
+        cmd[1:1] = ['-oControlMaster=yes', '-oControlPersist=yes',
+                    '-oControlPath=%s' % (control_path), '-N', '-f']
+
+        self.logger.debug('Starting master connection: "%s"' %
+                          (' '.join(cmd)))
+
+        # The backgrounded master keeps its stdout and stderr open so they
+        # can't be pipes which are read until EOF
+        with open(os.devnull, 'wb') as devnull:
+            with tempfile.TemporaryFile() as stderr:
+                child = subprocess.Popen(cmd, stdout=devnull, stderr=stderr)
+                child.wait()
+                stderr.seek(0)
+                error = stderr.read()
+
+        if child.returncode != 0:
+            shutil.rmtree(control_dir, ignore_errors=True)
+            raise IOError('Failed to start the SSH master connection: %s' %
+                          (error.decode('utf-8', 'replace').strip()))
+
+        self.control_path = control_path
         return True
 
-    def run(self, cmd):
-        return self._run_remote_shell_command([cmd])
+    def run(self, cmd, stdin=None):
+        """
+        :param stdin: Optional data which is sent to the command stdin.
+        :type stdin: ``str``, ``bytes`` or a file-like object
+        """
+        return self._run_remote_shell_command([cmd], stdin=stdin)
 
     def put(self, path, contents=None, chmod=None, mode='w'):
         if mode == 'w':
@@ -513,8 +723,9 @@ class ShellOutSSHClient(BaseSSHClient):
         else:
             raise ValueError('Invalid mode: ' + mode)
 
-        cmd = ['echo "%s" %s %s' % (contents, redirect, path)]
-        self._run_remote_shell_command(cmd)
+        # Contents are sent over stdin so they don't need to be escaped
+        cmd = ['cat %s %s' % (redirect, path)]
+        self._run_remote_shell_command(cmd, stdin=contents or '')
         return path
 
     def delete(self, path):
@@ -523,6 +734,21 @@ class ShellOutSSHClient(BaseSSHClient):
         return True
 
     def close(self):
+        """
+        Stop the master connection in the multiplex mode.
+        """
+        if not self.control_path:
+            return True
+
+        cmd = self._get_base_ssh_command()
+        cmd[-1:-1] = ['-O', 'exit']
+
+        child = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                 stderr=subprocess.PIPE)
+        child.communicate()
+
+        shutil.rmtree(os.path.dirname(self.control_path), ignore_errors=True)
+        self.control_path = None
         return True
 
     def _get_base_ssh_command(self):
@@ -534,17 +760,23 @@ class ShellOutSSHClient(BaseSSHClient):
         if self.timeout:
             cmd += ['-oConnectTimeout=%s' % (self.timeout)]
 
+        if self.control_path:
+            cmd += ['-oControlPath=%s' % (self.control_path)]
+
         cmd += ['%s@%s' % (self.username, self.hostname)]
 
         return cmd
 
-    def _run_remote_shell_command(self, cmd):
+    def _run_remote_shell_command(self, cmd, stdin=None):
         """
         Run a command on a remote server.
 
         :param      cmd: Command to run.
         :type       cmd: ``list`` of ``str``
 
+        :param      stdin: Optional data which is sent to the command stdin.
+        :type       stdin: ``str``, ``bytes`` or a file-like object
+
         :return: Command stdout, stderr and status code.
         :rtype: ``tuple``
         """
@@ -553,10 +785,73 @@ class ShellOutSSHClient(BaseSSHClient):
 
         self.logger.debug('Executing command: "%s"' % (' '.join(full_cmd)))
 
-        child = subprocess.Popen(full_cmd, stdout=subprocess.PIPE,
-                                 stderr=subprocess.PIPE)
-        stdout, stderr = child.communicate()
-        return (stdout, stderr, child.returncode)
+        if stdin is None:
+            child = subprocess.Popen(full_cmd, stdout=subprocess.PIPE,
+                                     stderr=subprocess.PIPE)
+            stdout, stderr = child.communicate()
+            return (stdout, stderr, child.returncode)
+
+        if not hasattr(stdin, 'read'):
+            child = subprocess.Popen(full_cmd, stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE,
+                                     stderr=subprocess.PIPE)
+            stdout, stderr = child.communicate(b(stdin))
+            return (stdout, stderr, child.returncode)
+
+        # File-like objects aren't read into memory. The output goes to
+        # temporary files so the command can't block on a full output pipe
+        # while its input is being written.
+        with tempfile.TemporaryFile() as stdout:
+            with tempfile.TemporaryFile() as stderr:
+                fileno = self._get_fileno(stdin)
+
+                if fileno is not None:
+                    child = subprocess.Popen(full_cmd, stdin=fileno,
+                                             stdout=stdout, stderr=stderr)
+                else:
+                    child = subprocess.Popen(full_cmd, stdin=subprocess.PIPE,
+                                             stdout=stdout, stderr=stderr)
+                    self._copy_to_stdin(stdin, child.stdin)
+
+                child.wait()
+
+                stdout.seek(0)
+                stderr.seek(0)
+                return (stdout.read(), stderr.read(), child.returncode)
+
+    def _get_fileno(self, fp):
+        """
+        Return the file descriptor of a file-like object or ``None`` if it
+        doesn't have one (e.g. ``BytesIO``).
+        """
+        try:
+            return fp.fileno()
+        except (AttributeError, IOError, OSError, ValueError):
+            return None
+
+    def _copy_to_stdin(self, fp, stdin):
+        """
+        Copy the file-like object to the command stdin in chunks and close
+        it. Copying stops if the command exits without reading everything.
+        """
+        try:
+            while True:
+                chunk = fp.read(self.SEND_CHUNK_SIZE)
+
+                if not chunk:
+                    break
+
+                stdin.write(b(chunk))
+        except IOError:
+            e = sys.exc_info()[1]
+
+            if e.errno != errno.EPIPE:
+                raise
+        finally:
+            try:
+                stdin.close()
+            except IOError:
+                pass
 
 
 class MockSSHClient(BaseSSHClient):
@@ -24,6 +24,7 @@ __all__ = [
     "NodeState",
     "DeploymentError",
     "DeploymentException",
+    "WaitUntilRunningTimeoutError",
 
     # @@TR: should the unused imports below be exported?
     "LibcloudError",
@@ -331,6 +332,22 @@ class DeploymentError(LibcloudError):
                 % (self.node.id, str(self.value), str(self.driver))))
 
 
+class WaitUntilRunningTimeoutError(LibcloudError):
+    """
+    Exception used when not all the nodes passed to
+    :meth:`NodeDriver.wait_until_running` are running before the timeout.
+
+    :ivar running: ``[(Node, ip_addresses)]`` list for the nodes which are
+                   already running.
+    :ivar pending: List of the nodes which are still not running.
+    """
+    def __init__(self, value, running=None, pending=None, driver=None):
+        super(WaitUntilRunningTimeoutError, self).__init__(value=value,
+                                                           driver=driver)
+        self.running = running or []
+        self.pending = pending or []
+
+
 class KeyPairError(LibcloudError):
     error_type = 'KeyPairError'
 
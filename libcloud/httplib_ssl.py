@@ -20,8 +20,12 @@ import os
 import sys
 import socket
 import ssl
+import time
 import base64
 import warnings
+import threading
+
+from collections import OrderedDict
 
 import libcloud.security
 from libcloud.utils.py3 import b
@@ -35,7 +39,10 @@ from libcloud.utils.py3 import CertificateError
 __all__ = [
     'LibcloudBaseConnection',
     'LibcloudHTTPConnection',
-    'LibcloudHTTPSConnection'
+    'LibcloudHTTPSConnection',
+
+    'find_ca_cert',
+    'get_ssl_context'
 ]
 
 HTTP_PROXY_ENV_VARIABLE_NAME = 'http_proxy'
@@ -58,6 +65,26 @@ SSL_CONSTANT_TO_TLS_VERSION_MAP = {
     5: 'TLS v1.2'
 }
 
+# SSLContext is available in Python 2.7.9+ and 3.2+, TLS session objects in
+# Python 3.6+
+HAS_SSL_CONTEXT = hasattr(ssl, 'SSLContext')
+HAS_TLS_SESSION = hasattr(ssl, 'SSLSession')
+
+# Maximum number of TLS sessions which are kept for resumption
+MAX_TLS_SESSIONS = 256
+
+_lock = threading.Lock()
+
+# CA_CERTS_PATH tuple -> first CA bundle which exists
+_ca_certs = {}
+
+# (ssl version, verify, CA bundle, client cert, key, check hostname) ->
+# SSLContext
+_ssl_contexts = {}
+
+# (SSLContext id, host, port) -> SSLSession of the last connection
+_tls_sessions = OrderedDict()
+
 
 class LibcloudBaseConnection(object):
     """
@@ -75,6 +102,11 @@ class LibcloudBaseConnection(object):
 
     http_proxy_used = False
 
+    # Durations of the phases of the last connect() call (dns, connect and
+    # tls). Reset by the caller which wants to know if a new connection has
+    # been established.
+    connect_timings = None
+
     def set_http_proxy(self, proxy_url):
         """
         Set a HTTP proxy which will be used with this connection.
@@ -172,6 +204,50 @@ class LibcloudBaseConnection(object):
         self.sock = sock
         self._tunnel()  # pylint: disable=no-member
 
+    def _create_timed_connection(self, address,
+                                 timeout=socket._GLOBAL_DEFAULT_TIMEOUT,
+                                 source_address=None):
+        """
+        Counterpart of ``socket.create_connection`` which records the time
+        spent on name resolution and TCP connect in ``connect_timings``.
+        """
+        host, port = address
+        timings = {}
+        self.connect_timings = timings
+
+        start = time.time()
+        addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        timings['dns'] = time.time() - start
+
+        start = time.time()
+        error = None
+
+        for family, socktype, proto, _, sockaddr in addresses:
+            sock = None
+
+            try:
+                sock = socket.socket(family, socktype, proto)
+
+                if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                    sock.settimeout(timeout)
+
+                if source_address:
+                    sock.bind(source_address)
+
+                sock.connect(sockaddr)
+                timings['connect'] = time.time() - start
+                return sock
+            except socket.error:
+                error = sys.exc_info()[1]
+
+                if sock is not None:
+                    sock.close()
+
+        if error is not None:
+            raise error
+
+        raise socket.error('getaddrinfo returns an empty list')
+
     def _set_hostport(self, host, port):
         """
         Backported from Python stdlib so Proxy support also works with
@@ -203,10 +279,93 @@ class LibcloudHTTPConnection(httplib.HTTPConnection, LibcloudBaseConnection):
 
         super(LibcloudHTTPConnection, self).__init__(*args, **kwargs)
 
+        # Used by HTTPConnection.connect() on Python 3
+        self._create_connection = self._create_timed_connection
+
         if proxy_url:
             self.set_http_proxy(proxy_url=proxy_url)
 
 
+def find_ca_cert():
+    """
+    Return the first CA bundle in ``libcloud.security.CA_CERTS_PATH`` which
+    exists. The result is cached until ``CA_CERTS_PATH`` changes.
+
+    :rtype: ``str``
+    """
+    paths = tuple(libcloud.security.CA_CERTS_PATH)
+
+    with _lock:
+        if paths in _ca_certs:
+            return _ca_certs[paths]
+
+    available = [cert for cert in paths
+                 if os.path.exists(cert) and os.path.isfile(cert)]
+
+    if not available:
+        raise RuntimeError(libcloud.security.CA_CERTS_UNAVAILABLE_ERROR_MSG)
+
+    with _lock:
+        _ca_certs[paths] = available[0]
+
+    return available[0]
+
+
+def get_ssl_context(ssl_version, verify=True, ca_cert=None, cert_file=None,
+                    key_file=None, check_hostname=False):
+    """
+    Return a ``SSLContext`` for the provided settings.
+
+    Contexts are cached at the module level so CA certificates are only
+    loaded once per process and TLS sessions can be reused between
+    connections which share a context.
+
+    :rtype: :class:`ssl.SSLContext`
+    """
+    key = (ssl_version, bool(verify), ca_cert, cert_file, key_file,
+           bool(check_hostname))
+
+    with _lock:
+        context = _ssl_contexts.get(key, None)
+
+        if context is not None:
+            return context
+
+        context = ssl.SSLContext(ssl_version)
+        context.check_hostname = False
+
+        if verify:
+            context.verify_mode = ssl.CERT_REQUIRED
+            context.load_verify_locations(cafile=ca_cert)
+            context.check_hostname = check_hostname
+        else:
+            context.verify_mode = ssl.CERT_NONE
+
+        if cert_file:
+            context.load_cert_chain(cert_file, key_file)
+
+        _ssl_contexts[key] = context
+
+    return context
+
+
+def _get_tls_session(key):
+    with _lock:
+        return _tls_sessions.get(key, None)
+
+
+def _store_tls_session(key, session):
+    if session is None:
+        return
+
+    with _lock:
+        _tls_sessions.pop(key, None)
+        _tls_sessions[key] = session
+
+        while len(_tls_sessions) > MAX_TLS_SESSIONS:
+            _tls_sessions.popitem(last=False)
+
+
 class LibcloudHTTPSConnection(httplib.HTTPSConnection, LibcloudBaseConnection):
     """
     LibcloudHTTPSConnection
@@ -217,6 +376,10 @@ class LibcloudHTTPSConnection(httplib.HTTPSConnection, LibcloudBaseConnection):
     verify = True         # verify by default
     ca_cert = None        # no default CA Certificate
 
+    # True if the last handshake resumed a previous TLS session
+    tls_session_reused = False
+    _tls_session_key = None
+
     def __init__(self, *args, **kwargs):
         """
         Constructor
@@ -226,8 +389,21 @@ class LibcloudHTTPSConnection(httplib.HTTPSConnection, LibcloudBaseConnection):
         proxy_url_env = os.environ.get(HTTP_PROXY_ENV_VARIABLE_NAME, None)
         proxy_url = kwargs.pop('proxy_url', proxy_url_env)
 
+        # HTTPSConnection creates (and loads the default CA certificates into)
+        # a new SSLContext for each instance unless one is passed in. The
+        # context is not used by connect() below, so hand over the cached one.
+        # It's mutated if client certificates are passed, so skip it then.
+        if HAS_SSL_CONTEXT and not (kwargs.get('key_file') or
+                                    kwargs.get('cert_file')):
+            kwargs.setdefault('context', get_ssl_context(
+                libcloud.security.SSL_VERSION, verify=self.verify,
+                ca_cert=self.ca_cert))
+
         super(LibcloudHTTPSConnection, self).__init__(*args, **kwargs)
 
+        # Used by HTTPSConnection.connect() on Python 3
+        self._create_connection = self._create_timed_connection
+
         if proxy_url:
             self.set_http_proxy(proxy_url=proxy_url)
 
@@ -257,61 +433,105 @@ class LibcloudHTTPSConnection(httplib.HTTPSConnection, LibcloudBaseConnection):
         if not self.verify:
             return
 
-        ca_certs_available = [cert
-                              for cert in libcloud.security.CA_CERTS_PATH
-                              if os.path.exists(cert) and os.path.isfile(cert)]
-        if ca_certs_available:
-            # use first available certificate
-            self.ca_cert = ca_certs_available[0]
-        else:
-            raise RuntimeError(
-                libcloud.security.CA_CERTS_UNAVAILABLE_ERROR_MSG)
+        # use first available certificate
+        self.ca_cert = find_ca_cert()
 
     def connect(self):
         """
         Connect
 
-        Checks if verification is toggled; if not, just call
-        httplib.HTTPSConnection's connect
+        Checks if verification is toggled; if not and SSLContext is not
+        available, just call httplib.HTTPSConnection's connect
         """
-        if not self.verify:
-            return httplib.HTTPSConnection.connect(self)
+        if not self.verify and not HAS_SSL_CONTEXT:
+            start = time.time()
+            result = httplib.HTTPSConnection.connect(self)
+            timings = self.connect_timings
+
+            if timings:
+                # Whatever is not spent on name resolution and TCP connect
+                # is spent on the TLS handshake
+                timings['tls'] = max(0, time.time() - start -
+                                     timings.get('dns', 0) -
+                                     timings.get('connect', 0))
+
+            return result
 
         # otherwise, create a connection and verify the hostname
-        # use socket.create_connection (in 2.6+) if possible
-        if getattr(socket, 'create_connection', None):
-            sock = socket.create_connection((self.host, self.port),
-                                            self.timeout)
-        else:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.connect((self.host, self.port))
+        sock = self._create_timed_connection((self.host, self.port),
+                                             self.timeout)
 
         # Activate the HTTP proxy
         if self.http_proxy_used:
             self._activate_http_proxy(sock=sock)
 
+        # Host of the server we are talking to (not the proxy)
+        hostname = getattr(self, '_tunnel_host', None) or self.host
+        port = getattr(self, '_tunnel_port', None) or self.port
+
         ssl_version = libcloud.security.SSL_VERSION
+        key_file = getattr(self, 'key_file', None)
+        cert_file = getattr(self, 'cert_file', None)
+        start = time.time()
 
         try:
-            self.sock = ssl.wrap_socket(
-                sock,
-                self.key_file,
-                self.cert_file,
-                cert_reqs=ssl.CERT_REQUIRED,
-                ca_certs=self.ca_cert,
-                ssl_version=ssl_version)
+            if HAS_SSL_CONTEXT:
+                context = get_ssl_context(ssl_version=ssl_version,
+                                          verify=self.verify,
+                                          ca_cert=self.ca_cert,
+                                          cert_file=cert_file,
+                                          key_file=key_file)
+                self._tls_session_key = (id(context), hostname, port)
+                kwargs = {}
+
+                if HAS_TLS_SESSION:
+                    kwargs['session'] = _get_tls_session(self._tls_session_key)
+
+                self.sock = context.wrap_socket(sock,
+                                                server_hostname=hostname,
+                                                **kwargs)
+            else:
+                self.sock = ssl.wrap_socket(
+                    sock,
+                    key_file,
+                    cert_file,
+                    cert_reqs=ssl.CERT_REQUIRED,
+                    ca_certs=self.ca_cert,
+                    ssl_version=ssl_version)
         except socket.error:
             exc = sys.exc_info()[1]
             # Re-throw an exception with a more friendly error message
             exc = get_socket_error_exception(ssl_version=ssl_version, exc=exc)
             raise exc
 
-        cert = self.sock.getpeercert()
-        try:
-            match_hostname(cert, self.host)
-        except CertificateError:
-            e = sys.exc_info()[1]
-            raise ssl.SSLError('Failed to verify hostname: %s' % (str(e)))
+        if self.verify:
+            cert = self.sock.getpeercert()
+            try:
+                match_hostname(cert, hostname)
+            except CertificateError:
+                e = sys.exc_info()[1]
+                raise ssl.SSLError('Failed to verify hostname: %s' % (str(e)))
+
+        if HAS_TLS_SESSION:
+            self.tls_session_reused = self.sock.session_reused
+            _store_tls_session(self._tls_session_key, self.sock.session)
+
+        if self.connect_timings is not None:
+            self.connect_timings['tls'] = time.time() - start
+
+    def close(self):
+        # With TLS 1.3 the session ticket is only received after the
+        # handshake so the session is stored again before closing
+        sock = self.sock
+
+        if HAS_TLS_SESSION and self._tls_session_key is not None and \
+           isinstance(sock, ssl.SSLSocket):
+            try:
+                _store_tls_session(self._tls_session_key, sock.session)
+            except (ValueError, socket.error):
+                pass
+
+        httplib.HTTPSConnection.close(self)
 
 
 def get_socket_error_exception(ssl_version, exc):
@@ -279,24 +279,26 @@ class BaseS3StorageDriver(StorageDriver):
             if last_key:
                 params['marker'] = last_key
 
+            # Listing is parsed incrementally so memory usage doesn't depend
+            # on the number of objects in a page
             response = self.connection.request(container_path,
-                                               params=params)
+                                               params=params, stream=True)
 
             if response.status != httplib.OK:
                 raise LibcloudError('Unexpected status code: %s' %
                                     (response.status), driver=self)
 
-            objects = self._to_objs(obj=response.object,
-                                    xpath='Contents', container=container)
-            is_truncated = response.object.findtext(fixxpath(
-                xpath='IsTruncated', namespace=self.namespace)).lower()
-            exhausted = (is_truncated == 'false')
-
             last_key = None
-            for obj in objects:
+            for element in response.iterparse('Contents'):
+                obj = self._to_obj(element, container)
                 last_key = obj.name
                 yield obj
 
+            # IsTruncated is only available once the whole page was parsed
+            is_truncated = response.object.findtext(fixxpath(
+                xpath='IsTruncated', namespace=self.namespace)).lower()
+            exhausted = (is_truncated == 'false')
+
     def get_container(self, container_name):
         try:
             response = self.connection.request('/%s' % container_name,
@@ -13,8 +13,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import sys
+import ssl
 import random
+import threading
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
 
 from libcloud.utils.py3 import httplib
 from libcloud.utils.py3 import StringIO
@@ -32,6 +42,10 @@ else:
 
 XML_HEADERS = {'content-type': 'application/xml'}
 
+# Self-signed certificate (and key) for localhost / 127.0.0.1
+TLS_CERT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'common', 'fixtures', 'tls', 'localhost.pem')
+
 
 class LibcloudTestCase(unittest.TestCase):
     def __init__(self, *args, **kwargs):
@@ -162,7 +176,6 @@ class MockHttp(BaseMockHttpObject):
     responseCls = MockResponse
     host = None
     port = None
-    response = None
 
     type = None
     use_param = None  # will use this param to namespace the request function
@@ -175,6 +188,18 @@ class MockHttp(BaseMockHttpObject):
         self.host = host
         self.port = port
 
+    # The connection pool keeps track of the connections by identity. Mock
+    # classes which also inherit from TestCase would otherwise compare equal
+    # to each other.
+    def __eq__(self, other):
+        return self is other
+
+    def __ne__(self, other):
+        return self is not other
+
+    def __hash__(self):
+        return id(self)
+
     def request(self, method, url, body=None, headers=None, raw=False):
         # Find a method we can use for this request
         parsed = urlparse.urlparse(url)
@@ -192,10 +217,12 @@ class MockHttp(BaseMockHttpObject):
             self.test._add_executed_mock_method(method_name=meth_name)
 
         status, body, headers, reason = meth(method, url, body, headers)
-        self.response = self.responseCls(status, body, headers, reason)
+        # Private name so the response doesn't shadow attributes of the
+        # subclasses when the connection is reused from the pool
+        self._mock_response = self.responseCls(status, body, headers, reason)
 
     def getresponse(self):
-        return self.response
+        return self._mock_response
 
     def connect(self):
         """
@@ -348,6 +375,72 @@ class MockRawResponse(BaseMockHttpObject):
                                               self._headers, self._reason)
         return self._response
 
+
+class LocalHTTPServer(ThreadingMixIn, HTTPServer):
+    """
+    HTTP server listening on a random local port which runs in a background
+    thread. Useful for tests which need to exercise a real socket.
+
+    Requests are handled by the ``handler`` callable which receives a
+    ``BaseHTTPRequestHandler`` instance and returns a tuple of
+    (int status, str body, dict headers).
+
+    If ``certfile`` is provided, the server speaks HTTPS. TLS_CERT_PATH is a
+    self-signed certificate for localhost which can be used in tests.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handler, certfile=None):
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _handle(self):
+                server.connections.add(self.client_address)
+                server.request_count += 1
+                status, body, headers = handler(self)
+                body = body.encode('utf-8')
+
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+
+                if self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = _handle
+
+            def log_message(self, *args, **kwargs):
+                pass
+
+        HTTPServer.__init__(self, ('127.0.0.1', 0), RequestHandler)
+        self.host, self.port = self.server_address[:2]
+
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile)
+            self.socket = context.wrap_socket(self.socket, server_side=True)
+
+        self.connections = set()
+        self.request_count = 0
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
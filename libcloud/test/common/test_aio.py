@@ -0,0 +1,347 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import json
+import functools
+
+from mock import Mock, patch
+
+from libcloud.utils.py3 import httplib
+from libcloud.common.base import Connection
+from libcloud.common.base import JsonResponse
+from libcloud.common.base import PollingConnection
+from libcloud.common.cache import ResponseCache
+from libcloud.common.retry import RetryPolicy
+from libcloud.common.types import LibcloudError
+from libcloud.common.exceptions import RateLimitReachedError
+from libcloud.compute.base import Node
+from libcloud.compute.base import NodeDriver
+from libcloud.compute.types import NodeState
+from libcloud.compute.types import WaitUntilRunningTimeoutError
+from libcloud.test import unittest
+from libcloud.test import LocalHTTPServer
+
+have_asyncio = sys.version_info >= (3, 5)
+
+if have_asyncio:
+    import asyncio
+    from libcloud.common.aio import AsyncConnection
+    from libcloud.common.aio import ThreadPoolAsyncDriver
+
+
+class EchoConnection(Connection):
+    responseCls = JsonResponse
+
+    def add_default_params(self, params):
+        params['api_key'] = 'key'
+        return params
+
+    def add_default_headers(self, headers):
+        headers['X-Token'] = 'token'
+        return headers
+
+    def pre_connect_hook(self, params, headers):
+        headers['X-Action'] = self.action
+        return params, headers
+
+
+class EchoPollingConnection(PollingConnection, EchoConnection):
+    poll_interval = 0.01
+    timeout = 5
+
+    def get_poll_request_kwargs(self, response, context, request_kwargs):
+        return {'action': '/job/%s' % (response.object['body'])}
+
+    def has_completed(self, response):
+        return response.object['action'].endswith('done')
+
+
+@unittest.skipIf(not have_asyncio, 'asyncio requires Python 3.5 or higher')
+class AsyncConnectionTestCase(unittest.TestCase):
+    def setUp(self):
+        environ = patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+        os.environ.pop('http_proxy', None)
+
+        self.server = LocalHTTPServer(self._handle).start()
+        self.loop = asyncio.new_event_loop()
+        self.throttled = 0
+
+    def tearDown(self):
+        self.loop.close()
+        self.server.stop()
+
+    def _handle(self, request):
+        length = int(request.headers.get('Content-Length', 0) or 0)
+        body = request.rfile.read(length).decode('utf-8') if length else ''
+
+        result = {'method': request.command, 'path': request.path,
+                  'body': body, 'token': request.headers.get('X-Token'),
+                  'action': request.headers.get('X-Action')}
+        status = httplib.OK
+        headers = {}
+
+        if request.path.startswith('/error'):
+            status = httplib.INTERNAL_SERVER_ERROR
+        elif request.path.startswith('/throttled') and self.throttled:
+            self.throttled -= 1
+            status = RateLimitReachedError.code
+        elif request.path.startswith('/cached'):
+            headers['ETag'] = '"1"'
+
+            if request.headers.get('If-None-Match') == '"1"':
+                return httplib.NOT_MODIFIED, '', headers
+
+        return status, json.dumps(result), headers
+
+    def _get_connection(self, cls=EchoConnection):
+        con = cls(secure=False, host=self.server.host,
+                  port=self.server.port)
+        return AsyncConnection(con, max_connections=10)
+
+    def test_request_uses_connection_hooks(self):
+        con = self._get_connection()
+        coro = con.request('/test', data='foo', method='POST')
+        response = self.loop.run_until_complete(coro)
+        con.close()
+
+        self.assertEqual(response.status, httplib.OK)
+        self.assertEqual(response.object['method'], 'POST')
+        self.assertEqual(response.object['path'], '/test?api_key=key')
+        self.assertEqual(response.object['body'], 'foo')
+        self.assertEqual(response.object['token'], 'token')
+        self.assertEqual(response.object['action'], '/test')
+
+    def test_concurrent_requests(self):
+        con = self._get_connection()
+        paths = ['/test/%s' % (index) for index in range(50)]
+        tasks = [self.loop.create_task(con.request(path)) for path in paths]
+        responses = self.loop.run_until_complete(asyncio.gather(*tasks))
+        con.close()
+
+        self.assertEqual([response.object['action'] for response in
+                          responses], paths)
+        self.assertEqual(self.server.request_count, 50)
+        self.assertTrue(len(self.server.connections) <= 10)
+
+    def test_kept_alive_connection_is_reused(self):
+        con = self._get_connection()
+
+        for _ in range(3):
+            self.loop.run_until_complete(con.request('/test'))
+
+        con.close()
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_error_response(self):
+        con = self._get_connection()
+        coro = con.request('/error')
+
+        self.assertRaises(Exception, self.loop.run_until_complete, coro)
+        con.close()
+
+    def test_async_request_polls_until_completed(self):
+        con = self._get_connection(cls=EchoPollingConnection)
+        coro = con.async_request('/start', data='done', method='POST')
+        response = self.loop.run_until_complete(coro)
+        con.close()
+
+        self.assertEqual(response.object['path'],
+                         '/job/done?api_key=key')
+
+    def test_throttled_request_is_retried(self):
+        con = self._get_connection()
+        con.connection.retry_policy = RetryPolicy(max_retries=2,
+                                                  base_delay=0.01,
+                                                  max_delay=0.01)
+        events = []
+        con.connection.add_observer(events.append)
+        self.throttled = 2
+
+        response = self.loop.run_until_complete(con.request('/throttled'))
+        con.close()
+
+        self.assertEqual(response.status, httplib.OK)
+        self.assertEqual(self.server.request_count, 3)
+        self.assertEqual([event.status for event in events],
+                         [RateLimitReachedError.code,
+                          RateLimitReachedError.code, httplib.OK])
+        self.assertEqual([event.retries for event in events], [0, 1, 2])
+        self.assertTrue('ttfb' in events[-1].timings)
+        self.assertTrue('parse' in events[-1].timings)
+
+        stats = con.connection.retry_policy.stats
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['throttled'], 2)
+        self.assertEqual(stats['retries'], 2)
+
+    def test_throttled_request_retries_are_exhausted(self):
+        con = self._get_connection()
+        con.connection.retry_policy = RetryPolicy(max_retries=1,
+                                                  base_delay=0.01,
+                                                  max_delay=0.01)
+        self.throttled = 5
+
+        coro = con.request('/throttled')
+        self.assertRaises(RateLimitReachedError, self.loop.run_until_complete,
+                          coro)
+        con.close()
+
+        self.assertEqual(self.server.request_count, 2)
+        self.assertEqual(con.connection.retry_policy.stats['exhausted'], 1)
+
+    def test_response_cache_revalidation(self):
+        con = self._get_connection()
+        con.connection.response_cache = ResponseCache()
+
+        first = self.loop.run_until_complete(con.request('/cached'))
+        second = self.loop.run_until_complete(con.request('/cached'))
+        con.close()
+
+        self.assertEqual(self.server.request_count, 2)
+        self.assertEqual(second.status, httplib.OK)
+        self.assertTrue(second.object is first.object)
+        self.assertEqual(
+            con.connection.response_cache.stats['revalidated'], 1)
+
+    def test_rate_limiter_delay_does_not_block(self):
+        con = self._get_connection()
+        con.connection.rate_limiter = Mock()
+        con.connection.rate_limiter.reserve.return_value = 0.01
+        events = []
+        con.connection.add_observer(events.append)
+
+        self.loop.run_until_complete(con.request('/test'))
+        con.close()
+
+        self.assertEqual(con.connection.rate_limiter.reserve.call_count, 1)
+        self.assertFalse(con.connection.rate_limiter.acquire.called)
+        self.assertEqual(events[0].timings['wait'], 0.01)
+
+    def test_read_chunked_response(self):
+        async def read():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b'HTTP/1.1 200 OK\r\n'
+                             b'Transfer-Encoding: chunked\r\n\r\n'
+                             b'3\r\nfoo\r\n3;ext=1\r\nbar\r\n0\r\n\r\n')
+            reader.feed_eof()
+            return await con._read_response(reader=reader, method='GET')
+
+        con = self._get_connection()
+        response = self.loop.run_until_complete(read())
+
+        self.assertEqual(response.status, httplib.OK)
+        self.assertEqual(response.read(), b'foobar')
+        self.assertFalse(response.will_close)
+
+
+@unittest.skipIf(not have_asyncio, 'asyncio requires Python 3.5 or higher')
+class ThreadPoolAsyncDriverTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.driver = Mock()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _get_node(self, state, public_ips):
+        return Node(id='1', name='node', state=state, public_ips=public_ips,
+                    private_ips=[], driver=self.driver)
+
+    def _use_node_driver_polling(self):
+        for name in ['wait_until_running', '_poll_running_nodes',
+                     '_filter_running_nodes']:
+            method = getattr(NodeDriver, name)
+            setattr(self.driver, name,
+                    functools.partial(method, self.driver))
+
+        self.driver._get_nodes_by_id.return_value = None
+
+    def test_list_nodes(self):
+        self.driver.list_nodes.return_value = ['node']
+        driver = ThreadPoolAsyncDriver(self.driver, max_concurrency=2)
+
+        result = self.loop.run_until_complete(
+            driver.list_nodes(ex_zone='all'))
+
+        self.assertEqual(result, ['node'])
+        self.driver.list_nodes.assert_called_once_with(ex_zone='all')
+
+    def test_connection(self):
+        driver = ThreadPoolAsyncDriver(self.driver, max_connections=5)
+
+        self.assertTrue(isinstance(driver.connection, AsyncConnection))
+        self.assertTrue(driver.connection.connection is
+                        self.driver.connection)
+        self.assertEqual(driver.connection.max_connections, 5)
+
+    def test_download_object_as_stream(self):
+        self.driver.download_object_as_stream.return_value = \
+            iter([b'a', b'b'])
+        driver = ThreadPoolAsyncDriver(self.driver)
+
+        stream = self.loop.run_until_complete(
+            driver.download_object_as_stream('obj'))
+        iterator = stream.__aiter__()
+        result = []
+
+        while True:
+            try:
+                chunk = self.loop.run_until_complete(iterator.__anext__())
+            except StopAsyncIteration:
+                break
+            result.append(chunk)
+
+        self.assertEqual(result, [b'a', b'b'])
+
+    def test_wait_until_running(self):
+        pending = self._get_node(NodeState.PENDING, [])
+        running = self._get_node(NodeState.RUNNING, ['1.2.3.4'])
+        self.driver.list_nodes.side_effect = [[pending], [running]]
+        self._use_node_driver_polling()
+        driver = ThreadPoolAsyncDriver(self.driver)
+
+        coro = driver.wait_until_running([pending], wait_period=0.01)
+        result = self.loop.run_until_complete(coro)
+
+        self.assertEqual(result, [(running, ['1.2.3.4'])])
+        self.assertEqual(self.driver.list_nodes.call_count, 2)
+
+    def test_wait_until_running_timeout(self):
+        pending = self._get_node(NodeState.PENDING, [])
+        self.driver.list_nodes.return_value = [pending]
+        self._use_node_driver_polling()
+        driver = ThreadPoolAsyncDriver(self.driver)
+
+        coro = driver.wait_until_running([pending], wait_period=0.01,
+                                         timeout=0.05)
+        self.assertRaises(LibcloudError, self.loop.run_until_complete, coro)
+
+        coro = driver.wait_until_running([pending], wait_period=0.01,
+                                         timeout=0.05)
+        try:
+            self.loop.run_until_complete(coro)
+        except WaitUntilRunningTimeoutError as e:
+            self.assertEqual(e.pending, [pending])
+            self.assertEqual(e.running, [])
+        else:
+            self.fail('Exception was not thrown')
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
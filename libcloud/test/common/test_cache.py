@@ -0,0 +1,169 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import json
+
+from mock import Mock, patch
+
+from libcloud.utils.py3 import httplib
+from libcloud.common.base import ConnectionUserAndKey, JsonResponse
+from libcloud.common.cache import ResponseCache
+from libcloud.test import unittest
+from libcloud.test import LocalHTTPServer
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def _get_response(self, body):
+        return Mock(body=body, headers={}, status=httplib.OK)
+
+    def test_lru_eviction_by_size(self):
+        cache = ResponseCache(max_size=10)
+        cache.put('a', self._get_response('aaaa'))
+        cache.put('b', self._get_response('bbbb'))
+
+        # Access "a" so "b" is the least recently used response
+        self.assertIsNotNone(cache.get('a'))
+
+        cache.put('c', self._get_response('cccc'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+        self.assertEqual(cache.size, 8)
+        self.assertEqual(cache.stats['evictions'], 1)
+
+    def test_response_larger_than_max_size_is_not_cached(self):
+        cache = ResponseCache(max_size=2)
+        cache.put('a', self._get_response('aaaa'))
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.size, 0)
+
+    def test_ttl(self):
+        cache = ResponseCache()
+        response = self._get_response('a')
+
+        with patch('libcloud.common.cache.time.time', return_value=100):
+            cache.put('a', response)
+
+        with patch('libcloud.common.cache.time.time', return_value=105):
+            self.assertEqual(cache.get('a', ttl=10), (response, True))
+            self.assertEqual(cache.get('a', ttl=2), (response, False))
+            self.assertEqual(cache.get('a'), (response, False))
+
+    def test_get_ttl(self):
+        cache = ResponseCache(ttl=1, ttls={'gce': 30})
+        connection = Mock(driver=Mock(type='gce'), response_cache_ttl=None)
+        self.assertEqual(cache.get_ttl(connection), 30)
+
+        connection.driver.type = 'ec2'
+        self.assertEqual(cache.get_ttl(connection), 1)
+
+        connection.response_cache_ttl = 5
+        self.assertEqual(cache.get_ttl(connection), 5)
+
+
+class CountingJsonResponse(JsonResponse):
+    parse_count = 0
+
+    def parse_body(self):
+        CountingJsonResponse.parse_count += 1
+        return super(CountingJsonResponse, self).parse_body()
+
+
+class CachingConnection(ConnectionUserAndKey):
+    responseCls = CountingJsonResponse
+
+
+class ConnectionCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        environ = patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+        os.environ.pop('http_proxy', None)
+
+        CountingJsonResponse.parse_count = 0
+        self.version = 1
+        self.request_headers = []
+        self.server = LocalHTTPServer(self._handle).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _handle(self, request):
+        self.request_headers.append(dict(request.headers))
+        etag = '"v%s"' % (self.version)
+
+        if request.headers.get('If-None-Match') == etag:
+            return httplib.NOT_MODIFIED, '', {'ETag': etag}
+
+        body = json.dumps({'version': self.version})
+        return httplib.OK, body, {'ETag': etag,
+                                  'Content-Type': 'application/json'}
+
+    def _get_connection(self, user_id='user', cache=None):
+        con = CachingConnection(user_id, 'secret', secure=False,
+                                host=self.server.host, port=self.server.port)
+        con.response_cache = cache or ResponseCache()
+        return con
+
+    def test_not_modified_response_is_not_parsed_again(self):
+        con = self._get_connection()
+
+        first = con.request('/sizes')
+        second = con.request('/sizes')
+
+        self.assertEqual(second.status, httplib.OK)
+        self.assertEqual(second.object, {'version': 1})
+        self.assertIs(second.object, first.object)
+        self.assertEqual(CountingJsonResponse.parse_count, 1)
+        self.assertEqual(self.request_headers[1]['If-None-Match'], '"v1"')
+        self.assertEqual(con.response_cache.stats['revalidated'], 1)
+
+        self.version = 2
+        third = con.request('/sizes')
+        self.assertEqual(third.object, {'version': 2})
+        self.assertEqual(CountingJsonResponse.parse_count, 2)
+
+    def test_fresh_response_is_returned_without_request(self):
+        con = self._get_connection(cache=ResponseCache(ttl=60))
+
+        con.request('/sizes')
+        con.request('/sizes')
+
+        self.assertEqual(self.server.request_count, 1)
+        self.assertEqual(con.response_cache.stats['hits'], 1)
+
+    def test_responses_are_not_shared_between_accounts(self):
+        cache = ResponseCache(ttl=60)
+        self._get_connection(cache=cache).request('/sizes')
+        self._get_connection(user_id='other', cache=cache).request('/sizes')
+
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_only_get_requests_are_cached(self):
+        con = self._get_connection(cache=ResponseCache(ttl=60))
+
+        con.request('/sizes', method='POST')
+        con.request('/sizes', method='POST')
+        con.request('/sizes', params={'page': 1})
+        con.request('/sizes', params={'page': 2})
+
+        self.assertEqual(self.server.request_count, 4)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -0,0 +1,139 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import json
+
+from mock import Mock, patch
+
+from libcloud.utils.py3 import httplib
+from libcloud.common.base import Connection, JsonResponse
+from libcloud.common.exceptions import BaseHTTPError
+from libcloud.common.instrumentation import RequestEvent
+from libcloud.common.instrumentation import RequestStatsObserver
+from libcloud.common.pool import ConnectionPool
+from libcloud.common.retry import RetryPolicy
+from libcloud.test import unittest
+from libcloud.test import LocalHTTPServer
+
+
+class InstrumentedConnection(Connection):
+    responseCls = JsonResponse
+
+
+class ConnectionObserverTestCase(unittest.TestCase):
+    def setUp(self):
+        environ = patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+        os.environ.pop('http_proxy', None)
+
+        self.responses = []
+        self.server = LocalHTTPServer(self._handle).start()
+
+        self.con = InstrumentedConnection(secure=False,
+                                          host=self.server.host,
+                                          port=self.server.port)
+        self.con.driver = Mock()
+        self.con.driver.name = 'Dummy'
+        self.events = []
+        self.con.add_observer(self.events.append)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _handle(self, request):
+        request.rfile.read(int(request.headers.get('Content-Length', 0)))
+
+        if self.responses:
+            return self.responses.pop(0)
+
+        return httplib.OK, json.dumps({'items': [1, 2, 3]}), {}
+
+    def test_event_is_emitted_for_each_request(self):
+        self.con.connection_pool = ConnectionPool()
+        self.addCleanup(self.con.connection_pool.clear)
+
+        self.con.request('/nodes', data='abc', method='POST')
+        self.con.request('/nodes')
+
+        self.assertEqual(len(self.events), 2)
+
+        event = self.events[0]
+        self.assertEqual(event.driver, 'Dummy')
+        self.assertEqual(event.action, '/nodes')
+        self.assertEqual(event.method, 'POST')
+        self.assertEqual(event.status, httplib.OK)
+        self.assertEqual(event.retries, 0)
+        self.assertEqual(event.bytes_sent, 3)
+        self.assertEqual(event.bytes_received, 20)
+        self.assertIsNone(event.error)
+
+        for name in ['dns', 'connect', 'ttfb', 'read', 'parse', 'total']:
+            self.assertTrue(event.timings[name] >= 0, name)
+
+        # Second request reuses the kept-alive connection
+        self.assertNotIn('connect', self.events[1].timings)
+        self.assertIn('ttfb', self.events[1].timings)
+
+    def test_failed_request_event(self):
+        self.responses.append((httplib.NOT_FOUND, '"not found"', {}))
+
+        self.assertRaises(BaseHTTPError, self.con.request, '/missing')
+        self.assertEqual(self.events[0].status, httplib.NOT_FOUND)
+        self.assertTrue(isinstance(self.events[0].error, BaseHTTPError))
+
+    def test_retry_count(self):
+        self.con.retry_policy = RetryPolicy(base_delay=0.01, max_delay=0.01)
+        self.responses.append((429, 'slow down', {}))
+
+        self.con.request('/nodes')
+
+        self.assertEqual([event.retries for event in self.events], [0, 1])
+        self.assertEqual(self.events[0].status, 429)
+
+    def test_observer_errors_are_ignored(self):
+        self.con.add_observer(Mock(side_effect=ValueError()))
+
+        self.con.request('/nodes')
+        self.assertEqual(len(self.events), 1)
+
+    def test_remove_observer(self):
+        self.con.remove_observer(self.events.append)
+
+        self.con.request('/nodes')
+        self.assertEqual(self.events, [])
+        self.assertEqual(InstrumentedConnection.observers, ())
+
+
+class RequestStatsObserverTestCase(unittest.TestCase):
+    def test_aggregation(self):
+        observer = RequestStatsObserver()
+
+        for total, action in [(1, '/a'), (2, '/b'), (3, '/b')]:
+            event = RequestEvent(driver='Dummy', host='localhost',
+                                 action=action, method='GET')
+            event.timings['total'] = total
+            observer(event)
+
+        slowest = observer.get_slowest(limit=1)
+        self.assertEqual(slowest[0][0], ('Dummy', 'GET', '/b'))
+        self.assertEqual(slowest[0][1]['count'], 2)
+        self.assertEqual(slowest[0][1]['time'], 5)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
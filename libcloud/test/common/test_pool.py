@@ -0,0 +1,274 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gc
+import os
+import sys
+
+from mock import Mock, patch
+
+from libcloud.utils.py3 import httplib
+from libcloud.common.base import Connection
+from libcloud.common.pool import ConnectionPool
+from libcloud.test import unittest
+from libcloud.test import MockHttpTestCase
+from libcloud.test import LocalHTTPServer
+
+
+class ConnectionPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pool = ConnectionPool(max_size=2, idle_timeout=10)
+        self.factory = Mock(side_effect=lambda: Mock(sock=None))
+
+    def test_acquire_release_reuses_connection(self):
+        conn1 = self.pool.acquire(key='a', factory=self.factory)
+        self.pool.release(conn1)
+        conn2 = self.pool.acquire(key='a', factory=self.factory)
+
+        self.assertTrue(conn1 is conn2)
+        self.assertTrue(self.pool.is_reused(conn2))
+        self.assertEqual(self.factory.call_count, 1)
+        self.assertEqual(self.pool.stats['hits'], 1)
+        self.assertEqual(self.pool.stats['misses'], 1)
+
+    def test_connections_are_not_shared_between_keys(self):
+        conn1 = self.pool.acquire(key='a', factory=self.factory)
+        self.pool.release(conn1)
+        conn2 = self.pool.acquire(key='b', factory=self.factory)
+
+        self.assertFalse(conn1 is conn2)
+        self.assertFalse(self.pool.is_reused(conn2))
+
+    def test_max_size(self):
+        conns = [self.pool.acquire(key='a', factory=self.factory)
+                 for _ in range(3)]
+
+        for conn in conns:
+            self.pool.release(conn)
+
+        self.assertEqual(self.pool.stats['idle'], 2)
+        conns[2].close.assert_called_once_with()
+
+    def test_idle_timeout_eviction(self):
+        with patch('libcloud.common.pool.time.time', return_value=100):
+            conn1 = self.pool.acquire(key='a', factory=self.factory)
+            self.pool.release(conn1)
+
+        with patch('libcloud.common.pool.time.time', return_value=111):
+            conn2 = self.pool.acquire(key='a', factory=self.factory)
+
+        self.assertFalse(conn1 is conn2)
+        conn1.close.assert_called_once_with()
+        self.assertEqual(self.pool.stats['evictions'], 1)
+
+    def test_will_close_response_is_not_pooled(self):
+        conn = self.pool.acquire(key='a', factory=self.factory)
+        self.pool.release(conn, Mock(will_close=True))
+
+        self.assertEqual(self.pool.stats['idle'], 0)
+        conn.close.assert_called_once_with()
+
+    def test_unconsumed_response_holds_connection(self):
+        response = Mock(will_close=False)
+        response.isclosed.return_value = False
+
+        conn1 = self.pool.acquire(key='a', factory=self.factory)
+        self.pool.release(conn1, response)
+        self.assertEqual(self.pool.stats['pending'], 1)
+
+        conn2 = self.pool.acquire(key='a', factory=self.factory)
+        self.assertFalse(conn1 is conn2)
+
+        response.isclosed.return_value = True
+        self.pool.release(conn2)
+        conn3 = self.pool.acquire(key='a', factory=self.factory)
+        self.assertEqual(self.pool.stats['pending'], 0)
+        self.assertTrue(conn3 in [conn1, conn2])
+
+    def _release_unconsumed(self, key='a'):
+        response = Mock(will_close=False)
+        response.isclosed.return_value = False
+
+        conn = self.pool.acquire(key=key, factory=self.factory)
+        self.pool.release(conn, response)
+        return conn, response
+
+    def test_collected_response_closes_connection(self):
+        conn, response = self._release_unconsumed()
+        self.assertFalse(conn.close.called)
+
+        del response
+        gc.collect()
+
+        conn.close.assert_called_once_with()
+        self.assertEqual(self.pool.stats['pending'], 0)
+        self.assertEqual(self.pool.stats['idle'], 0)
+
+    def test_max_pending(self):
+        self.pool.max_pending = 2
+        pending = [self._release_unconsumed() for _ in range(3)]
+
+        self.assertEqual(self.pool.stats['pending'], 2)
+        self.assertEqual(self.pool.stats['evictions'], 1)
+        pending[0][0].close.assert_called_once_with()
+        self.assertFalse(pending[1][0].close.called)
+
+    def test_pending_timeout(self):
+        self.pool.pending_timeout = 30
+
+        with patch('libcloud.common.pool.time.time', return_value=100):
+            conn, response = self._release_unconsumed()
+
+        with patch('libcloud.common.pool.time.time', return_value=131):
+            self.assertEqual(self.pool.stats['pending'], 0)
+
+        conn.close.assert_called_once_with()
+        self.assertEqual(self.pool.stats['evictions'], 1)
+
+    def test_reconnect(self):
+        conn1 = self.pool.acquire(key='a', factory=self.factory)
+        conn2 = self.pool.reconnect(conn1)
+
+        self.assertFalse(conn1 is conn2)
+        conn1.close.assert_called_once_with()
+        self.assertEqual(self.pool.stats['reconnects'], 1)
+
+        self.pool.release(conn2)
+        self.assertEqual(self.pool.stats['idle'], 1)
+
+    def test_release_unknown_connection(self):
+        self.pool.release(Mock())
+        self.assertEqual(self.pool.stats['idle'], 0)
+
+    def test_mock_connections(self):
+        # Mock connections which are also test cases are pooled by identity
+        def factory():
+            return MockHttpTestCase(host='localhost', port=80)
+
+        conn1 = self.pool.acquire(key='a', factory=factory)
+        conn2 = self.pool.acquire(key='a', factory=factory)
+        self.assertFalse(conn1 == conn2)
+
+        self.pool.release(conn1)
+        self.pool.release(conn2)
+        self.assertEqual(self.pool.stats['idle'], 2)
+
+
+class ConnectionKeepAliveTestCase(unittest.TestCase):
+    def setUp(self):
+        # Requests to the local server shouldn't go through a proxy
+        environ = patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+        os.environ.pop('http_proxy', None)
+
+        self.server = LocalHTTPServer(self._handle).start()
+        self.pool = ConnectionPool()
+        self.close_connection = False
+
+    def tearDown(self):
+        self.pool.clear()
+        self.server.stop()
+
+    def _handle(self, request):
+        if self.close_connection:
+            request.close_connection = True
+        return httplib.OK, 'ok', {}
+
+    def _get_connection(self):
+        con = Connection(secure=False, host=self.server.host,
+                         port=self.server.port)
+        con.connection_pool = self.pool
+        return con
+
+    def test_requests_reuse_tcp_connection(self):
+        con = self._get_connection()
+
+        for _ in range(5):
+            response = con.request('/')
+            self.assertEqual(response.body, 'ok')
+
+        # Different Connection instances to the same endpoint also share
+        # connections
+        self._get_connection().request('/')
+
+        self.assertEqual(self.server.request_count, 6)
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertEqual(self.pool.stats['misses'], 1)
+        self.assertEqual(self.pool.stats['hits'], 5)
+
+    def test_transparent_reconnect(self):
+        con = self._get_connection()
+        con.request('/')
+
+        # Server closes the connection after this request without telling
+        # the client
+        self.close_connection = True
+        con.request('/')
+
+        # Stale connection is not detected before it's handed out so the
+        # request needs to be re-sent on a new connection
+        self.pool._is_dropped = lambda connection: False
+
+        self.close_connection = False
+        response = con.request('/')
+        self.assertEqual(response.body, 'ok')
+        self.assertEqual(self.server.request_count, 3)
+        self.assertEqual(len(self.server.connections), 2)
+        self.assertEqual(self.pool.stats['reconnects'], 1)
+
+    def test_stale_connection_is_evicted(self):
+        con = self._get_connection()
+
+        self.close_connection = True
+        con.request('/')
+
+        self.close_connection = False
+        con.request('/')
+        self.assertEqual(len(self.server.connections), 2)
+
+    def test_raw_request_holds_connection_until_body_is_read(self):
+        con = self._get_connection()
+
+        response = con.request('/', raw=True)
+        self.assertEqual(response.status, httplib.OK)
+        self.assertEqual(self.pool.stats['pending'], 1)
+
+        # Body hasn't been read yet so a new connection needs to be used
+        con.request('/')
+        self.assertEqual(len(self.server.connections), 2)
+
+        self.assertEqual(response.response.read(), b'ok')
+        con.request('/')
+        self.assertEqual(self.pool.stats['pending'], 0)
+        self.assertEqual(len(self.server.connections), 2)
+
+    def test_abandoned_raw_response_closes_connection(self):
+        con = self._get_connection()
+
+        response = con.request('/', raw=True)
+        http_connection = response._http_connection
+        self.assertEqual(response.status, httplib.OK)
+        self.assertEqual(self.pool.stats['pending'], 1)
+
+        del response
+        gc.collect()
+
+        self.assertEqual(self.pool.stats['pending'], 0)
+        self.assertTrue(http_connection.sock is None)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
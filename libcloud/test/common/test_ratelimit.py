@@ -0,0 +1,167 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import shutil
+import tempfile
+
+from mock import Mock, patch
+
+from libcloud.common.aws import SignedAWSConnection
+from libcloud.common.base import Connection, ConnectionUserAndKey
+from libcloud.common.ratelimit import RateLimiter
+from libcloud.common.ratelimit import MemoryBackend, FileBackend
+from libcloud.test import unittest
+
+
+class MemoryBackendTestCase(unittest.TestCase):
+    backend_cls = MemoryBackend
+
+    def setUp(self):
+        now = patch('libcloud.common.ratelimit.time.time', return_value=100)
+        self.now = now.start()
+        self.addCleanup(now.stop)
+
+        self.backend = self._get_backend()
+
+    def _get_backend(self):
+        return self.backend_cls()
+
+    def test_burst_is_admitted_immediately(self):
+        for _ in range(3):
+            self.assertEqual(self.backend.reserve('a', rate=1, burst=3), 0)
+
+        self.assertEqual(self.backend.reserve('a', rate=1, burst=3), 1)
+        self.assertEqual(self.backend.reserve('a', rate=1, burst=3), 2)
+
+    def test_bucket_is_refilled(self):
+        for _ in range(2):
+            self.backend.reserve('a', rate=2, burst=2)
+
+        self.assertEqual(self.backend.reserve('a', rate=2, burst=2), 0.5)
+
+        self.now.return_value = 110
+        self.assertEqual(self.backend.reserve('a', rate=2, burst=2), 0)
+        self.assertEqual(self.backend.reserve('a', rate=2, burst=2), 0)
+        self.assertEqual(self.backend.reserve('a', rate=2, burst=2), 0.5)
+
+    def test_buckets_are_independent(self):
+        self.backend.reserve('a', rate=1, burst=1)
+
+        self.assertEqual(self.backend.reserve('b', rate=1, burst=1), 0)
+        self.assertEqual(self.backend.reserve('a', rate=1, burst=1), 1)
+
+
+class FileBackendTestCase(MemoryBackendTestCase):
+    backend_cls = FileBackend
+
+    def _get_backend(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        return FileBackend(os.path.join(self.tmp_dir, 'buckets.json'))
+
+    def test_state_is_shared(self):
+        other = FileBackend(self.backend.path)
+        self.backend.reserve('a', rate=1, burst=1)
+
+        self.assertEqual(other.reserve('a', rate=1, burst=1), 1)
+
+    def test_corrupted_state_file(self):
+        with open(self.backend.path, 'w') as fp:
+            fp.write('{invalid')
+
+        self.assertEqual(self.backend.reserve('a', rate=1, burst=1), 0)
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    def test_rates_per_action_class(self):
+        limiter = RateLimiter(rate=1, burst=1,
+                              rates={'describe': (10, 5), 'free': None})
+        limiter.backend = Mock(reserve=Mock(return_value=0))
+
+        limiter.reserve(('ec2', 'account', 'host', 'describe'))
+        limiter.backend.reserve.assert_called_with(
+            key='ec2|account|host|describe', rate=10, burst=5, tokens=1)
+
+        limiter.reserve(('ec2', 'account', 'host', 'mutate'))
+        limiter.backend.reserve.assert_called_with(
+            key='ec2|account|host|mutate', rate=1, burst=1, tokens=1)
+
+        limiter.backend.reserve.reset_mock()
+        self.assertEqual(limiter.reserve(('ec2', 'account', 'host', 'free')),
+                         0)
+        self.assertFalse(limiter.backend.reserve.called)
+
+    def test_acquire_waits_for_token(self):
+        limiter = RateLimiter(rate=1, burst=1)
+
+        with patch('libcloud.common.ratelimit.time.sleep') as sleep:
+            limiter.acquire(('a',))
+            self.assertFalse(sleep.called)
+            limiter.acquire(('a',))
+            self.assertTrue(sleep.called)
+
+        self.assertEqual(limiter.stats['requests'], 2)
+        self.assertEqual(limiter.stats['delayed'], 1)
+
+
+class ConnectionRateLimitTestCase(unittest.TestCase):
+    def test_get_rate_limit_key(self):
+        con = ConnectionUserAndKey('user', 'secret', host='api.example.com')
+        con.driver = Mock(type='dummy')
+
+        key = con.get_rate_limit_key(action='/', method='GET')
+        self.assertEqual(key[0], 'dummy')
+        self.assertNotIn('user', key[1])
+        self.assertEqual(key[2], 'api.example.com')
+        self.assertEqual(key[3], 'read')
+
+        key = con.get_rate_limit_key(action='/', method='POST')
+        self.assertEqual(key[3], 'write')
+
+        other = ConnectionUserAndKey('other', 'secret',
+                                     host='api.example.com')
+        other.driver = con.driver
+        self.assertNotEqual(other.get_rate_limit_key(action='/')[1],
+                            con.get_rate_limit_key(action='/')[1])
+
+    def test_aws_action_classes(self):
+        con = SignedAWSConnection('user', 'secret')
+
+        self.assertEqual(con.get_rate_limit_action_class(
+            action='/', params={'Action': 'DescribeInstances'},
+            method='GET'), 'describe')
+        self.assertEqual(con.get_rate_limit_action_class(
+            action='/', params={'Action': 'RunInstances'}, method='GET'),
+            'mutate')
+        self.assertEqual(con.get_rate_limit_action_class(
+            action='/', params={}, method='PUT'), 'write')
+
+    def test_request_acquires_token(self):
+        con = Connection(host='api.example.com')
+        con.rate_limiter = Mock()
+        con._send_request = Mock(side_effect=ValueError('sent'))
+
+        with patch.object(con, 'connect'):
+            self.assertRaises(ValueError, con.request, '/',
+                              params={'a': 1}, method='DELETE')
+
+        key = con.rate_limiter.acquire.call_args[0][0]
+        self.assertEqual(key[-1], 'write')
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
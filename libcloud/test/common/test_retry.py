@@ -0,0 +1,242 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import json
+import errno
+import socket
+
+from mock import Mock, patch
+
+from libcloud.utils.py3 import httplib
+from libcloud.common.aws import AWSBaseResponse, AWSJsonResponse
+from libcloud.common.base import Connection, Response
+from libcloud.common.google import GoogleBaseError, GoogleResponse
+from libcloud.common.exceptions import RateLimitReachedError
+from libcloud.common.retry import RetryPolicy
+from libcloud.test import unittest
+from libcloud.test import LocalHTTPServer
+
+
+class RetryPolicyTestCase(unittest.TestCase):
+    def setUp(self):
+        sleep = patch('libcloud.common.retry.time.sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def test_throttled_request_is_retried(self):
+        policy = RetryPolicy(max_retries=5)
+        func = Mock(side_effect=[RateLimitReachedError(), 'result'])
+
+        self.assertEqual(policy.call(func, 'a', b=1), 'result')
+        func.assert_called_with('a', b=1)
+        self.assertEqual(func.call_count, 2)
+        self.assertEqual(policy.stats['retries'], 1)
+        self.assertEqual(policy.stats['throttled'], 1)
+        self.assertEqual(policy.stats['requests'], 1)
+
+    def test_max_retries(self):
+        policy = RetryPolicy(max_retries=2)
+        func = Mock(side_effect=RateLimitReachedError())
+
+        self.assertRaises(RateLimitReachedError, policy.call, func)
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(policy.stats['exhausted'], 1)
+
+    def test_timeout(self):
+        policy = RetryPolicy(max_retries=10, base_delay=1, timeout=0.5)
+        func = Mock(side_effect=RateLimitReachedError())
+
+        self.assertRaises(RateLimitReachedError, policy.call, func)
+        self.assertEqual(func.call_count, 1)
+
+    def test_connection_reset_is_retried(self):
+        policy = RetryPolicy()
+        error = socket.error(errno.ECONNRESET, 'Connection reset by peer')
+        func = Mock(side_effect=[error, 'result'])
+
+        self.assertEqual(policy.call(func), 'result')
+        self.assertEqual(policy.stats['errors'], 1)
+
+    def test_other_errors_are_not_retried(self):
+        policy = RetryPolicy()
+        func = Mock(side_effect=socket.error(errno.EPIPE, 'Broken pipe'))
+
+        self.assertRaises(socket.error, policy.call, func)
+        self.assertEqual(func.call_count, 1)
+
+        func = Mock(side_effect=ValueError())
+        self.assertRaises(ValueError, policy.call, func)
+
+        policy = RetryPolicy(retry_exceptions=(ValueError,))
+        func = Mock(side_effect=[ValueError(), 'result'])
+        self.assertEqual(policy.call(func), 'result')
+
+    def test_get_delay_decorrelated_jitter(self):
+        policy = RetryPolicy(base_delay=1, max_delay=10)
+        delay = policy.base_delay
+
+        for _ in range(20):
+            previous_delay = delay
+            delay = policy.get_delay(previous_delay=delay)
+            self.assertTrue(1 <= delay <= min(10, previous_delay * 3))
+
+    def test_get_delay_honours_retry_after(self):
+        policy = RetryPolicy(base_delay=0.1, max_delay=1)
+        delay = policy.get_delay(previous_delay=0.1,
+                                 exception=RateLimitReachedError(
+                                     retry_after=30))
+        self.assertEqual(delay, 30)
+
+
+class ThrottledResponseTestCase(unittest.TestCase):
+    def _get_response(self, cls, status, body, headers=None,
+                      retry_policy=RetryPolicy()):
+        response = Mock()
+        response.status = status
+        response.reason = 'error'
+        response.getheaders.return_value = headers or {}
+        response.read.return_value = body
+        response._original_data = None
+        connection = Mock(stream=False, retry_policy=retry_policy)
+        return cls(response=response, connection=connection)
+
+    def test_status_code_429(self):
+        try:
+            self._get_response(Response, 429, 'slow down',
+                               {'Retry-After': '5'})
+        except RateLimitReachedError:
+            e = sys.exc_info()[1]
+            self.assertEqual(e.retry_after, 5)
+            self.assertEqual(e.code, 429)
+        else:
+            self.fail('Exception was not thrown')
+
+    def test_retry_after_http_date(self):
+        response = self._get_response(Response, httplib.OK, '',
+                                      {'Retry-After': 'Wed, 21 Oct 2015 '
+                                                      '07:28:00 GMT'})
+        self.assertEqual(response.get_retry_after(), 0)
+
+    def test_aws_throttling_error_codes(self):
+        ec2_body = ('<Response><Errors><Error><Code>RequestLimitExceeded'
+                    '</Code><Message>Request limit exceeded.</Message>'
+                    '</Error></Errors></Response>')
+        self.assertRaises(RateLimitReachedError, self._get_response,
+                          AWSBaseResponse, httplib.SERVICE_UNAVAILABLE,
+                          ec2_body)
+
+        s3_body = ('<Error><Code>SlowDown</Code><Message>Please reduce your '
+                   'request rate.</Message></Error>')
+        self.assertRaises(RateLimitReachedError, self._get_response,
+                          AWSBaseResponse, httplib.SERVICE_UNAVAILABLE,
+                          s3_body)
+
+        body = json.dumps({'__type': 'ThrottlingException', 'message': ''})
+        self.assertRaises(RateLimitReachedError, self._get_response,
+                          AWSJsonResponse, httplib.BAD_REQUEST, body)
+
+        body = ('<Error><Code>InvalidParameterValue</Code>'
+                '<Message>Invalid</Message></Error>')
+        try:
+            self._get_response(AWSBaseResponse, httplib.BAD_REQUEST, body)
+        except RateLimitReachedError:
+            self.fail('Error was incorrectly treated as throttling')
+        except Exception:
+            pass
+        else:
+            self.fail('Exception was not thrown')
+
+    def test_throttled_without_retry_policy(self):
+        # Errors are parsed by the response class when they aren't retried
+        body = json.dumps({'error': {'code': 403, 'message': 'Rate Limit',
+                                     'errors': [{'reason':
+                                                 'rateLimitExceeded'}]}})
+        try:
+            self._get_response(GoogleResponse, httplib.FORBIDDEN, body,
+                               retry_policy=None)
+        except RateLimitReachedError:
+            self.fail('Error was raised without a retry policy')
+        except GoogleBaseError:
+            e = sys.exc_info()[1]
+            self.assertEqual(e.http_code, httplib.FORBIDDEN)
+        else:
+            self.fail('Exception was not thrown')
+
+        self.assertRaises(RateLimitReachedError, self._get_response,
+                          Response, 429, 'slow down', retry_policy=None)
+
+    def test_google_throttling_reasons(self):
+        body = json.dumps({'error': {'code': 403, 'message': 'Rate Limit',
+                                     'errors': [{'reason':
+                                                 'rateLimitExceeded'}]}})
+        self.assertRaises(RateLimitReachedError, self._get_response,
+                          GoogleResponse, httplib.FORBIDDEN, body)
+
+        body = json.dumps({'error': {'code': 403, 'message': 'Forbidden',
+                                     'errors': [{'reason': 'forbidden'}]}})
+        self.assertRaises(GoogleBaseError, self._get_response,
+                          GoogleResponse, httplib.FORBIDDEN, body)
+
+
+class ConnectionRetryTestCase(unittest.TestCase):
+    def setUp(self):
+        environ = patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+        os.environ.pop('http_proxy', None)
+
+        self.throttled = 2
+        self.server = LocalHTTPServer(self._handle).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _handle(self, request):
+        if self.throttled:
+            self.throttled -= 1
+            return 429, 'slow down', {'Retry-After': '0'}
+        return httplib.OK, 'ok', {}
+
+    def test_throttled_request_is_retried(self):
+        policy = RetryPolicy(base_delay=0.01, max_delay=0.05)
+        con = Connection(secure=False, host=self.server.host,
+                         port=self.server.port)
+        con.retry_policy = policy
+        con.set_context({'foo': 'bar'})
+
+        with patch.object(con, 'add_default_params',
+                          side_effect=lambda params: params) as hook:
+            response = con.request('/')
+
+        self.assertEqual(response.body, 'ok')
+        self.assertEqual(self.server.request_count, 3)
+        self.assertEqual(policy.stats['throttled'], 2)
+
+        # Request is prepared again for each attempt
+        self.assertEqual(hook.call_count, 3)
+        self.assertEqual(con.context, {})
+
+    def test_no_retry_policy(self):
+        con = Connection(secure=False, host=self.server.host,
+                         port=self.server.port)
+
+        self.assertRaises(RateLimitReachedError, con.request, '/')
+        self.assertEqual(self.server.request_count, 1)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -25,7 +25,7 @@ try:
 except ImportError:
     import json
 
-from libcloud.compute.base import NodeLocation
+from libcloud.compute.base import Node, NodeLocation
 from libcloud.common.types import ProviderError
 from libcloud.compute.drivers.cloudstack import CloudStackNodeDriver, \
     CloudStackAffinityGroupType
@@ -611,6 +611,51 @@ class CloudStackCommonTestCase(TestCaseMixin):
         finally:
             del CloudStackMockHttp._cmd_listVirtualMachines
 
+    def test_get_nodes_by_id(self):
+        requested_ids = []
+
+        def list_nodes_mock(self, **kwargs):
+            requested_ids.append(kwargs.get('id'))
+
+            body, obj = self._load_fixture('listVirtualMachines_default.json')
+            return (httplib.OK, body, obj, httplib.responses[httplib.OK])
+
+        CloudStackMockHttp._cmd_listVirtualMachines = list_nodes_mock
+        try:
+            node = Node(id='2600', name='test', state=NodeState.PENDING,
+                        public_ips=[], private_ips=[], driver=self.driver)
+            nodes = self.driver._get_nodes_by_id([node])
+        finally:
+            del CloudStackMockHttp._cmd_listVirtualMachines
+
+        self.assertEqual(requested_ids, ['2600'])
+        self.assertEqual([n.id for n in nodes], ['2600'])
+        self.assertEqual(nodes[0].state, NodeState.RUNNING)
+        self.assertEqual(nodes[0].public_ips, ['1.1.1.116'])
+
+    def test_get_nodes_by_id_many_nodes(self):
+        requests = []
+
+        def list_nodes_mock(self, **kwargs):
+            requests.append(kwargs)
+
+            body, obj = self._load_fixture('listVirtualMachines_default.json')
+            return (httplib.OK, body, obj, httplib.responses[httplib.OK])
+
+        CloudStackMockHttp._cmd_listVirtualMachines = list_nodes_mock
+        try:
+            nodes = [Node(id=node_id, name='test', state=NodeState.PENDING,
+                          public_ips=[], private_ips=[], driver=self.driver)
+                     for node_id in ['2600', '2601', '9999']]
+            nodes = self.driver._get_nodes_by_id(nodes)
+        finally:
+            del CloudStackMockHttp._cmd_listVirtualMachines
+
+        # A single request for all the nodes
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(requests[0].get('ids'), '2600,2601,9999')
+        self.assertEqual([n.id for n in nodes], ['2600', '2601'])
+
     def test_ex_get_node(self):
         node = self.driver.ex_get_node(2600)
         self.assertEqual('test', node.name)
@@ -19,8 +19,11 @@ from __future__ import with_statement
 import os
 import sys
 import time
+import tarfile
 import unittest
 
+from io import BytesIO
+
 from libcloud.utils.py3 import httplib
 from libcloud.utils.py3 import u
 from libcloud.utils.py3 import PY3
@@ -30,6 +33,7 @@ from libcloud.compute.deployment import SSHKeyDeployment, ScriptDeployment
 from libcloud.compute.deployment import ScriptFileDeployment, FileDeployment
 from libcloud.compute.base import Node
 from libcloud.compute.types import NodeState, DeploymentError, LibcloudError
+from libcloud.compute.types import WaitUntilRunningTimeoutError
 from libcloud.compute.ssh import BaseSSHClient
 from libcloud.compute.drivers.rackspace import RackspaceFirstGenNodeDriver as Rackspace
 
@@ -63,6 +67,28 @@ class MockClient(BaseSSHClient):
         return True
 
 
+class MockStdinClient(MockClient):
+    supports_stdin = True
+
+    def __init__(self, *args, **kwargs):
+        super(MockStdinClient, self).__init__(*args, **kwargs)
+        self.commands = []
+        self.archives = []
+
+    def put(self, path, contents, chmod=755, mode='w'):
+        raise AssertionError('put() should not be called in batch mode')
+
+    def run(self, cmd, stdin=None):
+        self.commands.append((cmd, stdin))
+
+        if cmd.startswith('tar '):
+            # The archive is closed once the upload is done
+            archive = BytesIO(stdin.read())
+            self.archives.append(tarfile.open(fileobj=archive, mode='r'))
+
+        return self.stdout, self.stderr, self.exit_status
+
+
 class DeploymentTests(unittest.TestCase):
 
     def setUp(self):
@@ -88,6 +114,60 @@ class DeploymentTests(unittest.TestCase):
 
         self.assertEqual(self.node, msd.run(node=self.node, client=None))
 
+    def test_multi_step_deployment_batch(self):
+        client = MockStdinClient(hostname='localhost')
+        target = os.path.join('/tmp', os.path.basename(__file__))
+
+        msd = MultiStepDeployment([
+            FileDeployment(__file__, target),
+            FileDeployment(__file__, 'relative.py'),
+            ScriptDeployment(script='echo "foo"', args=['a', 'b']),
+            FileDeployment(__file__, target),
+            ScriptDeployment(script='#!/usr/bin/env python\nprint(1)'),
+            ScriptDeployment(script='#!/bin/bash -e\necho')
+        ], batch=True)
+
+        self.assertEqual(self.node, msd.run(node=self.node, client=client))
+
+        commands = [cmd for cmd, _ in client.commands]
+        self.assertEqual(commands, ['tar -xpPf -', '/bin/sh -s a b',
+                                    'tar -xpPf -', '/usr/bin/env python -',
+                                    '/bin/bash -e -s'])
+        self.assertEqual(client.commands[1][1], 'echo "foo"')
+
+        self.assertEqual(len(client.archives), 2)
+        members = client.archives[0].getmembers()
+        self.assertEqual([m.name for m in members], [target, 'relative.py'])
+        self.assertEqual(members[0].uname, 'root')
+        self.assertEqual(members[0].size, os.path.getsize(__file__))
+        self.assertEqual(members[0].mode, os.stat(__file__).st_mode & 0o7777)
+
+        with open(__file__, 'rb') as fp:
+            content = fp.read()
+
+        self.assertEqual(client.archives[0].extractfile(members[1]).read(),
+                         content)
+
+    def test_multi_step_deployment_batch_extract_failure(self):
+        client = MockStdinClient(hostname='localhost')
+        client.exit_status = 2
+        client.stderr = 'tar: cannot open'
+
+        msd = MultiStepDeployment([FileDeployment(__file__, '/tmp/a')],
+                                  batch=True)
+        self.assertRaisesRegex(LibcloudError, 'tar: cannot open', msd.run,
+                               node=self.node, client=client)
+
+    def test_multi_step_deployment_batch_not_supported(self):
+        # Clients without stdin support use the regular steps
+        client = MockClient(hostname='localhost')
+        client.put = Mock()
+        msd = MultiStepDeployment([FileDeployment(__file__, '/tmp/a')],
+                                  batch=True)
+
+        msd.run(node=self.node, client=client)
+        self.assertEqual(client.put.call_count, 1)
+
     def test_ssh_key_deployment(self):
         sshd = SSHKeyDeployment(key='1234')
 
@@ -297,6 +377,75 @@ class DeploymentTests(unittest.TestCase):
         self.assertEqual(['67.23.21.33'], nodes[0][1])
         self.assertEqual(['67.23.21.34'], nodes[1][1])
 
+    def _get_node(self, node, state):
+        return Node(id=node.id, name=node.name, state=state,
+                    public_ips=node.public_ips, private_ips=node.private_ips,
+                    driver=Rackspace)
+
+    def test_wait_until_running_uses_targeted_lookup(self):
+        self.driver.list_nodes = Mock()
+        self.driver._get_nodes_by_id = Mock(side_effect=[
+            [self._get_node(self.node, NodeState.PENDING),
+             self._get_node(self.node2, NodeState.RUNNING)],
+            [self._get_node(self.node, NodeState.RUNNING)]])
+
+        with patch('time.sleep') as mock_sleep:
+            nodes = self.driver.wait_until_running(
+                nodes=[self.node, self.node2], wait_period=0.1, timeout=5)
+
+        self.assertEqual([self.node.uuid, self.node2.uuid],
+                         [node.uuid for node, _ in nodes])
+        self.assertFalse(self.driver.list_nodes.called)
+        self.assertEqual(mock_sleep.call_count, 1)
+
+        # Only the node which is still pending is requested again
+        calls = self.driver._get_nodes_by_id.call_args_list
+        self.assertEqual(len(calls[0][0][0]), 2)
+        self.assertEqual(calls[1][0][0], [self.node])
+
+    def test_wait_until_running_list_nodes_kwargs_skip_targeted_lookup(self):
+        self.driver._get_nodes_by_id = Mock()
+        self.driver.list_nodes = Mock(return_value=[self.node])
+        self.driver.wait_until_running(nodes=[self.node], wait_period=0.1,
+                                       timeout=0.5,
+                                       ex_list_nodes_kwargs={'a': 1})
+        self.assertFalse(self.driver._get_nodes_by_id.called)
+        self.driver.list_nodes.assert_called_once_with(a=1)
+
+    def test_wait_until_running_backoff(self):
+        RackspaceMockHttp.type = 'TIMEOUT'
+        delays = []
+
+        def sleep(delay):
+            delays.append(delay)
+            if len(delays) == 6:
+                raise KeyboardInterrupt()
+
+        with patch('time.sleep', sleep):
+            self.assertRaises(KeyboardInterrupt,
+                              self.driver.wait_until_running,
+                              nodes=[self.node], wait_period=1,
+                              max_wait_period=3, timeout=600)
+
+        self.assertEqual(delays, [1, 1.5, 2.25, 3, 3, 3])
+
+    def test_wait_until_running_timeout_reports_pending_nodes(self):
+        self.driver._get_nodes_by_id = Mock(
+            return_value=[self._get_node(self.node2, NodeState.RUNNING)])
+
+        try:
+            self.driver.wait_until_running(nodes=[self.node, self.node2],
+                                           wait_period=0.1, timeout=0.3)
+        except WaitUntilRunningTimeoutError:
+            e = sys.exc_info()[1]
+            self.assertTrue(e.value.find('Timed out after 0.3 second') != -1)
+            self.assertEqual(e.pending, [self.node])
+            self.assertEqual([node.uuid for node, _ in e.running],
+                             [self.node2.uuid])
+            self.assertEqual(e.running[0][1], ['1.2.3.4'])
+        else:
+            self.fail('Exception was not thrown')
+
     def test_ssh_client_connect_success(self):
         mock_ssh_client = Mock()
         mock_ssh_client.return_value = None
@@ -399,6 +548,50 @@ class DeploymentTests(unittest.TestCase):
         else:
             self.fail('Exception was not thrown')
 
+    @patch('libcloud.compute.base.SSHClient')
+    @patch('libcloud.compute.ssh')
+    def test_deploy_nodes(self, mock_ssh_module, _):
+        RackspaceMockHttp.type = 'MULTIPLE_NODES'
+        mock_ssh_module.have_paramiko = True
+        self.driver.create_node = Mock(side_effect=[self.node, self.node2])
+
+        def run(node, client):
+            if node.uuid == self.node2.uuid:
+                raise Exception('foo')
+            return node
+
+        deploy = Mock()
+        deploy.run = Mock(side_effect=run)
+
+        nodes, errors = self.driver.deploy_nodes(count=2, name='web',
+                                                 deploy=deploy, max_tries=1,
+                                                 max_concurrency=2)
+
+        self.assertEqual([node.uuid for node in nodes], [self.node.uuid])
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(isinstance(errors[0], DeploymentError))
+        self.assertEqual(errors[0].node.uuid, self.node2.uuid)
+
+        # Deployment arguments are not passed to create_node
+        names = sorted([call[1]['name'] for call in
+                        self.driver.create_node.call_args_list])
+        self.assertEqual(names, ['web-000', 'web-001'])
+        self.assertEqual(self.driver.create_node.call_args[1],
+                         {'name': self.driver.create_node.call_args[1]['name']})
+
+    @patch('libcloud.compute.base.SSHClient')
+    @patch('libcloud.compute.ssh')
+    def test_deploy_nodes_create_node_failure(self, mock_ssh_module, _):
+        mock_ssh_module.have_paramiko = True
+        error = Exception('quota exceeded')
+        self.driver.create_node = Mock(side_effect=[self.node, error])
+
+        nodes, errors = self.driver.deploy_nodes(count=2, deploy=Mock(),
+                                                 max_concurrency=1)
+
+        self.assertEqual([node.uuid for node in nodes], [self.node.uuid])
+        self.assertEqual(errors, [error])
+
     @patch('libcloud.compute.ssh')
     def test_deploy_node_depoy_node_not_implemented(self, mock_ssh_module):
         self.driver.features = {'create_node': []}
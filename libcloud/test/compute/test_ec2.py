@@ -17,10 +17,15 @@ from __future__ import with_statement
 
 import os
 import sys
-from datetime import datetime
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+from mock import patch
+
 from libcloud.utils.iso8601 import UTC
 
-from libcloud.utils.py3 import httplib
+from libcloud.utils.py3 import httplib, parse_qs, urlparse
 
 from libcloud.compute.drivers.ec2 import EC2NodeDriver
 from libcloud.compute.drivers.ec2 import EC2PlacementGroup
@@ -30,10 +35,11 @@ from libcloud.compute.drivers.ec2 import IdempotentParamError
 from libcloud.compute.drivers.ec2 import REGION_DETAILS
 from libcloud.compute.drivers.ec2 import ExEC2AvailabilityZone
 from libcloud.compute.drivers.ec2 import EC2NetworkSubnet
+from libcloud.compute.drivers.ec2 import EC2ImageCatalog
 from libcloud.compute.base import Node, NodeImage, NodeSize, NodeLocation
 from libcloud.compute.base import StorageVolume, VolumeSnapshot
 from libcloud.compute.types import KeyPairDoesNotExistError, StorageVolumeState, \
-    VolumeSnapshotState
+    VolumeSnapshotState, NodeState
 
 from libcloud.test import MockHttpTestCase, LibcloudTestCase
 from libcloud.test.compute import TestCaseMixin
@@ -110,6 +116,34 @@ class EC2Tests(LibcloudTestCase, TestCaseMixin):
         self.assertEqual(node.extra['tags']['Name'], 'foo')
         self.assertEqual(len(node.extra['tags']), 1)
 
+    def test_create_nodes_single_request(self):
+        # assertions are done in _create_nodes_RunInstances
+        EC2MockHttp.type = 'create_nodes'
+        image = NodeImage(id='ami-be3adfd7',
+                          name=self.image_name,
+                          driver=self.driver)
+        size = NodeSize('m1.small', 'Small Instance', None, None, None, None,
+                        driver=self.driver)
+
+        nodes, errors = self.driver._create_nodes(count=3, name='foo',
+                                                  image=image, size=size)
+        self.assertEqual([node.id for node in nodes], ['i-2ba64342'])
+        self.assertEqual(errors, [])
+
+    def test_create_nodes_request_failure(self):
+        EC2MockHttp.type = 'idempotent_mismatch'
+        image = NodeImage(id='ami-be3adfd7',
+                          name=self.image_name,
+                          driver=self.driver)
+        size = NodeSize('m1.small', 'Small Instance', None, None, None, None,
+                        driver=self.driver)
+
+        nodes, errors = self.driver._create_nodes(count=2, name='foo',
+                                                  image=image, size=size)
+        self.assertEqual(nodes, [])
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(isinstance(errors[0], IdempotentParamError))
+
     def test_create_node_with_ex_assign_public_ip(self):
         # assertions are done in _create_ex_assign_public_ip_RunInstances
         EC2MockHttp.type = 'create_ex_assign_public_ip'
@@ -247,6 +281,55 @@ class EC2Tests(LibcloudTestCase, TestCaseMixin):
         self.assertIn('instance_type', ret_node1.extra)
         self.assertIn('instance_type', ret_node2.extra)
 
+    def test_get_nodes_by_id(self):
+        node = Node(id='i-4382922a', name='', state=NodeState.PENDING,
+                    public_ips=[], private_ips=[], driver=self.driver)
+
+        with patch.object(self.driver, 'list_nodes',
+                          wraps=self.driver.list_nodes) as list_nodes:
+            nodes = self.driver._get_nodes_by_id([node])
+
+        list_nodes.assert_called_once_with(ex_node_ids=['i-4382922a'])
+        self.assertEqual(nodes[0].uuid, node.uuid)
+
+    def test_get_nodes_by_id_not_found(self):
+        EC2MockHttp.type = 'not_found'
+        node = Node(id='i-4382922a', name='', state=NodeState.PENDING,
+                    public_ips=[], private_ips=[], driver=self.driver)
+
+        self.assertEqual(self.driver._get_nodes_by_id([node]), [])
+
+    def test_list_nodes_public_ips_from_network_interfaces(self):
+        EC2MockHttp.type = 'association'
+        nodes = self.driver.list_nodes(ex_describe_addresses=False)
+        self.assertEqual(nodes[0].public_ips, ['1.2.3.4'])
+        self.assertEqual(nodes[1].public_ips, ['1.2.3.5', '1.2.3.7'])
+
+    def test_list_nodes_without_describe_addresses(self):
+        with patch.object(self.driver, 'ex_describe_addresses') as describe:
+            nodes = self.driver.list_nodes(ex_describe_addresses=False)
+
+        self.assertFalse(describe.called)
+        self.assertEqual(nodes[0].public_ips, ['1.2.3.4'])
+
+    def test_list_nodes_addresses_cache(self):
+        self.driver.addresses_cache_ttl = 60
+        describe_addresses = self.driver.ex_describe_addresses
+
+        with patch.object(self.driver, 'ex_describe_addresses',
+                          side_effect=describe_addresses) as describe:
+            for _ in range(2):
+                node = self.driver.list_nodes()[0]
+                self.assertEqual(sorted(node.public_ips),
+                                 ['1.2.3.4', '1.2.3.4'])
+            self.assertEqual(describe.call_count, 1)
+
+            # Associating an address invalidates the cached addresses
+            self.driver.ex_associate_address_with_node(
+                node, self.driver.ex_allocate_address())
+            self.driver.list_nodes()
+            self.assertEqual(describe.call_count, 2)
+
     def test_ex_list_reserved_nodes(self):
         node = self.driver.ex_list_reserved_nodes()[0]
         self.assertEqual(node.id, '93bbbca2-c500-49d0-9ede-9d8737400498')
@@ -794,6 +877,72 @@ class EC2Tests(LibcloudTestCase, TestCaseMixin):
         result = self.driver.ex_change_node_size(node=node, new_size=size)
         self.assertTrue(result)
 
+    def test_iterate_volumes_follows_next_token(self):
+        EC2MockHttp.type = 'paginated'
+        EC2MockHttp.page_tokens = []
+        EC2MockHttp.page_sizes = []
+
+        volumes = self.driver.iterate_volumes(ex_page_size=2)
+        self.assertEqual(next(volumes).id, 'vol-10ae5e2b')
+        # The second page is only requested once the first one is processed
+        self.assertEqual(EC2MockHttp.page_tokens, [None])
+
+        self.assertEqual([volume.id for volume in volumes],
+                         ['vol-v24bfh75', 'vol-b6c851ec'])
+        self.assertEqual(EC2MockHttp.page_tokens, [None, 'volumes-page-2'])
+
+        # DescribeVolumes doesn't accept MaxResults at the used API version
+        volumes = self.driver.list_volumes()
+        self.assertEqual(len(volumes), 3)
+        self.assertEqual(EC2MockHttp.page_sizes, [None] * 4)
+
+        # DescribeVolumes returns at most 500 volumes per page
+        EC2MockHttp.page_sizes = []
+        with patch.object(self.driver, 'max_results_actions',
+                          ['DescribeVolumes']):
+            list(self.driver.iterate_volumes(ex_page_size=1000))
+        self.assertEqual(EC2MockHttp.page_sizes, ['500', '500'])
+
+    def test_iterate_nodes_follows_next_token(self):
+        EC2MockHttp.type = 'paginated'
+        EC2MockHttp.page_tokens = []
+        EC2MockHttp.page_sizes = []
+        EC2MockHttp.address_filters = []
+
+        nodes = self.driver.iterate_nodes(ex_page_size=2)
+        node = next(nodes)
+        self.assertEqual(node.id, 'i-4382922a')
+        self.assertTrue('1.2.3.4' in node.public_ips)
+        self.assertEqual(next(nodes).id, 'i-8474834a')
+        # The second page is only requested once the first one is processed
+        self.assertEqual(EC2MockHttp.page_tokens, [None])
+
+        node = next(nodes)
+        self.assertEqual(node.id, 'i-4382922b')
+        self.assertTrue('1.2.3.5' in node.public_ips)
+        self.assertTrue('1.2.3.6' in node.public_ips)
+        self.assertEqual(list(nodes), [])
+
+        self.assertEqual(EC2MockHttp.page_tokens, [None, 'instances-page-2'])
+        self.assertEqual(EC2MockHttp.page_sizes, ['2', '2'])
+        # The Elastic IP addresses are requested once for each page, the
+        # single node of the second page is filtered on
+        self.assertEqual(EC2MockHttp.address_filters, [None, 'i-4382922b'])
+
+    def test_iterate_images_follows_next_token(self):
+        EC2MockHttp.type = 'paginated'
+        EC2MockHttp.page_tokens = []
+        EC2MockHttp.page_sizes = []
+
+        images = self.driver.iterate_images(ex_page_size=1)
+        self.assertEqual(next(images).id, 'ami-57ba933a')
+        self.assertEqual(EC2MockHttp.page_tokens, [None])
+
+        self.assertEqual([image.id for image in images], ['ami-85b2a8ae'])
+        self.assertEqual(EC2MockHttp.page_tokens, [None, 'images-page-2'])
+        # DescribeImages doesn't accept MaxResults at the used API version
+        self.assertEqual(EC2MockHttp.page_sizes, [None, None])
+
     def test_list_volumes(self):
         volumes = self.driver.list_volumes()
 
@@ -1182,13 +1331,145 @@ class EC2SAEastTests(EC2Tests):
     region = 'sa-east-1'
 
 
+class EC2ImageCatalogTests(LibcloudTestCase):
+    def setUp(self):
+        EC2NodeDriver.connectionCls.conn_classes = (None, EC2MockHttp)
+        EC2MockHttp.use_param = 'Action'
+        EC2MockHttp.type = None
+
+        self.driver = EC2NodeDriver(*EC2_PARAMS, **{'region': 'us-east-1'})
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'images.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_refresh_and_find(self):
+        catalog = self.driver.ex_get_image_catalog()
+        self.assertTrue(self.driver.ex_get_image_catalog() is catalog)
+
+        self.assertEqual(catalog.refresh(owner='self'), 2)
+        self.assertEqual(len(catalog), 2)
+        self.assertTrue('ami-57ba933a' in catalog)
+
+        images = catalog.find(name_prefix='Test Image')
+        self.assertEqual([image.id for image in images],
+                         ['ami-57ba933a', 'ami-85b2a8ae'])
+        images = catalog.find(name='Test Image 2', owner='123456788908')
+        self.assertEqual([image.id for image in images], ['ami-85b2a8ae'])
+        self.assertEqual(catalog.find(name_prefix='Test Image 3'), [])
+        self.assertEqual(catalog.find(owner='amazon'), [])
+
+        # get_image() doesn't send a request for images in the catalog
+        with patch.object(self.driver, 'list_images') as list_images:
+            image = self.driver.get_image('ami-85b2a8ae')
+        self.assertFalse(list_images.called)
+        self.assertEqual(image.name, 'Test Image 2')
+
+    def test_refresh_removes_images_not_available_anymore(self):
+        catalog = EC2ImageCatalog(self.driver)
+        catalog.refresh(owner='self')
+
+        # A filtered refresh doesn't remove any image
+        EC2MockHttp.type = 'ex_imageids'
+        catalog.refresh(owner='self', filters={'name': 'Test Image'})
+        self.assertEqual(len(catalog), 2)
+
+        catalog.refresh(owner='self')
+        self.assertEqual([image.id for image in catalog.find()],
+                         ['ami-57ba933a'])
+        self.assertEqual(catalog.find(name='Test Image 2'), [])
+
+    def test_incremental_refresh(self):
+        catalog = EC2ImageCatalog(self.driver)
+        # Creation dates are compared with the current UTC date
+        today = datetime.utcnow().date()
+
+        with patch.object(self.driver, 'iterate_images',
+                          return_value=[]) as iterate_images:
+            catalog.refresh(since=today - timedelta(days=1))
+            filters = iterate_images.call_args[1]['ex_filters']
+            self.assertEqual(len(filters['creation-date']), 2)
+            self.assertTrue(filters['creation-date'][0].endswith('*'))
+
+            # The whole catalog is refreshed for old dates
+            catalog.refresh(since=today - timedelta(days=1000))
+            self.assertEqual(iterate_images.call_args[1]['ex_filters'], None)
+
+    def test_catalog_file(self):
+        catalog = EC2ImageCatalog(self.driver, path=self.path)
+        catalog.refresh()
+
+        with patch.object(self.driver, 'iterate_images') as iterate_images:
+            catalog = self.driver.ex_get_image_catalog(path=self.path)
+        self.assertFalse(iterate_images.called)
+
+        self.assertEqual(len(catalog), 2)
+        self.assertTrue('*' in catalog.refreshed)
+        image = catalog.get('ami-57ba933a')
+        self.assertEqual(image.name, 'Test Image')
+        self.assertEqual(image.extra['architecture'], 'x86_64')
+        self.assertTrue(image.driver is self.driver)
+
+    def test_catalog_file_unserializable_extra(self):
+        catalog = EC2ImageCatalog(self.driver, path=self.path)
+        catalog.refresh()
+        catalog.get('ami-57ba933a').extra['created'] = object()
+
+        # Failing to store the catalog is not an error
+        catalog.save()
+
+        self.assertEqual(os.listdir(self.tmp_dir), ['images.json'])
+        catalog = EC2ImageCatalog(self.driver, path=self.path)
+        self.assertTrue('created' not in catalog.get('ami-57ba933a').extra)
+
+
 class EC2MockHttp(MockHttpTestCase):
     fixtures = ComputeFileFixtures('ec2')
+    page_tokens = []
+    page_sizes = []
+    address_filters = []
 
     def _DescribeInstances(self, method, url, body, headers):
         body = self.fixtures.load('describe_instances.xml')
         return (httplib.OK, body, {}, httplib.responses[httplib.OK])
 
+    def _association_DescribeInstances(self, method, url, body, headers):
+        body = self.fixtures.load('describe_instances_association.xml')
+        return (httplib.OK, body, {}, httplib.responses[httplib.OK])
+
+    def _paginated_DescribeVolumes(self, method, url, body, headers):
+        return self._paginated_response(url, 'describe_volumes',
+                                        'volumes-page-2')
+
+    def _paginated_DescribeInstances(self, method, url, body, headers):
+        return self._paginated_response(url, 'describe_instances',
+                                        'instances-page-2')
+
+    def _paginated_DescribeImages(self, method, url, body, headers):
+        return self._paginated_response(url, 'describe_images',
+                                        'images-page-2')
+
+    def _paginated_DescribeAddresses(self, method, url, body, headers):
+        query = parse_qs(urlparse.urlparse(url).query)
+        self.address_filters.append(query.get('Filter.1.Value.1', [None])[0])
+
+        body = self.fixtures.load('describe_addresses_multi.xml')
+        return (httplib.OK, body, {}, httplib.responses[httplib.OK])
+
+    def _paginated_response(self, url, fixture, next_token):
+        query = parse_qs(urlparse.urlparse(url).query)
+        page_token = query.get('NextToken', [None])[0]
+        self.page_tokens.append(page_token)
+        self.page_sizes.append(query.get('MaxResults', [None])[0])
+
+        if page_token is None:
+            body = self.fixtures.load('%s_page_1.xml' % (fixture))
+        else:
+            self.assertEqual(page_token, next_token)
+            body = self.fixtures.load('%s_page_2.xml' % (fixture))
+        return (httplib.OK, body, {}, httplib.responses[httplib.OK])
+
     def _DescribeReservedInstances(self, method, url, body, headers):
         body = self.fixtures.load('describe_reserved_instances.xml')
         return (httplib.OK, body, {}, httplib.responses[httplib.OK])
@@ -1237,6 +1518,13 @@ class EC2MockHttp(MockHttpTestCase):
         body = self.fixtures.load('run_instances.xml')
         return (httplib.OK, body, {}, httplib.responses[httplib.OK])
 
+    def _create_nodes_RunInstances(self, method, url, body, headers):
+        self.assertUrlContainsQueryParams(url, {'MinCount': '3',
+                                                'MaxCount': '3'})
+
+        body = self.fixtures.load('run_instances.xml')
+        return (httplib.OK, body, {}, httplib.responses[httplib.OK])
+
     def _create_ex_assign_public_ip_RunInstances(self, method, url, body, headers):
         self.assertUrlContainsQueryParams(url, {
             'NetworkInterface.1.AssociatePublicIpAddress': "true",
@@ -1310,6 +1598,11 @@ class EC2MockHttp(MockHttpTestCase):
         body = self.fixtures.load('describe_key_pairs.xml')
         return (httplib.OK, body, {}, httplib.responses[httplib.OK])
 
+    def _not_found_DescribeInstances(self, method, url, body, headers):
+        body = self.fixtures.load('describe_instances_not_found.xml')
+        return (httplib.BAD_REQUEST, body, {},
+                httplib.responses[httplib.BAD_REQUEST])
+
     def _doesnt_exist_DescribeKeyPairs(self, method, url, body, headers):
         body = self.fixtures.load('describe_key_pairs_doesnt_exist.xml')
         return (httplib.BAD_REQUEST, body, {},
@@ -1623,6 +1916,20 @@ class NimbusTests(EC2Tests):
         self.assertTrue('m1.large' in ids)
         self.assertTrue('m1.xlarge' in ids)
 
+    def test_iterate_nodes_follows_next_token(self):
+        # overridden from EC2Tests -- Nimbus doesn't support elastic IPs.
+        EC2MockHttp.type = 'paginated'
+        EC2MockHttp.page_tokens = []
+        EC2MockHttp.page_sizes = []
+        EC2MockHttp.address_filters = []
+
+        nodes = list(self.driver.iterate_nodes(ex_page_size=2))
+        self.assertEqual([node.id for node in nodes],
+                         ['i-4382922a', 'i-8474834a', 'i-4382922b'])
+        self.assertEqual(EC2MockHttp.page_tokens, [None, 'instances-page-2'])
+        self.assertEqual(EC2MockHttp.page_sizes, ['2', '2'])
+        self.assertEqual(EC2MockHttp.address_filters, [])
+
     def test_list_nodes(self):
         # overridden from EC2Tests -- Nimbus doesn't support elastic IPs.
         node = self.driver.list_nodes()[0]
@@ -1642,6 +1949,12 @@ class NimbusTests(EC2Tests):
         self.assertEqual(node.extra['tags'],
                          {'Name': 'Test Server 2', 'Group': 'VPC Test'})
 
+    def test_list_nodes_addresses_cache(self):
+        # overridden from EC2Tests -- Nimbus doesn't support elastic IPs.
+        self.driver.addresses_cache_ttl = 60
+        node = self.driver.list_nodes()[0]
+        self.assertEqual(node.public_ips, ['1.2.3.4'])
+
     def test_ex_create_tags(self):
         # Nimbus doesn't support creating tags so this one should be a
         # passthrough
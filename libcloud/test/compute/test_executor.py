@@ -0,0 +1,201 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import socket
+import unittest
+
+from mock import patch
+
+from libcloud.common.types import LibcloudError
+from libcloud.compute.base import Node
+from libcloud.compute.types import NodeState
+from libcloud.compute.deployment import ScriptDeployment
+from libcloud.compute.drivers.dummy import DummyNodeDriver
+from libcloud.compute.executor import ParallelSSHExecutor
+from libcloud.compute.ssh import BaseSSHClient
+
+
+class FakeSSHClient(BaseSSHClient):
+    instances = []
+    connect_errors = {}
+
+    def __init__(self, *args, **kwargs):
+        super(FakeSSHClient, self).__init__(*args, **kwargs)
+        self.commands = []
+        self.timeouts = []
+        self.connects = 0
+        self.closed = False
+        FakeSSHClient.instances.append(self)
+
+    def connect(self):
+        self.connects += 1
+        errors = FakeSSHClient.connect_errors.get(self.hostname)
+
+        if errors:
+            raise errors.pop(0)
+
+        return True
+
+    def put(self, path, contents=None, chmod=None, mode='w'):
+        return path
+
+    def delete(self, path):
+        return True
+
+    def run(self, cmd, timeout=None):
+        self.commands.append(cmd)
+        self.timeouts.append(timeout)
+
+        if self.hostname == '10.0.0.3':
+            return '', 'failed', 1
+
+        return 'output of %s on %s' % (cmd, self.hostname), '', 0
+
+    def close(self):
+        self.closed = True
+        return True
+
+
+class ParallelSSHExecutorTests(unittest.TestCase):
+
+    def setUp(self):
+        FakeSSHClient.instances = []
+        FakeSSHClient.connect_errors = {}
+
+        self.nodes = [Node(id=str(index), name='node-%s' % (index),
+                           state=NodeState.RUNNING,
+                           public_ips=['10.0.0.%s' % (index)],
+                           private_ips=['192.168.0.%s' % (index)],
+                           driver=DummyNodeDriver(0))
+                      for index in range(1, 5)]
+        self.executor = ParallelSSHExecutor(self.nodes, username='ubuntu',
+                                            key_files='/tmp/key',
+                                            max_concurrency=2,
+                                            ssh_client_cls=FakeSSHClient)
+
+    def test_run_command(self):
+        results = self.executor.run('uptime')
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual([result.node for result in results], self.nodes)
+        self.assertEqual(results[0].hostname, '10.0.0.1')
+        self.assertEqual(results[0].stdout, 'output of uptime on 10.0.0.1')
+        self.assertEqual(results[0].exit_status, 0)
+        self.assertTrue(results[0].success)
+
+        self.assertEqual(results.failed, [results[2]])
+        self.assertEqual(results[2].stderr, 'failed')
+        self.assertEqual(len(results.succeeded), 3)
+
+        self.assertTrue(results.duration >= 0)
+        self.assertTrue(results.max_duration <= results.total_duration)
+
+        client = FakeSSHClient.instances[0]
+        self.assertEqual(client.username, 'ubuntu')
+        self.assertEqual(client.key_files, '/tmp/key')
+
+    def test_connections_are_reused(self):
+        self.executor.run('uptime')
+        self.executor.run('hostname')
+
+        self.assertEqual(len(FakeSSHClient.instances), 4)
+
+        for client in FakeSSHClient.instances:
+            self.assertEqual(client.connects, 1)
+            self.assertEqual(client.commands, ['uptime', 'hostname'])
+
+        self.executor.close()
+        self.assertTrue(all([client.closed
+                             for client in FakeSSHClient.instances]))
+
+        self.executor.run('uptime')
+        self.assertEqual(len(FakeSSHClient.instances), 8)
+
+    def test_run_deployment(self):
+        task = ScriptDeployment(script='echo foo', name='/root/foo.sh')
+
+        with self.executor as executor:
+            results = executor.run(task)
+
+        self.assertEqual(results[1].stdout,
+                         'output of /root/foo.sh on 10.0.0.2')
+        self.assertEqual(results[1].deployment.stdout, results[1].stdout)
+        self.assertEqual(results[2].exit_status, 1)
+
+        # Each node gets its own copy of the deployment
+        self.assertTrue(results[0].deployment is not results[1].deployment)
+        self.assertEqual(task.stdout, None)
+
+    def test_timeout(self):
+        self.executor.timeout = 30
+        task = ScriptDeployment(script='echo foo', name='/root/foo.sh')
+
+        # Only the commands of the clients which support it get the timeout
+        self.executor.run('uptime')
+        self.assertEqual(FakeSSHClient.instances[0].timeouts, [None])
+
+        with patch('libcloud.compute.executor.ParamikoSSHClient',
+                   FakeSSHClient):
+            self.executor.run('uptime')
+            self.executor.run(task)
+
+        self.assertEqual(FakeSSHClient.instances[0].commands,
+                         ['uptime', 'uptime', '/root/foo.sh'])
+        self.assertEqual(FakeSSHClient.instances[0].timeouts,
+                         [None, 30, 30])
+
+    def test_connect_retry_and_failure(self):
+        FakeSSHClient.connect_errors['10.0.0.1'] = [socket.error('refused')]
+        FakeSSHClient.connect_errors['10.0.0.2'] = [socket.error('refused')
+                                                    for _ in range(3)]
+        self.executor.connect_timeout = 4
+        self.executor.max_concurrency = 1
+
+        clock = [0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        with patch('time.sleep', sleep), patch('time.time', lambda: clock[0]):
+            results = self.executor.run('uptime')
+
+        self.assertTrue(results[0].success)
+        self.assertEqual(FakeSSHClient.instances[0].connects, 2)
+        self.assertEqual(FakeSSHClient.instances[1].connects, 3)
+
+        self.assertTrue(isinstance(results[1].error, LibcloudError))
+        self.assertTrue('Giving up' in str(results[1].error))
+        self.assertTrue('refused' in str(results[1].error))
+        self.assertEqual(results[1].exit_status, None)
+        self.assertEqual(results.failed, [results[1], results[2]])
+
+    def test_node_without_addresses(self):
+        self.nodes[0].public_ips = ['2001:db8::1']
+
+        results = self.executor.run('uptime')
+
+        self.assertTrue(isinstance(results[0].error, LibcloudError))
+        self.assertEqual(len(FakeSSHClient.instances), 3)
+
+    def test_private_interface(self):
+        self.executor.ssh_interface = 'private_ips'
+
+        results = self.executor.run('uptime')
+        self.assertEqual(results[3].hostname, '192.168.0.4')
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -15,11 +15,19 @@
 """
 Tests for Google Compute Engine Driver
 """
+import os
 import sys
+import shutil
+import tempfile
 import unittest
+import email
 import datetime
+import json
+import threading
 
-from libcloud.utils.py3 import httplib
+from mock import Mock, patch
+
+from libcloud.utils.py3 import httplib, parse_qs, urlparse
 from libcloud.compute.drivers.gce import (GCENodeDriver, API_VERSION,
                                           timestamp_to_datetime,
                                           GCEAddress, GCEBackendService,
@@ -27,12 +35,14 @@ from libcloud.compute.drivers.gce import (GCENodeDriver, API_VERSION,
                                           GCEHealthCheck, GCENetwork,
                                           GCENodeImage, GCERoute,
                                           GCETargetHttpProxy, GCEUrlMap,
-                                          GCEZone)
+                                          GCEZone, GCEOperation,
+                                          GCEOperationWaiter)
 from libcloud.common.google import (GoogleBaseAuthConnection,
                                     ResourceNotFoundError, ResourceExistsError,
                                     InvalidRequestError, GoogleBaseError)
 from libcloud.test.common.test_google import GoogleAuthMockHttp, GoogleTestCase
 from libcloud.compute.base import Node, StorageVolume
+from libcloud.compute.types import NodeState
 
 from libcloud.test import MockHttpTestCase
 from libcloud.test.compute import TestCaseMixin
@@ -65,6 +75,66 @@ class GCENodeDriverTest(GoogleTestCase, TestCaseMixin):
     def test_default_scopes(self):
         self.assertEqual(self.driver.scopes, None)
 
+    def test_zones_and_regions_are_loaded_lazily(self):
+        self.assertIsNone(self.driver._zone_list)
+        self.assertIsNone(self.driver._region_list)
+
+        self.assertEqual(self.driver.zone.name, 'us-central1-a')
+        self.assertEqual(self.driver.region.name, 'us-central1')
+        self.assertEqual(len(self.driver.zone_list), 6)
+        self.assertEqual(len(self.driver.region_dict), 3)
+
+    def test_zones_and_regions_can_be_assigned(self):
+        zone = GCEZone(id='1', name='custom-zone', status='UP',
+                       maintenance_windows=None, deprecated=None,
+                       driver=self.driver)
+
+        with patch.object(self.driver, '_load_catalog') as load_catalog:
+            self.driver.zone_list = [zone]
+            self.driver.zone_dict = {zone.name: zone}
+            self.driver.region_list = []
+            self.driver.region_dict = {}
+
+            self.assertEqual(self.driver.zone_list, [zone])
+            self.assertEqual(self.driver.zone_dict, {'custom-zone': zone})
+            self.assertEqual(self.driver.region_list, [])
+            self.assertEqual(self.driver.region_dict, {})
+            self.assertEqual(load_catalog.call_count, 0)
+
+        # Values assigned by the user are kept when the rest is loaded
+        driver = GCENodeDriver(*GCE_PARAMS, auth_type='IA',
+                               **GCE_KEYWORD_PARAMS)
+        driver.zone_list = [zone]
+        self.assertEqual(len(driver.zone_dict), 6)
+        self.assertEqual(driver.zone_list, [zone])
+
+    def test_catalog_file(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        catalog_file = os.path.join(tmp_dir, 'catalog')
+
+        kwargs = GCE_KEYWORD_PARAMS.copy()
+        kwargs.update(auth_type='IA', catalog_file=catalog_file)
+        driver = GCENodeDriver(*GCE_PARAMS, **kwargs)
+        zone_names = [zone.name for zone in driver.zone_list]
+        self.assertTrue(os.path.exists(catalog_file))
+
+        # Zones and regions are loaded from the file without any request
+        driver = GCENodeDriver(*GCE_PARAMS, **kwargs)
+        with patch.object(driver.connection, 'request') as request:
+            self.assertEqual([zone.name for zone in driver.zone_list],
+                             zone_names)
+            self.assertEqual(len(driver.region_list), 3)
+            self.assertEqual(request.call_count, 0)
+
+        # Expired catalog
+        kwargs['catalog_ttl'] = -1
+        driver = GCENodeDriver(*GCE_PARAMS, **kwargs)
+        with patch.object(driver.connection, 'request',
+                          wraps=driver.connection.request) as request:
+            self.assertEqual(len(driver.zone_list), 6)
+            self.assertEqual(request.call_count, 2)
+
     def test_timestamp_to_datetime(self):
         timestamp1 = '2013-06-26T10:05:19.340-07:00'
         datetime1 = datetime.datetime(2013, 6, 26, 17, 5, 19)
@@ -250,6 +320,19 @@ class GCENodeDriverTest(GoogleTestCase, TestCaseMixin):
         names = [n.name for n in nodes_all]
         self.assertTrue('node-name' in names)
 
+    def test_list_nodes_resolves_boot_disks_in_bulk(self):
+        with patch.object(self.driver, 'ex_get_volume',
+                          wraps=self.driver.ex_get_volume) as get_volume:
+            nodes = self.driver.list_nodes(ex_zone='us-central1-a')
+            self.assertEqual(get_volume.call_count, 0)
+            self.assertEqual(nodes[0].extra['boot_disk'].name, 'node-name')
+
+            # Boot disks missing from the bulk listing are looked up one by
+            # one
+            nodes_all = self.driver.list_nodes(ex_zone='all')
+            self.assertEqual(len(nodes_all), 8)
+            self.assertEqual(get_volume.call_count, 1)
+
     def test_ex_list_regions(self):
         regions = self.driver.ex_list_regions()
         self.assertEqual(len(regions), 3)
@@ -260,6 +343,27 @@ class GCENodeDriverTest(GoogleTestCase, TestCaseMixin):
         self.assertEqual(len(snapshots), 2)
         self.assertEqual(snapshots[0].name, 'lcsnapshot')
 
+    def test_ex_iterate_snapshots_follows_page_tokens(self):
+        GCEMockHttp.type = 'PAGINATED'
+        GCEMockHttp.page_tokens = []
+        snapshots = self.driver.ex_iterate_snapshots()
+        self.assertEqual(next(snapshots).name, 'lcsnapshot')
+        # Only the first page has been requested so far
+        self.assertEqual(GCEMockHttp.page_tokens, [None])
+
+        names = [s.name for s in snapshots]
+        self.assertEqual(names, ['libcloud-demo-snapshot'])
+        self.assertEqual(GCEMockHttp.page_tokens, [None, 'page-2'])
+
+        snapshots = self.driver.ex_list_snapshots()
+        self.assertEqual(len(snapshots), 2)
+
+    def test_ex_iterate_snapshots_prefetch(self):
+        GCEMockHttp.type = 'PAGINATED'
+        snapshots = list(self.driver.ex_iterate_snapshots(ex_prefetch=True))
+        self.assertEqual([s.name for s in snapshots],
+                         ['lcsnapshot', 'libcloud-demo-snapshot'])
+
     def test_ex_list_targethttpproxies(self):
         target_proxies = self.driver.ex_list_targethttpproxies()
         self.assertEqual(len(target_proxies), 2)
@@ -632,6 +736,24 @@ class GCENodeDriverTest(GoogleTestCase, TestCaseMixin):
         self.assertTrue(isinstance(node, Node))
         self.assertEqual(node.name, node_name)
 
+    def test_create_node_without_waiting(self):
+        image = self.driver.ex_get_image('debian-7')
+        size = self.driver.ex_get_size('n1-standard-1')
+        operations = [self.driver.create_node('node-name', size, image,
+                                              ex_wait_for_completion=False),
+                      self.driver.destroy_node(
+                          self.driver.ex_get_node('node-name'),
+                          ex_wait_for_completion=False)]
+        self.assertTrue(isinstance(operations[0], GCEOperation))
+        self._executed_mock_methods = []
+
+        results = self.driver.ex_wait_for_operations(operations)
+
+        self.assertEqual(results[0].name, 'node-name')
+        self.assertTrue(results[1])
+        # Both operations are polled with a single batch request
+        self.assertEqual(self._executed_mock_methods.count('_batch'), 1)
+
     def test_create_node_image_family(self):
         node_name = 'node-name'
         size = self.driver.ex_get_size('n1-standard-1')
@@ -782,6 +904,96 @@ class GCENodeDriverTest(GoogleTestCase, TestCaseMixin):
         self.assertEqual(nodes[0].name, '%s-000' % base_name)
         self.assertEqual(nodes[1].name, '%s-001' % base_name)
 
+    def test_request_batch(self):
+        requests = [{'action': '/zones/us-central1-a/instances/node-name'},
+                    {'action': '/global/images/family/nofamily'},
+                    {'action': '/zones/us-central1-a/instances',
+                     'method': 'POST', 'data': {'name': 'node-name'}}]
+        self.driver.connection.batch_size = 2
+        responses = self.driver.connection.request_batch(requests)
+
+        self.assertEqual(responses[0].object['name'], 'node-name')
+        self.assertTrue(isinstance(responses[1], ResourceNotFoundError))
+        self.assertEqual(responses[2].object['kind'], 'compute#operation')
+        self.assertEqual(self._executed_mock_methods.count('_batch'), 2)
+
+    def test_request_batch_missing_responses(self):
+        response = Mock(headers={'content-type':
+                                 'multipart/mixed; boundary=batch_x'},
+                        body='--batch_x--\r\n')
+        connection = self.driver.connection
+
+        with patch.object(connection, 'request', return_value=response):
+            results = connection._request_batch([{'action': '/a'},
+                                                 {'action': '/b'}])
+
+        self.assertTrue(all([isinstance(result, GoogleBaseError)
+                             for result in results]))
+        self.assertFalse(results[0] is results[1])
+
+    def test_get_nodes_by_id(self):
+        node = self.driver.ex_get_node('node-name', 'us-central1-a')
+        removed_node = Node(id='1', name='libcloud-lb-demo-www-002',
+                            state=NodeState.PENDING, public_ips=[],
+                            private_ips=[], driver=self.driver,
+                            extra={'zone': self.driver.ex_get_zone(
+                                'us-central1-b')})
+        self._executed_mock_methods = []
+
+        nodes = self.driver._get_nodes_by_id([node, removed_node])
+        self.assertEqual([n.uuid for n in nodes], [node.uuid])
+        self.assertEqual(self._executed_mock_methods.count('_batch'), 1)
+
+        # The zone of nodes which weren't returned by the driver isn't known
+        removed_node.extra = {}
+        self.assertEqual(self.driver._get_nodes_by_id([removed_node]), None)
+
+    def test_ex_create_multiple_nodes_uses_batch_requests(self):
+        size = self.driver.ex_get_size('n1-standard-1')
+        image = self.driver.ex_get_image('debian-7')
+        self._executed_mock_methods = []
+
+        nodes = self.driver.ex_create_multiple_nodes('lcnode', size, image, 2,
+                                                     poll_interval=0)
+        self.assertEqual([node.name for node in nodes],
+                         ['lcnode-000', 'lcnode-001'])
+        # Create, poll operations and get nodes
+        self.assertEqual(self._executed_mock_methods.count('_batch'), 3)
+
+    def test_create_nodes_uses_ex_create_multiple_nodes(self):
+        size = self.driver.ex_get_size('n1-standard-1')
+        image = self.driver.ex_get_image('debian-7')
+
+        with patch.object(self.driver, 'ex_create_multiple_nodes') as create:
+            create.return_value = ['node']
+            nodes, errors = self.driver._create_nodes(
+                2, name='lcnode', size=size, image=image,
+                ex_tags=['web'], description='web server')
+
+        self.assertEqual((nodes, errors), (['node'], []))
+        create.assert_called_once_with('lcnode', size, image, 2,
+                                       ignore_errors=True, ex_tags=['web'],
+                                       description='web server')
+
+    def test_create_nodes_unsupported_argument(self):
+        size = self.driver.ex_get_size('n1-standard-1')
+        image = self.driver.ex_get_image('debian-7')
+
+        # ex_preemptible is only supported by create_node
+        with patch.object(self.driver, 'ex_create_multiple_nodes') as \
+                create_multiple, \
+                patch.object(self.driver, 'create_node') as create_node:
+            create_node.return_value = 'node'
+            nodes, errors = self.driver._create_nodes(
+                2, name='lcnode', size=size, image=image, ex_preemptible=True)
+
+        self.assertFalse(create_multiple.called)
+        self.assertEqual(nodes, ['node', 'node'])
+        self.assertEqual(sorted([c[1]['name'] for c in
+                                 create_node.call_args_list]),
+                         ['lcnode-000', 'lcnode-001'])
+        self.assertTrue(create_node.call_args[1]['ex_preemptible'])
+
     def test_ex_create_multiple_nodes_image_family(self):
         base_name = 'lcnode'
         image = None
@@ -945,6 +1157,18 @@ class GCENodeDriverTest(GoogleTestCase, TestCaseMixin):
         self.assertTrue(add_node)
         self.assertEqual(len(targetpool.nodes), 2)
 
+    def test_ex_targetpool_remove_add_node_list(self):
+        targetpool = self.driver.ex_get_targetpool('lctargetpool')
+        node = self.driver.ex_get_node('libcloud-lb-demo-www-001',
+                                       'us-central1-b')
+        self.assertTrue(self.driver.ex_targetpool_remove_node(targetpool,
+                                                              [node]))
+        self.assertEqual(len(targetpool.nodes), 1)
+
+        self.assertTrue(self.driver.ex_targetpool_add_node(
+            targetpool, [node, node.extra['selfLink']]))
+        self.assertEqual(len(targetpool.nodes), 2)
+
     def test_ex_targetpool_remove_add_healthcheck(self):
         targetpool = self.driver.ex_get_targetpool('lctargetpool')
         healthcheck = self.driver.ex_get_healthcheck(
@@ -1477,9 +1701,98 @@ class GCENodeDriverTest(GoogleTestCase, TestCaseMixin):
         self.assertEqual(zone_no_mw.time_until_mw, None)
 
 
+class GCEOperationWaiterTest(unittest.TestCase):
+    def _get_response(self, name, status):
+        return Mock(object={'name': name, 'status': status,
+                            'selfLink': name})
+
+    def test_adaptive_polling(self):
+        connection = Mock(poll_interval=1, timeout=100)
+        connection.request_batch.side_effect = [
+            [self._get_response('a', 'RUNNING'),
+             self._get_response('b', 'RUNNING')],
+            [self._get_response('a', 'RUNNING'),
+             self._get_response('b', 'RUNNING')],
+            [self._get_response('a', 'DONE'),
+             self._get_response('b', 'RUNNING')]]
+        connection.request.side_effect = [self._get_response('b', 'DONE')]
+
+        waiter = GCEOperationWaiter(connection)
+        done = []
+        operations = [waiter.add({'name': name, 'status': 'PENDING',
+                                  'selfLink': name}) for name in 'ab']
+        operations[0].add_done_callback(done.append)
+
+        with patch('libcloud.compute.drivers.gce.time.sleep') as sleep:
+            waiter.wait()
+
+        # Back off while nothing changes, start over once an operation is
+        # done
+        self.assertEqual([c[0][0] for c in sleep.call_args_list],
+                         [1, 1.5, 1])
+        self.assertEqual(done, [operations[0]])
+        self.assertEqual(operations[1].result()['status'], 'DONE')
+        self.assertEqual(waiter.pending, [])
+
+    def test_failed_operation(self):
+        error = GoogleBaseError('failed', 200, 'ERROR')
+        connection = Mock(poll_interval=1, timeout=100)
+        connection.request.side_effect = error
+
+        waiter = GCEOperationWaiter(connection)
+        operation = waiter.add({'name': 'a', 'status': 'PENDING',
+                                'selfLink': 'a'})
+        waiter.wait()
+
+        self.assertTrue(operation.done)
+        self.assertRaises(GoogleBaseError, operation.result)
+
+    def test_wait_only_polls_own_operations(self):
+        connection = Mock(poll_interval=1, timeout=100)
+        connection.request.side_effect = [self._get_response('a', 'DONE')]
+
+        waiter = GCEOperationWaiter(connection)
+        operations = [waiter.add({'name': name, 'status': 'PENDING',
+                                  'selfLink': name}) for name in 'ab']
+
+        # Operation "b" belongs to another caller, it is neither polled nor
+        # can its errors be raised here
+        waiter.wait([operations[0]])
+
+        connection.request.assert_called_once_with('a')
+        self.assertFalse(connection.request_batch.called)
+        self.assertTrue(operations[0].done)
+        self.assertEqual(waiter.pending, [operations[1]])
+
+    def test_wait_from_many_threads(self):
+        names = ['op-%d' % (index) for index in range(10)]
+        connection = Mock(poll_interval=0, timeout=100)
+        connection.request.side_effect = lambda name: \
+            self._get_response(name, 'DONE')
+        connection.request_batch.side_effect = lambda requests: \
+            [self._get_response(request['action'], 'DONE')
+             for request in requests]
+
+        waiter = GCEOperationWaiter(connection)
+        operations = [waiter.add({'name': name, 'status': 'PENDING',
+                                  'selfLink': name}) for name in names]
+        threads = [threading.Thread(target=waiter.wait, args=([operation],))
+                   for operation in operations]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([operation.result()['name']
+                          for operation in operations], names)
+        self.assertEqual(waiter.pending, [])
+
+
 class GCEMockHttp(MockHttpTestCase):
     fixtures = ComputeFileFixtures('gce')
     json_hdr = {'content-type': 'application/json; charset=UTF-8'}
+    page_tokens = []
 
     def _get_method_name(self, type, use_param, qs, path):
         api_path = '/compute/%s' % API_VERSION
@@ -1497,6 +1810,38 @@ class GCEMockHttp(MockHttpTestCase):
                                                                 qs, path)
         return method_name
 
+    def _batch(self, method, url, body, headers):
+        # _get_method_name strips the API path, make sure the batch endpoint
+        # is used instead of a project path
+        self.assertEqual(urlparse.urlsplit(url).path,
+                         '/batch/compute/%s' % (API_VERSION))
+
+        # Dispatch each request in the batch to the other mock methods
+        content_type = headers['Content-Type']
+        boundary = content_type.split('boundary=')[1]
+        message = email.message_from_string(
+            'Content-Type: %s\r\n\r\n%s' % (content_type, body))
+
+        parts = []
+        for part in message.get_payload():
+            request, _, part_body = part.get_payload().partition('\r\n\r\n')
+            part_method, part_url = request.split('\r\n')[0].split(' ')[:2]
+            self.request(part_method, part_url, part_body or None, {})
+            response = self.getresponse()
+            parts.append('\r\n'.join([
+                '--%s' % (boundary),
+                'Content-Type: application/http',
+                'Content-ID: <response-%s>' % (part['Content-ID'].strip('<>')),
+                '',
+                'HTTP/1.1 %s %s' % (response.status, response.reason),
+                'Content-Type: application/json',
+                '',
+                response.body.read()]))
+
+        body = '\r\n'.join(parts + ['--%s--' % (boundary), ''])
+        headers = {'content-type': 'multipart/mixed; boundary=%s' % (boundary)}
+        return (httplib.OK, body, headers, httplib.responses[httplib.OK])
+
     def _setUsageExportBucket(self, method, url, body, headers):
         if method == 'POST':
             body = self.fixtures.load('setUsageExportBucket_post.json')
@@ -1766,6 +2111,21 @@ class GCEMockHttp(MockHttpTestCase):
         body = self.fixtures.load('global_snapshots.json')
         return (httplib.OK, body, self.json_hdr, httplib.responses[httplib.OK])
 
+    def _global_snapshots_PAGINATED(self, method, url, body, headers):
+        # Return one snapshot per page
+        query = parse_qs(urlparse.urlparse(url).query)
+        page_token = query.get('pageToken', [None])[0]
+        self.page_tokens.append(page_token)
+
+        snapshots = json.loads(self.fixtures.load('global_snapshots.json'))
+        if page_token is None:
+            snapshots['items'] = snapshots['items'][:1]
+            snapshots['nextPageToken'] = 'page-2'
+        else:
+            snapshots['items'] = snapshots['items'][1:]
+        body = json.dumps(snapshots)
+        return (httplib.OK, body, self.json_hdr, httplib.responses[httplib.OK])
+
     def _global_snapshots_lcsnapshot(self, method, url, body, headers):
         if method == 'DELETE':
             body = self.fixtures.load(
@@ -35,7 +35,7 @@ from libcloud.utils.py3 import u
 from libcloud.common.types import InvalidCredsError, MalformedResponseError, \
     LibcloudError
 from libcloud.compute.types import Provider, KeyPairDoesNotExistError, StorageVolumeState, \
-    VolumeSnapshotState
+    VolumeSnapshotState, NodeState
 from libcloud.compute.providers import get_driver
 from libcloud.compute.drivers.openstack import (
     OpenStack_1_0_NodeDriver, OpenStack_1_0_Response,
@@ -1105,6 +1105,17 @@ class OpenStack_1_1_Tests(unittest.TestCase, TestCaseMixin):
         self.assertEqual(node.id, '12064')
         self.assertEqual(node.name, 'lc-test')
 
+    def test_get_nodes_by_id(self):
+        nodes = [Node(id=node_id, name='', state=NodeState.PENDING,
+                      public_ips=[], private_ips=[], driver=self.driver)
+                 for node_id in ['12064', '12099']]
+
+        result = self.driver._get_nodes_by_id(nodes)
+
+        # Servers which don't exist (yet) are left out
+        self.assertEqual([node.id for node in result], ['12064'])
+        self.assertEqual(result[0].uuid, nodes[0].uuid)
+
     def test_ex_get_size(self):
         size_id = '7'
         size = self.driver.ex_get_size(size_id)
@@ -1613,6 +1624,12 @@ class OpenStack_1_1_MockHttp(MockHttpTestCase):
         else:
             raise NotImplementedError()
 
+    def _v1_1_slug_servers_12099(self, method, url, body, headers):
+        body = json.dumps({'itemNotFound': {
+            'message': 'Instance could not be found', 'code': 404}})
+        return (httplib.NOT_FOUND, body, self.json_content_headers,
+                httplib.responses[httplib.NOT_FOUND])
+
     def _v1_1_slug_servers_12062(self, method, url, body, headers):
         if method == "GET":
             body = self.fixtures.load('_servers_12064.json')
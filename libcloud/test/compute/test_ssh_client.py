@@ -19,16 +19,23 @@ from __future__ import with_statement
 
 import os
 import sys
+import socket
+import subprocess
 import tempfile
 
+from io import BytesIO
+
 from libcloud import _init_once
 from libcloud.test import LibcloudTestCase
 from libcloud.test import unittest
 from libcloud.compute.ssh import ParamikoSSHClient
 from libcloud.compute.ssh import ShellOutSSHClient
+from libcloud.compute.ssh import SSHCommandTimeoutError
 from libcloud.compute.ssh import have_paramiko
+from libcloud.compute.ssh import _OutputBuffer
 
 from libcloud.utils.py3 import StringIO
+from libcloud.utils.py3 import b
 from libcloud.utils.py3 import u
 
 from mock import patch, Mock, MagicMock
@@ -340,6 +347,121 @@ class ParamikoSSHClientTests(LibcloudTestCase):
         self.assertEqual('\xf0\x90\x8d\x88', stderr.encode('utf-8'))
         self.assertTrue(len(stderr) in [1, 2])
 
+    @patch('select.select')
+    def test_run_output_handlers(self, mock_select):
+        client = ParamikoSSHClient(hostname='dummy.host.org',
+                                   username='ubuntu')
+        client.client = Mock()
+
+        chan = client.client.get_transport().open_session()
+        chan.eof_received = False
+        chan.exit_status_ready.side_effect = [False, True]
+        chan.recv_ready.side_effect = [True, True, False, False, False]
+        chan.recv.side_effect = [b'123\xf0\x90', b'\x8d\x88456']
+        chan.recv_stderr_ready.return_value = False
+        chan.recv_exit_status.return_value = 0
+
+        chunks = []
+        stdout, stderr, status = client.run('cmd', timeout=10,
+                                            stdout_handler=chunks.append,
+                                            max_output_size=4)
+
+        self.assertEqual(chunks, [u('123'), u('\U00010348456')])
+        self.assertEqual(stdout, u('\U00010348456'))
+        self.assertEqual(stderr, u(''))
+        self.assertEqual(status, 0)
+
+        # Waits for the channel instead of sleeping
+        self.assertEqual(mock_select.call_count, 1)
+        self.assertEqual(mock_select.call_args[0][0], [chan])
+
+    def test_wait_for_channel_after_eof(self):
+        chan = Mock()
+        chan.recv_ready.return_value = False
+        chan.recv_stderr_ready.return_value = False
+        chan.eof_received = True
+
+        self.ssh_cli._wait_for_channel(chan, timeout=1.5)
+        chan.status_event.wait.assert_called_once_with(1.5)
+
+    def test_run_with_stdin(self):
+        client = ParamikoSSHClient(hostname='dummy.host.org',
+                                   username='ubuntu')
+        client.client = Mock()
+        client.SEND_CHUNK_SIZE = 4
+
+        chan = client.client.get_transport().open_session()
+        chan.exit_status_ready.return_value = True
+        chan.recv_ready.return_value = False
+        chan.recv_stderr_ready.return_value = False
+        chan.recv_exit_status.return_value = 0
+
+        stdout, stderr, status = client.run('tar -xpPf -', stdin='0123456789')
+
+        sent = [call[0][0] for call in chan.sendall.call_args_list]
+        self.assertEqual(sent, [b('0123'), b('4567'), b('89')])
+        chan.shutdown_write.assert_called_once_with()
+        self.assertFalse(chan.makefile.called)
+        self.assertEqual(status, 0)
+
+    def test_run_with_stdin_timeout(self):
+        client = ParamikoSSHClient(hostname='dummy.host.org',
+                                   username='ubuntu')
+        client.client = Mock()
+        client.SEND_CHUNK_SIZE = 4
+
+        chan = client.client.get_transport().open_session()
+        chan.recv_ready.return_value = False
+        chan.recv_stderr_ready.return_value = False
+        chan.sendall.side_effect = [None, socket.timeout()]
+
+        self.assertRaises(SSHCommandTimeoutError, client.run, 'cat',
+                          timeout=10, stdin='0123456789')
+        self.assertEqual(chan.sendall.call_count, 2)
+        self.assertTrue(chan.settimeout.call_args[0][0] <= 10)
+        self.assertTrue(chan.close.called)
+        self.assertFalse(chan.shutdown_write.called)
+
+        # Deadline is checked between the chunks
+        chan = client.client.get_transport().open_session()
+        chan.reset_mock()
+        chan.sendall.side_effect = None
+
+        with patch('libcloud.compute.ssh.time') as mock_time:
+            mock_time.time.side_effect = [0, 0, 5, 11]
+            self.assertRaises(SSHCommandTimeoutError, client.run, 'cat',
+                              timeout=10, stdin='0123456789')
+
+        self.assertEqual(chan.sendall.call_count, 2)
+        self.assertTrue(chan.close.called)
+
+
+class OutputBufferTests(LibcloudTestCase):
+
+    def test_incremental_decoding(self):
+        output = _OutputBuffer()
+        data = b'\xf0\x90\x8d\x88'
+
+        for index in range(len(data)):
+            output.write(data[index:index + 1])
+
+        self.assertEqual(output.getvalue(), u('\U00010348'))
+
+    def test_handler_and_max_size(self):
+        chunks = []
+        output = _OutputBuffer(handler=chunks.append, max_size=5)
+
+        output.write(b('0123'))
+        output.write(b('4567'))
+        output.write(b('89'))
+
+        self.assertEqual(chunks, [u('0123'), u('4567'), u('89')])
+        self.assertEqual(output.getvalue(), u('56789'))
+
+        output = _OutputBuffer(max_size=0)
+        output.write(b('0123'))
+        self.assertEqual(output.getvalue(), u(''))
+
 
 class ShellOutSSHClientTests(LibcloudTestCase):
 
@@ -399,6 +521,95 @@ class ShellOutSSHClientTests(LibcloudTestCase):
         self.assertEqual(cmd3, ['ssh', '-i', '/home/my.key',
                                 '-oConnectTimeout=5', 'root@localhost'])
 
+    def test_run_with_file_stdin(self):
+        client = ShellOutSSHClient(hostname='localhost', username='root')
+        client.SEND_CHUNK_SIZE = 1024
+        # Run the commands locally instead of over SSH
+        client._get_base_ssh_command = lambda: ['sh', '-c']
+        data = b('0123456789') * 50000
+
+        with tempfile.TemporaryFile() as fp:
+            fp.write(data)
+            fp.seek(0)
+
+            with patch.object(client, '_copy_to_stdin') as copy_to_stdin:
+                stdout, stderr, status = client.run('cat', stdin=fp)
+
+            # Real files are passed to the command as they are
+            self.assertFalse(copy_to_stdin.called)
+            self.assertEqual(stdout, data)
+            self.assertEqual(status, 0)
+
+        # Other file-like objects are copied in chunks
+        stdout, stderr, status = client.run('cat; echo err >&2',
+                                            stdin=BytesIO(data))
+        self.assertEqual(stdout, data)
+        self.assertEqual(stderr, b('err\n'))
+        self.assertEqual(status, 0)
+
+        # Command which doesn't read its input
+        stdout, stderr, status = client.run('exit 3', stdin=BytesIO(data))
+        self.assertEqual(stdout, b(''))
+        self.assertEqual(status, 3)
+
+    @patch('subprocess.Popen')
+    def test_put_sends_contents_over_stdin(self, mock_popen):
+        client = ShellOutSSHClient(hostname='localhost', username='root')
+        child = mock_popen.return_value
+        child.communicate.return_value = (b(''), b(''))
+        child.returncode = 0
+
+        client.put('/root/foo.sh', contents='echo "foo $BAR"', mode='a')
+
+        self.assertEqual(mock_popen.call_args[0][0],
+                         ['ssh', 'root@localhost', 'cat >> /root/foo.sh'])
+        self.assertEqual(mock_popen.call_args[1]['stdin'], subprocess.PIPE)
+        child.communicate.assert_called_with(b('echo "foo $BAR"'))
+
+    @patch('subprocess.Popen')
+    def test_multiplex_connect_and_close(self, mock_popen):
+        client = ShellOutSSHClient(hostname='localhost', username='root',
+                                   multiplex=True)
+        child = mock_popen.return_value
+        child.communicate.return_value = (b('out'), b(''))
+        child.returncode = 0
+
+        self.assertTrue(client.connect())
+        control_path = client.control_path
+        self.assertTrue(os.path.isdir(os.path.dirname(control_path)))
+
+        master_cmd = mock_popen.call_args[0][0]
+        self.assertEqual(master_cmd[0], 'ssh')
+        self.assertTrue('-oControlMaster=yes' in master_cmd)
+        self.assertTrue('-oControlPath=%s' % (control_path) in master_cmd)
+
+        # Connecting again doesn't start another master
+        client.connect()
+        self.assertEqual(mock_popen.call_count, 2)
+
+        self.assertEqual(client.run('uptime'), (b('out'), b(''), 0))
+        self.assertEqual(mock_popen.call_args[0][0],
+                         ['ssh', '-oControlPath=%s' % (control_path),
+                          'root@localhost', 'uptime'])
+
+        self.assertTrue(client.close())
+        self.assertEqual(mock_popen.call_args[0][0],
+                         ['ssh', '-oControlPath=%s' % (control_path),
+                          '-O', 'exit', 'root@localhost'])
+        self.assertFalse(os.path.exists(os.path.dirname(control_path)))
+        self.assertEqual(client.control_path, None)
+
+    @patch('subprocess.Popen')
+    def test_multiplex_connect_failure(self, mock_popen):
+        client = ShellOutSSHClient(hostname='localhost', username='root',
+                                   multiplex=True)
+        mock_popen.return_value.returncode = 255
+
+        self.assertRaises(IOError, client.connect)
+        self.assertEqual(client.control_path, None)
+        self.assertEqual(client._get_base_ssh_command(),
+                         ['ssh', 'root@localhost'])
+
 
 if __name__ == '__main__':
     sys.exit(unittest.main())
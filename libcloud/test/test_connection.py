@@ -18,12 +18,22 @@ import os
 import socket
 import sys
 import ssl
+import hmac
+import json
+import time
+import hashlib
+import threading
 
 from mock import Mock, call, patch
 
+from libcloud.utils.py3 import b
+from libcloud.utils.py3 import httplib
 from libcloud.test import unittest
+from libcloud.test import LocalHTTPServer
 from libcloud.common.base import Connection
+from libcloud.common.base import JsonResponse
 from libcloud.common.base import LoggingConnection
+from libcloud.common.pool import ConnectionPool
 from libcloud.httplib_ssl import LibcloudBaseConnection
 from libcloud.httplib_ssl import LibcloudHTTPConnection
 from libcloud.utils.misc import retry
@@ -112,7 +122,7 @@ class ConnectionClassTestCase(unittest.TestCase):
 
     def tearDown(self):
         Connection.connect = self.originalConnect
-        Connection.responseCls = Connection.responseCls
+        Connection.responseCls = self.originalResponseCls
         Connection.allow_insecure = True
 
     def test_dont_allow_insecure(self):
@@ -330,5 +340,120 @@ class ConnectionClassTestCase(unittest.TestCase):
             self.assertGreater(mock_connect.call_count, 1,
                                'Retry logic failed')
 
+
+SIGNING_KEY = b('secret')
+
+
+def _get_signature(method, path, body):
+    string_to_sign = '\n'.join([method, path, body or ''])
+    return hmac.new(SIGNING_KEY, b(string_to_sign),
+                    hashlib.sha256).hexdigest()
+
+
+class SignedConnection(Connection):
+    responseCls = JsonResponse
+
+    def pre_connect_hook(self, params, headers):
+        # Give other threads a chance to run between the time request state
+        # is set and the time it's used to sign the request
+        time.sleep(0.0001)
+
+        headers['X-Signature'] = _get_signature(method=self.method,
+                                                path=self.action,
+                                                body=self.data)
+        return params, headers
+
+
+class ConnectionThreadSafetyTestCase(unittest.TestCase):
+    thread_count = 8
+    request_count = 25
+
+    def setUp(self):
+        # Requests to the local server shouldn't go through a proxy
+        environ = patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+        os.environ.pop('http_proxy', None)
+
+        self.server = LocalHTTPServer(self._handle).start()
+        self.pool = ConnectionPool()
+
+    def tearDown(self):
+        self.pool.clear()
+        self.server.stop()
+
+    def _handle(self, request):
+        length = int(request.headers.get('Content-Length', 0) or 0)
+        body = request.rfile.read(length).decode('utf-8') if length else ''
+        signature = _get_signature(method=request.command, path=request.path,
+                                   body=body)
+
+        if request.headers.get('X-Signature') != signature:
+            return httplib.UNAUTHORIZED, json.dumps({}), {}
+
+        result = {'path': request.path, 'body': body}
+        return httplib.OK, json.dumps(result), {}
+
+    def test_concurrent_signed_requests(self):
+        con = SignedConnection(secure=False, host=self.server.host,
+                               port=self.server.port)
+        con.connection_pool = self.pool
+        errors = []
+
+        def worker(index):
+            for request_index in range(self.request_count):
+                path = '/thread-%s/%s' % (index, request_index)
+
+                if request_index % 2:
+                    kwargs = {'method': 'POST', 'data': path}
+                else:
+                    kwargs = {'method': 'GET'}
+
+                try:
+                    con.set_context({'path': path})
+                    response = con.request(path, **kwargs)
+                    self.assertEqual(response.object['path'], path)
+                    self.assertEqual(response.object['body'],
+                                     kwargs.get('data', ''))
+                    self.assertEqual(con.context, {})
+                except Exception:
+                    errors.append(sys.exc_info()[1])
+
+        threads = [threading.Thread(target=worker, args=(index,))
+                   for index in range(self.thread_count)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.server.request_count,
+                         self.thread_count * self.request_count)
+
+        # Threads share kept-alive connections
+        self.assertTrue(len(self.server.connections) <= self.thread_count)
+        self.assertTrue(self.pool.stats['hits'] > 0)
+
+    def test_request_state_is_thread_local(self):
+        con = Connection()
+        con.action = '/main'
+        con.set_context({'foo': 'bar'})
+        result = {}
+
+        def worker():
+            result['action'] = con.action
+            result['context'] = con.context
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(result, {'action': None, 'context': {}})
+        self.assertEqual(con.action, '/main')
+        self.assertEqual(con.context, {'foo': 'bar'})
+
+
 if __name__ == '__main__':
     sys.exit(unittest.main())
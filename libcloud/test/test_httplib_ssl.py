@@ -16,6 +16,7 @@
 import os
 import sys
 import os.path
+import ssl
 import socket
 
 import mock
@@ -25,8 +26,11 @@ import libcloud.security
 
 from libcloud.utils.py3 import reload
 from libcloud.httplib_ssl import LibcloudHTTPSConnection
+from libcloud.httplib_ssl import HAS_TLS_SESSION
+from libcloud.httplib_ssl import find_ca_cert, get_ssl_context
 
 from libcloud.test import unittest
+from libcloud.test import LocalHTTPServer, TLS_CERT_PATH
 
 ORIGINAL_CA_CERS_PATH = libcloud.security.CA_CERTS_PATH
 
@@ -108,9 +112,13 @@ class TestHttpLibSSLTests(unittest.TestCase):
                                 self.httplib_object._setup_ca_cert)
 
     @mock.patch('socket.create_connection', mock.MagicMock())
+    @mock.patch('socket.getaddrinfo', mock.MagicMock(return_value=[
+        (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', 443))]))
     @mock.patch('socket.socket', mock.MagicMock())
-    @mock.patch('ssl.wrap_socket')
-    def test_connect_throws_friendly_error_message_on_ssl_wrap_connection_reset_by_peer(self, mock_wrap_socket):
+    @mock.patch('libcloud.httplib_ssl.get_ssl_context')
+    def test_connect_throws_friendly_error_message_on_ssl_wrap_connection_reset_by_peer(self, mock_get_ssl_context):
+        mock_wrap_socket = mock_get_ssl_context.return_value.wrap_socket
+
         # Test that we re-throw a more friendly error message in case
         # "connection reset by peer" error occurs when trying to establish a
         # SSL connection
@@ -153,5 +161,59 @@ class TestHttpLibSSLTests(unittest.TestCase):
         self.assertTrue('Some random error' in str(e))
 
 
+@unittest.skipIf(not hasattr(ssl, 'PROTOCOL_TLS_CLIENT'),
+                 'PROTOCOL_TLS_CLIENT is not supported')
+class SSLContextReuseTests(unittest.TestCase):
+    def setUp(self):
+        self.original_ssl_version = libcloud.security.SSL_VERSION
+        libcloud.security.SSL_VERSION = ssl.PROTOCOL_TLS_CLIENT
+        libcloud.security.VERIFY_SSL_CERT = True
+        libcloud.security.CA_CERTS_PATH = [TLS_CERT_PATH]
+
+        environ = patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop)
+        os.environ.pop('http_proxy', None)
+
+        self.server = LocalHTTPServer(lambda request: (200, 'ok', {}),
+                                      certfile=TLS_CERT_PATH).start()
+
+    def tearDown(self):
+        self.server.stop()
+        libcloud.security.SSL_VERSION = self.original_ssl_version
+        libcloud.security.VERIFY_SSL_CERT = False
+        libcloud.security.CA_CERTS_PATH = ORIGINAL_CA_CERS_PATH
+
+    def _request(self):
+        connection = LibcloudHTTPSConnection('localhost', self.server.port)
+        connection.request('GET', '/')
+        self.assertEqual(connection.getresponse().read(), b'ok')
+        connection.close()
+        return connection
+
+    def test_ssl_context_is_cached(self):
+        context = get_ssl_context(ssl_version=ssl.PROTOCOL_TLS_CLIENT,
+                                  ca_cert=TLS_CERT_PATH)
+
+        self.assertIs(get_ssl_context(ssl_version=ssl.PROTOCOL_TLS_CLIENT,
+                                      ca_cert=TLS_CERT_PATH), context)
+        self.assertIsNot(get_ssl_context(ssl_version=ssl.PROTOCOL_TLS_CLIENT,
+                                         verify=False), context)
+        self.assertEqual(find_ca_cert(), TLS_CERT_PATH)
+
+    @unittest.skipIf(not HAS_TLS_SESSION, 'TLS sessions are not supported')
+    def test_tls_session_is_resumed(self):
+        first = self._request()
+        second = self._request()
+
+        self.assertFalse(first.tls_session_reused)
+        self.assertTrue(second.tls_session_reused)
+        self.assertIn('tls', second.connect_timings)
+
+    def test_hostname_is_verified(self):
+        connection = LibcloudHTTPSConnection('127.0.0.2', self.server.port)
+        self.assertRaises(Exception, connection.connect)
+
+
 if __name__ == '__main__':
     sys.exit(unittest.main())
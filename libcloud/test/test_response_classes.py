@@ -14,14 +14,18 @@
 # limitations under the License.
 
 import sys
+import json
 import unittest
 import zlib
 import gzip
 
+from io import BytesIO
+
 from mock import Mock
 
 from libcloud.utils.py3 import httplib, b, StringIO, PY3
 from libcloud.common.base import Response, XmlResponse, JsonResponse
+from libcloud.common.base import JsonStreamParser
 from libcloud.common.types import MalformedResponseError
 
 
@@ -117,7 +121,6 @@ class ResponseClassesTests(unittest.TestCase):
         original_data = 'foo bar ponies, wooo gzip'
 
         if PY3:
-            from io import BytesIO
             string_io = BytesIO()
         else:
             string_io = StringIO()
@@ -146,6 +149,121 @@ class ResponseClassesTests(unittest.TestCase):
         body = response.parse_body()
         self.assertEqual(body, original_data)
 
+    def _get_stream_response(self, cls, data, headers=None):
+        self._mock_connection.stream = True
+        self._mock_response.read = BytesIO(b(data)).read
+        self._mock_response.getheaders.return_value = headers or {}
+
+        return cls(response=self._mock_response,
+                   connection=self._mock_connection)
+
+    def test_XmlResponse_iterparse_stream(self):
+        data = ('<ListBucketResult xmlns="http://s3.amazonaws.com/doc/">'
+                '<IsTruncated>false</IsTruncated>' +
+                ''.join(['<Contents><Key>%s</Key></Contents>' % (index)
+                         for index in range(1000)]) +
+                '</ListBucketResult>')
+        response = self._get_stream_response(XmlResponse, data)
+
+        # Body is not read upfront
+        self.assertEqual(response.body, None)
+
+        keys = []
+        for element in response.iterparse('Contents'):
+            keys.append(element.findtext('{http://s3.amazonaws.com/doc/}Key'))
+
+        self.assertEqual(keys, [str(index) for index in range(1000)])
+
+        # Processed elements are removed from the tree
+        self.assertEqual(len(response.object), 1)
+        self.assertEqual(response.object.findtext(
+            '{http://s3.amazonaws.com/doc/}IsTruncated'), 'false')
+
+    def test_XmlResponse_iterparse_parent(self):
+        data = ('<DescribeInstancesResponse><reservationSet><item>'
+                '<instancesSet><item><instanceId>i-1</instanceId></item>'
+                '<item><instanceId>i-2</instanceId></item></instancesSet>'
+                '</item></reservationSet></DescribeInstancesResponse>')
+        response = self._get_stream_response(XmlResponse, data)
+
+        ids = [element.findtext('instanceId') for element in
+               response.iterparse('item', parent='instancesSet')]
+        self.assertEqual(ids, ['i-1', 'i-2'])
+
+        # Non streaming response results in the same elements
+        self._mock_connection.stream = False
+        self._mock_response.read = Mock(return_value=data)
+        response = XmlResponse(response=self._mock_response,
+                               connection=self._mock_connection)
+        ids = [element.findtext('instanceId') for element in
+               response.iterparse('item', parent='instancesSet')]
+        self.assertEqual(ids, ['i-1', 'i-2'])
+
+    def test_XmlResponse_iterparse_gzip_stream(self):
+        data = '<items>%s</items>' % ('<item>foo</item>' * 100)
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        compressed_data = compressor.compress(b(data)) + compressor.flush()
+        response = self._get_stream_response(
+            XmlResponse, compressed_data, {'Content-Encoding': 'gzip'})
+
+        items = [element.text for element in response.iterparse('item')]
+        self.assertEqual(items, ['foo'] * 100)
+
+    def test_XmlResponse_iterparse_malformed_stream(self):
+        response = self._get_stream_response(XmlResponse,
+                                             '<items><item>foo</item>')
+
+        self.assertRaises(MalformedResponseError, list,
+                          response.iterparse('item'))
+
+    def test_XmlResponse_iterparse_empty_stream(self):
+        response = self._get_stream_response(XmlResponse, '')
+        self.assertEqual(list(response.iterparse('item')), [])
+
+    def test_JsonResponse_iter_items_stream(self):
+        data = json.dumps({'kind': 'compute#instanceList',
+                           'items': [{'id': index, 'name': u'n\xe9-%s' % index}
+                                     for index in range(1000)],
+                           'nextPageToken': 'token'})
+        response = self._get_stream_response(JsonResponse, data)
+        self.assertEqual(response.body, None)
+
+        # Read the body in small chunks so values and multi-byte characters
+        # are split between chunks
+        items = list(JsonStreamParser(
+            chunks=response._iter_body_chunks(chunk_size=7)).iter_items(
+                key='items'))
+
+        self.assertEqual([item['id'] for item in items], list(range(1000)))
+        self.assertEqual(items[10]['name'], u'n\xe9-10')
+
+        response = self._get_stream_response(JsonResponse, data)
+        items = list(response.iter_items(key='items'))
+        self.assertEqual(len(items), 1000)
+        self.assertEqual(response.object, {'kind': 'compute#instanceList',
+                                           'nextPageToken': 'token'})
+
+    def test_JsonResponse_iter_items_top_level_array(self):
+        data = '[1, 22, 333, {"a": [1, 2]}, "b"]'
+        chunks = iter([b(data[index:index + 2]) for index in
+                       range(0, len(data), 2)])
+        items = list(JsonStreamParser(chunks=chunks).iter_items())
+        self.assertEqual(items, [1, 22, 333, {'a': [1, 2]}, 'b'])
+
+        # Non streaming response
+        self._mock_response.read.return_value = data
+        response = JsonResponse(response=self._mock_response,
+                                connection=self._mock_connection)
+        self.assertEqual(list(response.iter_items()),
+                         [1, 22, 333, {'a': [1, 2]}, 'b'])
+
+    def test_JsonResponse_iter_items_malformed_stream(self):
+        response = self._get_stream_response(JsonResponse,
+                                             '{"items": [{"id": 1}, {"id"')
+
+        self.assertRaises(MalformedResponseError, list,
+                          response.iter_items(key='items'))
+
 
 if __name__ == '__main__':
     sys.exit(unittest.main())
@@ -15,7 +15,9 @@
 # limitations under the License.
 
 import sys
+import time
 import socket
+import threading
 import codecs
 import unittest
 import warnings
@@ -45,6 +47,8 @@ from libcloud.utils.networking import is_valid_ip_address
 from libcloud.utils.networking import join_ipv4_segments
 from libcloud.utils.networking import increment_ipv4_segments
 from libcloud.storage.drivers.dummy import DummyIterator
+from libcloud.utils.xml import compile_extractor, findattr
+from libcloud.utils.concurrency import run_in_parallel
 
 
 WARNINGS_BUFFER = []
@@ -281,6 +285,73 @@ class TestUtils(unittest.TestCase):
             self.assertEqual(bchr(97), 'a')
 
 
+class XMLUtilsTestCase(unittest.TestCase):
+    def test_compile_extractor(self):
+        from xml.etree import ElementTree as ET
+
+        namespace = 'http://example.com/ns'
+        element = ET.fromstring(
+            '<item xmlns="%s">'
+            '<id>i-1</id><empty/>'
+            '<state><code>16</code><name>running</name></state>'
+            '<set><item><id>a</id></item><item><id>b</id></item></set>'
+            '</item>' % (namespace))
+        mapping = {
+            'id': {'xpath': 'id', 'transform_func': str},
+            'empty': {'xpath': 'empty', 'transform_func': str},
+            'missing': {'xpath': 'missing', 'transform_func': int},
+            'state': {'xpath': 'state/name', 'transform_func': str},
+            'code': {'xpath': 'state/code', 'transform_func': int},
+            'first': {'xpath': 'set/item/id', 'transform_func': str}
+        }
+
+        extract = compile_extractor(mapping, namespace=namespace)
+        extra = extract(element)
+
+        self.assertEqual(extra, {'id': 'i-1', 'empty': '', 'missing': None,
+                                 'state': 'running', 'code': 16,
+                                 'first': 'a'})
+
+        # Same values as findattr() for each attribute
+        for attribute, values in mapping.items():
+            value = findattr(element=element, xpath=values['xpath'],
+                             namespace=namespace)
+            if value is not None:
+                value = values['transform_func'](value)
+            self.assertEqual(extra[attribute], value)
+
+
+class ConcurrencyUtilsTestCase(unittest.TestCase):
+    def test_run_in_parallel(self):
+        error = ValueError('3')
+
+        def func(item):
+            if item == 3:
+                raise error
+            return item * 2
+
+        results = run_in_parallel(func, range(5), max_workers=3)
+        self.assertEqual(results, [(0, None), (2, None), (4, None),
+                                   (None, error), (8, None)])
+
+    def test_run_in_parallel_max_workers(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def func(item):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        run_in_parallel(func, range(10), max_workers=2)
+        self.assertEqual(running[1], 2)
+
+        self.assertEqual(run_in_parallel(func, []), [])
+
+
 class NetworkingUtilsTestCase(unittest.TestCase):
     def test_is_public_and_is_private_subnet(self):
         public_ips = [
@@ -0,0 +1,78 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import threading
+
+__all__ = [
+    'run_in_parallel'
+]
+
+
+def run_in_parallel(func, items, max_workers=10):
+    """
+    Call ``func`` with each of the provided items using a pool of at most
+    ``max_workers`` threads.
+
+    Exceptions raised by ``func`` don't stop the other calls, they are
+    returned in place of the result.
+
+    :param func: Function which is called with a single item.
+    :type func: ``callable``
+
+    :param items: Items to call the function with.
+    :type items: ``list``
+
+    :param max_workers: Maximum number of concurrent calls.
+    :type max_workers: ``int``
+
+    :return: ``(result, exception)`` tuple for each item, in the same order
+             as the items. ``exception`` is ``None`` on success.
+    :rtype: ``list`` of ``tuple``
+    """
+    items = list(items)
+    results = [None] * len(items)
+    indexes = iter(range(len(items)))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                index = next(indexes, None)
+
+            if index is None:
+                return
+
+            try:
+                results[index] = (func(items[index]), None)
+            except Exception:
+                results[index] = (None, sys.exc_info()[1])
+
+    count = min(max(max_workers or 1, 1), len(items))
+
+    if count <= 1:
+        worker()
+        return results
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    return results
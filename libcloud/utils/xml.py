@@ -17,16 +17,32 @@ __all__ = [
     'fixxpath',
     'findtext',
     'findattr',
-    'findall'
+    'findall',
+    'compile_extractor'
 ]
 
+# Namespaced xpaths returned by fixxpath(), keyed by (xpath, namespace)
+_FIXXPATH_CACHE = {}
+_FIXXPATH_CACHE_SIZE = 1024
+
 
 def fixxpath(xpath, namespace=None):
     # ElementTree wants namespaces in its xpaths, so here we add them.
     if not namespace:
         return xpath
 
-    return '/'.join(['{%s}%s' % (namespace, e) for e in xpath.split('/')])
+    key = (xpath, namespace)
+    try:
+        return _FIXXPATH_CACHE[key]
+    except KeyError:
+        pass
+
+    if len(_FIXXPATH_CACHE) >= _FIXXPATH_CACHE_SIZE:
+        _FIXXPATH_CACHE.clear()
+
+    value = '/'.join(['{%s}%s' % (namespace, e) for e in xpath.split('/')])
+    _FIXXPATH_CACHE[key] = value
+    return value
 
 
 def findtext(element, xpath, namespace=None, no_text_value=''):
@@ -48,3 +64,67 @@ def findattr(element, xpath, namespace=None):
 
 def findall(element, xpath, namespace=None):
     return element.findall(fixxpath(xpath=xpath, namespace=namespace))
+
+
+def compile_extractor(mapping, namespace=None):
+    """
+    Compile a mapping of attribute names to ``xpath`` and ``transform_func``
+    (e.g. ``{'instance_id': {'xpath': 'instanceId', 'transform_func': str}}``)
+    into a function which extracts all the attributes from an element in a
+    single pass over its children.
+
+    The function returns the same dictionary as calling ``findattr()`` for
+    each attribute and applying ``transform_func`` to the values which are
+    not None. Only simple xpaths (tag names separated by slashes) are
+    supported.
+
+    :param mapping: Dictionary with the attributes to extract.
+    :type mapping: ``dict``
+
+    :param namespace: Namespace of the tags in the xpaths.
+    :type namespace: ``str``
+
+    :rtype: ``function``
+    """
+    # Tree of the tags in the xpaths. Each node is a tuple of the attributes
+    # set to the text of the element and a dictionary with the child nodes.
+    root = ([], {})
+
+    for attribute, values in mapping.items():
+        node = root
+        for tag in values['xpath'].split('/'):
+            tag = fixxpath(tag, namespace)
+            node = node[1].setdefault(tag, ([], {}))
+        node[0].append((attribute, values['transform_func']))
+
+    def visit(element, children, values):
+        for child in element:
+            node = children.get(child.tag)
+            if node is None:
+                continue
+
+            fields, grandchildren = node
+            for attribute, _ in fields:
+                # Like findtext(), the first matching element is used
+                if attribute not in values:
+                    values[attribute] = child.text or ''
+            if grandchildren:
+                visit(child, grandchildren, values)
+
+    attributes = [(attribute, values['transform_func']) for
+                  attribute, values in mapping.items()]
+
+    def extract(element):
+        values = {}
+        visit(element, root[1], values)
+
+        extra = {}
+        for attribute, transform_func in attributes:
+            value = values.get(attribute)
+            if value is not None:
+                extra[attribute] = transform_func(value)
+            else:
+                extra[attribute] = None
+        return extra
+
+    return extract